@@ -8,6 +8,10 @@ from pydantic_settings import BaseSettings
 from typing import Optional
 from pathlib import Path
 
+# Project root for default paths (HybridSearch/)
+_PROJECT_ROOT = Path(__file__).parent.parent.parent
+_DEFAULT_CACHE_PATH = str(_PROJECT_ROOT / "data" / "embedding_cache.db")
+
 
 class Settings(BaseSettings):
     """
@@ -46,6 +50,13 @@ class Settings(BaseSettings):
     embedding_batch_size: int = 32
     embedding_max_length: int = 512
 
+    # Request coalescing and embedding cache
+    embedding_batch_window_ms: float = 5.0  # How long a text waits for others to share its upstream batch
+    embedding_max_concurrent_batches: int = 4  # Upstream embedding calls in flight
+    embedding_cache_path: str = _DEFAULT_CACHE_PATH  # SQLite text-hash -> vector cache ("" = disabled)
+    embedding_cache_max_entries: int = 200000  # LRU bound (~3 KB per 768-dim vector; 0 = unbounded)
+    embedding_cache_max_age_seconds: float = 2592000.0  # Drop entries unused for 30 days (0 = never)
+
     # SSL Verification Settings
     verify_ssl: bool = True
 
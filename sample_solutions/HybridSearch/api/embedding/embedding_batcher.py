@@ -0,0 +1,380 @@
+"""
+Embedding Batcher
+Coalesces concurrent encode calls into upstream batches, with a persistent vector cache
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Keys per SELECT ... IN (...) (SQLite's default variable limit is 999)
+CACHE_LOOKUP_CHUNK = 500
+# last_used is only rewritten on a hit once it is this old, so hot texts do not write on every lookup
+CACHE_TOUCH_INTERVAL_SECONDS = 3600
+# Minimum time between prunes (run after writes)
+CACHE_PRUNE_INTERVAL_SECONDS = 60
+
+
+class EmbeddingCache:
+    """
+    Persistent text -> vector cache in SQLite.
+
+    Keys are SHA-256 hashes of the model name and text, so switching models
+    never serves stale vectors. Vectors are stored as float32 blobs and
+    returned as read-only float32 arrays.
+    Re-ingesting unchanged chunks is answered from here without calling the
+    embedding model.
+
+    Every caller's texts (queries included) end up here, so the cache is
+    bounded: entries unused for ``max_age_seconds`` are dropped, and beyond
+    ``max_entries`` the least recently used ones are evicted. Pruning runs
+    at startup and at most once per ``CACHE_PRUNE_INTERVAL_SECONDS`` after
+    writes; SQLite reuses the freed pages, so the file stops growing.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model: str,
+        max_entries: int = 0,
+        max_age_seconds: float = 0.0
+    ):
+        """
+        Open (or create) the cache.
+
+        Args:
+            path (str): SQLite database file.
+            model (str): Embedding model name (part of every key).
+            max_entries (int): Entries kept, least recently used evicted first (0 = unbounded).
+            max_age_seconds (float): Entries unused for longer are dropped (0 = never).
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self.max_entries = max(max_entries, 0)
+        self.max_age_seconds = max(max_age_seconds, 0.0)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL DEFAULT 0"
+            ") WITHOUT ROWID"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if "last_used" not in columns:
+            # Caches written before eviction existed; their entries count as least recently used
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN last_used INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evicted = 0
+        self._last_prune = 0.0
+        self.prune()
+        logger.info(
+            f"Embedding cache opened at {self.path} (model={model}, max_entries={self.max_entries or 'unbounded'}, "
+            f"max_age_seconds={self.max_age_seconds or 'unbounded'})"
+        )
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model}\0{text}".encode('utf-8')).digest()
+
+    def get_many(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached vectors.
+
+        Args:
+            texts (List[str]): Distinct texts.
+
+        Returns:
+            Dict[str, np.ndarray]: Vectors of the texts found in the cache.
+        """
+        keys = {self._key(text): text for text in texts}
+        found = {}
+        stale = []
+        key_list = list(keys)
+        now = int(time.time())
+        with self._lock:
+            for start in range(0, len(key_list), CACHE_LOOKUP_CHUNK):
+                chunk = key_list[start:start + CACHE_LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, vector, last_used in rows:
+                    found[keys[key]] = np.frombuffer(vector, dtype=np.float32)
+                    if now - last_used >= CACHE_TOUCH_INTERVAL_SECONDS:
+                        stale.append((now, key))
+            if stale:
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", stale)
+                self._conn.commit()
+        self.hits += len(found)
+        self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        """
+        Store vectors.
+
+        Args:
+            vectors (Dict[str, np.ndarray]): Vector per text.
+        """
+        now = int(time.time())
+        rows = [
+            (self._key(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in vectors.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+        self.writes += len(rows)
+        if time.monotonic() - self._last_prune >= CACHE_PRUNE_INTERVAL_SECONDS:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Drop expired entries, then the least recently used beyond ``max_entries``.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        self._last_prune = time.monotonic()
+        if not self.max_entries and not self.max_age_seconds:
+            return 0
+        removed = 0
+        with self._lock:
+            if self.max_age_seconds:
+                cutoff = int(time.time() - self.max_age_seconds)
+                removed += self._conn.execute("DELETE FROM embeddings WHERE last_used < ?", (cutoff,)).rowcount
+            if self.max_entries:
+                excess = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    removed += self._conn.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (excess,)
+                    ).rowcount
+            self._conn.commit()
+        if removed:
+            self.evicted += removed
+            logger.info(f"Pruned {removed} entries from the embedding cache")
+        return removed
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict: Hit/miss/write/eviction counters, hit rate, limits and file size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evicted": self.evicted,
+            "max_entries": self.max_entries,
+            "max_age_seconds": self.max_age_seconds,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size_bytes": self.path.stat().st_size if self.path.exists() else 0
+        }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingBatcher:
+    """
+    Request coalescer in front of the embedding model.
+
+    Texts from concurrent encode calls are collected for up to
+    ``window_ms`` milliseconds (or until ``batch_size`` texts are waiting)
+    and sent upstream as one batch; results are fanned back out to each
+    caller. A text that is already queued or in flight is not sent again,
+    its callers share one result. Texts found in the persistent cache skip
+    the model entirely.
+
+    The upstream call is blocking, so batches run in worker threads, at
+    most ``max_concurrent_batches`` at a time; the event loop keeps
+    accepting requests meanwhile.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], np.ndarray],
+        batch_size: int = 32,
+        window_ms: float = 5.0,
+        max_concurrent_batches: int = 4,
+        cache: Optional[EmbeddingCache] = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embed_fn (Callable[[List[str]], np.ndarray]): Blocking upstream
+                call returning a (len(texts), dimensions) matrix.
+            batch_size (int): Maximum texts per upstream call.
+            window_ms (float): How long the first waiting text waits for company.
+            max_concurrent_batches (int): Upstream calls in flight at once.
+            cache (Optional[EmbeddingCache]): Persistent vector cache (None disables).
+        """
+        self.embed_fn = embed_fn
+        self.batch_size = max(batch_size, 1)
+        self.window_ms = max(window_ms, 0.0)
+        self.cache = cache
+        self._slots = asyncio.Semaphore(max(max_concurrent_batches, 1))
+        self._pending: Dict[str, asyncio.Future] = {}  # queued or in-flight text -> its result
+        self._queue: List[str] = []  # texts waiting for the next batch
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches: Set[asyncio.Task] = set()
+
+        self.requests = 0
+        self.texts = 0
+        self.deduplicated = 0
+        self.upstream_batches = 0
+        self.upstream_texts = 0
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts through the cache and the shared upstream batches.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: float32 matrix with one row per text, in order.
+
+        Raises:
+            Exception: Whatever the upstream call raised for a batch holding one of the texts.
+        """
+        self.requests += 1
+        self.texts += len(texts)
+        unique = list(dict.fromkeys(texts))
+        self.deduplicated += len(texts) - len(unique)
+
+        vectors: Dict[str, np.ndarray] = {}
+        if self.cache is not None:
+            vectors = await asyncio.to_thread(self.cache.get_many, unique)
+
+        loop = asyncio.get_running_loop()
+        waiting: Dict[str, asyncio.Future] = {}
+        for text in unique:
+            if text in vectors:
+                continue
+            future = self._pending.get(text)
+            if future is None:
+                future = loop.create_future()
+                self._pending[text] = future
+                self._queue.append(text)
+            else:
+                self.deduplicated += 1
+            waiting[text] = future
+        if self._queue:
+            self._schedule()
+
+        if waiting:
+            # Shielded: a cancelled caller must not cancel results other callers share
+            results = await asyncio.gather(*(asyncio.shield(future) for future in waiting.values()))
+            vectors.update(zip(waiting, results))
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[text] for text in texts])
+
+    def _schedule(self):
+        """Start full batches now and arm the window timer for the rest."""
+        while len(self._queue) >= self.batch_size:
+            self._start_batch()
+        if self._queue and self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.window_ms / 1000, self._flush)
+
+    def _flush(self):
+        """Window elapsed: send everything that is waiting."""
+        self._flush_handle = None
+        while self._queue:
+            self._start_batch()
+
+    def _start_batch(self):
+        batch = self._queue[:self.batch_size]
+        del self._queue[:self.batch_size]
+        if not self._queue and self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        task = asyncio.create_task(self._run_batch(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: List[str]):
+        """
+        Embed one batch upstream and resolve its callers.
+
+        Args:
+            batch (List[str]): Distinct texts.
+        """
+        try:
+            async with self._slots:
+                self.upstream_batches += 1
+                self.upstream_texts += len(batch)
+                vectors = await asyncio.to_thread(self.embed_fn, batch)
+            if len(vectors) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+        except BaseException as e:
+            for text in batch:
+                future = self._pending.pop(text, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                    # Callers may all be gone; do not warn about an unretrieved exception
+                    future.exception()
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for text, vector in zip(batch, vectors):
+            future = self._pending.pop(text, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
+
+        if self.cache is not None:
+            try:
+                await asyncio.to_thread(self.cache.put_many, dict(zip(batch, vectors)))
+            except Exception as e:
+                logger.warning(f"Could not write {len(batch)} embeddings to the cache: {e}")
+
+    def get_stats(self) -> Dict:
+        """
+        Get batching statistics.
+
+        Returns:
+            Dict: Request/text counters, deduplication, upstream batch sizes and cache stats.
+        """
+        return {
+            "batch_size": self.batch_size,
+            "window_ms": self.window_ms,
+            "requests": self.requests,
+            "texts": self.texts,
+            "deduplicated": self.deduplicated,
+            "queued": len(self._queue),
+            "in_flight_texts": len(self._pending) - len(self._queue),
+            "upstream_batches": self.upstream_batches,
+            "upstream_texts": self.upstream_texts,
+            "avg_upstream_batch": round(self.upstream_texts / self.upstream_batches, 2)
+            if self.upstream_batches else 0.0,
+            "cache": self.cache.get_stats() if self.cache is not None else None
+        }
@@ -3,12 +3,15 @@ Embedding Service - OpenAI API Wrapper
 Generates vector embeddings for documents and queries
 """
 
+import base64
 import logging
 import time
-import math
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
+import numpy as np
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
 from openai import OpenAI, OpenAIError, RateLimitError, APIConnectionError, APITimeoutError
 from tenacity import (
@@ -19,6 +22,8 @@ from tenacity import (
     before_sleep_log
 )
 from config import settings
+from embedding_batcher import EmbeddingBatcher, EmbeddingCache
+from embedding_codec import MSGPACK_MEDIA_TYPE, encode_matrix, msgpack, pack, sanitize
 
 # Configure logging
 logging.basicConfig(
@@ -28,10 +33,19 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Shutdown
+    if embedding_cache is not None:
+        embedding_cache.close()
+    logger.info("Service shutdown complete")
+
 app = FastAPI(
     title="Embedding Service",
     description="OpenAI-powered embedding generation service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -71,9 +85,18 @@ class EmbeddingRequest(BaseModel):
     Attributes:
         texts (List[str]): List of input text strings to embed.
         normalize (bool): Whether to apply L2 normalization to the embeddings.
+        encoding_format (str): "float" (JSON lists), "base64" (packed matrix in
+            JSON) or "msgpack" (packed matrix in a msgpack body).
+        dtype (str): Packed value type for the binary formats, "float32" or "float16".
     """
     texts: List[str] = Field(..., description="List of texts to embed", min_length=1)
     normalize: bool = Field(True, description="Whether to L2 normalize embeddings")
+    encoding_format: Literal["float", "base64", "msgpack"] = Field(
+        "float", description="Response format for the embeddings"
+    )
+    dtype: Literal["float32", "float16"] = Field(
+        "float32", description="Little-endian value type of base64/msgpack embeddings"
+    )
     
     class Config:
         json_schema_extra = {
@@ -89,13 +112,21 @@ class EmbeddingResponse(BaseModel):
     Response model for embedding generation.
     
     Attributes:
-        embeddings (List[List[float]]): The generated vector embeddings.
+        embeddings (List[List[float]]): The generated vector embeddings
+            (empty for the base64 format).
+        embeddings_base64 (Optional[str]): Row-major (text_count, dimensions)
+            matrix of little-endian ``dtype`` values (base64 format only).
+        encoding_format (str): Format of the embeddings.
+        dtype (Optional[str]): Value type of ``embeddings_base64``.
         model (str): The name of the model used.
         dimensions (int): The dimension size of the embeddings.
         processing_time_ms (float): Time taken to generate embeddings in milliseconds.
         text_count (int): The number of texts processed.
     """
-    embeddings: List[List[float]] = Field(..., description="Generated embeddings")
+    embeddings: List[List[float]] = Field(default_factory=list, description="Generated embeddings")
+    embeddings_base64: Optional[str] = Field(None, description="Base64 packed embedding matrix")
+    encoding_format: str = Field("float", description="Format of the embeddings")
+    dtype: Optional[str] = Field(None, description="Value type of the packed matrix")
     model: str = Field(..., description="Model used for embedding")
     dimensions: int = Field(..., description="Embedding dimensions")
     processing_time_ms: float = Field(..., description="Processing time in milliseconds")
@@ -158,6 +189,44 @@ def _call_embeddings_api(
         raise
 
 
+def _embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Embed one upstream batch (runs in a worker thread of the batcher).
+
+    Args:
+        texts: Distinct texts, at most embedding_batch_size
+
+    Returns:
+        Sanitized float32 embeddings, one row per text
+    """
+    response = _call_embeddings_api(
+        texts=texts,
+        model=settings.embedding_model_name,
+    )
+
+    # Extract and sanitize embeddings (NaN/Inf -> 0) in one array pass
+    return sanitize([item.embedding for item in response.data])
+
+
+# Concurrent requests share upstream batches; repeated texts come from the cache
+embedding_cache = (
+    EmbeddingCache(
+        settings.embedding_cache_path,
+        settings.embedding_model_name,
+        max_entries=settings.embedding_cache_max_entries,
+        max_age_seconds=settings.embedding_cache_max_age_seconds
+    )
+    if settings.embedding_cache_path else None
+)
+batcher = EmbeddingBatcher(
+    _embed_texts,
+    batch_size=settings.embedding_batch_size,
+    window_ms=settings.embedding_batch_window_ms,
+    max_concurrent_batches=settings.embedding_max_concurrent_batches,
+    cache=embedding_cache
+)
+
+
 # API Endpoints
 @app.post(
     "/api/v1/embeddings/encode",
@@ -174,7 +243,8 @@ async def encode_embeddings(request: EmbeddingRequest):
         request (EmbeddingRequest): The request containing texts to embed.
         
     Returns:
-        EmbeddingResponse: Object containing generated embeddings and metadata.
+        EmbeddingResponse: Object containing generated embeddings and metadata
+            (a msgpack body with the same fields for the msgpack format).
         
     Raises:
         HTTPException: If input validation fails or external API errors occur.
@@ -197,31 +267,20 @@ async def encode_embeddings(request: EmbeddingRequest):
                     detail=f"Text at index {idx} is empty"
                 )
         
+        if request.encoding_format == "msgpack" and msgpack is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="msgpack encoding is not available (msgpack package not installed)"
+            )
+        
         logger.info(f"Generating embeddings for {len(request.texts)} texts")
 
         # Use GenAI Gateway via OpenAI client
         model_name = settings.embedding_model_name
 
-        # Call API with retry logic
-        response = _call_embeddings_api(
-            texts=request.texts,
-            model=model_name,
-        )
-
-        # Extract embeddings
-        raw_embeddings = [item.embedding for item in response.data]
-        dimensions = len(raw_embeddings[0]) if raw_embeddings else 768
-
-        # Sanitize embeddings
-        embeddings = []
-        for embedding in raw_embeddings:
-            sanitized_embedding = []
-            for val in embedding:
-                if math.isnan(val) or math.isinf(val):
-                    sanitized_embedding.append(0.0)
-                else:
-                    sanitized_embedding.append(val)
-            embeddings.append(sanitized_embedding)
+        # Deduplicated, served from the cache or batched with concurrent requests
+        embeddings = await batcher.embed(request.texts)
+        dimensions = embeddings.shape[1] if len(embeddings) else 768
 
         # Calculate processing time
         processing_time = (time.time() - start_time) * 1000
@@ -231,8 +290,31 @@ async def encode_embeddings(request: EmbeddingRequest):
             f"in {processing_time:.2f}ms (dimensions={dimensions})"
         )
         
+        if request.encoding_format == "msgpack":
+            return Response(
+                content=pack({
+                    "embeddings": encode_matrix(embeddings, request.dtype),
+                    "encoding_format": "msgpack",
+                    "dtype": request.dtype,
+                    "model": model_name,
+                    "dimensions": dimensions,
+                    "processing_time_ms": round(processing_time, 2),
+                    "text_count": len(request.texts)
+                }),
+                media_type=MSGPACK_MEDIA_TYPE
+            )
+        if request.encoding_format == "base64":
+            return EmbeddingResponse(
+                embeddings_base64=base64.b64encode(encode_matrix(embeddings, request.dtype)).decode('ascii'),
+                encoding_format="base64",
+                dtype=request.dtype,
+                model=model_name,
+                dimensions=dimensions,
+                processing_time_ms=round(processing_time, 2),
+                text_count=len(request.texts)
+            )
         return EmbeddingResponse(
-            embeddings=embeddings,
+            embeddings=embeddings.tolist(),
             model=model_name,
             dimensions=dimensions,
             processing_time_ms=round(processing_time, 2),
@@ -278,6 +360,22 @@ async def encode_batch(request: EmbeddingRequest):
     return await encode_embeddings(request)
 
 
+@app.get(
+    "/api/v1/embeddings/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Batching and cache statistics",
+    description="Request coalescing, deduplication and embedding cache counters"
+)
+async def get_stats():
+    """
+    Get batching and cache statistics.
+    
+    Returns:
+        dict: Batcher counters, including the cache hit rate.
+    """
+    return batcher.get_stats()
+
+
 @app.get(
     "/health",
     response_model=HealthResponse,
@@ -35,14 +35,28 @@ class Settings(BaseSettings):
     # Product Catalog Settings
     system_mode: str = "document"  # "document" or "product"
     default_result_limit: int = 20
+    # Seconds between catalog version checks with ingestion (ingestion also pushes changes)
+    catalog_cache_revalidate_seconds: float = 60.0
     
     # Keycloak/Auth Configuration (optional)
     base_url: Optional[str] = None
     keycloak_realm: Optional[str] = None
+    # Shared secret for internal service-to-service endpoints (catalog invalidation).
+    # Sent as the X-Internal-Token header; internal endpoints reject all calls while unset.
+    internal_api_token: Optional[str] = None
 
     # SSL Verification Settings
     verify_ssl: bool = True
 
+    # Pooled HTTP clients for calls to backend services (one pool per service)
+    http_max_connections: int = 100  # Per upstream service
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http2_enabled: bool = False  # Requires the optional 'h2' package
+    # Circuit breaker: fail fast after consecutive failures, probe again after the reset timeout
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout_seconds: float = 30.0
+
     # Logging
     log_level: str = "INFO"
     
@@ -3,13 +3,15 @@ Gateway Service
 Main API orchestrator for the hybrid search system
 """
 
+import json
 import logging
 import time
 import os
-from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Dict, Any, List
 from fastapi import FastAPI, HTTPException, status, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -19,7 +21,9 @@ from services.complexity_detector import ComplexityDetector
 from services.orchestrator import ServiceOrchestrator
 from services.query_analyzer import QueryAnalyzer
 from services.filter_extractor import FilterExtractor
-from services.auth import get_current_user
+from services.catalog_cache import CatalogCache
+from services.http_clients import HTTPClients
+from services.auth import auth_service, get_current_user, require_internal_token
 
 # Configure logging
 logging.basicConfig(
@@ -28,11 +32,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pooled, keep-alive clients for backend services (one pool per service),
+# closed when the app shuts down
+http_clients = HTTPClients(
+    max_connections=settings.http_max_connections,
+    max_keepalive_connections=settings.http_max_keepalive_connections,
+    keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    http2=settings.http2_enabled,
+    failure_threshold=settings.circuit_failure_threshold,
+    reset_timeout=settings.circuit_reset_timeout_seconds
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Shutdown
+    await http_clients.aclose()
+    logger.info("Service shutdown complete")
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Gateway Service",
     description="Main API gateway for hybrid search RAG system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Initialize rate limiter
@@ -56,12 +81,20 @@ orchestrator = ServiceOrchestrator(
     retrieval_service_url=settings.retrieval_service_url,
     llm_service_url=settings.llm_service_url,
     embedding_service_url=getattr(settings, 'embedding_service_url', None),
-    ingestion_service_url=getattr(settings, 'ingestion_service_url', None)
+    ingestion_service_url=getattr(settings, 'ingestion_service_url', None),
+    http_clients=http_clients
 )
 query_analyzer = QueryAnalyzer()
 filter_extractor = FilterExtractor(
-    llm_service_url=settings.llm_service_url
+    llm_service_url=settings.llm_service_url,
+    llm_client=http_clients["llm"]
+)
+catalog_cache = CatalogCache(
+    http_clients.upstreams.get("ingestion"),
+    revalidate_seconds=settings.catalog_cache_revalidate_seconds
 )
+# Keycloak key fetches share a pooled client (registered as the "auth" upstream)
+auth_service.attach(http_clients)
 
 
 # Request/Response Models
@@ -119,6 +152,8 @@ class QueryResponse(BaseModel):
         retrieval_results_count (int): Number of results found in the retrieval step.
         processing_time_ms (float): Total time taken to process the query.
         debug_info (Optional[Dict]): Detailed execution metadata if requested.
+        time_to_first_token_ms (Optional[float]): Time until the first answer
+            token was sent (streaming endpoint only).
     """
     answer: str
     citations: list
@@ -128,6 +163,7 @@ class QueryResponse(BaseModel):
     retrieval_results_count: int
     processing_time_ms: float
     debug_info: Optional[Dict] = None
+    time_to_first_token_ms: Optional[float] = None
 
 
 class ProductSearchRequest(BaseModel):
@@ -297,7 +333,9 @@ async def process_query(request: Request, query_data: QueryRequest, user: dict =
         llm_response = await orchestrator.generate_answer(
             query_data.query,
             results,
-            model_type=query_complexity
+            model_type=query_complexity,
+            index_version=retrieval_response.get("index_version"),
+            query_embedding=retrieval_response.get("query_embedding")
         )
         llm_time = (time.time() - llm_start) * 1000
         
@@ -305,7 +343,8 @@ async def process_query(request: Request, query_data: QueryRequest, user: dict =
             debug_info["llm"] = {
                 "model_used": llm_response.get("model_used"),
                 "generation_time_ms": llm_response.get("generation_time_ms"),
-                "token_count": llm_response.get("token_count")
+                "token_count": llm_response.get("token_count"),
+                "cached": llm_response.get("cached", False)
             }
         
         # Calculate total processing time
@@ -361,6 +400,155 @@ async def process_query_with_explanation(request: Request, query_data: QueryRequ
     return await process_query(request, query_data)
 
 
+def format_sse_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Encode one Server-Sent Event.
+    
+    Args:
+        event (str): Event name.
+        data (Dict[str, Any]): JSON-serialisable payload.
+        
+    Returns:
+        str: The event in SSE wire format.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _source_preview(result: Dict) -> Dict:
+    """
+    Summarise a retrieval result for the streaming client.
+    
+    Args:
+        result (Dict): Retrieval result.
+        
+    Returns:
+        Dict: Document, page, chunk id, character offsets in the page, score
+              and a short text snippet.
+    """
+    text = result.get("text", "")
+    return {
+        "document_id": result.get("document_id"),
+        "page_number": result.get("page_number"),
+        "chunk_id": result.get("chunk_id"),
+        "char_start": result.get("char_start"),
+        "char_end": result.get("char_end"),
+        "score": result.get("score", 0.0),
+        "relevant_text_snippet": text[:200] + "..." if len(text) > 200 else text
+    }
+
+
+@app.post(
+    "/api/v1/query/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Streaming query endpoint",
+    description="Process query through full RAG pipeline, streaming the answer as Server-Sent Events"
+)
+@limiter.limit("100/minute")
+async def process_query_stream(request: Request, query_data: QueryRequest, user: dict = Depends(get_current_user)):
+    """
+    Process a query like /query, streaming the result as it is produced.
+    
+    Retrieval runs before the response starts (errors are plain HTTP
+    errors). The stream then carries:
+    
+    - ``retrieval``: result count, retrieval time and source previews,
+      sent before generation starts
+    - ``token``: ``{"text"}`` pieces of the answer as the LLM generates them
+    - ``done``: the final ``QueryResponse`` (cleaned answer, citations,
+      timing including ``time_to_first_token_ms``)
+    - ``error``: ``{"detail"}`` if generation fails
+    
+    Args:
+        request: FastAPI Request object (for rate limiting)
+        query_data: QueryRequest with query and parameters
+        user: Authenticated user context
+        
+    Returns:
+        StreamingResponse: ``text/event-stream`` of the events above.
+    """
+    start_time = time.time()
+    try:
+        logger.info(f"Processing streaming query: {query_data.query[:100]}")
+        
+        complexity_result = complexity_detector.detect(query_data.query)
+        query_complexity = query_data.force_model or complexity_result["complexity"]
+        
+        retrieval_start = time.time()
+        retrieval_response = await orchestrator.retrieve_context(
+            query_data.query,
+            top_k=query_data.top_k_results
+        )
+        retrieval_time = (time.time() - retrieval_start) * 1000
+        results = retrieval_response.get("results", [])
+    except Exception as e:
+        logger.error(f"Error processing query: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Query processing failed: {str(e)}"
+        )
+    
+    async def events() -> AsyncIterator[str]:
+        yield format_sse_event("retrieval", {
+            "results_count": len(results),
+            "retrieval_time_ms": round(retrieval_time, 2),
+            "query_complexity": query_complexity,
+            "sources": [_source_preview(r) for r in results]
+        })
+        
+        if not results:
+            logger.warning("No results found in retrieval")
+            yield format_sse_event("done", QueryResponse(
+                answer="I don't have enough information to answer this question.",
+                citations=[],
+                query_complexity=query_complexity,
+                llm_model="none",
+                retrieval_results_count=0,
+                processing_time_ms=round((time.time() - start_time) * 1000, 2)
+            ).model_dump())
+            return
+        
+        first_token_ms = None
+        try:
+            async for event, data in orchestrator.stream_answer(
+                query_data.query,
+                results,
+                model_type=query_complexity,
+                index_version=retrieval_response.get("index_version"),
+                query_embedding=retrieval_response.get("query_embedding")
+            ):
+                if event == "token":
+                    if first_token_ms is None:
+                        first_token_ms = (time.time() - start_time) * 1000
+                    yield format_sse_event("token", data)
+                elif event == "done":
+                    total_time = (time.time() - start_time) * 1000
+                    logger.info(
+                        f"Streaming query completed in {total_time:.2f}ms "
+                        f"(retrieval: {retrieval_time:.2f}ms, first token: {first_token_ms or 0:.2f}ms)"
+                    )
+                    yield format_sse_event("done", QueryResponse(
+                        answer=data.get("answer", ""),
+                        citations=data.get("citations", []),
+                        query_complexity=data.get("query_type", query_complexity),
+                        llm_model=data.get("model_used", ""),
+                        retrieval_results_count=len(results),
+                        processing_time_ms=round(total_time, 2),
+                        time_to_first_token_ms=round(first_token_ms, 2) if first_token_ms is not None else None
+                    ).model_dump())
+                elif event == "error":
+                    yield format_sse_event("error", data)
+        except Exception as e:
+            logger.error(f"Error streaming answer: {e}", exc_info=True)
+            yield format_sse_event("error", {"detail": f"Answer generation failed: {str(e)}"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post(
     "/api/v1/search",
     response_model=ProductSearchResponse,
@@ -394,15 +582,17 @@ async def search_products(request: Request, search_data: ProductSearchRequest, u
         
         logger.info(f"Processing product search: {search_data.query[:100]}")
         
-        # Get catalog info to extract known categories
-        catalog_info = await orchestrator.get_catalog_info()
-        known_categories = catalog_info.get('categories', []) if catalog_info.get('loaded') else []
+        # Known categories come from the cached catalog (no upstream call while it is fresh)
+        await catalog_cache.get()
+        category_matcher = catalog_cache.category_matcher
+        known_categories = category_matcher.categories
         
         # Extract filters from query
         extracted_filters = await filter_extractor.extract_async(
             search_data.query,
             known_categories=known_categories,
-            use_llm_fallback=True
+            use_llm_fallback=True,
+            category_matcher=category_matcher
         )
         
         # Merge with provided filters (provided filters take precedence)
@@ -504,10 +694,10 @@ async def check_all_services():
     Returns:
         ServiceHealthResponse: Aggregate status of all services.
     """
-    embedding_health = await orchestrator.check_service_health(settings.embedding_service_url)
-    retrieval_health = await orchestrator.check_service_health(settings.retrieval_service_url)
-    llm_health = await orchestrator.check_service_health(settings.llm_service_url)
-    ingestion_health = await orchestrator.check_service_health(settings.ingestion_service_url)
+    embedding_health = await orchestrator.check_service_health("embedding")
+    retrieval_health = await orchestrator.check_service_health("retrieval")
+    llm_health = await orchestrator.check_service_health("llm")
+    ingestion_health = await orchestrator.check_service_health("ingestion")
     
     return ServiceHealthResponse(
         gateway="healthy",
@@ -518,6 +708,61 @@ async def check_all_services():
     )
 
 
+@app.get(
+    "/api/v1/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Gateway statistics",
+    description="Connection pool utilisation and circuit breaker state per backend service"
+)
+async def get_stats(user: dict = Depends(get_current_user)):
+    """
+    Get gateway statistics.
+    
+    Returns:
+        dict: Per-service HTTP pool and circuit breaker stats.
+    """
+    return {
+        "http_pools": http_clients.get_stats(),
+        "catalog_cache": catalog_cache.get_stats(),
+        "deployment_phase": settings.deployment_phase
+    }
+
+
+class CatalogChangedEvent(BaseModel):
+    """
+    Catalog change notification sent by the ingestion service.
+    
+    Attributes:
+        version (Optional[str]): Version of the new catalog, if known.
+    """
+    version: Optional[str] = None
+
+
+@app.post(
+    "/api/v1/catalog/invalidate",
+    status_code=status.HTTP_200_OK,
+    summary="Catalog changed notification",
+    description="Called by the ingestion service when the product catalog changes",
+    dependencies=[Depends(require_internal_token)]
+)
+async def invalidate_catalog(event: Optional[CatalogChangedEvent] = None):
+    """
+    Mark the cached catalog info stale.
+    
+    The notification carries no catalog data; it only makes the next
+    product search revalidate the catalog with the ingestion service.
+    Requires the shared internal token (X-Internal-Token header).
+    
+    Args:
+        event (Optional[CatalogChangedEvent]): Notification with the new version.
+        
+    Returns:
+        dict: Whether the cache was invalidated.
+    """
+    invalidated = catalog_cache.invalidate(event.version if event else None)
+    return {"invalidated": invalidated}
+
+
 @app.get("/", summary="Root endpoint")
 async def root():
     """
@@ -4,12 +4,13 @@ Handles JWT token verification from Keycloak
 """
 
 import logging
+import secrets
 from typing import Optional, Dict, Any
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-import httpx
 from config import settings
+from services.http_clients import HTTPClients, UpstreamClient
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,8 @@ class AuthService:
     
     Handles validation of JWT tokens issued by Keycloak, including
     signature verification (in production) and public key caching.
+    One instance is shared by all requests (``auth_service``), so cached
+    keys and pooled Keycloak connections are reused.
     """
     
     def __init__(self):
@@ -33,6 +36,17 @@ class AuthService:
         # http://{keycloak}/realms/{realm}/protocol/openid-connect/certs
         self.jwks_url = f"{self.base_url}/certs" if self.base_url else None
         self._cached_keys = None
+        self.client: Optional[UpstreamClient] = None
+    
+    def attach(self, http_clients: HTTPClients):
+        """
+        Register Keycloak as the "auth" upstream of the gateway's pooled clients.
+        
+        Args:
+            http_clients (HTTPClients): The gateway's client registry (closed on shutdown).
+        """
+        if self.base_url:
+            self.client = http_clients.register("auth", self.base_url, verify=settings.verify_ssl)
 
     async def _get_public_keys(self) -> Dict[str, Any]:
         """
@@ -46,13 +60,14 @@ class AuthService:
             
         if not self.jwks_url:
             return {}
-            
+        
+        if self.client is None:
+            self.client = UpstreamClient("auth", self.base_url, verify=settings.verify_ssl)
         try:
-            async with httpx.AsyncClient(verify=settings.verify_ssl) as client:
-                response = await client.get(self.jwks_url)
-                response.raise_for_status()
-                self._cached_keys = response.json()
-                return self._cached_keys
+            response = await self.client.get(self.jwks_url)
+            response.raise_for_status()
+            self._cached_keys = response.json()
+            return self._cached_keys
         except Exception as e:
             logger.error(f"Failed to fetch public keys from Keycloak: {e}")
             return {}
@@ -105,6 +120,10 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+# Shared instance (main attaches the pooled Keycloak client)
+auth_service = AuthService()
+
+
 # Dependency for FastAPI routes
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
     """
@@ -116,5 +135,28 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any
     Returns:
         Dict[str, Any]: The authenticated user's claims.
     """
-    auth_service = AuthService()
     return await auth_service.verify_token(token)
+
+
+async def require_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    """
+    FastAPI dependency for endpoints only other services may call.
+    
+    Args:
+        x_internal_token (Optional[str]): Value of the X-Internal-Token header.
+        
+    Raises:
+        HTTPException: 403 if no internal token is configured or the header
+                       does not match it.
+    """
+    expected = settings.internal_api_token
+    if not expected:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Internal endpoints are disabled (INTERNAL_API_TOKEN is not set)"
+        )
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid internal token"
+        )
@@ -0,0 +1,157 @@
+"""
+Catalog Cache
+Gateway-side copy of the product catalog info, revalidated by version
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from services.filter_extractor import CategoryMatcher
+from services.http_clients import UpstreamClient
+
+logger = logging.getLogger(__name__)
+
+CATALOG_INFO_PATH = "/api/v1/products/catalog/info"
+
+
+class CatalogCache:
+    """
+    Cached catalog info with a category matcher precompiled per catalog version.
+
+    Product search needs the catalog's categories for filter extraction.
+    Instead of asking the ingestion service on every request, the info is
+    kept here and revalidated at most every ``revalidate_seconds`` with a
+    conditional request (``If-None-Match``), which ingestion answers with
+    ``304 Not Modified`` while the catalog is unchanged. Ingestion also
+    notifies the gateway when the catalog changes (``invalidate``), so new
+    uploads are picked up immediately rather than after the interval.
+
+    If ingestion is unreachable, the last known catalog keeps being served.
+    """
+
+    def __init__(self, ingestion_client: Optional[UpstreamClient], revalidate_seconds: float = 60.0):
+        """
+        Initialize the cache (the catalog is fetched on first use).
+
+        Args:
+            ingestion_client (Optional[UpstreamClient]): Pooled client for the
+                ingestion service (None if it is not configured).
+            revalidate_seconds (float): Seconds between version checks (0 checks every request).
+        """
+        self.ingestion_client = ingestion_client
+        self.revalidate_seconds = revalidate_seconds
+        self.info: Dict[str, Any] = {"loaded": False}
+        self.version: Optional[str] = None
+        self.category_matcher = CategoryMatcher([])
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+        self.hits = 0
+        self.revalidations = 0
+        self.refreshes = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def categories(self) -> List[str]:
+        """Known categories of the loaded catalog (empty if none is loaded)."""
+        return self.category_matcher.categories
+
+    def _is_fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.revalidate_seconds
+
+    async def get(self) -> Dict[str, Any]:
+        """
+        Get the catalog info, revalidating it if the check interval has passed.
+
+        Returns:
+            Dict[str, Any]: Catalog info as returned by the ingestion service.
+        """
+        if self._is_fresh():
+            self.hits += 1
+            return self.info
+
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            if not self._is_fresh():
+                await self._revalidate()
+        return self.info
+
+    async def _revalidate(self):
+        """Check the catalog version with ingestion and reload it if changed."""
+        if self.ingestion_client is None:
+            self.info = {"loaded": False, "error": "Ingestion service URL not configured"}
+            self._checked_at = time.monotonic()
+            return
+
+        headers = {"If-None-Match": f'"{self.version}"'} if self.version else {}
+        try:
+            response = await self.ingestion_client.get(CATALOG_INFO_PATH, headers=headers, timeout=10.0)
+            if response.status_code == 304:
+                self.revalidations += 1
+            else:
+                response.raise_for_status()
+                self._set_info(response.json(), response.headers.get("ETag"))
+            self._checked_at = time.monotonic()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error getting catalog info: {e}")
+            if self.version is None:
+                self.info = {"loaded": False, "error": str(e)}
+
+    def _set_info(self, info: Dict[str, Any], etag: Optional[str]):
+        """
+        Store new catalog info and precompile its category matcher.
+
+        Args:
+            info (Dict[str, Any]): Catalog info.
+            etag (Optional[str]): ETag of the response.
+        """
+        self.refreshes += 1
+        self.info = info
+        self.version = etag.strip('"') if etag else info.get("version")
+        categories = (info.get("categories") or []) if info.get("loaded") else []
+        if categories != self.category_matcher.categories:
+            self.category_matcher = CategoryMatcher(categories)
+        logger.info(
+            f"Catalog info refreshed (version={self.version}, "
+            f"{len(categories)} categories)"
+        )
+
+    def invalidate(self, version: Optional[str] = None) -> bool:
+        """
+        Mark the cached catalog stale so the next request revalidates it.
+
+        Args:
+            version (Optional[str]): New catalog version, if known. Nothing
+                happens if it matches the cached version.
+
+        Returns:
+            bool: True if the cache was marked stale.
+        """
+        if version is not None and version == self.version:
+            return False
+        self.invalidations += 1
+        self._checked_at = None
+        logger.info(f"Catalog cache invalidated (new version={version})")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict[str, Any]: Version, category count and hit/revalidation counters.
+        """
+        return {
+            "version": self.version,
+            "loaded": bool(self.info.get("loaded")),
+            "categories": len(self.categories),
+            "revalidate_seconds": self.revalidate_seconds,
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "refreshes": self.refreshes,
+            "invalidations": self.invalidations,
+            "errors": self.errors
+        }
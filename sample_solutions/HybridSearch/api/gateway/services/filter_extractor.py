@@ -5,25 +5,85 @@ Extracts structured filters from natural language queries
 
 import logging
 import re
-import httpx
 from typing import Dict, List, Optional, Any
 from config import settings
+from services.http_clients import UpstreamClient
 
 logger = logging.getLogger(__name__)
 
+# Query words that select a category whose name contains the key
+CATEGORY_KEYWORDS = {
+    'electronics': ['electronics', 'electronic', 'tech', 'technology'],
+    'home': ['home', 'household', 'house'],
+    'kitchen': ['kitchen', 'cooking', 'cookware'],
+    'clothing': ['clothing', 'clothes', 'apparel', 'fashion'],
+    'books': ['books', 'book', 'reading'],
+    'sports': ['sports', 'sport', 'fitness', 'exercise'],
+    'toys': ['toys', 'toy', 'games', 'game'],
+}
+
+
+class CategoryMatcher:
+    """
+    Category matching precompiled for one catalog.
+    
+    A category matches when its name, or a variation of a keyword its name
+    contains (see ``CATEGORY_KEYWORDS``), appears in the query. The search
+    terms are worked out once per catalog, so matching a query only tests
+    each distinct term once instead of re-deriving terms per category and
+    request.
+    """
+    
+    def __init__(self, categories: List[str]):
+        """
+        Precompile search terms for the catalog's categories.
+        
+        Args:
+            categories (List[str]): Valid categories in the catalog.
+        """
+        self.categories = list(categories)
+        self._terms: List[tuple] = []
+        for category in self.categories:
+            category_lower = category.lower()
+            terms = {category_lower}
+            for keyword, variations in CATEGORY_KEYWORDS.items():
+                if keyword in category_lower:
+                    terms.update(variations)
+            self._terms.append((category, frozenset(terms)))
+        self._all_terms = frozenset().union(*(terms for _, terms in self._terms))
+    
+    def match(self, query: str) -> List[str]:
+        """
+        Find the categories mentioned in a query.
+        
+        Args:
+            query (str): User query string.
+            
+        Returns:
+            List[str]: Matched categories, in catalog order.
+        """
+        query_lower = query.lower()
+        present = {term for term in self._all_terms if term in query_lower}
+        if not present:
+            return []
+        return [category for category, terms in self._terms if not terms.isdisjoint(present)]
+
 
 class FilterExtractor:
     """Extract filters from natural language queries"""
     
-    def __init__(self, llm_service_url: str = None):
+    def __init__(self, llm_service_url: str = None, llm_client: Optional[UpstreamClient] = None):
         """
         Initialize filter extractor.
         
         Args:
             llm_service_url (str, optional): URL of LLM service for complex extraction fallback.
                 Defaults to configuration settings if not provided.
+            llm_client (UpstreamClient, optional): Shared pooled client for the LLM service.
         """
         self.llm_service_url = llm_service_url or getattr(settings, 'llm_service_url', 'http://localhost:8003')
+        self.llm_client = llm_client or UpstreamClient("llm", self.llm_service_url)
+        self._category_matcher: Optional[CategoryMatcher] = None
         
         # Price filter patterns
         self.price_patterns = [
@@ -141,7 +201,8 @@ class FilterExtractor:
     def extract_category_filters(
         self,
         query: str,
-        known_categories: List[str] = None
+        known_categories: List[str] = None,
+        category_matcher: Optional[CategoryMatcher] = None
     ) -> List[str]:
         """
         Extract category filters from query using fuzzy matching against known categories.
@@ -149,46 +210,32 @@ class FilterExtractor:
         Args:
             query (str): User query string.
             known_categories (List[str]): List of valid categories in the catalog.
+            category_matcher (CategoryMatcher, optional): Matcher precompiled for the
+                catalog; used instead of known_categories if given.
             
         Returns:
             List[str]: List of matched category names.
         """
-        if not known_categories:
-            return []
+        if category_matcher is None:
+            if not known_categories:
+                return []
+            category_matcher = self._get_category_matcher(known_categories)
         
-        query_lower = query.lower()
-        matched_categories = []
-        
-        # Simple keyword matching
-        category_keywords = {
-            'electronics': ['electronics', 'electronic', 'tech', 'technology'],
-            'home': ['home', 'household', 'house'],
-            'kitchen': ['kitchen', 'cooking', 'cookware'],
-            'clothing': ['clothing', 'clothes', 'apparel', 'fashion'],
-            'books': ['books', 'book', 'reading'],
-            'sports': ['sports', 'sport', 'fitness', 'exercise'],
-            'toys': ['toys', 'toy', 'games', 'game'],
-        }
-        
-        for category in known_categories:
-            category_lower = category.lower()
-            
-            # Direct match
-            if category_lower in query_lower:
-                matched_categories.append(category)
-                continue
+        return category_matcher.match(query)
+    
+    def _get_category_matcher(self, known_categories: List[str]) -> CategoryMatcher:
+        """
+        Get a matcher for the categories, reusing the last one if they are unchanged.
+        
+        Args:
+            known_categories (List[str]): List of valid categories in the catalog.
             
-            # Keyword match
-            for keyword, variations in category_keywords.items():
-                if keyword in category_lower:
-                    for variation in variations:
-                        if variation in query_lower:
-                            matched_categories.append(category)
-                            break
-                    if category in matched_categories:
-                        break
-        
-        return list(set(matched_categories))  # Remove duplicates
+        Returns:
+            CategoryMatcher: Precompiled matcher.
+        """
+        if self._category_matcher is None or self._category_matcher.categories != list(known_categories):
+            self._category_matcher = CategoryMatcher(known_categories)
+        return self._category_matcher
     
     async def extract_with_llm(self, query: str) -> Dict[str, Any]:
         """
@@ -210,18 +257,18 @@ Query: "{query}"
 
 Return only valid JSON, no other text."""
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{self.llm_service_url}/api/v1/llm/extract-filters",
-                    json={"query": query, "prompt": prompt}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get('filters', {})
-                else:
-                    logger.warning(f"LLM filter extraction failed: {response.status_code}")
-                    return {}
+            response = await self.llm_client.post(
+                "/api/v1/llm/extract-filters",
+                json={"query": query, "prompt": prompt},
+                timeout=10.0
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                return data.get('filters', {})
+            else:
+                logger.warning(f"LLM filter extraction failed: {response.status_code}")
+                return {}
         
         except Exception as e:
             logger.warning(f"LLM filter extraction error: {e}")
@@ -231,7 +278,8 @@ Return only valid JSON, no other text."""
         self,
         query: str,
         known_categories: List[str] = None,
-        use_llm_fallback: bool = False
+        use_llm_fallback: bool = False,
+        category_matcher: Optional[CategoryMatcher] = None
     ) -> Dict[str, Any]:
         """
         Extract all filters from query (synchronously).
@@ -243,6 +291,7 @@ Return only valid JSON, no other text."""
             query (str): User query string.
             known_categories (List[str]): List of known categories.
             use_llm_fallback (bool): Whether to attempt LLM fallback (skipped in sync method).
+            category_matcher (CategoryMatcher, optional): Matcher precompiled for the catalog.
             
         Returns:
             Dict[str, Any]: Dictionary containing all extracted filters.
@@ -258,8 +307,8 @@ Return only valid JSON, no other text."""
         filters.update(rating_filters)
         
         # Extract category filters
-        if known_categories:
-            category_filters = self.extract_category_filters(query, known_categories)
+        if known_categories or category_matcher is not None:
+            category_filters = self.extract_category_filters(query, known_categories, category_matcher)
             if category_filters:
                 filters['categories'] = category_filters
         
@@ -281,7 +330,8 @@ Return only valid JSON, no other text."""
         self,
         query: str,
         known_categories: List[str] = None,
-        use_llm_fallback: bool = True
+        use_llm_fallback: bool = True,
+        category_matcher: Optional[CategoryMatcher] = None
     ) -> Dict[str, Any]:
         """
         Extract filters asynchronously (supports LLM fallback).
@@ -293,12 +343,13 @@ Return only valid JSON, no other text."""
             query (str): User query string.
             known_categories (List[str]): List of known categories.
             use_llm_fallback (bool): Whether to use LLM for complex queries.
+            category_matcher (CategoryMatcher, optional): Matcher precompiled for the catalog.
             
         Returns:
             Dict[str, Any]: Dictionary with extracted filters.
         """
         # First try regex extraction
-        filters = self.extract(query, known_categories, use_llm_fallback=False)
+        filters = self.extract(query, known_categories, use_llm_fallback=False, category_matcher=category_matcher)
         
         # If no filters found and LLM fallback enabled, try LLM
         if not filters and use_llm_fallback:
@@ -0,0 +1,371 @@
+"""
+HTTP Clients
+Pooled, keep-alive HTTP clients for calls to other services, with circuit breakers
+"""
+
+import importlib.util
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately for ``reset_timeout`` seconds. The first call
+    after that is let through as a probe (half-open): success closes the
+    circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            name (str): Upstream name (for logs).
+            failure_threshold (int): Consecutive failures that open the circuit (0 disables).
+            reset_timeout (float): Seconds the circuit stays open before a probe.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """Current state: 'closed', 'open' or 'half_open'."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may go to the upstream.
+
+        Returns:
+            bool: False while the circuit is open (or a half-open probe is in flight).
+        """
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        """Record a successful call, closing the circuit."""
+        if self.opened_at is not None:
+            logger.info(f"Circuit for {self.name} closed")
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release_probe(self):
+        """Let another probe through after a probe ended without a verdict (e.g. cancelled)."""
+        self._probing = False
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit at the threshold."""
+        self.consecutive_failures += 1
+        if self._probing or (
+            self.failure_threshold and self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.opened_at is None or self._probing:
+                logger.warning(
+                    f"Circuit for {self.name} opened after {self.consecutive_failures} "
+                    f"consecutive failures"
+                )
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class UpstreamClient:
+    """
+    Pooled HTTP client for one upstream service.
+
+    Wraps a long-lived ``httpx.AsyncClient`` so connections (and TLS
+    sessions) are reused across requests instead of being set up per call.
+    Connection errors, timeouts and 5xx responses count as failures for the
+    circuit breaker; 4xx responses do not.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: Optional[str],
+        timeout: float = 60.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        verify: bool = True,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        """
+        Initialize the upstream client (the connection pool is created on first use).
+
+        Args:
+            name (str): Upstream name, used in logs and stats.
+            base_url (Optional[str]): Base URL of the upstream service.
+            timeout (float): Default request timeout in seconds.
+            max_connections (int): Maximum concurrent connections to the upstream.
+            max_keepalive_connections (int): Idle connections kept open.
+            keepalive_expiry (float): Seconds an idle connection is kept.
+            http2 (bool): Negotiate HTTP/2 (needs the optional ``h2`` package).
+            verify (bool): Verify TLS certificates.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds before an open circuit lets a probe through.
+        """
+        self.name = name
+        self.base_url = base_url.rstrip('/') if base_url else base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(f"HTTP/2 requested for {name} but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.verify = verify
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.total_time_ms = 0.0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled ``httpx.AsyncClient`` (created on first access)."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                verify=self.verify
+            )
+        return self._client
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the pool and circuit breaker.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path relative to the upstream base URL (or an absolute URL).
+            **kwargs: Extra arguments for ``httpx.AsyncClient.request`` (json, timeout, ...).
+
+        Returns:
+            httpx.Response: The response (status is not checked here).
+
+        Raises:
+            CircuitOpenError: If the upstream's circuit is open.
+            httpx.HTTPError: If the request fails.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open; failing fast")
+
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        start = time.time()
+        self.in_flight += 1
+        self.requests += 1
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled: says nothing about the upstream's health
+            self.breaker.release_probe()
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_time_ms += (time.time() - start) * 1000
+
+        if response.status_code >= 500:
+            self.failures += 1
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        """Send a GET request (see ``request``)."""
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        """Send a POST request (see ``request``)."""
+        return await self.request("POST", path, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """
+        Send a request and stream the response body (e.g. Server-Sent Events).
+
+        The circuit breaker judges the upstream on the response headers;
+        errors while reading the body are left to the caller.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path relative to the upstream base URL (or an absolute URL).
+            **kwargs: Extra arguments for ``httpx.AsyncClient.stream`` (json, timeout, ...).
+
+        Yields:
+            httpx.Response: The response, with the body not yet read.
+
+        Raises:
+            CircuitOpenError: If the upstream's circuit is open.
+            httpx.HTTPError: If the request fails.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open; failing fast")
+
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        start = time.time()
+        self.in_flight += 1
+        self.requests += 1
+        judged = False
+        try:
+            async with self.client.stream(method, url, **kwargs) as response:
+                judged = True
+                if response.status_code >= 500:
+                    self.failures += 1
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                yield response
+        except httpx.HTTPError:
+            if not judged:
+                self.failures += 1
+                self.breaker.record_failure()
+            raise
+        except BaseException:
+            if not judged:
+                self.breaker.release_probe()
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_time_ms += (time.time() - start) * 1000
+
+    def _pool_stats(self) -> Dict[str, int]:
+        """
+        Count open, idle and active connections in the pool.
+
+        Returns:
+            Dict[str, int]: Connection counts (empty before the pool is created).
+        """
+        if self._client is None:
+            return {}
+        # httpcore's pool is not part of httpx's public API; report what is available
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for c in connections if getattr(c, "is_idle", lambda: False)())
+        return {
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool and circuit statistics.
+
+        Returns:
+            Dict[str, Any]: Request counters, pool utilisation and circuit state.
+        """
+        pool = self._pool_stats()
+        max_connections = self.limits.max_connections
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "avg_latency_ms": round(self.total_time_ms / self.requests, 2) if self.requests else 0.0,
+            "max_connections": max_connections,
+            **pool,
+            "pool_utilisation": round(pool.get("active_connections", 0) / max_connections, 4)
+            if max_connections else 0.0,
+            "circuit_state": self.breaker.state,
+            "circuit_rejected": self.breaker.rejected
+        }
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class HTTPClients:
+    """
+    Registry of upstream clients for one service.
+
+    Created once per process; ``aclose`` is called from the FastAPI
+    lifespan on shutdown.
+    """
+
+    def __init__(self, **defaults):
+        """
+        Initialize the registry.
+
+        Args:
+            **defaults: Default ``UpstreamClient`` options for every upstream.
+        """
+        self.defaults = defaults
+        self.upstreams: Dict[str, UpstreamClient] = {}
+
+    def register(self, name: str, base_url: Optional[str], **options) -> UpstreamClient:
+        """
+        Register an upstream service.
+
+        Args:
+            name (str): Upstream name.
+            base_url (Optional[str]): Base URL of the service.
+            **options: ``UpstreamClient`` options overriding the defaults.
+
+        Returns:
+            UpstreamClient: The registered client.
+        """
+        upstream = UpstreamClient(name, base_url, **{**self.defaults, **options})
+        self.upstreams[name] = upstream
+        return upstream
+
+    def __getitem__(self, name: str) -> UpstreamClient:
+        return self.upstreams[name]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get statistics for every upstream.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Stats keyed by upstream name.
+        """
+        return {name: upstream.get_stats() for name, upstream in self.upstreams.items()}
+
+    async def aclose(self):
+        """Close all upstream connection pools."""
+        for upstream in self.upstreams.values():
+            await upstream.aclose()
@@ -3,9 +3,11 @@ Service Orchestrator
 Coordinates calls to all backend services
 """
 
+import json
 import logging
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from services.http_clients import HTTPClients
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -30,7 +32,8 @@ class ServiceOrchestrator:
         retrieval_service_url: str,
         llm_service_url: str,
         embedding_service_url: str = None,
-        ingestion_service_url: str = None
+        ingestion_service_url: str = None,
+        http_clients: Optional[HTTPClients] = None
     ):
         """
         Initialize orchestrator.
@@ -40,11 +43,23 @@ class ServiceOrchestrator:
             llm_service_url (str): URL of LLM service.
             embedding_service_url (str, optional): URL of embedding service.
             ingestion_service_url (str, optional): URL of ingestion service.
+            http_clients (HTTPClients, optional): Shared pooled clients; services
+                not registered there get a pooled client with default limits.
         """
         self.retrieval_service_url = retrieval_service_url
         self.llm_service_url = llm_service_url
         self.embedding_service_url = embedding_service_url
         self.ingestion_service_url = ingestion_service_url
+        
+        self.http_clients = http_clients or HTTPClients()
+        for name, url in (
+            ("retrieval", retrieval_service_url),
+            ("llm", llm_service_url),
+            ("embedding", embedding_service_url),
+            ("ingestion", ingestion_service_url)
+        ):
+            if url and name not in self.http_clients.upstreams:
+                self.http_clients.register(name, url)
     
     @retry(
         stop=stop_after_attempt(3),
@@ -66,7 +81,8 @@ class ServiceOrchestrator:
             top_k (int): Number of results to retrieve.
             
         Returns:
-            Dict[str, Any]: Dictionary with retrieval results and metadata.
+            Dict[str, Any]: Dictionary with retrieval results and metadata,
+                including the query embedding for the LLM answer cache.
             
         Raises:
             httpx.HTTPError: If retrieval service fails.
@@ -74,18 +90,19 @@ class ServiceOrchestrator:
         try:
             logger.info(f"Retrieving context for query: {query[:100]}")
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.retrieval_service_url}/api/v1/retrieve/hybrid",
-                    json={
-                        "query": query,
-                        "top_k_candidates": 100,
-                        "top_k_fusion": 50,
-                        "top_k_final": top_k
-                    }
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self.http_clients["retrieval"].post(
+                "/api/v1/retrieve/hybrid",
+                json={
+                    "query": query,
+                    "top_k_candidates": 100,
+                    "top_k_fusion": 50,
+                    "top_k_final": top_k,
+                    "include_query_embedding": True
+                },
+                timeout=60.0
+            )
+            response.raise_for_status()
+            return response.json()
                 
         except (httpx.HTTPError, httpx.TimeoutException, httpx.ConnectError) as e:
             logger.warning(f"Retrieval service error (will retry): {type(e).__name__}: {e}")
@@ -105,7 +122,9 @@ class ServiceOrchestrator:
         self,
         query: str,
         context_chunks: List[Dict],
-        model_type: str = "auto"
+        model_type: str = "auto",
+        index_version: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> Dict[str, Any]:
         """
         Generate answer using LLM with retry logic.
@@ -114,6 +133,10 @@ class ServiceOrchestrator:
             query (str): The user query.
             context_chunks (List[Dict]): Retrieved context chunks to use as grounding.
             model_type (str): Model type strategy ('simple', 'complex', 'auto').
+            index_version (Optional[int]): Index version the chunks were retrieved
+                from (lets the LLM service invalidate its answer cache).
+            query_embedding (Optional[List[float]]): Query embedding from retrieval
+                (spares the LLM service an embedding call for its answer cache).
             
         Returns:
             Dict[str, Any]: Dictionary with generated answer, citations, and metadata.
@@ -124,18 +147,20 @@ class ServiceOrchestrator:
         try:
             logger.info(f"Generating answer using {model_type} model")
             
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    f"{self.llm_service_url}/api/v1/llm/generate",
-                    json={
-                        "query": query,
-                        "context_chunks": context_chunks,
-                        "model_type": model_type,
-                        "include_citations": True
-                    }
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self.http_clients["llm"].post(
+                "/api/v1/llm/generate",
+                json={
+                    "query": query,
+                    "context_chunks": context_chunks,
+                    "model_type": model_type,
+                    "include_citations": True,
+                    "index_version": index_version,
+                    "query_embedding": query_embedding
+                },
+                timeout=120.0
+            )
+            response.raise_for_status()
+            return response.json()
                 
         except (httpx.HTTPError, httpx.TimeoutException, httpx.ConnectError) as e:
             logger.warning(f"LLM service error (will retry): {type(e).__name__}: {e}")
@@ -144,26 +169,96 @@ class ServiceOrchestrator:
             logger.error(f"Unexpected error during answer generation: {e}")
             raise Exception(f"Answer generation failed: {str(e)}")
     
-    async def check_service_health(self, service_url: str) -> Dict:
+    async def stream_answer(
+        self,
+        query: str,
+        context_chunks: List[Dict],
+        model_type: str = "auto",
+        index_version: Optional[int] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Generate an answer with the LLM service's streaming endpoint.
+        
+        Not retried: tokens may already have been forwarded when a failure
+        happens, so errors are reported to the caller instead.
+        
+        Args:
+            query (str): The user query.
+            context_chunks (List[Dict]): Retrieved context chunks to use as grounding.
+            model_type (str): Model type strategy ('simple', 'complex', 'auto').
+            index_version (Optional[int]): Index version the chunks were retrieved from.
+            query_embedding (Optional[List[float]]): Query embedding from retrieval.
+            
+        Yields:
+            Tuple[str, Dict[str, Any]]: Server-Sent Events as (event, data):
+                ``meta``, ``token``, ``done`` or ``error``.
+            
+        Raises:
+            httpx.HTTPError: If the LLM stream cannot be opened.
+        """
+        logger.info(f"Streaming answer using {model_type} model")
+        
+        async with self.http_clients["llm"].stream(
+            "POST",
+            "/api/v1/llm/generate/stream",
+            json={
+                "query": query,
+                "context_chunks": context_chunks,
+                "model_type": model_type,
+                "include_citations": True,
+                "index_version": index_version,
+                "query_embedding": query_embedding
+            },
+            timeout=120.0
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+            
+            event, data_lines = "message", []
+            async for line in response.aiter_lines():
+                if line:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "event":
+                        event = value
+                    elif field == "data":
+                        data_lines.append(value)
+                    continue
+                # Blank line ends an event
+                if data_lines:
+                    yield event, json.loads("\n".join(data_lines))
+                event, data_lines = "message", []
+    
+    async def check_service_health(self, service: str) -> Dict:
         """
         Check health of a downstream service.
         
+        Uses the service's pooled connections but bypasses its circuit
+        breaker, so an open circuit does not hide a recovered service.
+        
         Args:
-            service_url (str): Base URL of the service to check.
+            service (str): Upstream name ('retrieval', 'llm', 'embedding' or 'ingestion').
             
         Returns:
             Dict: Health status dictionary covering status and details.
         """
+        upstream = self.http_clients.upstreams.get(service)
+        if upstream is None:
+            return {
+                "status": "unhealthy",
+                "error": f"No URL configured for the {service} service"
+            }
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{service_url}/health")
-                response.raise_for_status()
-                return {
-                    "status": "healthy",
-                    "details": response.json()
-                }
+            response = await upstream.client.get(f"{upstream.base_url}/health", timeout=5.0)
+            response.raise_for_status()
+            return {
+                "status": "healthy",
+                "details": response.json()
+            }
         except Exception as e:
-            logger.error(f"Health check failed for {service_url}: {e}")
+            logger.error(f"Health check failed for {service} ({upstream.base_url}): {e}")
             return {
                 "status": "unhealthy",
                 "error": str(e)
@@ -199,32 +294,32 @@ class ServiceOrchestrator:
             # Get query embedding
             query_embedding = None
             if self.embedding_service_url:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        f"{self.embedding_service_url}/api/v1/embeddings/encode",
-                        json={"texts": [query], "normalize": True}
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    # Extract first embedding from the list
-                    embeddings = data.get("embeddings", [])
-                    query_embedding = embeddings[0] if embeddings else None
-            
-            # Call retrieval service
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                # retrieval service caps top_k at 100; guard here to avoid 422
-                safe_top_k = min(limit * 5, 100)
-                response = await client.post(
-                    f"{self.retrieval_service_url}/api/v1/search/products",
-                    json={
-                        "query_embedding": query_embedding,
-                        "query_text": query,
-                        "filters": filters,
-                        "top_k": safe_top_k
-                    }
+                response = await self.http_clients["embedding"].post(
+                    "/api/v1/embeddings/encode",
+                    json={"texts": [query], "normalize": True},
+                    timeout=30.0
                 )
                 response.raise_for_status()
-                return response.json()
+                data = response.json()
+                # Extract first embedding from the list
+                embeddings = data.get("embeddings", [])
+                query_embedding = embeddings[0] if embeddings else None
+            
+            # Call retrieval service
+            # retrieval service caps top_k at 100; guard here to avoid 422
+            safe_top_k = min(limit * 5, 100)
+            response = await self.http_clients["retrieval"].post(
+                "/api/v1/search/products",
+                json={
+                    "query_embedding": query_embedding,
+                    "query_text": query,
+                    "filters": filters,
+                    "top_k": safe_top_k
+                },
+                timeout=60.0
+            )
+            response.raise_for_status()
+            return response.json()
                 
         except Exception as e:
             logger.error(f"Product search error: {e}")
@@ -241,12 +336,12 @@ class ServiceOrchestrator:
             if not self.ingestion_service_url:
                 return {"loaded": False, "error": "Ingestion service URL not configured"}
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.ingestion_service_url}/api/v1/products/catalog/info"
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self.http_clients["ingestion"].get(
+                "/api/v1/products/catalog/info",
+                timeout=10.0
+            )
+            response.raise_for_status()
+            return response.json()
                 
         except Exception as e:
             logger.error(f"Error getting catalog info: {e}")
@@ -5,6 +5,7 @@ Manages environment variables and service settings
 
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Optional
 
 # Compute project root path (hybrid-search/)
 # config.py is at: hybrid-search/api/ingestion/config.py
@@ -13,6 +14,7 @@ _PROJECT_ROOT = Path(__file__).parent.parent.parent
 _DEFAULT_DOCUMENT_PATH = str(_PROJECT_ROOT / "data" / "documents")
 _DEFAULT_INDEX_PATH = str(_PROJECT_ROOT / "data" / "indexes")
 _DEFAULT_DB_PATH = str(_PROJECT_ROOT / "data" / "metadata.db")
+_DEFAULT_UPLOAD_PATH = str(_PROJECT_ROOT / "data" / "uploads")
 
 
 class Settings(BaseSettings):
@@ -36,25 +38,71 @@ class Settings(BaseSettings):
     
     # Embedding Service
     embedding_service_url: str = "http://localhost:8001"
+    embedding_encoding_format: str = "base64"  # "float" (JSON lists), "base64" or "msgpack" (needs `msgpack`)
+    embedding_wire_dtype: str = "float32"  # "float32" or "float16" for base64/msgpack responses
+    
+    # Gateway, notified when the product catalog changes (optional)
+    gateway_service_url: Optional[str] = None
+    # Shared secret sent as X-Internal-Token; notifications are skipped while unset
+    internal_api_token: Optional[str] = None
     
     # Storage Paths (default to local development paths)
     document_storage_path: str = _DEFAULT_DOCUMENT_PATH
     index_storage_path: str = _DEFAULT_INDEX_PATH
     metadata_db_path: str = _DEFAULT_DB_PATH
+    product_upload_path: str = _DEFAULT_UPLOAD_PATH  # Uploaded catalogs are spooled here until processed
+    metadata_read_pool_size: int = 4  # Read-only SQLite connections (WAL readers never block the writer)
     
     # Document Processing
     chunk_size: int = 256  # tokens (reduced to safe limit for 512-token models)
     chunk_overlap: int = 25  # tokens
+    chunk_boundary: str = "none"  # "none", "sentence" or "paragraph": end chunks at the last boundary in range
+    chunk_tokenizer: str = ""  # Hugging Face tokenizer for token counts, e.g. "BAAI/bge-base-en-v1.5" (needs `tokenizers`; empty = word/punctuation)
     max_file_size_mb: int = 100
     supported_formats: str = "pdf,docx,xlsx,ppt,txt"
     embedding_dim: int = 768  # BAAI/bge-base-en-v1.5 dimensions
     embedding_batch_size: int = 32  # must match batch size from embedding service
+    index_compaction_threshold: float = 0.2  # tombstone ratio that triggers index compaction
+    embedding_store_dtype: str = "float32"  # "float32" or "float16" for stored embeddings
+    
+    # Document Jobs: parsing runs in a process pool; PDFs are split into page ranges across workers
+    parse_workers: int = 0  # Parser processes (0 = one per CPU core)
+    pdf_pages_per_task: int = 25
+    document_max_concurrent_jobs: int = 2  # Documents parsed/embedded/indexed at the same time
+    document_max_queued_jobs: int = 50  # Waiting + running jobs before uploads get 503 (0 = unbounded)
+    document_queue_retry_after_seconds: int = 30  # Retry-After sent with those 503s
+    
+    # Dense (FAISS) Index
+    # "flat" (exact), "ivf_flat", "ivf_pq" or "hnsw". IVF types stay flat until
+    # faiss_ivf_nlist * faiss_train_min_points_per_list vectors exist, then train.
+    faiss_index_type: str = "flat"
+    faiss_ivf_nlist: int = 1024
+    faiss_pq_m: int = 64  # PQ sub-quantizers; must divide embedding_dim
+    faiss_pq_nbits: int = 8
+    faiss_hnsw_m: int = 32
+    faiss_hnsw_ef_construction: int = 200
+    faiss_train_min_points_per_list: int = 39
+    faiss_train_max_vectors: int = 262144  # training sample cap
+    
+    # Index snapshots: each save is published as a new versioned directory
+    index_snapshots_to_keep: int = 3
     
     # Product Catalog Settings
     system_mode: str = "document"  # "document" or "product"
     embedding_field_template: str = "{name}. {description}. Category: {category}. Brand: {brand}"
     default_result_limit: int = 20
     max_products_per_catalog: int = 50000
+    product_batch_size: int = 100  # Products per embedding request group / index append
+    product_embedding_concurrency: int = 4  # Embedding requests in flight during catalog ingestion
+    product_index_checkpoint_batches: int = 0  # Publish a snapshot every N batches (0 = only at the end)
+    
+    # Pooled HTTP clients for the embedding service and gateway
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http2_enabled: bool = False  # Requires the optional 'h2' package
+    # Circuit breaker: fail fast after consecutive failures, probe again after the reset timeout
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout_seconds: float = 30.0
     
     # Logging
     log_level: str = "INFO"
@@ -3,24 +3,32 @@ Document Ingestion Service
 Handles document upload, processing, chunking, and indexing
 """
 
+import hashlib
+import json
 import logging
+import shutil
 import time
 import uuid
-import httpx
 import asyncio
+from functools import partial
 from pathlib import Path
-from typing import List, Optional, Dict
-from fastapi import FastAPI, File, UploadFile, HTTPException, status, Form
+from typing import Any, Callable, List, Optional, Dict
+import numpy as np
+from fastapi import FastAPI, File, UploadFile, HTTPException, status, Form, Request, Response
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from config import settings
 from services.document_parser import DocumentParser
+from services.document_workers import DocumentJobQueue, ParsePool
 from services.chunker import TextChunker
 from services.index_manager import IndexManager
+from services.ann_index import AnnIndexBuilder
 from services.metadata_store import MetadataStore
 from services.product_parser import ProductParser
 from services.product_processor import ProductProcessor
+from services.http_clients import UpstreamClient
+from services.embedding_codec import decode_response, resolve_format
 from schemas.product_schemas import (
     UploadResponse, ProcessingStatus, FieldMapping, 
     ProductCreate, CatalogMetadata
@@ -37,8 +45,13 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    parse_pool.start()
     yield
     # Shutdown
+    parse_pool.shutdown()
+    await embedding_client.aclose()
+    if gateway_client is not None:
+        await gateway_client.aclose()
     metadata_store.close()
     logger.info("Service shutdown complete")
 
@@ -60,22 +73,79 @@ app.add_middleware(
 
 # Initialize services
 document_parser = DocumentParser()
+parse_pool = ParsePool(
+    document_parser,
+    workers=settings.parse_workers,
+    pdf_pages_per_task=settings.pdf_pages_per_task
+)
+document_jobs = DocumentJobQueue(
+    max_concurrent=settings.document_max_concurrent_jobs,
+    max_pending=settings.document_max_queued_jobs
+)
 text_chunker = TextChunker(
     chunk_size=settings.chunk_size,
-    chunk_overlap=settings.chunk_overlap
+    chunk_overlap=settings.chunk_overlap,
+    boundary=settings.chunk_boundary,
+    tokenizer_name=settings.chunk_tokenizer or None
 )
 index_manager = IndexManager(
     index_storage_path=settings.index_storage_path,
-    embedding_dim=settings.embedding_dim
+    embedding_dim=settings.embedding_dim,
+    compaction_threshold=settings.index_compaction_threshold,
+    embedding_store_dtype=settings.embedding_store_dtype,
+    ann_index_builder=AnnIndexBuilder(
+        embedding_dim=settings.embedding_dim,
+        index_type=settings.faiss_index_type,
+        nlist=settings.faiss_ivf_nlist,
+        pq_m=settings.faiss_pq_m,
+        pq_nbits=settings.faiss_pq_nbits,
+        hnsw_m=settings.faiss_hnsw_m,
+        hnsw_ef_construction=settings.faiss_hnsw_ef_construction,
+        min_points_per_list=settings.faiss_train_min_points_per_list,
+        max_training_vectors=settings.faiss_train_max_vectors
+    ),
+    snapshots_to_keep=settings.index_snapshots_to_keep
+)
+metadata_store = MetadataStore(
+    settings.metadata_db_path,
+    read_pool_size=settings.metadata_read_pool_size
 )
-metadata_store = MetadataStore(settings.metadata_db_path)
 product_parser = ProductParser()
 product_processor = ProductProcessor(
     embedding_field_template=getattr(settings, 'embedding_field_template', None)
 )
 
+# Pooled, keep-alive client for the embedding service (closed on shutdown)
+embedding_client = UpstreamClient(
+    "embedding",
+    settings.embedding_service_url,
+    timeout=120.0,
+    max_connections=settings.http_max_connections,
+    max_keepalive_connections=settings.http_max_keepalive_connections,
+    http2=settings.http2_enabled,
+    failure_threshold=settings.circuit_failure_threshold,
+    reset_timeout=settings.circuit_reset_timeout_seconds
+)
+# Packed float32/float16 embeddings decode straight into arrays (no JSON float lists)
+embedding_wire_format = resolve_format(settings.embedding_encoding_format, settings.embedding_wire_dtype)
+
+# Gateway client for catalog change notifications (if configured)
+gateway_client = UpstreamClient(
+    "gateway",
+    settings.gateway_service_url,
+    timeout=5.0,
+    max_connections=4,
+    max_keepalive_connections=1,
+    failure_threshold=settings.circuit_failure_threshold,
+    reset_timeout=settings.circuit_reset_timeout_seconds
+) if settings.gateway_service_url else None
+
 # Ensure storage directories exist
 Path(settings.document_storage_path).mkdir(parents=True, exist_ok=True)
+Path(settings.product_upload_path).mkdir(parents=True, exist_ok=True)
+
+# Index mutations and snapshot publishes run one at a time (see run_index_write)
+index_lock = asyncio.Lock()
 
 # Job tracking for product processing
 processing_jobs: Dict[str, Dict] = {}
@@ -115,6 +185,8 @@ class DocumentStatus(BaseModel):
         chunk_count (int): Number of chunks generated so far.
         upload_timestamp (str): ISO timestamp of upload.
         error_message (Optional[str]): detailed error if processing failed.
+        stage_timings (Optional[dict]): Milliseconds spent queued, parsing, chunking,
+            embedding and indexing (set when processing ends).
     """
     document_id: str
     filename: str
@@ -123,6 +195,7 @@ class DocumentStatus(BaseModel):
     chunk_count: int
     upload_timestamp: str
     error_message: Optional[str] = None
+    stage_timings: Optional[Dict[str, float]] = None
 
 
 class IndexStats(BaseModel):
@@ -134,11 +207,15 @@ class IndexStats(BaseModel):
         total_chunks (int): Total number of chunks indexed.
         faiss_vectors (int): Number of vectors in the FAISS index.
         status_counts (dict): Breakdown of documents by status (completed, failed, etc.).
+        http_pools (dict): Connection pool and circuit breaker stats per upstream service.
+        document_jobs (dict): Document job queue and parse pool stats.
     """
     total_documents: int
     total_chunks: int
     faiss_vectors: int
     status_counts: dict
+    http_pools: dict = {}
+    document_jobs: dict = {}
 
 
 class HealthResponse(BaseModel):
@@ -158,7 +235,7 @@ class HealthResponse(BaseModel):
 
 
 # Helper Functions
-async def get_embeddings(texts: List[str]) -> List[List[float]]:
+async def get_embeddings(texts: List[str]) -> np.ndarray:
     """
     Call embedding service to get embeddings (with batching support).
     
@@ -166,230 +243,379 @@ async def get_embeddings(texts: List[str]) -> List[List[float]]:
         texts (List[str]): List of texts to embed.
         
     Returns:
-        List[List[float]]: List of embedding vectors.
+        np.ndarray: float32 array of shape (len(texts), embedding_dim).
         
     Raises:
         httpx.HTTPError: If embedding service fails.
+        CircuitOpenError: If the embedding service circuit is open.
     """
     BATCH_SIZE = settings.embedding_batch_size
     logger.info(f"Embedding batch size: {BATCH_SIZE}")
     all_embeddings = []
 
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        # Process in batches if needed
-        for i in range(0, len(texts), BATCH_SIZE):
-            batch = texts[i:i + BATCH_SIZE]
-            logger.info(f"Getting embeddings for batch {i//BATCH_SIZE + 1}/{(len(texts)-1)//BATCH_SIZE + 1} ({len(batch)} texts)")
-            
-            response = await client.post(
-                f"{settings.embedding_service_url}/api/v1/embeddings/encode-batch",
-                json={"texts": batch, "normalize": True}
-            )
-            response.raise_for_status()
-            data = response.json()
-            all_embeddings.extend(data["embeddings"])
+    # Process in batches if needed
+    for i in range(0, len(texts), BATCH_SIZE):
+        batch = texts[i:i + BATCH_SIZE]
+        logger.info(f"Getting embeddings for batch {i//BATCH_SIZE + 1}/{(len(texts)-1)//BATCH_SIZE + 1} ({len(batch)} texts)")
+        
+        response = await embedding_client.post(
+            "/api/v1/embeddings/encode-batch",
+            json={"texts": batch, "normalize": True, **embedding_wire_format}
+        )
+        response.raise_for_status()
+        all_embeddings.append(decode_response(response.headers.get("content-type"), response.content))
+    
+    if not all_embeddings:
+        return np.zeros((0, settings.embedding_dim), dtype=np.float32)
+    return np.concatenate(all_embeddings) if len(all_embeddings) > 1 else all_embeddings[0]
+
+
+def get_catalog_version(catalog_metadata: Optional[Dict]) -> str:
+    """
+    Compute a version tag for the current catalog.
+    
+    Args:
+        catalog_metadata (Optional[Dict]): Catalog metadata row (None if no catalog).
+        
+    Returns:
+        str: Short hash that changes whenever the catalog is replaced or cleared.
+    """
+    if not catalog_metadata:
+        return "empty"
+    encoded = json.dumps(catalog_metadata, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded, usedforsecurity=False).hexdigest()[:16]
+
+
+async def notify_catalog_changed():
+    """
+    Tell the gateway that the product catalog changed, so it drops its cached catalog info.
+    
+    Failures are only logged: the gateway also revalidates periodically.
+    The gateway only accepts the notification with the shared internal token.
+    """
+    if gateway_client is None or not settings.internal_api_token:
+        return
+    version = get_catalog_version(metadata_store.get_catalog_metadata())
+    try:
+        response = await gateway_client.post(
+            "/api/v1/catalog/invalidate",
+            json={"version": version},
+            headers={"X-Internal-Token": settings.internal_api_token}
+        )
+        response.raise_for_status()
+        logger.info(f"Notified gateway of catalog version {version}")
+    except Exception as e:
+        logger.warning(f"Failed to notify gateway of catalog change: {e}")
+
+
+async def run_index_write(fn: Callable, *args, **kwargs) -> Any:
+    """
+    Run an index mutation in a worker thread, one writer at a time.
     
-    return all_embeddings
+    FAISS/BM25 updates and snapshot publishes are CPU- and disk-heavy, so
+    they stay off the event loop; the index lock keeps writers from
+    interleaving (or publishing each other's unfinished changes).
+    
+    Args:
+        fn (Callable): IndexManager method (or other blocking index write).
+        *args: Positional arguments for fn.
+        **kwargs: Keyword arguments for fn.
+        
+    Returns:
+        Any: The function's result.
+    """
+    async with index_lock:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+def _elapsed_ms(start: float) -> float:
+    """Milliseconds since a ``time.perf_counter()`` reading."""
+    return round((time.perf_counter() - start) * 1000, 1)
 
 
 async def process_document_async(
     document_id: str,
     file_path: Path,
-    file_type: str
+    file_type: str,
+    queued_at: Optional[float] = None
 ):
     """
     Process document asynchronously.
     
     Orchestrates parsing, chunking, embedding generation, and indexing.
-    Updates status in metadata store throughout the process.
+    Parsing runs in the parse pool's worker processes, chunking in a worker
+    thread and indexing in the serialized index writer (``run_index_write``),
+    so the event loop stays free for other requests.
+    Updates status and per-stage timings in metadata store.
     
     Args:
         document_id (str): Unique document identifier.
         file_path (Path): Path to the uploaded file on disk.
         file_type (str): File extension/type (e.g., 'pdf').
+        queued_at (Optional[float]): ``time.perf_counter()`` when the job was queued.
     """
+    start = time.perf_counter()
+    timings = {"queued_ms": _elapsed_ms(queued_at) if queued_at is not None else 0.0}
     try:
         # Update status to processing
-        metadata_store.update_status(document_id, "processing")
+        await asyncio.to_thread(metadata_store.update_status, document_id, "processing")
         
         # Parse document
         logger.info(f"Parsing document {document_id} ({file_type})")
-        pages_or_sections = document_parser.parse_document(file_path, file_type)
+        stage = time.perf_counter()
+        pages_or_sections = await parse_pool.parse_document(file_path, file_type)
+        timings["parse_ms"] = _elapsed_ms(stage)
         
         if not pages_or_sections:
             raise ValueError("No text content extracted from document")
         
         # Chunk text
         logger.info(f"Chunking document {document_id}")
-        chunks = text_chunker.chunk_document(pages_or_sections, document_id)
+        stage = time.perf_counter()
+        chunks = await asyncio.to_thread(text_chunker.chunk_document, pages_or_sections, document_id)
+        timings["chunk_ms"] = _elapsed_ms(stage)
         
         if not chunks:
             raise ValueError("No chunks created from document")
         
         # Get embeddings
         logger.info(f"Getting embeddings for {len(chunks)} chunks")
+        stage = time.perf_counter()
         texts = [chunk["text"] for chunk in chunks]
         embeddings = await get_embeddings(texts)
+        timings["embed_ms"] = _elapsed_ms(stage)
         
         # Add to indexes
         logger.info(f"Adding {len(chunks)} chunks to indexes")
-        index_manager.add_chunks(chunks, embeddings)
+        stage = time.perf_counter()
+        await run_index_write(index_manager.add_chunks, chunks, embeddings)
+        timings["index_ms"] = _elapsed_ms(stage)
+        timings["total_ms"] = _elapsed_ms(start)
         
         # Update status to completed
-        metadata_store.update_status(
+        await asyncio.to_thread(
+            metadata_store.update_status,
             document_id,
             "completed",
-            chunk_count=len(chunks)
+            chunk_count=len(chunks),
+            stage_timings=timings
         )
         
-        logger.info(f"Document {document_id} processed successfully ({len(chunks)} chunks)")
+        logger.info(f"Document {document_id} processed successfully ({len(chunks)} chunks, timings: {timings})")
         
     except Exception as e:
         logger.error(f"Error processing document {document_id}: {e}", exc_info=True)
-        metadata_store.update_status(
+        timings["total_ms"] = _elapsed_ms(start)
+        await asyncio.to_thread(
+            metadata_store.update_status,
             document_id,
             "failed",
-            error_message=str(e)
+            error_message=str(e),
+            stage_timings=timings
         )
 
 
+def _next_processed_batch(batches, job_id: str) -> Optional[List[Dict]]:
+    """
+    Read, normalise and validate batches until one has valid products.
+    
+    Runs in a worker thread (file parsing and normalisation are blocking).
+    
+    Args:
+        batches: Iterator of field-mapped product batches.
+        job_id (str): Job identifier (invalid products are recorded on the job).
+        
+    Returns:
+        Optional[List[Dict]]: Processed products, or None when the file is exhausted.
+    """
+    job = processing_jobs[job_id]
+    for mapped_products in batches:
+        processed_products, invalid_products = product_processor.process_batch(
+            mapped_products,
+            batch_size=len(mapped_products),
+            skip_invalid=True
+        )
+        for err in invalid_products:
+            job['products_invalid'] += 1
+            job['errors'].append(f"Product {job['products_invalid']}: {', '.join(err['errors'])}")
+        if processed_products:
+            return processed_products
+    return None
+
+
 async def process_products_async(
     job_id: str,
-    products: List[Dict],
+    file_path: Path,
+    filename: str,
     field_mapping: FieldMapping,
     catalog_name: str
 ):
     """
     Process products asynchronously.
     
-    Handles field mapping, validation, embedding generation, and indexing of product data.
-    Updates job status and progress.
+    Streams the spooled catalog file in batches: each batch is field-mapped,
+    validated, written to the metadata store, embedded and indexed, so memory
+    stays flat regardless of catalog size. Updates job status and progress.
+    The spooled file is removed when processing ends.
+    
+    The job holds the index lock from clearing the old catalog until the new
+    one is published, and index updates run in worker threads. Clearing and
+    adding are published as one snapshot (unless checkpoints are enabled),
+    so readers see either the old catalog or the new one; if the job fails,
+    its unpublished changes are discarded.
     
     Args:
         job_id (str): Unique job identifier.
-        products (List[Dict]): List of raw product dictionaries.
+        file_path (Path): Spooled catalog file.
+        filename (str): Original filename (used for type detection).
         field_mapping (FieldMapping): Mapping configuration for product fields.
         catalog_name (str): Name of the catalog.
     """
+    job = processing_jobs[job_id]
     try:
         # Update job status
-        processing_jobs[job_id]['status'] = 'processing'
-        processing_jobs[job_id]['current_step'] = 'Processing products...'
-        processing_jobs[job_id]['products_total'] = len(products)
-        
-        # Apply field mapping
-        logger.info(f"Applying field mapping for job {job_id}")
-        mapped_products = product_parser.apply_field_mapping(products, field_mapping)
-        
-        # Process and validate products
-        logger.info(f"Processing {len(mapped_products)} products for job {job_id}")
-        processed_products, invalid_products = product_processor.process_batch(
-            mapped_products,
-            batch_size=100,
-            skip_invalid=True
+        job['status'] = 'processing'
+        job['current_step'] = 'Processing products...'
+        job['products_invalid'] = 0
+        products_total = max(job.get('products_total', 0), 1)
+        
+        logger.info(f"Streaming products from {filename} for job {job_id}")
+        batches = product_parser.iter_mapped_batches(
+            file_path,
+            filename,
+            field_mapping,
+            batch_size=settings.product_batch_size
         )
         
-        if invalid_products:
-            processing_jobs[job_id]['errors'].extend([
-                f"Product {i+1}: {', '.join(err['errors'])}"
-                for i, err in enumerate(invalid_products)
-            ])
-        
-        if not processed_products:
+        # The current catalog is only replaced once the file yields a valid product
+        first_batch = await asyncio.to_thread(_next_processed_batch, batches, job_id)
+        if first_batch is None:
             raise ValueError("No valid products found after processing")
         
         # Clear existing products (single catalog mode)
         logger.info(f"Clearing existing products for job {job_id}")
-        metadata_store.clear_all_products()
-        index_manager.clear_products_only()  # Only clear products, keep documents intact
+        await asyncio.to_thread(metadata_store.clear_all_products)
         
-        # Process in batches
-        BATCH_SIZE = 100
-        total_batches = (len(processed_products) + BATCH_SIZE - 1) // BATCH_SIZE
+        checkpoint_every = settings.product_index_checkpoint_batches
         
+        # Collect categories and price range as batches go by
         categories = set()
-        prices = []
+        price_min = None
+        price_max = None
+        product_count = 0
         
-        for batch_idx in range(0, len(processed_products), BATCH_SIZE):
-            batch = processed_products[batch_idx:batch_idx + BATCH_SIZE]
-            batch_num = batch_idx // BATCH_SIZE + 1
-            
-            # Update progress
-            processing_jobs[job_id]['products_processed'] = min(batch_idx + BATCH_SIZE, len(processed_products))
-            processing_jobs[job_id]['progress'] = processing_jobs[job_id]['products_processed'] / len(processed_products)
-            processing_jobs[job_id]['current_step'] = f'Processing batch {batch_num}/{total_batches}...'
-            
-            # Collect categories and prices
-            for product in batch:
-                if product.get('category'):
-                    categories.add(product['category'])
-                if product.get('price') is not None:
-                    prices.append(product['price'])
-            
-            # Get embeddings for batch
-            logger.info(f"Getting embeddings for batch {batch_num}/{total_batches} ({len(batch)} products)")
-            embedding_texts = [p['embedding_text'] for p in batch]
-            embeddings = await get_embeddings(embedding_texts)
-            
-            # Add to database
-            for product, embedding in zip(batch, embeddings):
-                metadata_store.add_product(
-                    product_id=product['id'],
-                    name=product['name'],
-                    description=product['description'],
-                    category=product['category'],
-                    price=product['price'],
-                    rating=product['rating'],
-                    review_count=product['review_count'],
-                    image_url=product['image_url'],
-                    brand=product['brand'],
-                    embedding_text=product['embedding_text']
-                )
-            
-            # Add to product indexes
-            product_entries = [
-                {
-                    'id': product['id'],
-                    'name': product['name'],
-                    'description': product['description'],
-                    'category': product['category'],
-                    'price': product['price'],
-                    'rating': product['rating'],
-                    'review_count': product['review_count'],
-                    'brand': product['brand'],
-                    'image_url': product['image_url'],
-                    'embedding_text': product['embedding_text']
-                }
-                for product in batch
-            ]
-            index_manager.add_products(product_entries, embeddings)
-            
-            logger.info(f"Processed batch {batch_num}/{total_batches}")
+        # Parsing and embedding requests run ahead of indexing: at most `concurrency`
+        # requests in flight, and at most `concurrency` embedded batches waiting (in order)
+        concurrency = max(settings.product_embedding_concurrency, 1)
+        in_flight = asyncio.Semaphore(concurrency)
+        embedded: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
         
-        # Update catalog metadata
-        price_min = min(prices) if prices else None
-        price_max = max(prices) if prices else None
+        async def embed_batches():
+            try:
+                batch = first_batch
+                while batch is not None:
+                    await in_flight.acquire()
+                    task = asyncio.create_task(get_embeddings([p['embedding_text'] for p in batch]))
+                    task.add_done_callback(lambda _: in_flight.release())
+                    await embedded.put((batch, task))
+                    batch = await asyncio.to_thread(_next_processed_batch, batches, job_id)
+            except Exception as e:
+                # Parse errors surface in the indexing loop
+                await embedded.put(e)
+            else:
+                await embedded.put(None)
+        
+        async with index_lock:
+            # Only clear products, keep documents intact; published with the new catalog
+            await asyncio.to_thread(index_manager.clear_products_only, persist=False)
+            producer = asyncio.create_task(embed_batches())
+            try:
+                batch_num = 0
+                while (item := await embedded.get()) is not None:
+                    if isinstance(item, Exception):
+                        raise item
+                    batch, task = item
+                    embeddings = await task
+                    batch_num += 1
+                    
+                    # Add to database and to product indexes in memory (both in worker
+                    # threads); snapshots are published at checkpoints and at the end
+                    await asyncio.to_thread(metadata_store.add_products_bulk, batch)
+                    product_entries = [
+                        {
+                            'id': product['id'],
+                            'name': product['name'],
+                            'description': product['description'],
+                            'category': product['category'],
+                            'price': product['price'],
+                            'rating': product['rating'],
+                            'review_count': product['review_count'],
+                            'brand': product['brand'],
+                            'image_url': product['image_url'],
+                            'embedding_text': product['embedding_text']
+                        }
+                        for product in batch
+                    ]
+                    await asyncio.to_thread(index_manager.add_products, product_entries, embeddings, persist=False)
+                    
+                    for product in batch:
+                        if product.get('category'):
+                            categories.add(product['category'])
+                        price = product.get('price')
+                        if price is not None:
+                            price_min = price if price_min is None else min(price_min, price)
+                            price_max = price if price_max is None else max(price_max, price)
+                    product_count += len(batch)
+                    
+                    # Update progress (counts indexed products against rows in the file)
+                    job['products_processed'] = product_count
+                    job['progress'] = min(product_count / products_total, 1.0)
+                    job['current_step'] = f'Indexed batch {batch_num} ({product_count}/{products_total} products)'
+                    logger.info(f"Processed batch {batch_num} ({product_count} products)")
+                    
+                    if checkpoint_every and batch_num % checkpoint_every == 0:
+                        job['current_step'] = f'Saving checkpoint after batch {batch_num}...'
+                        await asyncio.to_thread(index_manager.save)
+                await producer
+                
+                job['current_step'] = 'Saving indexes...'
+                await asyncio.to_thread(index_manager.save)
+            except Exception:
+                # Keep the partial catalog out of the next snapshot another writer publishes
+                await asyncio.to_thread(index_manager.reload)
+                raise
+            finally:
+                producer.cancel()
+                while not embedded.empty():
+                    item = embedded.get_nowait()
+                    if isinstance(item, tuple):
+                        item[1].cancel()
         
-        metadata_store.update_catalog_metadata(
+        # Update catalog metadata
+        await asyncio.to_thread(
+            metadata_store.update_catalog_metadata,
             catalog_name=catalog_name,
-            product_count=len(processed_products),
+            product_count=product_count,
             categories=list(categories),
             price_range_min=price_min,
             price_range_max=price_max
         )
+        await notify_catalog_changed()
         
         # Update job status
-        processing_jobs[job_id]['status'] = 'complete'
-        processing_jobs[job_id]['progress'] = 1.0
-        processing_jobs[job_id]['current_step'] = 'Complete'
+        job['status'] = 'complete'
+        job['progress'] = 1.0
+        job['current_step'] = 'Complete'
         
-        logger.info(f"Job {job_id} completed: {len(processed_products)} products processed")
+        logger.info(f"Job {job_id} completed: {product_count} products processed")
         
     except Exception as e:
         logger.error(f"Error processing products for job {job_id}: {e}", exc_info=True)
-        processing_jobs[job_id]['status'] = 'error'
-        processing_jobs[job_id]['errors'].append(str(e))
-        processing_jobs[job_id]['current_step'] = f'Error: {str(e)}'
+        job['status'] = 'error'
+        job['errors'].append(str(e))
+        job['current_step'] = f'Error: {str(e)}'
+    finally:
+        file_path.unlink(missing_ok=True)
 
 
 # API Endpoints
@@ -434,6 +660,14 @@ async def upload_document(
                        f"Supported: {', '.join(settings.supported_formats_list)}"
             )
         
+        # Backpressure: turn uploads away while the processing queue is full
+        if document_jobs.is_full():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Document processing queue is full, please retry later",
+                headers={"Retry-After": str(settings.document_queue_retry_after_seconds)}
+            )
+        
         # Read file content
         try:
             content = await file.read()
@@ -492,7 +726,8 @@ async def upload_document(
         
         # Add to metadata store
         try:
-            metadata_store.add_document(
+            await asyncio.to_thread(
+                metadata_store.add_document,
                 document_id=document_id,
                 filename=file.filename,
                 file_type=file_ext,
@@ -514,10 +749,15 @@ async def upload_document(
                 detail=f"Failed to add document to metadata store: {str(e)}"
             )
         
-        # Process document asynchronously
+        # Queue document for processing
         try:
-            import asyncio
-            asyncio.create_task(process_document_async(document_id, file_path, file_ext))
+            document_jobs.submit(partial(
+                process_document_async,
+                document_id,
+                file_path,
+                file_ext,
+                queued_at=time.perf_counter()
+            ))
         except Exception as e:
             logger.error(f"Error creating async task: {e}", exc_info=True)
             # Don't fail the upload if async task creation fails
@@ -605,10 +845,10 @@ async def clear_all_indexes():
     """
     try:
         # Clear indexes
-        index_manager.clear_all()
+        await run_index_write(index_manager.clear_all)
         
         # Clear metadata store
-        metadata_store.clear_all()
+        await asyncio.to_thread(metadata_store.clear_all)
         
         logger.warning("All indexes and metadata cleared by user request")
         
@@ -656,7 +896,7 @@ async def delete_document(document_id: str):
     
     try:
         # Delete from indexes
-        index_manager.delete_document(document_id)
+        await run_index_write(index_manager.delete_document, document_id)
         
         # Delete file
         storage_path = Path(settings.document_storage_path) / document_id
@@ -665,7 +905,7 @@ async def delete_document(document_id: str):
             shutil.rmtree(storage_path)
         
         # Delete from metadata store
-        metadata_store.delete_document(document_id)
+        await asyncio.to_thread(metadata_store.delete_document, document_id)
         
         logger.info(f"Deleted document: {document_id}")
         
@@ -700,7 +940,16 @@ async def get_stats():
         total_documents=db_stats["total_documents"],
         total_chunks=index_stats["total_chunks"],
         faiss_vectors=index_stats["faiss_vectors"],
-        status_counts=db_stats["status_counts"]
+        status_counts=db_stats["status_counts"],
+        http_pools={
+            name: client.get_stats()
+            for name, client in (("embedding", embedding_client), ("gateway", gateway_client))
+            if client is not None
+        },
+        document_jobs={
+            "queue": document_jobs.get_stats(),
+            "parse_pool": parse_pool.get_stats()
+        }
     )
 
 
@@ -743,7 +992,9 @@ async def upload_products(
     """
     Upload product catalog file (CSV/JSON/XLSX).
     
-    Parses the file to detect columns and generates a suggested field mapping.
+    Spools the file to disk, scans it to detect columns and generates a
+    suggested field mapping. Products are streamed from the spooled file
+    during processing rather than held in memory.
     
     Args:
         file (UploadFile): The product catalog file.
@@ -763,51 +1014,65 @@ async def upload_products(
             )
         
         file_ext = Path(file.filename).suffix.lstrip('.').lower()
-        if file_ext not in ['csv', 'json', 'xlsx', 'xls']:
+        if file_ext == 'xls':
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unsupported file type: {file_ext}. Supported: csv, json, xlsx"
+                detail="Legacy .xls workbooks are not supported. Save the file as .xlsx or .csv and upload it again"
             )
-        
-        # Read file content
-        content = await file.read()
-        if len(content) == 0:
+        if file_ext not in ['csv', 'json', 'xlsx']:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="File is empty"
+                detail=f"Unsupported file type: {file_ext}. Supported: csv, json, xlsx"
             )
         
-        # Parse file
+        # Spool the upload to disk in chunks; rows are streamed from there later
+        job_id = str(uuid.uuid4())
+        spool_path = Path(settings.product_upload_path) / f"{job_id}{Path(file.filename).suffix.lower()}"
         try:
-            products, detected_columns, suggested_mapping = product_parser.parse_file(content, file.filename)
-        except Exception as e:
-            logger.error(f"Error parsing file: {e}", exc_info=True)
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Failed to parse file: {str(e)}"
-            )
-        
-        if not products:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No products found in file"
-            )
-        
-        # Ensure detected_columns are strings (not tuples)
-        detected_columns = [str(col) if not isinstance(col, str) else col for col in detected_columns]
+            with open(spool_path, 'wb') as spool:
+                await asyncio.to_thread(shutil.copyfileobj, file.file, spool, ProductParser.READ_CHUNK_BYTES)
+            
+            if spool_path.stat().st_size == 0:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="File is empty"
+                )
+            
+            # Scan file (row count and columns, one streaming pass)
+            try:
+                products_total, detected_columns = await asyncio.to_thread(
+                    product_parser.scan_file, spool_path, file.filename
+                )
+                suggested_mapping = product_parser.detect_field_mapping(detected_columns)
+                if not suggested_mapping.name:
+                    raise ValueError("Required field 'name' not found. Please provide field mapping.")
+            except Exception as e:
+                logger.error(f"Error parsing file: {e}", exc_info=True)
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Failed to parse file: {str(e)}"
+                )
+            
+            if not products_total:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="No products found in file"
+                )
+        except BaseException:
+            spool_path.unlink(missing_ok=True)
+            raise
         
-        # Generate job ID
-        job_id = str(uuid.uuid4())
+        logger.info(f"Spooled {products_total} products from {file.filename} for job {job_id}")
         
         # Store job info
         processing_jobs[job_id] = {
             'status': 'pending_confirmation',
             'filename': file.filename,
-            'products': products,
+            'file_path': spool_path,
             'detected_columns': detected_columns,
             'suggested_mapping': suggested_mapping,
             'products_processed': 0,
-            'products_total': len(products),
+            'products_total': products_total,
             'progress': 0.0,
             'current_step': 'Waiting for field mapping confirmation',
             'errors': []
@@ -822,16 +1087,11 @@ async def upload_products(
             job['field_mapping'] = suggested_mapping
             job['catalog_name'] = Path(file.filename).stem
             
-            # Apply field mapping
-            mapped_products = product_parser.apply_field_mapping(
-                products,
-                suggested_mapping
-            )
-            
-            # Start async processing
+            # Start async processing (field mapping is applied per batch)
             asyncio.create_task(process_products_async(
                 job_id,
-                mapped_products,
+                spool_path,
+                file.filename,
                 suggested_mapping,
                 job['catalog_name']
             ))
@@ -912,16 +1172,11 @@ async def confirm_product_mapping(
         job['field_mapping'] = field_mapping_obj
         job['catalog_name'] = catalog_name or Path(job['filename']).stem
         
-        # Apply field mapping
-        mapped_products = product_parser.apply_field_mapping(
-            job['products'],
-            field_mapping_obj
-        )
-        
-        # Start async processing
+        # Start async processing (field mapping is applied per batch)
         asyncio.create_task(process_products_async(
             job_id,
-            mapped_products,
+            job['file_path'],
+            job['filename'],
             field_mapping_obj,
             job['catalog_name']
         ))
@@ -1002,8 +1257,9 @@ async def clear_products():
         dict: Success message.
     """
     try:
-        metadata_store.clear_all_products()
-        index_manager.clear_all()
+        await asyncio.to_thread(metadata_store.clear_all_products)
+        await run_index_write(index_manager.clear_all)
+        await notify_catalog_changed()
         
         logger.warning("All products cleared by user request")
         
@@ -1081,24 +1337,39 @@ async def set_mode(mode: str = Form(...)):
     summary="Get catalog info",
     description="Get information about the current product catalog"
 )
-async def get_catalog_info():
+async def get_catalog_info(request: Request, response: Response):
     """
     Get catalog information.
     
+    The response carries the catalog version as an ETag; a request whose
+    ``If-None-Match`` matches it gets ``304 Not Modified`` without the
+    product statistics being computed.
+    
+    Args:
+        request (Request): Incoming request (for If-None-Match).
+        response (Response): Outgoing response (for the ETag header).
+    
     Returns:
         dict: Catalog metadata, product counts, price ranges, etc.
     """
     catalog_metadata = metadata_store.get_catalog_metadata()
-    product_stats = metadata_store.get_product_stats()
+    version = get_catalog_version(catalog_metadata)
+    etag = f'"{version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     
     if not catalog_metadata:
         return {
             "loaded": False,
+            "version": version,
             "message": "No catalog loaded"
         }
     
+    product_stats = metadata_store.get_product_stats()
     return {
         "loaded": True,
+        "version": version,
         "name": catalog_metadata['catalog_name'],
         "product_count": catalog_metadata['product_count'],
         "categories": catalog_metadata.get('categories', []),
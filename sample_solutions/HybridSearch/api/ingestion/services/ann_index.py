@@ -0,0 +1,236 @@
+"""
+ANN Index Builder
+Creates the configured FAISS index type for the unified dense index
+"""
+
+import logging
+from typing import Optional
+import numpy as np
+import faiss
+
+logger = logging.getLogger(__name__)
+
+# Supported values for the FAISS_INDEX_TYPE setting
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+class AnnIndexBuilder:
+    """
+    Build FAISS indexes of the configured type.
+
+    All index types use inner product on L2-normalized vectors (cosine
+    similarity) and store the unified row positions managed by
+    ``IndexManager`` as ids. Flat and HNSW indexes are wrapped in an
+    IndexIDMap2; IVF indexes keep the ids in their inverted lists
+    (``IndexIVF.add_with_ids``). IndexIDMap2 assumes ``remove_ids`` shifts the
+    remaining vectors down, which IVF lists do not, so wrapping them would
+    corrupt the id table on the first delete:
+
+    - ``flat``: exact search (IndexFlatIP).
+    - ``ivf_flat``: inverted lists over full vectors; needs training.
+    - ``ivf_pq``: inverted lists over product-quantized codes; needs training.
+    - ``hnsw``: graph index; no training, but vectors cannot be removed.
+
+    IVF indexes are only built once enough vectors exist to train the coarse
+    quantizer (``min_points_per_list`` per list); until then a flat index is used.
+    """
+
+    def __init__(
+        self,
+        embedding_dim: int,
+        index_type: str = "flat",
+        nlist: int = 1024,
+        pq_m: int = 64,
+        pq_nbits: int = 8,
+        hnsw_m: int = 32,
+        hnsw_ef_construction: int = 200,
+        min_points_per_list: int = 39,
+        max_training_vectors: int = 262144
+    ):
+        """
+        Initialize the builder.
+
+        Args:
+            embedding_dim (int): Vector dimension.
+            index_type (str): One of "flat", "ivf_flat", "ivf_pq", "hnsw".
+            nlist (int): Number of IVF lists.
+            pq_m (int): Number of PQ sub-quantizers (must divide embedding_dim).
+            pq_nbits (int): Bits per PQ sub-quantizer code.
+            hnsw_m (int): HNSW graph neighbours per node.
+            hnsw_ef_construction (int): HNSW candidate list size while building.
+            min_points_per_list (int): Training vectors required per IVF list.
+            max_training_vectors (int): Cap on vectors sampled for training.
+
+        Raises:
+            ValueError: If the index type or PQ layout is invalid.
+        """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported FAISS index type: {index_type} (expected one of {INDEX_TYPES})")
+        if index_type == "ivf_pq" and embedding_dim % pq_m != 0:
+            raise ValueError(f"PQ sub-quantizers ({pq_m}) must divide the embedding dimension ({embedding_dim})")
+
+        self.embedding_dim = embedding_dim
+        self.index_type = index_type
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.min_points_per_list = min_points_per_list
+        self.max_training_vectors = max_training_vectors
+
+    @property
+    def requires_training(self) -> bool:
+        """Whether the configured index type must be trained before use."""
+        return self.index_type in ("ivf_flat", "ivf_pq")
+
+    @property
+    def min_training_vectors(self) -> int:
+        """Number of vectors needed before the configured index can be trained."""
+        if not self.requires_training:
+            return 0
+        needed = self.nlist * self.min_points_per_list
+        if self.index_type == "ivf_pq":
+            # Each PQ codebook has 2^nbits centroids
+            needed = max(needed, (1 << self.pq_nbits) * self.min_points_per_list)
+        return needed
+
+    def can_build(self, num_vectors: int) -> bool:
+        """
+        Check whether the configured index can be built.
+
+        Args:
+            num_vectors (int): Number of vectors available for training.
+
+        Returns:
+            bool: True if no training is needed or enough vectors exist.
+        """
+        return num_vectors >= self.min_training_vectors
+
+    def build_flat(self) -> faiss.Index:
+        """
+        Create an empty exact index.
+
+        Returns:
+            faiss.Index: Empty IndexIDMap2 over an IndexFlatIP.
+        """
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedding_dim))
+
+    def build(self, training_vectors: Optional[np.ndarray] = None) -> faiss.Index:
+        """
+        Create an empty index of the configured type.
+
+        Args:
+            training_vectors (Optional[np.ndarray]): float32 vectors used to
+                train IVF indexes. Ignored by flat and HNSW indexes.
+
+        Returns:
+            faiss.Index: Empty (trained) index ready for ``add_with_ids``: an
+                IndexIDMap2 for flat and HNSW, a bare IndexIVF for IVF types.
+
+        Raises:
+            ValueError: If an IVF index is requested without enough training vectors.
+        """
+        d = self.embedding_dim
+
+        if self.index_type == "flat":
+            return self.build_flat()
+
+        if self.index_type == "hnsw":
+            inner = faiss.IndexHNSWFlat(d, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            inner.hnsw.efConstruction = self.hnsw_ef_construction
+            return faiss.IndexIDMap2(inner)
+
+        if training_vectors is None or not self.can_build(len(training_vectors)):
+            raise ValueError(
+                f"{self.index_type} index needs at least {self.min_training_vectors} training vectors"
+            )
+
+        quantizer = faiss.IndexFlatIP(d)
+        if self.index_type == "ivf_flat":
+            inner = faiss.IndexIVFFlat(quantizer, d, self.nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            inner = faiss.IndexIVFPQ(
+                quantizer, d, self.nlist, self.pq_m, self.pq_nbits, faiss.METRIC_INNER_PRODUCT
+            )
+
+        logger.info(f"Training {self.index_type} index (nlist={self.nlist}) on {len(training_vectors)} vectors")
+        inner.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+        return inner
+
+    def sample_training_rows(self, rows: np.ndarray, seed: int = 0) -> np.ndarray:
+        """
+        Pick the rows used to train an IVF index.
+
+        Args:
+            rows (np.ndarray): Candidate row positions (live rows).
+            seed (int): Random seed, so rebuilds are reproducible.
+
+        Returns:
+            np.ndarray: Sorted row positions (at most ``max_training_vectors``).
+        """
+        if len(rows) <= self.max_training_vectors:
+            return rows
+        rng = np.random.default_rng(seed)
+        return np.sort(rng.choice(rows, size=self.max_training_vectors, replace=False))
+
+    @staticmethod
+    def index_type_of(index: Optional[faiss.Index]) -> str:
+        """
+        Identify the type of an existing index.
+
+        Args:
+            index (Optional[faiss.Index]): Index, possibly wrapped in an IndexIDMap.
+
+        Returns:
+            str: One of INDEX_TYPES ("flat" for unknown or missing indexes).
+        """
+        if index is None:
+            return "flat"
+        inner = index
+        if isinstance(inner, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            inner = faiss.downcast_index(inner.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(inner, faiss.IndexIVFPQ):
+            return "ivf_pq"
+        if isinstance(inner, faiss.IndexIVF):
+            return "ivf_flat"
+        return "flat"
+
+    @staticmethod
+    def has_row_ids(index: Optional[faiss.Index]) -> bool:
+        """
+        Check whether an index stores row positions as ids in the current layout.
+
+        Args:
+            index (Optional[faiss.Index]): Index to check.
+
+        Returns:
+            bool: True for an IndexIDMap2 over a flat or HNSW index, or a bare
+                IndexIVF. False for position-addressed indexes and for IVF
+                indexes wrapped in an IndexIDMap2 (written by older versions),
+                which must be rebuilt.
+        """
+        if isinstance(index, faiss.IndexIVF):
+            return True
+        if isinstance(index, faiss.IndexIDMap2):
+            return not isinstance(faiss.downcast_index(index.index), faiss.IndexIVF)
+        return False
+
+    @classmethod
+    def supports_remove(cls, index: faiss.Index) -> bool:
+        """
+        Check whether vectors can be removed from an index.
+
+        HNSW graphs do not support removal; deleted rows stay in the graph
+        until the next rebuild and are skipped through their tombstoned metadata.
+        IVF indexes remove ids from their inverted lists directly.
+
+        Args:
+            index (faiss.Index): Index to check.
+
+        Returns:
+            bool: True if ``remove_ids`` is supported.
+        """
+        return cls.index_type_of(index) != "hnsw"
@@ -3,27 +3,102 @@ Text Chunker
 Splits text into chunks for embedding and retrieval
 """
 
+import bisect
 import logging
-from typing import List, Dict
+from itertools import accumulate
+from typing import Callable, List, Dict, Optional, Tuple
 import re
 
+try:
+    from tokenizers import Tokenizer
+except ImportError:  # optional: only needed for model tokenizer counts
+    Tokenizer = None
+
 logger = logging.getLogger(__name__)
 
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+# Token plus the whitespace before it; cumulative lengths give token end offsets
+SPACED_TOKEN_PATTERN = re.compile(r'\s*(?:\w+|[^\w\s])')
+SENTENCE_END_PATTERN = re.compile(r'[.!?]["\')\]]*\s+')
+PARAGRAPH_BREAK_PATTERN = re.compile(r'\n[^\S\n]*\n\s*')
+
+BOUNDARY_MODES = ("none", "sentence", "paragraph")
+# A boundary is used only if the chunk keeps at least this share of chunk_size
+MIN_BOUNDARY_FILL = 0.5
+
 
 class TextChunker:
-    """Chunk text into smaller pieces for processing"""
+    """
+    Chunk text into smaller pieces for processing.
     
-    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50):
+    Each page is tokenized once into token end offsets, and chunks are
+    slices of the original text between the first and last token's offsets,
+    so spacing and line breaks are kept and every chunk records
+    ``char_start``/``char_end`` in its page for citations. Optionally chunks
+    end at sentence or paragraph boundaries, and token counts can come from
+    the embedding model's tokenizer instead of the built-in word/punctuation
+    tokenizer.
+    """
+    
+    def __init__(
+        self,
+        chunk_size: int = 512,
+        chunk_overlap: int = 50,
+        boundary: str = "none",
+        tokenizer_name: Optional[str] = None
+    ):
         """
         Initialize chunker.
         
         Args:
             chunk_size (int): Maximum number of tokens per chunk.
             chunk_overlap (int): Number of tokens to overlap between chunks.
+            boundary (str): End chunks at "sentence" or "paragraph" boundaries
+                            when one is close enough, or "none".
+            tokenizer_name (Optional[str]): Hugging Face tokenizer used to count
+                tokens (needs the optional ``tokenizers`` package). None uses
+                the built-in word/punctuation tokenizer.
         """
+        if boundary not in BOUNDARY_MODES:
+            raise ValueError(f"Unknown chunk boundary '{boundary}'. Use one of: {', '.join(BOUNDARY_MODES)}")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        logger.info(f"TextChunker initialized with chunk_size={chunk_size}, chunk_overlap={chunk_overlap}")
+        self.boundary = boundary
+        self._boundary_patterns = {
+            "none": [],
+            "sentence": [PARAGRAPH_BREAK_PATTERN, SENTENCE_END_PATTERN],
+            "paragraph": [PARAGRAPH_BREAK_PATTERN]
+        }[boundary]
+        self.tokenizer = self._load_tokenizer(tokenizer_name) if tokenizer_name else None
+        logger.info(
+            f"TextChunker initialized with chunk_size={chunk_size}, chunk_overlap={chunk_overlap}, "
+            f"boundary={boundary}, tokenizer={tokenizer_name if self.tokenizer else 'simple'}"
+        )
+    
+    @staticmethod
+    def _load_tokenizer(name: str):
+        """
+        Load a Hugging Face tokenizer, falling back to the simple tokenizer.
+        
+        Args:
+            name (str): Tokenizer name or path (e.g. "BAAI/bge-base-en-v1.5").
+            
+        Returns:
+            Optional[Tokenizer]: The tokenizer, or None if it cannot be loaded.
+        """
+        if Tokenizer is None:
+            logger.warning(f"Tokenizer {name} requested but the 'tokenizers' package is not installed; using simple tokenizer")
+            return None
+        try:
+            tokenizer = Tokenizer.from_pretrained(name)
+        except Exception as e:
+            logger.warning(f"Could not load tokenizer {name}: {e}; using simple tokenizer")
+            return None
+        # Model tokenizers truncate to the model's max length (512 for BGE),
+        # which would cap token counts and offsets for long pages
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        return tokenizer
     
     @staticmethod
     def simple_tokenize(text: str) -> List[str]:
@@ -37,9 +112,76 @@ class TextChunker:
             List[str]: List of token strings.
         """
         # Split on whitespace and punctuation
-        tokens = re.findall(r'\w+|[^\w\s]', text)
+        tokens = TOKEN_PATTERN.findall(text)
         return tokens
     
+    def count_tokens(self, text: str) -> int:
+        """
+        Count tokens the way chunk sizes are measured.
+        
+        Args:
+            text (str): Input text.
+            
+        Returns:
+            int: Number of tokens.
+        """
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return len(TOKEN_PATTERN.findall(text))
+    
+    def _token_offsets(self, text: str) -> Tuple[List[int], Callable[[int], int]]:
+        """
+        Tokenize text into character offsets.
+        
+        Args:
+            text (str): Input text.
+            
+        Returns:
+            Tuple[List[int], Callable[[int], int]]: End offset of every token,
+                and a function giving the start offset of token i.
+        """
+        if self.tokenizer is not None:
+            offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+            return [end for _, end in offsets], lambda i: offsets[i][0]
+        
+        # One regex pass; token strings are only measured, never joined.
+        # Start offsets are only needed for the first token of each chunk.
+        pieces = SPACED_TOKEN_PATTERN.findall(text)
+        ends = list(accumulate(map(len, pieces)))
+        return ends, lambda i: ends[i] - len(pieces[i].lstrip())
+    
+    def _boundary_end(self, text: str, ends: List[int], token_start: Callable[[int], int], start: int, end: int) -> int:
+        """
+        Pull a chunk's end back to the last sentence or paragraph boundary in range.
+        
+        Only the tail of the chunk that may hold the boundary is scanned, so
+        boundary detection adds well under one pass over the text.
+        
+        Args:
+            text (str): Input text.
+            ends (List[int]): Token end offsets.
+            token_start (Callable[[int], int]): Start offset of a token.
+            start (int): First token of the chunk.
+            end (int): Token after the chunk's last token (before adjustment).
+        
+        Returns:
+            int: Adjusted end token (unchanged if no boundary keeps the chunk
+                 at least ``MIN_BOUNDARY_FILL`` of ``chunk_size`` long).
+        """
+        min_end = start + max(int(self.chunk_size * MIN_BOUNDARY_FILL), 1)
+        if min_end >= end:
+            return end
+        # From the last token a chunk must keep (it may be the sentence's final '.')
+        low, high = token_start(min_end - 1), token_start(end)
+        boundary = -1
+        for pattern in self._boundary_patterns:
+            for match in pattern.finditer(text, low, high):
+                boundary = max(boundary, match.end())
+        if boundary < 0:
+            return end
+        # The boundary ends where the next token starts
+        return bisect.bisect_right(ends, boundary)
+    
     def chunk_text(self, text: str, metadata: Dict = None) -> List[Dict]:
         """
         Chunk text into overlapping segments based on token count.
@@ -49,7 +191,8 @@ class TextChunker:
             metadata (Dict, optional): Optional metadata to attach to each chunk.
             
         Returns:
-            List[Dict]: List of chunk dictionaries with text, token counts, and metadata.
+            List[Dict]: List of chunk dictionaries with text, token counts,
+                        character offsets into ``text``, and metadata.
         """
         if not text.strip():
             return []
@@ -57,44 +200,39 @@ class TextChunker:
         metadata = metadata or {}
         
         # Tokenize
-        tokens = self.simple_tokenize(text)
-        logger.info(f"Tokenized text into {len(tokens)} tokens")
-        
-        if len(tokens) <= self.chunk_size:
-            # Text is smaller than chunk size, return as single chunk
-            return [{
-                "text": text,
-                "token_count": len(tokens),
-                **metadata
-            }]
+        ends, token_start = self._token_offsets(text)
+        total = len(ends)
+        logger.info(f"Tokenized text into {total} tokens")
+        if not total:
+            return []
         
         chunks = []
         start = 0
         
-        while start < len(tokens):
-            # Get chunk
-            end = start + self.chunk_size
-            chunk_tokens = tokens[start:end]
-            
-            # Reconstruct text from tokens
-            chunk_text = " ".join(chunk_tokens)
+        while True:
+            end = min(start + self.chunk_size, total)
+            if end < total and self._boundary_patterns:
+                end = self._boundary_end(text, ends, token_start, start, end)
             
+            char_start = token_start(start)
+            char_end = ends[end - 1]
             chunks.append({
-                "text": chunk_text,
-                "token_count": len(chunk_tokens),
+                "text": text[char_start:char_end],
+                "token_count": end - start,
                 "start_token": start,
                 "end_token": end,
+                "char_start": char_start,
+                "char_end": char_end,
                 **metadata
             })
             
-            # Move start position with overlap
-            start = end - self.chunk_overlap
-            
-            # Prevent infinite loop
-            if start >= len(tokens):
+            if end >= total:
                 break
+            
+            # Move start position with overlap (always advancing)
+            start = max(end - self.chunk_overlap, start + 1)
         
-        logger.debug(f"Created {len(chunks)} chunks from {len(tokens)} tokens")
+        logger.debug(f"Created {len(chunks)} chunks from {total} tokens")
         return chunks
     
     def chunk_document(
@@ -105,6 +243,8 @@ class TextChunker:
         """
         Chunk an entire document preserving page/section context.
         
+        Character offsets in each chunk refer to its page/section text.
+        
         Args:
             pages_or_sections (Dict[int, str]): Dictionary mapping page/section numbers to text.
             document_id (str): Unique document identifier.
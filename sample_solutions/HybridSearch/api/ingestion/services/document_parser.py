@@ -33,6 +33,54 @@ class DocumentParser:
         Returns:
             Dict[int, str]: Dictionary mapping page numbers (1-based) to text content.
             
+        Raises:
+            ValueError: If parsing fails.
+        """
+        pages = DocumentParser.parse_pdf_pages(file_path)
+        logger.info(f"Extracted {len(pages)} pages from PDF: {file_path.name}")
+        return pages
+    
+    @staticmethod
+    def count_pdf_pages(file_path: Path) -> int:
+        """
+        Count the pages of a PDF without extracting text.
+        
+        Args:
+            file_path (Path): Path to the PDF file.
+            
+        Returns:
+            int: Number of pages.
+            
+        Raises:
+            ValueError: If the PDF cannot be read.
+        """
+        try:
+            with open(file_path, 'rb') as file:
+                return len(PdfReader(file).pages)
+        except Exception as e:
+            logger.error(f"Error reading PDF {file_path}: {e}")
+            raise ValueError(f"Failed to parse PDF: {str(e)}")
+    
+    @staticmethod
+    def parse_pdf_pages(
+        file_path: Path,
+        first_page: int = 1,
+        last_page: Optional[int] = None
+    ) -> Dict[int, str]:
+        """
+        Extract text from a range of PDF pages.
+        
+        Page ranges of one PDF can be extracted in parallel (each call opens
+        the file itself).
+        
+        Args:
+            file_path (Path): Path to the PDF file.
+            first_page (int): First page to extract (1-based).
+            last_page (Optional[int]): Last page to extract (inclusive), None for the last page.
+            
+        Returns:
+            Dict[int, str]: Dictionary mapping page numbers (1-based) to text content.
+            
         Raises:
             ValueError: If parsing fails.
         """
@@ -40,12 +88,11 @@ class DocumentParser:
             pages = {}
             with open(file_path, 'rb') as file:
                 pdf_reader = PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    text = page.extract_text()
+                last_page = len(pdf_reader.pages) if last_page is None else min(last_page, len(pdf_reader.pages))
+                for page_num in range(first_page, last_page + 1):
+                    text = pdf_reader.pages[page_num - 1].extract_text()
                     if text.strip():
                         pages[page_num] = text
-            
-            logger.info(f"Extracted {len(pages)} pages from PDF: {file_path.name}")
             return pages
             
         except Exception as e:
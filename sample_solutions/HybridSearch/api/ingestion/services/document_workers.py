@@ -0,0 +1,267 @@
+"""
+Document Workers
+Process pool for document parsing and a bounded queue for document jobs
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from services.document_parser import DocumentParser
+
+logger = logging.getLogger(__name__)
+
+
+class ParsePool:
+    """
+    Process pool for CPU-heavy document parsing.
+
+    Parsing runs in worker processes so it neither blocks the event loop nor
+    competes for the GIL with request handling, and uses all cores. PDFs
+    longer than ``pdf_pages_per_task`` pages are split into page ranges
+    extracted in parallel.
+
+    On Linux the workers are forked when the pool starts (service startup),
+    before any request-handling threads exist; spawned (or forkserver)
+    workers would re-run the service module, indexes and all, in every
+    worker. A crashed worker breaks the pool, which is then replaced for the
+    next document. The replacement is forked from the running, multithreaded
+    service: a lock held by another thread at that moment stays locked in
+    the children. Logging locks are reset after fork and the workers only
+    run the parser, but a pool restart is the rare case that carries this
+    risk; restart the service if parse workers stop responding after one.
+    """
+
+    def __init__(self, parser: DocumentParser, workers: int = 0, pdf_pages_per_task: int = 25):
+        """
+        Initialize the pool (workers are started by ``start`` or on first use).
+
+        Args:
+            parser (DocumentParser): Parser whose methods run in the workers.
+            workers (int): Worker processes (0 = one per CPU core).
+            pdf_pages_per_task (int): PDF pages extracted per task.
+        """
+        self.parser = parser
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.pdf_pages_per_task = max(pdf_pages_per_task, 1)
+        start_methods = multiprocessing.get_all_start_methods()
+        self._mp_context = multiprocessing.get_context("fork") if "fork" in start_methods else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self.documents_parsed = 0
+        self.tasks = 0
+        self.failures = 0
+        self.restarts = 0
+        self.total_parse_ms = 0.0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """The process pool (created on first access)."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._mp_context)
+        return self._executor
+
+    def start(self):
+        """Start all worker processes now rather than on the first upload."""
+        futures = [self.executor.submit(os.getpid) for _ in range(self.workers)]
+        pids = {future.result() for future in futures}
+        logger.info(f"Parse pool started with {len(pids)} of {self.workers} worker processes")
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """
+        Replace a broken pool.
+
+        Tasks that were running in the same pool all fail with
+        BrokenProcessPool; only the first replaces it, so a new pool already
+        serving other uploads is not shut down.
+
+        Args:
+            broken (ProcessPoolExecutor): Pool the failed task was submitted to.
+        """
+        if self._executor is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.restarts += 1
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        """
+        Run a function in a worker process.
+
+        Args:
+            fn (Callable): Picklable function.
+            *args: Arguments for fn.
+
+        Returns:
+            Any: The function's result.
+
+        Raises:
+            ValueError: If the worker process died.
+        """
+        self.tasks += 1
+        executor = self.executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool as e:
+            logger.error(f"Parse worker died, restarting pool: {e}")
+            self._restart(executor)
+            raise ValueError(f"Parser worker process died: {e}")
+
+    async def parse_document(self, file_path: Path, file_type: str) -> Dict[int, str]:
+        """
+        Parse a document in the worker processes.
+
+        Args:
+            file_path (Path): Path to document file.
+            file_type (str): Type of file ('pdf', 'docx', 'xlsx', 'pptx', 'txt').
+
+        Returns:
+            Dict[int, str]: Dictionary mapping page/section numbers to text content.
+
+        Raises:
+            ValueError: If the file type is unsupported or parsing fails.
+        """
+        start = time.perf_counter()
+        try:
+            if file_type.lower().strip() == 'pdf':
+                page_count = await self._run(DocumentParser.count_pdf_pages, file_path)
+                if page_count > self.pdf_pages_per_task:
+                    ranges = [
+                        (first, min(first + self.pdf_pages_per_task - 1, page_count))
+                        for first in range(1, page_count + 1, self.pdf_pages_per_task)
+                    ]
+                    parts = await asyncio.gather(*(
+                        self._run(DocumentParser.parse_pdf_pages, file_path, first, last)
+                        for first, last in ranges
+                    ))
+                    pages = {}
+                    for part in parts:
+                        pages.update(part)
+                    logger.info(
+                        f"Extracted {len(pages)} pages from PDF: {file_path.name} "
+                        f"({len(ranges)} page ranges in parallel)"
+                    )
+                    return pages
+            return await self._run(self.parser.parse_document, file_path, file_type)
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.documents_parsed += 1
+            self.total_parse_ms += (time.perf_counter() - start) * 1000
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dict[str, Any]: Worker count, task counters and average parse time.
+        """
+        return {
+            "workers": self.workers,
+            "pdf_pages_per_task": self.pdf_pages_per_task,
+            "documents_parsed": self.documents_parsed,
+            "tasks": self.tasks,
+            "failures": self.failures,
+            "restarts": self.restarts,
+            "avg_parse_ms": round(self.total_parse_ms / self.documents_parsed, 2)
+            if self.documents_parsed else 0.0
+        }
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class DocumentJobQueue:
+    """
+    Bounded queue for document processing jobs.
+
+    At most ``max_concurrent`` documents are processed at a time; the rest
+    wait in FIFO order. Once ``max_pending`` jobs are waiting or running,
+    ``is_full`` tells the upload endpoint to turn new uploads away instead of
+    letting the backlog (and its files) grow without limit.
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_pending: int = 50):
+        """
+        Initialize the queue.
+
+        Args:
+            max_concurrent (int): Documents processed at the same time.
+            max_pending (int): Waiting plus running jobs before uploads are rejected (0 = unbounded).
+        """
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_pending = max(max_pending, 0)
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def is_full(self) -> bool:
+        """
+        Check whether new jobs should be rejected (counts the rejection).
+
+        Returns:
+            bool: True if ``max_pending`` jobs are already waiting or running.
+        """
+        if self.max_pending and self.pending >= self.max_pending:
+            self.rejected += 1
+            return True
+        return False
+
+    def submit(self, job: Callable[[], Any]) -> asyncio.Task:
+        """
+        Queue a job.
+
+        Args:
+            job (Callable[[], Any]): Coroutine function run once a slot is free.
+
+        Returns:
+            asyncio.Task: Task that waits for a slot and runs the job.
+        """
+        self.pending += 1
+
+        async def run():
+            try:
+                async with self._slot():
+                    return await job()
+            finally:
+                self.pending -= 1
+                self.completed += 1
+
+        return asyncio.create_task(run())
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        async with self._slots:
+            self.running += 1
+            try:
+                yield
+            finally:
+                self.running -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics.
+
+        Returns:
+            Dict[str, Any]: Limits and waiting/running/completed/rejected counts.
+        """
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_pending": self.max_pending,
+            "running": self.running,
+            "waiting": self.pending - self.running,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
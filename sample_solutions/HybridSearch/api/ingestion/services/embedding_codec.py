@@ -0,0 +1,158 @@
+"""
+Embedding Wire Format
+Encodes embedding matrices for the encode endpoints and decodes them into NumPy arrays
+
+This module is shared by the embedding service (encoding) and the services
+calling it (decoding) and is kept identical in each of them.
+
+Formats:
+    float:   JSON lists of floats in "embeddings" (the original format).
+    base64:  JSON with the row-major matrix as one base64 string of
+             little-endian float32 or float16 values in "embeddings_base64".
+    msgpack: application/msgpack body with the same raw bytes in "embeddings"
+             (needs the optional ``msgpack`` package on both sides).
+"""
+
+import base64
+import json
+import logging
+from typing import Any, Dict, Optional
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for the msgpack format
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_FORMATS = ("float", "base64", "msgpack")
+WIRE_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def sanitize(embeddings: Any) -> np.ndarray:
+    """
+    Convert embeddings to a float32 matrix with NaN and +/-Inf replaced by 0.
+
+    Args:
+        embeddings (Any): Sequence of equal-length vectors or an array.
+
+    Returns:
+        np.ndarray: float32 array of shape (n, dimensions).
+    """
+    matrix = np.array(embeddings, dtype=np.float32, ndmin=2)
+    np.nan_to_num(matrix, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    return matrix
+
+
+def encode_matrix(matrix: np.ndarray, dtype: str = "float32") -> bytes:
+    """
+    Serialize a matrix as row-major little-endian values.
+
+    Args:
+        matrix (np.ndarray): Embeddings of shape (n, dimensions).
+        dtype (str): "float32" or "float16".
+
+    Returns:
+        bytes: Raw matrix bytes.
+    """
+    return np.ascontiguousarray(matrix, dtype=WIRE_DTYPES[dtype]).tobytes()
+
+
+def decode_matrix(data: bytes, dtype: str, count: int) -> np.ndarray:
+    """
+    Deserialize raw matrix bytes.
+
+    Args:
+        data (bytes): Row-major little-endian values.
+        dtype (str): "float32" or "float16".
+        count (int): Number of rows.
+
+    Returns:
+        np.ndarray: float32 array of shape (count, dimensions). float32 input
+                    is returned as a read-only view of ``data``.
+
+    Raises:
+        ValueError: If the dtype is unknown or the size does not match.
+    """
+    if dtype not in WIRE_DTYPES:
+        raise ValueError(f"Unknown embedding dtype '{dtype}'")
+    values = np.frombuffer(data, dtype=WIRE_DTYPES[dtype])
+    if count == 0:
+        return values.astype(np.float32).reshape(0, 0)
+    if values.size % count:
+        raise ValueError(f"{values.size} values cannot be split into {count} embeddings")
+    return values.reshape(count, -1).astype(np.float32, copy=False)
+
+
+def resolve_format(encoding_format: str, dtype: str = "float32") -> Dict[str, str]:
+    """
+    Check a client's wire format settings and build the request fields for it.
+
+    Falls back to base64 if msgpack is requested but not installed.
+
+    Args:
+        encoding_format (str): "float", "base64" or "msgpack".
+        dtype (str): "float32" or "float16" (binary formats only).
+
+    Returns:
+        Dict[str, str]: ``encoding_format`` and ``dtype`` request fields.
+
+    Raises:
+        ValueError: If the format or dtype is unknown.
+    """
+    if encoding_format not in ENCODING_FORMATS:
+        raise ValueError(f"Unknown embedding encoding format '{encoding_format}'. Use one of: {', '.join(ENCODING_FORMATS)}")
+    if dtype not in WIRE_DTYPES:
+        raise ValueError(f"Unknown embedding dtype '{dtype}'. Use one of: {', '.join(WIRE_DTYPES)}")
+    if encoding_format == "msgpack" and msgpack is None:
+        logger.warning("msgpack embedding format requested but the 'msgpack' package is not installed; using base64")
+        encoding_format = "base64"
+    return {"encoding_format": encoding_format, "dtype": dtype}
+
+
+def pack(payload: Dict[str, Any]) -> bytes:
+    """
+    Serialize an encode response as msgpack.
+
+    Args:
+        payload (Dict[str, Any]): Response fields, with raw matrix bytes in "embeddings".
+
+    Returns:
+        bytes: msgpack body.
+
+    Raises:
+        ValueError: If msgpack is not installed.
+    """
+    if msgpack is None:
+        raise ValueError("msgpack encoding requires the 'msgpack' package")
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def decode_response(content_type: Optional[str], body: bytes) -> np.ndarray:
+    """
+    Decode an encode endpoint response in any of the formats.
+
+    Args:
+        content_type (Optional[str]): Response Content-Type header.
+        body (bytes): Response body.
+
+    Returns:
+        np.ndarray: float32 array of shape (text_count, dimensions).
+
+    Raises:
+        ValueError: If the body is msgpack and msgpack is not installed, or malformed.
+    """
+    if content_type and content_type.startswith(MSGPACK_MEDIA_TYPE):
+        if msgpack is None:
+            raise ValueError("Received a msgpack embedding response but the 'msgpack' package is not installed")
+        data = msgpack.unpackb(body, raw=False)
+        return decode_matrix(data["embeddings"], data["dtype"], data["text_count"])
+
+    data = json.loads(body)
+    if data.get("embeddings_base64") is not None:
+        return decode_matrix(base64.b64decode(data["embeddings_base64"]), data["dtype"], data["text_count"])
+    if not data["embeddings"]:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.array(data["embeddings"], dtype=np.float32)
@@ -0,0 +1,260 @@
+"""
+Embedding Store
+Persistent, memory-mapped storage of the vectors behind the FAISS index
+"""
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = "embeddings.bin"
+HEADER_FILE = "embeddings.json"
+# Data files written by compaction or clear: embeddings.<generation>.bin
+GENERATION_FILE_PATTERN = re.compile(r"^embeddings\.(\d{8})\.bin$")
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk store of normalized embeddings.
+
+    Row ``i`` holds the vector for metadata row ``i`` of the unified index,
+    including tombstoned rows until the next compaction. Vectors are kept in a
+    raw binary file (float32 or float16) that is memory-mapped for reads, so
+    FAISS indexes can be rebuilt without calling the embedding service again.
+
+    Appends only ever extend the data file. Compaction and clear renumber
+    rows, so they write a new generation file instead of rewriting the one
+    the published index snapshot refers to; the index manifest records which
+    file belongs to a snapshot, and older files are removed with
+    ``remove_stale_files`` once a snapshot using the new one is published.
+    """
+
+    # Rows read per block during compaction and index rebuilds
+    COPY_BLOCK_ROWS = 65536
+
+    def __init__(
+        self,
+        storage_path: str,
+        embedding_dim: int,
+        dtype: str = "float32",
+        data_file: Optional[str] = None
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            storage_path (str): Directory holding the store files.
+            embedding_dim (int): Vector dimension.
+            dtype (str): On-disk element type ("float32" or "float16").
+            data_file (Optional[str]): Data file recorded in the index manifest
+                (``embeddings.bin`` if None).
+
+        Raises:
+            ValueError: If dtype is unsupported.
+        """
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding store dtype: {dtype}")
+
+        self.storage_path = Path(storage_path)
+        self.storage_path.mkdir(parents=True, exist_ok=True)
+        self.data_path = self.storage_path / (data_file or DATA_FILE)
+        self.header_path = self.storage_path / HEADER_FILE
+
+        self.embedding_dim = embedding_dim
+        self.dtype = np.dtype(dtype)
+        self._mmap: Optional[np.memmap] = None
+
+        self._load_header()
+
+    def _load_header(self):
+        """
+        Load or create the header describing the data file.
+
+        An existing store keeps its own dtype; a store with a different
+        dimension is discarded since its vectors cannot be used.
+        """
+        if self.header_path.exists():
+            with open(self.header_path, 'r') as f:
+                header = json.load(f)
+            if header.get("dim") == self.embedding_dim:
+                self.dtype = np.dtype(header.get("dtype", self.dtype.name))
+                self._truncate_partial_row()
+                logger.info(f"Loaded embedding store with {len(self)} vectors ({self.dtype.name})")
+                return
+            logger.warning(
+                f"Embedding store dimension {header.get('dim')} does not match "
+                f"{self.embedding_dim}; starting a new store"
+            )
+            self.data_path.unlink(missing_ok=True)
+
+        self._write_header()
+        self.data_path.touch()
+
+    def _write_header(self):
+        """Persist dtype and dimension of the data file."""
+        with open(self.header_path, 'w') as f:
+            json.dump({"dim": self.embedding_dim, "dtype": self.dtype.name}, f)
+
+    @property
+    def data_file(self) -> str:
+        """Name of the data file (recorded in the index manifest)."""
+        return self.data_path.name
+
+    @property
+    def generation(self) -> int:
+        """Generation of the data file (0 for ``embeddings.bin``)."""
+        match = GENERATION_FILE_PATTERN.match(self.data_path.name)
+        return int(match.group(1)) if match else 0
+
+    def _next_data_path(self) -> Path:
+        return self.storage_path / f"embeddings.{self.generation + 1:08d}.bin"
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.embedding_dim * self.dtype.itemsize
+
+    def _truncate_partial_row(self):
+        """Drop a trailing partial row left by an interrupted append."""
+        if not self.data_path.exists():
+            self.data_path.touch()
+            return
+        size = self.data_path.stat().st_size
+        extra = size % self._row_bytes
+        if extra:
+            logger.warning(f"Truncating {extra} trailing bytes from embedding store")
+            with open(self.data_path, 'r+b') as f:
+                f.truncate(size - extra)
+
+    def __len__(self) -> int:
+        return self.data_path.stat().st_size // self._row_bytes if self.data_path.exists() else 0
+
+    def append(self, vectors: np.ndarray):
+        """
+        Append vectors to the end of the store.
+
+        Args:
+            vectors (np.ndarray): Array of shape (n, embedding_dim).
+        """
+        if len(vectors) == 0:
+            return
+        data = np.ascontiguousarray(vectors, dtype=self.dtype)
+        with open(self.data_path, 'ab') as f:
+            f.write(data.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._mmap = None
+
+    def vectors(self) -> np.ndarray:
+        """
+        Memory-map all stored vectors.
+
+        Returns:
+            np.ndarray: Read-only array of shape (len(self), embedding_dim)
+                        in the on-disk dtype.
+        """
+        count = len(self)
+        if count == 0:
+            return np.zeros((0, self.embedding_dim), dtype=self.dtype)
+        if self._mmap is None or self._mmap.shape[0] != count:
+            self._mmap = np.memmap(self.data_path, dtype=self.dtype, mode='r', shape=(count, self.embedding_dim))
+        return self._mmap
+
+    def read(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Read vectors as float32.
+
+        Args:
+            rows (Optional[np.ndarray]): Row positions to read (all rows if None).
+
+        Returns:
+            np.ndarray: float32 array of the requested vectors.
+        """
+        data = self.vectors()
+        if rows is not None:
+            data = data[rows]
+        return np.asarray(data, dtype=np.float32)
+
+    def iter_blocks(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Iterate over stored vectors in fixed-size blocks.
+
+        Yields:
+            Tuple[int, np.ndarray]: First row position of the block and the
+                                    block's vectors as float32.
+        """
+        data = self.vectors()
+        for start in range(0, len(data), self.COPY_BLOCK_ROWS):
+            yield start, np.asarray(data[start:start + self.COPY_BLOCK_ROWS], dtype=np.float32)
+
+    def compact(self, live: np.ndarray):
+        """
+        Copy the live rows, in order, into a new generation file and switch to it.
+
+        The previous file is left untouched for the published snapshot.
+
+        Args:
+            live (np.ndarray): Boolean mask over current rows.
+        """
+        data = self.vectors()
+        new_path = self._next_data_path()
+        tmp_path = new_path.with_suffix(".bin.tmp")
+        with open(tmp_path, 'wb') as f:
+            # Copy in blocks so large stores are never fully loaded into memory
+            for start in range(0, len(data), self.COPY_BLOCK_ROWS):
+                end = start + self.COPY_BLOCK_ROWS
+                f.write(np.ascontiguousarray(data[start:end][live[start:end]]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._mmap = None
+        os.replace(tmp_path, new_path)
+        self.data_path = new_path
+        logger.info(f"Compacted embedding store to {len(self)} vectors ({self.data_file})")
+
+    def resize(self, rows: int):
+        """
+        Truncate or zero-pad the store to a number of rows.
+
+        Used to realign the store with the metadata rows after an append
+        whose index save did not complete.
+
+        Args:
+            rows (int): Number of rows to keep.
+        """
+        count = len(self)
+        if rows < count:
+            self._mmap = None
+            with open(self.data_path, 'r+b') as f:
+                f.truncate(rows * self._row_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+        elif rows > count:
+            self.append(np.zeros((rows - count, self.embedding_dim), dtype=self.dtype))
+
+    def clear(self):
+        """Switch to a new, empty generation file."""
+        self._mmap = None
+        new_path = self._next_data_path()
+        with open(new_path, 'wb'):
+            pass
+        self.data_path = new_path
+        self._write_header()
+
+    def remove_stale_files(self):
+        """
+        Delete data files other than the current one.
+
+        Called once the index manifest refers to the current file, and on
+        startup to drop files of compactions that were never published.
+        """
+        for path in self.storage_path.glob("embeddings*.bin*"):
+            if path == self.data_path:
+                continue
+            if path.name == DATA_FILE or GENERATION_FILE_PATTERN.match(path.name) or path.suffix == ".tmp":
+                path.unlink(missing_ok=True)
+                logger.info(f"Removed stale embedding store file {path.name}")
@@ -6,10 +6,25 @@ Manages FAISS vector index and BM25 sparse index
 import logging
 import pickle
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import numpy as np
 import faiss
-from rank_bm25 import BM25Okapi
+from services.ann_index import AnnIndexBuilder
+from services.embedding_store import EmbeddingStore
+from services.metadata_records import (
+    RECORDS_FILE,
+    read_metadata_records,
+    write_metadata_records,
+    write_attribute_columns
+)
+from services.index_snapshots import (
+    IndexSnapshots,
+    FAISS_INDEX_FILE,
+    BM25_INDEX_FILE,
+    METADATA_FILE,
+    FILTERS_CACHE_FILE
+)
+from services.sparse_index import IncrementalBM25Index, INDEX_FORMAT
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +35,33 @@ class IndexManager:
     
     Handles creation, loading, saving, and updating of vector (FAISS) 
     and sparse (BM25) indexes for both documents and products.
+    
+    FAISS ids, metadata rows, BM25 documents and embedding store rows share
+    the same position. Deleted rows are removed from FAISS right away and
+    tombstoned elsewhere (metadata entry set to None); they are physically
+    removed once the tombstone ratio exceeds the compaction threshold, and the
+    FAISS index is rebuilt from the stored embeddings.
+    
+    The dense index type (flat, IVF-Flat, IVF-PQ or HNSW) comes from the
+    ``AnnIndexBuilder``. Indexes that need training start out flat and are
+    rebuilt as the configured type once enough vectors have been stored.
+    
+    Each save writes the document indexes as a new versioned snapshot and
+    publishes it through ``manifest.json`` (see ``IndexSnapshots``), so the
+    retrieval service can load and swap in a complete index set atomically.
+    The manifest also names the embedding store file whose rows match the
+    snapshot; compaction writes a new store file that only replaces the old
+    one once a snapshot referring to it is published.
     """
     
     def __init__(
         self,
         index_storage_path: str,
-        embedding_dim: int = 768
+        embedding_dim: int = 768,
+        compaction_threshold: float = 0.2,
+        embedding_store_dtype: str = "float32",
+        ann_index_builder: Optional[AnnIndexBuilder] = None,
+        snapshots_to_keep: int = 3
     ):
         """
         Initialize index manager.
@@ -33,17 +69,34 @@ class IndexManager:
         Args:
             index_storage_path (str): Path to store index files.
             embedding_dim (int): Dimension of embeddings (default: 768).
+            compaction_threshold (float): Tombstone ratio that triggers compaction.
+            embedding_store_dtype (str): On-disk dtype of stored embeddings
+                                         ("float32" or "float16").
+            ann_index_builder (Optional[AnnIndexBuilder]): Builder for the
+                                         dense index type (exact flat index if None).
+            snapshots_to_keep (int): Published index snapshots kept on disk.
         """
         self.index_storage_path = Path(index_storage_path)
         self.index_storage_path.mkdir(parents=True, exist_ok=True)
         
         self.embedding_dim = embedding_dim
+        self.compaction_threshold = compaction_threshold
+        self.ann_index_builder = ann_index_builder or AnnIndexBuilder(embedding_dim)
+        
+        # Versioned document index snapshots
+        self.snapshots = IndexSnapshots(str(self.index_storage_path), keep=snapshots_to_keep)
+        self.snapshot_version = 0
         
-        # Document index paths
-        self.faiss_index_path = self.index_storage_path / "faiss_index.bin"
-        self.bm25_index_path = self.index_storage_path / "bm25_index.pkl"
-        self.metadata_path = self.index_storage_path / "metadata.pkl"
-        self.filters_cache_path = self.index_storage_path / "filters_cache.pkl"
+        # Document index paths (set to the current snapshot on load; the
+        # root-level files are the pre-snapshot layout, read for migration)
+        self.faiss_index_path = self.index_storage_path / FAISS_INDEX_FILE
+        self.bm25_index_path = self.index_storage_path / BM25_INDEX_FILE
+        self.metadata_path = self.index_storage_path / METADATA_FILE
+        self.filters_cache_path = self.index_storage_path / FILTERS_CACHE_FILE
+        
+        # Embeddings behind the FAISS index, for rebuilds without re-embedding
+        self.embedding_store_dtype = embedding_store_dtype
+        self.embedding_store = self._open_embedding_store()
         
         # Product index paths (separate from documents)
         self.product_faiss_index_path = self.index_storage_path / "product_faiss_index.bin"
@@ -53,7 +106,7 @@ class IndexManager:
         
         # Initialize document indexes
         self.faiss_index = None
-        self.bm25_index = None
+        self.bm25_index = IncrementalBM25Index()
         self.metadata = []
         
         # Initialize product indexes (separate)
@@ -73,31 +126,86 @@ class IndexManager:
         self._load_indexes()
         self._load_product_indexes()
     
+    def _open_embedding_store(self) -> EmbeddingStore:
+        """
+        Open the embedding store file recorded in the manifest.
+        
+        Files not referenced by the manifest (left by unpublished compactions)
+        are removed.
+        
+        Returns:
+            EmbeddingStore: Store whose rows match the published snapshot
+                            (plus any rows appended since).
+        """
+        manifest = self.snapshots.read_manifest() or {}
+        store = EmbeddingStore(
+            str(self.index_storage_path),
+            self.embedding_dim,
+            dtype=self.embedding_store_dtype,
+            data_file=manifest.get("embedding_store")
+        )
+        store.remove_stale_files()
+        return store
+    
+    def reload(self):
+        """
+        Drop unpublished changes and reload the published document indexes.
+        
+        Used when a bulk load that defers publishing (``persist=False``)
+        fails part-way, so a later save does not publish its partial state.
+        """
+        self.faiss_index = None
+        self.bm25_index = IncrementalBM25Index()
+        self.metadata = []
+        self.filters_cache = {
+            "prices": [],
+            "categories": [],
+            "ratings": [],
+            "product_ids": []
+        }
+        self.embedding_store = self._open_embedding_store()
+        self._load_indexes()
+        logger.info(f"Reloaded index snapshot v{self.snapshot_version}, discarding unpublished changes")
+    
     def _load_indexes(self):
         """
         Load existing indexes from disk.
         
-        Initializes FAISS and BM25 indexes and loads metadata.
-        Creates fresh indexes if files are missing or corrupt.
+        Initializes FAISS and BM25 indexes and loads metadata from the
+        published snapshot, falling back to the root-level files written by
+        older versions. Creates fresh indexes if files are missing or corrupt.
         """
         try:
+            self.snapshot_version, snapshot_dir = self.snapshots.current()
+            if snapshot_dir is not None:
+                self._set_index_paths(snapshot_dir)
+                logger.info(f"Loading index snapshot v{self.snapshot_version} from {snapshot_dir}")
+            
             # Load FAISS index
             if self.faiss_index_path.exists():
                 self.faiss_index = faiss.read_index(str(self.faiss_index_path))
                 logger.info(f"Loaded FAISS index with {self.faiss_index.ntotal} vectors (d={self.faiss_index.d})")
             else:
-                # Create new FAISS index (IndexFlatIP for cosine similarity)
-                self.faiss_index = faiss.IndexFlatIP(self.embedding_dim)
+                self.faiss_index = self._new_faiss_index()
                 logger.info(f"Created new FAISS index (d={self.embedding_dim})")
             
             # Load BM25 index
             if self.bm25_index_path.exists():
                 with open(self.bm25_index_path, 'rb') as f:
-                    self.bm25_index = pickle.load(f)  # nosec B301 - indexes are written by this application
-                logger.info("Loaded BM25 index")
+                    bm25_state = pickle.load(f)  # nosec B301 - indexes are written by this application
+                if isinstance(bm25_state, dict) and bm25_state.get("format") == INDEX_FORMAT:
+                    self.bm25_index = IncrementalBM25Index.from_state(bm25_state)
+                else:
+                    # Legacy rank_bm25.BM25Okapi pickle: migrate once
+                    self.bm25_index = IncrementalBM25Index.from_bm25(bm25_state)
+                logger.info(f"Loaded BM25 index ({self.bm25_index.num_live} documents)")
             
-            # Load metadata
-            if self.metadata_path.exists():
+            # Load metadata (offset-table records; pickle in older layouts)
+            records_dir = self.metadata_path.parent
+            if (records_dir / RECORDS_FILE).exists():
+                self.metadata = read_metadata_records(records_dir)
+                logger.info(f"Loaded {len(self.metadata)} metadata entries")
+            elif self.metadata_path.exists():
                 with open(self.metadata_path, 'rb') as f:
                     self.metadata = pickle.load(f)  # nosec B301 - indexes are written by this application
                 logger.info(f"Loaded {len(self.metadata)} metadata entries")
@@ -108,11 +216,21 @@ class IndexManager:
                     self.filters_cache = pickle.load(f)  # nosec B301 - indexes are written by this application
                 logger.info(f"Loaded filters cache with {len(self.filters_cache.get('product_ids', []))} products")
             
+            if self.bm25_index.num_docs != len(self.metadata):
+                self._rebuild_bm25_index()
+            
+            if not AnnIndexBuilder.has_row_ids(self.faiss_index):
+                self._migrate_legacy_faiss_index()
+                self._align_embedding_store()
+            else:
+                self._align_embedding_store()
+                self._sync_faiss_index_type()
+            
         except Exception as e:
             logger.error(f"Error loading indexes: {e}")
             # Initialize new indexes
-            self.faiss_index = faiss.IndexFlatIP(self.embedding_dim)
-            self.bm25_index = None
+            self.faiss_index = self._new_faiss_index()
+            self.bm25_index = IncrementalBM25Index()
             self.metadata = []
             self.filters_cache = {
                 "prices": [],
@@ -121,6 +239,139 @@ class IndexManager:
                 "product_ids": []
             }
     
+    def _set_index_paths(self, index_dir: Path):
+        """
+        Point the document index paths at a directory.
+        
+        Args:
+            index_dir (Path): Snapshot (or legacy root) directory.
+        """
+        self.faiss_index_path = index_dir / FAISS_INDEX_FILE
+        self.bm25_index_path = index_dir / BM25_INDEX_FILE
+        self.metadata_path = index_dir / METADATA_FILE
+        self.filters_cache_path = index_dir / FILTERS_CACHE_FILE
+    
+    def _new_faiss_index(self) -> faiss.Index:
+        """
+        Create an empty ID-mapped FAISS index that needs no training.
+        
+        Inner product on L2-normalized vectors gives cosine similarity; ids
+        are unified row positions, so deletes are ``remove_ids`` calls.
+        
+        Returns:
+            faiss.Index: Empty index of the configured type, or a flat index
+                         if the configured type must be trained first.
+        """
+        if self.ann_index_builder.requires_training:
+            return self.ann_index_builder.build_flat()
+        return self.ann_index_builder.build()
+    
+    def _target_index_type(self) -> str:
+        """
+        Get the index type to use for the current number of live vectors.
+        
+        Returns:
+            str: Configured index type, or "flat" while there are too few
+                 vectors to train it.
+        """
+        if self.ann_index_builder.can_build(self.bm25_index.num_live):
+            return self.ann_index_builder.index_type
+        return "flat"
+    
+    def _sync_faiss_index_type(self) -> bool:
+        """
+        Rebuild the FAISS index if its type differs from the target type.
+        
+        Covers automatic training (a flat index is replaced by the configured
+        IVF index once enough vectors exist) and configuration changes.
+        
+        Returns:
+            bool: True if the index was rebuilt.
+        """
+        current = AnnIndexBuilder.index_type_of(self.faiss_index)
+        target = self._target_index_type()
+        if current == target:
+            return False
+        logger.info(f"Switching FAISS index from {current} to {target}")
+        self.rebuild_faiss_index()
+        return True
+    
+    def _rebuild_bm25_index(self):
+        """
+        Rebuild the BM25 index from metadata texts.
+        
+        Only used when the stored BM25 index is missing or does not line up
+        with the metadata rows.
+        """
+        logger.warning(
+            f"BM25 index has {self.bm25_index.num_docs} documents but metadata has "
+            f"{len(self.metadata)} rows; rebuilding BM25 from metadata"
+        )
+        self.bm25_index = IncrementalBM25Index()
+        self.bm25_index.add_documents(chunk["text"] if chunk else "" for chunk in self.metadata)
+        dead = [idx for idx, chunk in enumerate(self.metadata) if chunk is None]
+        self.bm25_index.delete_documents(dead, [""] * len(dead))
+    
+    def _migrate_legacy_faiss_index(self):
+        """
+        Convert a position-addressed FAISS index to an ID-mapped one.
+        
+        Vectors are reconstructed from the old flat index into the embedding
+        store (if it is empty), then the index is rebuilt from the store.
+        IVF indexes wrapped in an IndexIDMap2 by older versions are rebuilt
+        the same way (their vectors are already in the embedding store).
+        """
+        legacy_index = self.faiss_index
+        if isinstance(legacy_index, faiss.IndexIDMap2):
+            logger.info("Rebuilding IVF index written with an IndexIDMap2 wrapper")
+        else:
+            if len(self.embedding_store) == 0 and legacy_index.ntotal > 0:
+                self.embedding_store.append(legacy_index.reconstruct_n(0, legacy_index.ntotal))
+            if legacy_index.ntotal != len(self.metadata):
+                logger.warning(
+                    f"Legacy FAISS index has {legacy_index.ntotal} vectors but metadata has "
+                    f"{len(self.metadata)} rows; re-ingest to restore alignment"
+                )
+        self.rebuild_faiss_index()
+        logger.info(f"Migrated legacy FAISS index to ID-mapped index ({self.faiss_index.ntotal} vectors)")
+    
+    def rebuild_faiss_index(self):
+        """
+        Rebuild the FAISS index from the embedding store.
+        
+        Only live rows (non-tombstoned metadata) are added, with their row
+        position as id. No calls are made to the embedding service. IVF
+        indexes are trained on a sample of the stored live vectors.
+        """
+        live = np.array([chunk is not None for chunk in self.metadata], dtype=bool)
+        if len(self.embedding_store) < len(live):
+            logger.error(
+                f"Embedding store has {len(self.embedding_store)} vectors for "
+                f"{len(live)} metadata rows; missing rows are not indexed"
+            )
+            live = live[:len(self.embedding_store)]
+        
+        builder = self.ann_index_builder
+        live_rows = np.flatnonzero(live)
+        if builder.requires_training and builder.can_build(len(live_rows)):
+            training_rows = builder.sample_training_rows(live_rows)
+            index = builder.build(self.embedding_store.read(training_rows))
+        else:
+            index = self._new_faiss_index()
+        
+        for start, block in self.embedding_store.iter_blocks():
+            block_live = live[start:start + len(block)]
+            block = block[:len(block_live)]
+            ids = np.flatnonzero(block_live).astype(np.int64) + start
+            if len(ids):
+                index.add_with_ids(np.ascontiguousarray(block[block_live]), ids)
+        
+        self.faiss_index = index
+        logger.info(
+            f"Rebuilt {AnnIndexBuilder.index_type_of(index)} FAISS index from embedding store "
+            f"({index.ntotal} vectors)"
+        )
+    
     def _load_product_indexes(self):
         """Load existing product indexes from disk"""
         try:
@@ -155,34 +406,51 @@ class IndexManager:
     
     def _save_indexes(self):
         """
-        Save indexes to disk.
+        Save indexes to disk as a new snapshot.
         
-        Persists FAISS index, BM25 index, metadata, and cache to configured storage paths.
+        Persists FAISS index, BM25 index, metadata, and cache into a fresh
+        snapshot directory, then publishes it through the manifest. Files of
+        earlier snapshots are never overwritten.
         
         Raises:
             IOError: If saving fails.
         """
         try:
+            version = self.snapshot_version + 1
+            staging = self.snapshots.begin(version)
+            
             # Save FAISS index
-            faiss.write_index(self.faiss_index, str(self.faiss_index_path))
+            faiss.write_index(self.faiss_index, str(staging / FAISS_INDEX_FILE))
             logger.info(f"Saved FAISS index ({self.faiss_index.ntotal} vectors)")
             
-            # Save BM25 index
-            if self.bm25_index:
-                with open(self.bm25_index_path, 'wb') as f:
-                    pickle.dump(self.bm25_index, f)
-                logger.info("Saved BM25 index")
+            # Save BM25 index (plain postings arrays, readable by the retrieval service)
+            with open(staging / BM25_INDEX_FILE, 'wb') as f:
+                pickle.dump(self.bm25_index.to_state(), f)
+            logger.info(f"Saved BM25 index ({self.bm25_index.num_live} documents)")
             
-            # Save metadata
-            with open(self.metadata_path, 'wb') as f:
-                pickle.dump(self.metadata, f)
+            # Save metadata as mmap-friendly records plus filterable attribute columns
+            write_metadata_records(staging, self.metadata)
+            write_attribute_columns(staging, self.metadata)
             logger.info(f"Saved {len(self.metadata)} metadata entries")
             
             # Save filters cache (for products)
-            with open(self.filters_cache_path, 'wb') as f:
+            with open(staging / FILTERS_CACHE_FILE, 'wb') as f:
                 pickle.dump(self.filters_cache, f)
             logger.debug("Saved filters cache")
             
+            snapshot_dir = self.snapshots.publish(version, staging, {
+                "rows": len(self.metadata),
+                "live_rows": self.bm25_index.num_live,
+                "faiss_vectors": self.faiss_index.ntotal,
+                "faiss_index_type": AnnIndexBuilder.index_type_of(self.faiss_index),
+                "embedding_store": self.embedding_store.data_file,
+                "embedding_rows": len(self.embedding_store)
+            })
+            self.snapshot_version = version
+            self._set_index_paths(snapshot_dir)
+            # Store files from before a compaction or clear are no longer referenced
+            self.embedding_store.remove_stale_files()
+            
         except Exception as e:
             logger.error(f"Error saving indexes: {e}", exc_info=True)
             raise
@@ -190,7 +458,7 @@ class IndexManager:
     def add_chunks(
         self,
         chunks: List[Dict],
-        embeddings: List[List[float]],
+        embeddings: Union[np.ndarray, List[List[float]]],
         content_type: str = "document"
     ):
         """
@@ -200,7 +468,7 @@ class IndexManager:
         
         Args:
             chunks (List[Dict]): List of chunk dictionaries with text and metadata.
-            embeddings (List[List[float]]): List of embedding vectors corresponding to chunks.
+            embeddings (Union[np.ndarray, List[List[float]]]): Embedding vectors corresponding to chunks.
             content_type (str): Type of content ("document" or "product").
             
         Raises:
@@ -222,24 +490,73 @@ class IndexManager:
         # Add debug logging for dimensions
         logger.info(f"Adding embeddings to FAISS index: embedding_dim={embeddings_array.shape[1]}, index_dim={self.faiss_index.d}")
         
-        # Add to index
-        self.faiss_index.add(embeddings_array)
+        # Add to index (ids are the new metadata row positions) and persist vectors
+        self._add_vectors(embeddings_array)
         
         # Add metadata with content_type
         for chunk in chunks:
             chunk['content_type'] = content_type
             self.metadata.append(chunk)
         
-        # Rebuild BM25 index with all texts
-        all_texts = [chunk["text"] for chunk in self.metadata]
-        tokenized_corpus = [text.lower().split() for text in all_texts]
-        self.bm25_index = BM25Okapi(tokenized_corpus)
+        # Append new chunks to the BM25 index (only new texts are tokenized)
+        self.bm25_index.add_documents(chunk["text"] for chunk in chunks)
         
         logger.info(f"Added {len(chunks)} chunks to indexes (content_type={content_type})")
         
+        # Train the configured ANN index once enough vectors exist
+        self._sync_faiss_index_type()
+        
         # Save indexes
         self._save_indexes()
     
+    def _add_vectors(self, embeddings_array: np.ndarray):
+        """
+        Add normalized vectors for rows about to be appended to metadata.
+        
+        Args:
+            embeddings_array (np.ndarray): float32 array of shape (n, embedding_dim).
+        """
+        start = len(self.metadata)
+        ids = np.arange(start, start + len(embeddings_array), dtype=np.int64)
+        self._align_embedding_store()
+        self.embedding_store.append(embeddings_array)
+        self.faiss_index.add_with_ids(embeddings_array, ids)
+    
+    def _align_embedding_store(self):
+        """
+        Make embedding store row ``i`` belong to metadata row ``i`` again.
+        
+        The store is appended to before the snapshot is saved, so a failed
+        save (or a crash in between) leaves vectors for rows the published
+        metadata does not have. Those are truncated.
+        
+        Older versions compacted the store file in place before publishing;
+        a store holding exactly the live rows of tombstoned metadata is such
+        an unpublished compaction, and metadata and BM25 are compacted to
+        match it (and FAISS rebuilt) rather than shifting vectors onto the
+        wrong rows. Any other shortfall can only be trailing rows, which are
+        padded with zero vectors so the rows before them keep their vectors.
+        """
+        stored, rows = len(self.embedding_store), len(self.metadata)
+        if stored == rows:
+            return
+        if stored > rows:
+            logger.warning(f"Embedding store has {stored - rows} vectors without metadata rows; truncating")
+            self.embedding_store.resize(rows)
+            return
+        live_rows = sum(chunk is not None for chunk in self.metadata)
+        if live_rows < rows and stored == live_rows:
+            logger.warning(
+                f"Embedding store holds only the {stored} live rows of {rows}; "
+                f"compacting metadata to match an unpublished compaction"
+            )
+            self.metadata = [chunk for chunk in self.metadata if chunk is not None]
+            self.bm25_index.compact()
+            self.rebuild_faiss_index()
+            return
+        logger.error(f"Embedding store is missing its last {rows - stored} vectors; padding with zero vectors")
+        self.embedding_store.resize(rows)
+    
     def get_stats(self) -> Dict:
         """
         Get index statistics.
@@ -248,9 +565,13 @@ class IndexManager:
             Dict: Dictionary containing detailed index stats (counts, dims, etc.).
         """
         return {
-            "total_chunks": len(self.metadata),
+            "total_chunks": self.bm25_index.num_live,
             "faiss_vectors": self.faiss_index.ntotal if self.faiss_index else 0,
-            "bm25_enabled": self.bm25_index is not None,
+            "bm25_enabled": self.bm25_index.num_live > 0,
+            "tombstones": self.bm25_index.num_tombstones,
+            "stored_embeddings": len(self.embedding_store),
+            "faiss_index_type": AnnIndexBuilder.index_type_of(self.faiss_index),
+            "snapshot_version": self.snapshot_version,
             "embedding_dim": self.embedding_dim
         }
     
@@ -258,53 +579,78 @@ class IndexManager:
         """
         Delete all chunks for a document.
         
-        Removed chunks from metadata and rebuilds indexes (expensive operation).
+        Tombstones the document's rows; the indexes are compacted once enough
+        rows have been deleted.
         
         Args:
             document_id (str): Document ID to delete.
         """
-        # Find indices to remove
-        indices_to_remove = []
-        new_metadata = []
-        
-        for idx, chunk in enumerate(self.metadata):
-            if chunk.get("document_id") == document_id:
-                indices_to_remove.append(idx)
-            else:
-                new_metadata.append(chunk)
+        indices_to_remove = [
+            idx for idx, chunk in enumerate(self.metadata)
+            if chunk is not None and chunk.get("document_id") == document_id
+        ]
         
         if not indices_to_remove:
             logger.warning(f"No chunks found for document {document_id}")
             return
         
-        # For simplicity, rebuild indexes without deleted chunks
-        # In production, consider more efficient index update strategies
-        logger.info(f"Rebuilding indexes after deleting {len(indices_to_remove)} chunks")
+        self._tombstone_rows(indices_to_remove)
+        self._compact_if_needed()
         
-        # Rebuild FAISS index
-        self.faiss_index = faiss.IndexFlatIP(self.embedding_dim)
+        # Save indexes
+        self._save_indexes()
         
-        # Add back remaining chunks (this requires re-embedding, which we skip for now)
-        # In production, store embeddings with metadata and rebuild from those
-        self.metadata = new_metadata
+        logger.info(f"Deleted document {document_id} ({len(indices_to_remove)} chunks)")
+    
+    def _tombstone_rows(self, indices: List[int]):
+        """
+        Remove rows from FAISS and tombstone them in metadata and BM25.
         
-        # Rebuild BM25
-        if new_metadata:
-            all_texts = [chunk["text"] for chunk in new_metadata]
-            tokenized_corpus = [text.lower().split() for text in all_texts]
-            self.bm25_index = BM25Okapi(tokenized_corpus)
-        else:
-            self.bm25_index = None
+        The embedding store keeps the vectors until compaction; the retrieval
+        service skips rows whose metadata entry is None. HNSW indexes cannot
+        remove vectors, so deleted rows stay in the graph until compaction.
         
-        # Save indexes
-        self._save_indexes()
+        Args:
+            indices (List[int]): Row positions to delete.
+        """
+        if AnnIndexBuilder.supports_remove(self.faiss_index):
+            self.faiss_index.remove_ids(np.array(indices, dtype=np.int64))
+        texts = [self.metadata[idx]["text"] for idx in indices]
+        self.bm25_index.delete_documents(indices, texts)
+        for idx in indices:
+            self.metadata[idx] = None
+    
+    def _compact_if_needed(self):
+        """Compact indexes if the tombstone ratio exceeds the threshold."""
+        if self.bm25_index.tombstone_ratio > self.compaction_threshold:
+            self.compact()
+    
+    def compact(self):
+        """
+        Physically remove tombstoned rows from metadata, BM25 and the embedding store.
+        
+        Remaining rows keep their relative order and are renumbered; the FAISS
+        index is then rebuilt from the stored embeddings with the new ids. The
+        compacted vectors go to a new store file, so the published snapshot's
+        file stays valid until the caller publishes the compacted indexes.
+        """
+        live = np.array([chunk is not None for chunk in self.metadata], dtype=bool)
+        removed = int((~live).sum())
+        if removed == 0:
+            return
         
-        logger.info(f"Deleted document {document_id}")
+        self.embedding_store.compact(live)
+        self.metadata = [chunk for chunk in self.metadata if chunk is not None]
+        self.bm25_index.compact()
+        self.rebuild_faiss_index()
+        
+        logger.info(f"Compacted indexes: removed {removed} rows, {len(self.metadata)} remain")
     
     def clear_all(self):
         """Clear all indexes"""
-        self.faiss_index = faiss.IndexFlatIP(self.embedding_dim)
-        self.bm25_index = None
+        self.faiss_index = self._new_faiss_index()
+        self.embedding_store.clear()
+        self.bm25_index = IncrementalBM25Index()
         self.metadata = []
         
         # Clear product indexes
@@ -323,26 +669,25 @@ class IndexManager:
         self._save_product_indexes()
         logger.info("Cleared all indexes (documents and products)")
     
-    def clear_products_only(self):
+    def clear_products_only(self, persist: bool = True):
         """
         Clear only products from the unified index, keeping documents intact.
         
-        Filters metadata to remove product entries and rebuilds BM25.
-        Note: FAISS vectors remain but metadata filtering ensures only current content is returned.
-        """
-        # Count existing products before clearing
-        product_count = sum(1 for chunk in self.metadata if chunk.get('content_type') == 'product')
+        Tombstones product rows in metadata and BM25 without re-tokenizing the
+        remaining documents; indexes are compacted once enough rows are deleted.
         
-        # Filter out products, keep only documents
-        self.metadata = [chunk for chunk in self.metadata if chunk.get('content_type') != 'product']
+        Args:
+            persist (bool): Publish a snapshot. Catalog replacement passes
+                False so the clear is published together with the new products.
+        """
+        product_indices = [
+            idx for idx, chunk in enumerate(self.metadata)
+            if chunk is not None and chunk.get('content_type') == 'product'
+        ]
         
-        # Rebuild BM25 index with remaining content (documents only)
-        if self.metadata:
-            all_texts = [chunk["text"] for chunk in self.metadata]
-            tokenized_corpus = [text.lower().split() for text in all_texts]
-            self.bm25_index = BM25Okapi(tokenized_corpus)
-        else:
-            self.bm25_index = None
+        if product_indices:
+            self._tombstone_rows(product_indices)
+            self._compact_if_needed()
         
         # Clear filters cache (product-specific)
         self.filters_cache = {
@@ -353,22 +698,29 @@ class IndexManager:
         }
         
         # Save the updated metadata and BM25 index
-        # Note: FAISS index keeps old vectors but metadata filtering ensures correctness
-        self._save_indexes()
+        if persist:
+            self._save_indexes()
         
-        logger.info(f"Cleared {product_count} products from unified index. {len(self.metadata)} documents remain")
+        logger.info(
+            f"Cleared {len(product_indices)} products from unified index. "
+            f"{self.bm25_index.num_live} documents remain"
+        )
     
     def add_products(
         self,
         products: List[Dict],
-        embeddings: List[List[float]]
+        embeddings: Union[np.ndarray, List[List[float]]],
+        persist: bool = True
     ):
         """
         Add products to unified indexes (uses main index with content_type="product").
         
         Args:
             products (List[Dict]): List of product dictionaries with metadata.
-            embeddings (List[List[float]]): List of embedding vectors (one per product).
+            embeddings (Union[np.ndarray, List[List[float]]]): Embedding vectors (one per product).
+            persist (bool): Train the ANN index if due and publish a snapshot.
+                Bulk loads pass False and call ``save`` once at the end (or at
+                checkpoints) instead of publishing after every batch.
             
         Raises:
             ValueError: If products and embeddings counts mismatch.
@@ -412,20 +764,25 @@ class IndexManager:
         # Add to UNIFIED FAISS index (same as documents)
         embeddings_array = np.array(embeddings, dtype=np.float32)
         faiss.normalize_L2(embeddings_array)
-        self.faiss_index.add(embeddings_array)
+        self._add_vectors(embeddings_array)
         
         # Add metadata to unified metadata list
         for chunk in chunks:
             self.metadata.append(chunk)
             
-        # Rebuild unified BM25 index with all content (documents + products)
-        all_texts = [chunk["text"] for chunk in self.metadata]
-        tokenized_corpus = [text.lower().split() for text in all_texts]
-        self.bm25_index = BM25Okapi(tokenized_corpus)
+        # Append products to the unified BM25 index (documents + products)
+        self.bm25_index.add_documents(chunk["text"] for chunk in chunks)
         
         logger.info(f"Added {len(products)} products to unified indexes (content_type=product)")
         
-        # Save unified indexes
+        if persist:
+            self.save()
+    
+    def save(self):
+        """
+        Train the configured ANN index if enough vectors exist and publish a snapshot.
+        """
+        self._sync_faiss_index_type()
         self._save_indexes()
     
     def _save_product_indexes(self):
@@ -475,7 +832,7 @@ class IndexManager:
             Optional[Dict]: Product metadata dictionary or None if not found.
         """
         for chunk in self.metadata:
-            if chunk.get('metadata', {}).get('product_id') == product_id:
+            if chunk is not None and chunk.get('metadata', {}).get('product_id') == product_id:
                 return chunk.get('metadata')
         return None
 
@@ -0,0 +1,163 @@
+"""
+Index Snapshots
+Versioned, immutable index directories published through a manifest
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# File names inside a snapshot directory (shared with the retrieval service)
+FAISS_INDEX_FILE = "faiss_index.bin"
+BM25_INDEX_FILE = "bm25_index.pkl"
+METADATA_FILE = "metadata.pkl"  # pickled metadata (older snapshots; see metadata_records)
+FILTERS_CACHE_FILE = "filters_cache.pkl"
+
+MANIFEST_FILE = "manifest.json"
+SNAPSHOTS_DIR = "snapshots"
+
+
+def _fsync_dir(path: Path):
+    """Flush a directory entry so renames inside it survive a crash."""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class IndexSnapshots:
+    """
+    Write index files as versioned snapshots.
+
+    Every save goes to a fresh ``snapshots/vNNNNNNNN.tmp`` directory, which is
+    renamed to its final name once all files are written. ``manifest.json`` is
+    then replaced atomically to point at it. Readers (the retrieval service)
+    only follow the manifest, so they never see a partially written index,
+    and files of a published snapshot are never modified afterwards.
+    Older snapshots are pruned, keeping a few for readers still loading them.
+    """
+
+    def __init__(self, index_storage_path: str, keep: int = 3):
+        """
+        Initialize snapshot handling.
+
+        Args:
+            index_storage_path (str): Root index directory (holds the manifest).
+            keep (int): Number of published snapshots to keep on disk.
+        """
+        self.root = Path(index_storage_path)
+        self.snapshots_path = self.root / SNAPSHOTS_DIR
+        self.manifest_path = self.root / MANIFEST_FILE
+        self.keep = max(keep, 1)
+
+    def read_manifest(self) -> Optional[Dict]:
+        """
+        Read the current manifest.
+
+        Returns:
+            Optional[Dict]: Manifest contents, or None if nothing was published yet.
+        """
+        if not self.manifest_path.exists():
+            return None
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read index manifest {self.manifest_path}: {e}")
+            return None
+
+    def current(self) -> Tuple[int, Optional[Path]]:
+        """
+        Get the published snapshot.
+
+        Returns:
+            Tuple[int, Optional[Path]]: Version and snapshot directory
+                                        (0 and None if nothing was published).
+        """
+        manifest = self.read_manifest()
+        if not manifest:
+            return 0, None
+        snapshot_dir = self.root / manifest["snapshot"]
+        if not snapshot_dir.is_dir():
+            logger.error(f"Manifest points to missing snapshot {snapshot_dir}")
+            return int(manifest.get("version", 0)), None
+        return int(manifest["version"]), snapshot_dir
+
+    def begin(self, version: int) -> Path:
+        """
+        Create an empty staging directory for a new snapshot.
+
+        Args:
+            version (int): Version of the snapshot being written.
+
+        Returns:
+            Path: Staging directory to write index files into.
+        """
+        staging = self.snapshots_path / f"v{version:08d}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        return staging
+
+    def publish(self, version: int, staging: Path, stats: Dict) -> Path:
+        """
+        Finalize a staged snapshot and point the manifest at it.
+
+        Args:
+            version (int): Snapshot version.
+            staging (Path): Directory returned by ``begin``.
+            stats (Dict): Row/vector counts recorded in the manifest.
+
+        Returns:
+            Path: Published snapshot directory.
+        """
+        for path in staging.iterdir():
+            with open(path, 'rb') as f:
+                os.fsync(f.fileno())
+
+        snapshot_dir = self.snapshots_path / f"v{version:08d}"
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        os.replace(staging, snapshot_dir)
+        _fsync_dir(self.snapshots_path)
+
+        manifest = {
+            "version": version,
+            "snapshot": str(snapshot_dir.relative_to(self.root)),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **stats
+        }
+        tmp_manifest = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_manifest, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_manifest, self.manifest_path)
+        _fsync_dir(self.root)
+
+        logger.info(f"Published index snapshot v{version} ({snapshot_dir})")
+        self._prune()
+        return snapshot_dir
+
+    def _prune(self):
+        """Delete old snapshots and staging directories left by interrupted saves."""
+        published = sorted(
+            p for p in self.snapshots_path.iterdir()
+            if p.is_dir() and not p.name.endswith(".tmp")
+        )
+        for path in published[:-self.keep]:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.debug(f"Pruned index snapshot {path.name}")
+
+        for path in self.snapshots_path.glob("*.tmp"):
+            shutil.rmtree(path, ignore_errors=True)
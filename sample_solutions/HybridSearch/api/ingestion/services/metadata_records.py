@@ -0,0 +1,137 @@
+"""
+Metadata Records
+Compact on-disk metadata format shared with the retrieval service
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Files inside a snapshot directory
+RECORDS_FILE = "metadata.records"            # concatenated UTF-8 JSON records
+OFFSETS_FILE = "metadata.offsets.npy"        # int64 record offsets (rows + 1)
+ATTRIBUTES_FILE = "attributes.json"          # category / content type vocabularies
+ATTRIBUTE_COLUMNS = {
+    "live": "attr_live.npy",
+    "price": "attr_price.npy",
+    "rating": "attr_rating.npy",
+    "category": "attr_category.npy",
+    "content_type": "attr_content_type.npy",
+}
+
+
+def _to_float(value: Any) -> float:
+    """
+    Convert a metadata value to float, using NaN for missing or invalid values.
+
+    Args:
+        value (Any): Raw metadata value.
+
+    Returns:
+        float: Parsed value or NaN.
+    """
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def write_metadata_records(directory: Path, metadata: List[Optional[Dict]]):
+    """
+    Write metadata rows as an offset table plus concatenated JSON records.
+
+    Row ``i`` is ``records[offsets[i]:offsets[i + 1]]``; tombstoned rows
+    (None) are zero-length. Readers memory-map both files and decode only the
+    rows they return.
+
+    Args:
+        directory (Path): Snapshot directory.
+        metadata (List[Optional[Dict]]): Metadata rows, in index order.
+    """
+    offsets = np.zeros(len(metadata) + 1, dtype=np.int64)
+    position = 0
+    with open(directory / RECORDS_FILE, 'wb') as f:
+        for row, chunk in enumerate(metadata):
+            if chunk is not None:
+                record = json.dumps(chunk, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+                f.write(record)
+                position += len(record)
+            offsets[row + 1] = position
+    np.save(directory / OFFSETS_FILE, offsets)
+
+
+def write_attribute_columns(directory: Path, metadata: List[Optional[Dict]]):
+    """
+    Write the filterable attributes as one NumPy column per field.
+
+    Prices and ratings are floats (NaN when missing); categories and content
+    types are codes into the vocabularies stored in ``attributes.json``
+    (-1 when missing). The retrieval service memory-maps these columns to
+    build filter allow-lists without decoding any metadata record.
+
+    Args:
+        directory (Path): Snapshot directory.
+        metadata (List[Optional[Dict]]): Metadata rows, in index order.
+    """
+    n = len(metadata)
+    live = np.zeros(n, dtype=bool)
+    price = np.full(n, np.nan, dtype=np.float64)
+    rating = np.full(n, np.nan, dtype=np.float32)
+    category = np.full(n, -1, dtype=np.int32)
+    content_type = np.full(n, -1, dtype=np.int8)
+    category_codes: Dict[str, int] = {}
+    content_type_codes: Dict[str, int] = {}
+
+    for row, chunk in enumerate(metadata):
+        if chunk is None:
+            continue
+        live[row] = True
+        if chunk.get('content_type') is not None:
+            content_type[row] = content_type_codes.setdefault(chunk['content_type'], len(content_type_codes))
+        attributes = chunk.get('metadata') or {}
+        price[row] = _to_float(attributes.get('price'))
+        rating[row] = _to_float(attributes.get('rating'))
+        if attributes.get('category') is not None:
+            category[row] = category_codes.setdefault(attributes['category'], len(category_codes))
+
+    columns = {
+        "live": live,
+        "price": price,
+        "rating": rating,
+        "category": category,
+        "content_type": content_type,
+    }
+    for name, values in columns.items():
+        np.save(directory / ATTRIBUTE_COLUMNS[name], values)
+
+    with open(directory / ATTRIBUTES_FILE, 'w') as f:
+        json.dump({
+            "rows": n,
+            "categories": list(category_codes),
+            "content_types": list(content_type_codes)
+        }, f)
+
+
+def read_metadata_records(directory: Path) -> List[Optional[Dict]]:
+    """
+    Decode all metadata rows (the ingestion service keeps them in memory).
+
+    Args:
+        directory (Path): Snapshot directory.
+
+    Returns:
+        List[Optional[Dict]]: Metadata rows, None for tombstones.
+    """
+    offsets = np.load(directory / OFFSETS_FILE)
+    with open(directory / RECORDS_FILE, 'rb') as f:
+        data = f.read()
+    metadata: List[Optional[Dict]] = []
+    for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+        metadata.append(json.loads(data[start:end]) if end > start else None)
+    return metadata
@@ -3,38 +3,85 @@ Metadata Store
 SQLite database for document metadata and processing status
 """
 
+import functools
 import logging
+import queue
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 import json
 
 logger = logging.getLogger(__name__)
 
 
+def _writer(method: Callable) -> Callable:
+    """
+    Run a MetadataStore method under the store's write lock.
+
+    All writes share the one write connection, so calls from worker
+    threads are serialized.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _reader(method: Callable) -> Callable:
+    """
+    Run a MetadataStore query method with a pooled read connection.
+
+    The connection is passed to the method as ``conn``, after ``self``;
+    callers do not pass it.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._read_connection() as conn:
+            return method(self, conn, *args, **kwargs)
+    return wrapper
+
+
 class MetadataStore:
     """
     SQLite-based metadata storage.
     
     Manages persistence for document and product metadata, processing status,
     and catalog statistics using a local SQLite database.
+
+    All writes go through one connection; reads use a small pool of
+    read-only connections. In WAL mode readers see the last committed state
+    without waiting for the writer, so status and stats requests are not
+    held up by a catalog import. Writes wait for the write lock, which a
+    bulk insert holds for a whole batch, so async callers run them in a
+    thread (``asyncio.to_thread``) rather than on the event loop.
     """
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, read_pool_size: int = 4):
         """
         Initialize metadata store.
         
         Args:
             db_path (str): Path to SQLite database file.
+            read_pool_size (int): Number of read-only connections (0 reads
+                through the write connection).
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
         self.conn = None
+        self._write_lock = threading.RLock()
         self._connect()
         self._initialize_schema()
+
+        self.read_pool_size = read_pool_size
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(read_pool_size):
+            self._readers.put(self._open_reader())
     
     def _connect(self):
         """
@@ -81,6 +128,7 @@ class MetadataStore:
             except Exception as e:
                 logger.warning(f"Could not set synchronous mode: {e}")
             
+            self._apply_pragmas(self.conn)
             self.conn.commit()
             
             logger.info(f"Connected to database: {self.db_path}")
@@ -93,6 +141,59 @@ class MetadataStore:
             logger.error(f"Failed to connect to database {self.db_path}: {e}")
             raise
     
+    @staticmethod
+    def _apply_pragmas(conn: sqlite3.Connection):
+        """
+        Apply per-connection performance settings.
+
+        Args:
+            conn (sqlite3.Connection): Connection to configure.
+        """
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-32000")  # ~32 MB page cache
+        cursor.execute("PRAGMA mmap_size=268435456")  # Map up to 256 MB of the database file
+        cursor.execute("PRAGMA busy_timeout=10000")
+
+    def _open_reader(self) -> sqlite3.Connection:
+        """
+        Open a read-only connection for the read pool.
+
+        Returns:
+            sqlite3.Connection: Connection that rejects writes.
+        """
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            timeout=10.0
+        )
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn)
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def _read_connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a read-only connection from the pool.
+
+        Falls back to the write connection (under the write lock) if the
+        pool is disabled.
+
+        Yields:
+            sqlite3.Connection: Connection for SELECT statements.
+        """
+        if not self.read_pool_size:
+            with self._write_lock:
+                yield self.conn
+            return
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
     def _initialize_schema(self):
         """
         Initialize database schema.
@@ -113,10 +214,16 @@ class MetadataStore:
                 processing_status TEXT NOT NULL,
                 chunk_count INTEGER DEFAULT 0,
                 error_message TEXT,
-                metadata TEXT
+                metadata TEXT,
+                stage_timings TEXT
             )
         """)
         
+        # Databases created before per-stage timings were recorded
+        cursor.execute("PRAGMA table_info(documents)")
+        if "stage_timings" not in {row["name"] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE documents ADD COLUMN stage_timings TEXT")
+
         # Products table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS products (
@@ -179,6 +286,7 @@ class MetadataStore:
         self.conn.commit()
         logger.info("Database schema initialized")
     
+    @_writer
     def add_document(
         self,
         document_id: str,
@@ -217,12 +325,14 @@ class MetadataStore:
         self.conn.commit()
         logger.info(f"Added document: {document_id}")
     
+    @_writer
     def update_status(
         self,
         document_id: str,
         status: str,
         chunk_count: int = None,
-        error_message: str = None
+        error_message: str = None,
+        stage_timings: Dict[str, float] = None
     ):
         """
         Update document processing status.
@@ -232,6 +342,7 @@ class MetadataStore:
             status (str): New status ('pending', 'processing', 'completed', 'failed').
             chunk_count (int, optional): Number of chunks created.
             error_message (str, optional): Error message if failed.
+            stage_timings (Dict[str, float], optional): Milliseconds spent per processing stage.
         """
         cursor = self.conn.cursor()
         
@@ -246,6 +357,10 @@ class MetadataStore:
             query += ", error_message = ?"
             params.append(error_message)
         
+        if stage_timings is not None:
+            query += ", stage_timings = ?"
+            params.append(json.dumps(stage_timings))
+
         query += " WHERE document_id = ?"
         params.append(document_id)
         
@@ -254,7 +369,8 @@ class MetadataStore:
         
         logger.info(f"Updated document {document_id} status to: {status}")
     
-    def get_document(self, document_id: str) -> Optional[Dict]:
+    @_reader
+    def get_document(self, conn: sqlite3.Connection, document_id: str) -> Optional[Dict]:
         """
         Get document by ID
         
@@ -264,7 +380,7 @@ class MetadataStore:
         Returns:
             Document dictionary or None
         """
-        cursor = self.conn.cursor()
+        cursor = conn.cursor()
         cursor.execute(
             "SELECT * FROM documents WHERE document_id = ?",
             (document_id,)
@@ -274,11 +390,14 @@ class MetadataStore:
         if row:
             doc = dict(row)
             doc['metadata'] = json.loads(doc['metadata'])
+            doc['stage_timings'] = json.loads(doc['stage_timings']) if doc['stage_timings'] else None
             return doc
         return None
     
+    @_reader
     def list_documents(
         self,
+        conn: sqlite3.Connection,
         status: str = None,
         limit: int = 100
     ) -> List[Dict]:
@@ -292,7 +411,7 @@ class MetadataStore:
         Returns:
             List[Dict]: List of document dictionaries.
         """
-        cursor = self.conn.cursor()
+        cursor = conn.cursor()
         
         if status:
             cursor.execute(
@@ -312,10 +431,12 @@ class MetadataStore:
         for row in rows:
             doc = dict(row)
             doc['metadata'] = json.loads(doc['metadata'])
+            doc['stage_timings'] = json.loads(doc['stage_timings']) if doc['stage_timings'] else None
             documents.append(doc)
         
         return documents
     
+    @_writer
     def delete_document(self, document_id: str):
         """
         Delete document record
@@ -331,14 +452,15 @@ class MetadataStore:
         self.conn.commit()
         logger.info(f"Deleted document: {document_id}")
     
-    def get_stats(self) -> Dict:
+    @_reader
+    def get_stats(self, conn: sqlite3.Connection) -> Dict:
         """
         Get database statistics.
         
         Returns:
             Dict: Dictionary with total documents, status breakdowns, and chunk counts.
         """
-        cursor = self.conn.cursor()
+        cursor = conn.cursor()
         
         cursor.execute("SELECT COUNT(*) as total FROM documents")
         total = cursor.fetchone()['total']
@@ -358,6 +480,7 @@ class MetadataStore:
             "total_chunks": total_chunks
         }
     
+    @_writer
     def clear_all(self):
         """
         Clear all documents from the database
@@ -370,12 +493,15 @@ class MetadataStore:
         logger.warning("All documents cleared from database")
     
     def close(self):
-        """Close database connection"""
+        """Close database connections"""
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
         if self.conn:
             self.conn.close()
             logger.info("Database connection closed")
     
     # Product-related methods
+    @_writer
     def add_product(
         self,
         product_id: str,
@@ -427,6 +553,7 @@ class MetadataStore:
         self.conn.commit()
         logger.debug(f"Added product: {product_id}")
     
+    @_writer
     def add_product_attribute(
         self,
         product_id: str,
@@ -451,7 +578,72 @@ class MetadataStore:
         
         self.conn.commit()
     
-    def get_product(self, product_id: str) -> Optional[Dict]:
+    @_writer
+    def add_products_bulk(self, products: Iterable[Dict]) -> int:
+        """
+        Add many product records in a single transaction.
+
+        Uses one ``executemany`` and one commit for the whole batch instead
+        of a commit per product.
+
+        Args:
+            products (Iterable[Dict]): Processed products with the same fields
+                as ``add_product`` ('id', 'name', 'description', ...).
+
+        Returns:
+            int: Number of products written.
+        """
+        rows = [
+            (
+                product['id'],
+                product['name'],
+                product.get('description'),
+                product.get('category'),
+                product.get('price'),
+                product.get('rating'),
+                product.get('review_count'),
+                product.get('image_url'),
+                product.get('brand'),
+                product.get('embedding_text')
+            )
+            for product in products
+        ]
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO products
+                (id, name, description, category, price, rating, review_count,
+                 image_url, brand, embedding_text, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, rows)
+
+        logger.info(f"Added {len(rows)} products")
+        return len(rows)
+
+    @_writer
+    def add_product_attributes_bulk(self, attributes: Iterable[Tuple[str, str, str]]) -> int:
+        """
+        Add many product attributes in a single transaction.
+
+        Args:
+            attributes (Iterable[Tuple[str, str, str]]): (product_id, attribute_name,
+                attribute_value) tuples.
+
+        Returns:
+            int: Number of attributes written.
+        """
+        rows = list(attributes)
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO product_attributes
+                (product_id, attribute_name, attribute_value)
+                VALUES (?, ?, ?)
+            """, rows)
+
+        logger.debug(f"Added {len(rows)} product attributes")
+        return len(rows)
+
+    @_reader
+    def get_product(self, conn: sqlite3.Connection, product_id: str) -> Optional[Dict]:
         """
         Get product by ID
         
@@ -461,7 +653,7 @@ class MetadataStore:
         Returns:
             Product dictionary or None
         """
-        cursor = self.conn.cursor()
+        cursor = conn.cursor()
         cursor.execute(
             "SELECT * FROM products WHERE id = ?",
             (product_id,)
@@ -480,8 +672,10 @@ class MetadataStore:
             return product
         return None
     
+    @_reader
     def list_products(
         self,
+        conn: sqlite3.Connection,
         category: str = None,
         price_min: float = None,
         price_max: float = None,
@@ -503,7 +697,7 @@ class MetadataStore:
         Returns:
             List of product dictionaries
         """
-        cursor = self.conn.cursor()
+        cursor = conn.cursor()
         
         query = "SELECT * FROM products WHERE 1=1"
         params = []
@@ -544,14 +738,15 @@ class MetadataStore:
         
         return products
     
-    def get_product_stats(self) -> Dict:
+    @_reader
+    def get_product_stats(self, conn: sqlite3.Connection) -> Dict:
         """
         Get product statistics
         
         Returns:
             Dictionary with product statistics
         """
-        cursor = self.conn.cursor()
+        cursor = conn.cursor()
         
         cursor.execute("SELECT COUNT(*) as total FROM products")
         total = cursor.fetchone()['total']
@@ -580,6 +775,7 @@ class MetadataStore:
             } if rating_stats['min_rating'] else None
         }
     
+    @_writer
     def update_catalog_metadata(
         self,
         catalog_name: str,
@@ -618,14 +814,15 @@ class MetadataStore:
         self.conn.commit()
         logger.info(f"Updated catalog metadata: {catalog_name} ({product_count} products)")
     
-    def get_catalog_metadata(self) -> Optional[Dict]:
+    @_reader
+    def get_catalog_metadata(self, conn: sqlite3.Connection) -> Optional[Dict]:
         """
         Get current catalog metadata
         
         Returns:
             Catalog metadata dictionary or None
         """
-        cursor = self.conn.cursor()
+        cursor = conn.cursor()
         cursor.execute("SELECT * FROM catalog_metadata ORDER BY upload_date DESC LIMIT 1")
         row = cursor.fetchone()
         
@@ -636,6 +833,7 @@ class MetadataStore:
             return metadata
         return None
     
+    @_writer
     def clear_all_products(self):
         """
         Clear all products from the database
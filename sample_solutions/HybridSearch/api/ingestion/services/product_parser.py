@@ -4,11 +4,14 @@ Handles CSV/JSON parsing with field detection and mapping
 """
 
 import logging
+import codecs
 import csv
 import json
 import io
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
+import ijson
+import openpyxl
 import pandas as pd
 from schemas.product_schemas import FieldMapping
 
@@ -36,6 +39,9 @@ class ProductParser:
         'id': ['id', 'product_id', 'item_id', 'sku', 'asin', 'identifier']
     }
     
+    # Bytes read at a time when scanning spooled files
+    READ_CHUNK_BYTES = 1024 * 1024
+    
     def __init__(self):
         """Initialize product parser"""
         pass
@@ -48,14 +54,15 @@ class ProductParser:
             filename (str): Name of the file.
             
         Returns:
-            str: Detected type ('csv', 'json', 'xlsx', or 'unknown').
+            str: Detected type ('csv', 'json', 'xlsx', or 'unknown'). Legacy
+                 '.xls' workbooks are 'unknown': openpyxl only reads XLSX.
         """
         ext = Path(filename).suffix.lower()
         if ext == '.csv':
             return 'csv'
         elif ext == '.json':
             return 'json'
-        elif ext in ['.xlsx', '.xls']:
+        elif ext == '.xlsx':
             return 'xlsx'
         else:
             return 'unknown'
@@ -178,6 +185,227 @@ class ProductParser:
             logger.error(f"XLSX parse error: {e}")
             raise ValueError(f"Failed to parse XLSX file: {e}")
     
+    def _detect_text_encoding(self, file_path: Path) -> str:
+        """
+        Detect the text encoding of a spooled CSV file without loading it.
+        
+        Args:
+            file_path (Path): Path to the file.
+            
+        Returns:
+            str: 'utf-8-sig' if the whole file is valid UTF-8, else 'latin-1'.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            with open(file_path, 'rb') as f:
+                while chunk := f.read(self.READ_CHUNK_BYTES):
+                    decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+            return 'utf-8-sig'
+        except UnicodeDecodeError:
+            return 'latin-1'
+    
+    def iter_csv(self, file_path: Path) -> Iterator[Dict]:
+        """
+        Stream rows from a CSV file.
+        
+        Args:
+            file_path (Path): Path to the CSV file.
+            
+        Yields:
+            Dict: One product dictionary per row (empty values as None).
+        """
+        encoding = self._detect_text_encoding(file_path)
+        with open(file_path, newline='', encoding=encoding) as f:
+            for row in csv.DictReader(f):
+                # Convert empty strings to None
+                yield {k: (v if v and v.strip() else None) for k, v in row.items()}
+    
+    def _json_products_prefix(self, file_path: Path) -> Optional[str]:
+        """
+        Find where the product list sits in a JSON file, in one streaming pass.
+        
+        Handles simple lists, or wrapped objects (e.g. {'products': [...]}).
+        
+        Args:
+            file_path (Path): Path to the JSON file.
+            
+        Returns:
+            Optional[str]: ijson prefix of the product items, or None if the
+                           file holds a single product object.
+                           
+        Raises:
+            ValueError: If JSON structure is invalid/unsupported.
+        """
+        has_items = False
+        try:
+            with open(file_path, 'rb') as f:
+                for prefix, event, value in ijson.parse(f):
+                    if prefix != '':
+                        continue
+                    if event == 'start_array':
+                        return 'item'
+                    if event not in ('start_map', 'map_key', 'end_map'):
+                        raise ValueError("JSON must be an object or array")
+                    if event == 'map_key' and value == 'products':
+                        return 'products.item'
+                    if event == 'map_key' and value == 'items':
+                        has_items = True
+        except ijson.JSONError as e:
+            logger.error(f"JSON parse error: {e}")
+            raise ValueError(f"Invalid JSON format: {e}")
+        
+        # 'products' wins over 'items'; an object with neither is a single product
+        return 'items.item' if has_items else None
+    
+    def iter_json(self, file_path: Path) -> Iterator[Dict]:
+        """
+        Stream products from a JSON file (array items are decoded one at a time).
+        
+        Args:
+            file_path (Path): Path to the JSON file.
+            
+        Yields:
+            Dict: One product dictionary per item (non-object items are skipped).
+            
+        Raises:
+            ValueError: If JSON structure is invalid/unsupported.
+        """
+        prefix = self._json_products_prefix(file_path)
+        try:
+            with open(file_path, 'rb') as f:
+                if prefix is None:
+                    items = [json.load(f)]
+                else:
+                    items = ijson.items(f, prefix, use_float=True)
+                for product in items:
+                    if isinstance(product, dict):
+                        yield product
+        except (ijson.JSONError, json.JSONDecodeError) as e:
+            logger.error(f"JSON parse error: {e}")
+            raise ValueError(f"Invalid JSON format: {e}")
+    
+    def _xlsx_rows(self, file_path: Path) -> Iterator[tuple]:
+        """
+        Stream raw rows from the active sheet of an Excel file (read-only mode).
+        
+        Args:
+            file_path (Path): Path to the XLSX file.
+            
+        Yields:
+            tuple: Cell values per row, starting with the header row.
+            
+        Raises:
+            ValueError: If the workbook cannot be opened.
+        """
+        try:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            logger.error(f"XLSX parse error: {e}")
+            raise ValueError(f"Failed to parse XLSX file: {e}")
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _xlsx_columns(header: tuple) -> List[str]:
+        """Column names from an Excel header row (blank headers are named like pandas does)."""
+        return [
+            str(col) if col is not None else f"Unnamed: {i}"
+            for i, col in enumerate(header)
+        ]
+    
+    def iter_xlsx(self, file_path: Path) -> Iterator[Dict]:
+        """
+        Stream rows from an Excel (XLSX) file.
+        
+        Args:
+            file_path (Path): Path to the XLSX file.
+            
+        Yields:
+            Dict: One product dictionary per non-empty row (empty cells as None).
+        """
+        rows = self._xlsx_rows(file_path)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = self._xlsx_columns(header)
+        for row in rows:
+            values = [None if value == '' else value for value in row]
+            if all(value is None for value in values):
+                continue
+            yield dict(zip(columns, values))
+    
+    def iter_products(self, file_path: Path, filename: str) -> Iterator[Dict]:
+        """
+        Stream raw product dictionaries from a spooled catalog file.
+        
+        Only one row (or JSON item) is held in memory at a time.
+        
+        Args:
+            file_path (Path): Path to the spooled file.
+            filename (str): Original filename (used for type detection).
+            
+        Yields:
+            Dict: Raw product dictionaries.
+            
+        Raises:
+            ValueError: If the file type is unsupported or the file is malformed.
+        """
+        file_type = self.detect_file_type(filename)
+        if file_type == 'csv':
+            return self.iter_csv(file_path)
+        elif file_type == 'json':
+            return self.iter_json(file_path)
+        elif file_type == 'xlsx':
+            return self.iter_xlsx(file_path)
+        raise ValueError(f"Unsupported file type: {file_type}")
+    
+    def scan_file(self, file_path: Path, filename: str) -> tuple[int, List[str]]:
+        """
+        Count products and collect column names in one streaming pass.
+        
+        Args:
+            file_path (Path): Path to the spooled file.
+            filename (str): Original filename (used for type detection).
+            
+        Returns:
+            tuple[int, List[str]]: Number of products and the column names
+                                   (for JSON, every field seen in any product).
+                                   
+        Raises:
+            ValueError: If the file type is unsupported or the file is malformed.
+        """
+        file_type = self.detect_file_type(filename)
+        count = 0
+        if file_type == 'csv':
+            with open(file_path, newline='', encoding=self._detect_text_encoding(file_path)) as f:
+                reader = csv.DictReader(f)
+                columns = list(reader.fieldnames or [])
+                for _ in reader:
+                    count += 1
+        elif file_type == 'xlsx':
+            rows = self._xlsx_rows(file_path)
+            header = next(rows, None)
+            columns = self._xlsx_columns(header) if header is not None else []
+            for row in rows:
+                if any(value is not None and value != '' for value in row):
+                    count += 1
+        elif file_type == 'json':
+            # dict keeps first-seen order
+            fields: Dict[str, None] = {}
+            for product in self.iter_json(file_path):
+                fields.update(dict.fromkeys(product))
+                count += 1
+            columns = list(fields)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+        
+        columns = [str(col) if not isinstance(col, str) else col for col in columns]
+        logger.info(f"Scanned {file_type.upper()}: {count} products, {len(columns)} columns")
+        return count, columns
+    
     def detect_field_mapping(self, columns: List[str]) -> FieldMapping:
         """
         Auto-detect field mapping from column names.
@@ -277,10 +505,10 @@ class ProductParser:
             List[Dict]: List of normalized product dictionaries.
         """
         normalized_products = []
+        mapping_dict = field_mapping.model_dump(exclude_none=True)
         
         for product in products:
             normalized = {}
-            mapping_dict = field_mapping.model_dump(exclude_none=True)
             
             for target_field, source_field in mapping_dict.items():
                 if source_field in product:
@@ -291,4 +519,37 @@ class ProductParser:
             normalized_products.append(normalized)
         
         return normalized_products
+    
+    def iter_mapped_batches(
+        self,
+        file_path: Path,
+        filename: str,
+        field_mapping: FieldMapping,
+        batch_size: int = 100
+    ) -> Iterator[List[Dict]]:
+        """
+        Stream a spooled catalog file as batches of field-mapped products.
+        
+        Peak memory is bounded by the batch size, not the catalog size.
+        
+        Args:
+            file_path (Path): Path to the spooled file.
+            filename (str): Original filename (used for type detection).
+            field_mapping (FieldMapping): Mapping configuration.
+            batch_size (int): Products per batch.
+            
+        Yields:
+            List[Dict]: Normalized product dictionaries (see apply_field_mapping).
+            
+        Raises:
+            ValueError: If the file type is unsupported or the file is malformed.
+        """
+        batch = []
+        for product in self.iter_products(file_path, filename):
+            batch.append(product)
+            if len(batch) >= batch_size:
+                yield self.apply_field_mapping(batch, field_mapping)
+                batch = []
+        if batch:
+            yield self.apply_field_mapping(batch, field_mapping)
 
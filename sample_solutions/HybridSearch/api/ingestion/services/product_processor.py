@@ -6,12 +6,27 @@ Handles data validation, text preparation, and batch processing
 import logging
 import re
 import uuid
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+import numpy as np
 from schemas.product_schemas import ProductCreate
 
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns shared by the row-wise and columnar paths
+CURRENCY_SYMBOL_PATTERN = re.compile(r'[$€£¥₹]')
+CURRENCY_CODE_PATTERN = re.compile(r'\b(USD|EUR|GBP|JPY|INR)\b', re.IGNORECASE)
+DECIMAL_PATTERN = re.compile(r'[\d.]+')
+INTEGER_PATTERN = re.compile(r'\d+')
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Plain numeric strings the columnar path converts in bulk; anything else
+# ("$1,299", "4.5 out of 5", non-ASCII digits...) goes through the row-wise functions
+PLAIN_DECIMAL_PATTERN = re.compile(r'\s*(?:\d+(?:\.\d*)?|\.\d+)\s*', re.ASCII)
+PLAIN_INTEGER_PATTERN = re.compile(r'\s*\d{1,18}\s*', re.ASCII)
+
+TEXT_FIELDS = ('name', 'description', 'category', 'image_url', 'brand')
+
 
 class ProductProcessor:
     """
@@ -57,16 +72,16 @@ class ProductProcessor:
                 return None
             
             # Remove common currency symbols
-            price_str = re.sub(r'[$€£¥₹]', '', price_str)
+            price_str = CURRENCY_SYMBOL_PATTERN.sub('', price_str)
             
             # Remove "USD", "EUR", etc.
-            price_str = re.sub(r'\b(USD|EUR|GBP|JPY|INR)\b', '', price_str, flags=re.IGNORECASE)
+            price_str = CURRENCY_CODE_PATTERN.sub('', price_str)
             
             # Remove commas and other formatting
             price_str = price_str.replace(',', '').strip()
             
             # Extract number
-            match = re.search(r'[\d.]+', price_str)
+            match = DECIMAL_PATTERN.search(price_str)
             if match:
                 try:
                     value = float(match.group())
@@ -104,7 +119,7 @@ class ProductProcessor:
                 return None
             
             # Extract number
-            match = re.search(r'[\d.]+', rating_str)
+            match = DECIMAL_PATTERN.search(rating_str)
             if match:
                 try:
                     value = float(match.group())
@@ -142,7 +157,7 @@ class ProductProcessor:
             
             # Remove commas and extract number
             count_str = count_str.replace(',', '').strip()
-            match = re.search(r'\d+', count_str)
+            match = INTEGER_PATTERN.search(count_str)
             if match:
                 try:
                     value = int(match.group())
@@ -169,7 +184,7 @@ class ProductProcessor:
             return None
         
         # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
+        text = HTML_TAG_PATTERN.sub('', text)
         
         # Normalize whitespace
         text = ' '.join(text.split())
@@ -312,55 +327,253 @@ class ProductProcessor:
         
         return processed
     
+    def _normalize_column(
+        self,
+        values: List[Any],
+        normalize_value: Callable[[Any], Any],
+        plain_pattern: re.Pattern,
+        convert_plain: Callable[[np.ndarray], List[Any]]
+    ) -> List[Any]:
+        """
+        Normalize a whole column, matching a row-wise normalizer value for value.
+        
+        Each distinct string is handled once: strings matching
+        ``plain_pattern`` are converted together in one vectorized step, other
+        strings and non-string values go through ``normalize_value``.
+        
+        Args:
+            values (List[Any]): Raw column values.
+            normalize_value (Callable[[Any], Any]): Row-wise normalizer.
+            plain_pattern (re.Pattern): Strings that ``convert_plain`` handles.
+            convert_plain (Callable[[np.ndarray], List[Any]]): Converts an
+                array of stripped plain strings to normalized values.
+                
+        Returns:
+            List[Any]: Normalized values aligned with the input.
+        """
+        distinct: Dict[str, Any] = {}
+        plain: List[str] = []
+        for value in values:
+            if type(value) is str and value not in distinct:
+                if plain_pattern.fullmatch(value):
+                    plain.append(value)
+                    distinct[value] = None
+                else:
+                    distinct[value] = normalize_value(value)
+        if plain:
+            converted = convert_plain(np.array([value.strip() for value in plain], dtype=object))
+            distinct.update(zip(plain, converted))
+        
+        return [
+            distinct[value] if type(value) is str
+            else None if value is None
+            else normalize_value(value)
+            for value in values
+        ]
+    
+    def normalize_prices(self, values: List[Any]) -> List[Optional[float]]:
+        """
+        Columnar counterpart of ``normalize_price``.
+        
+        Args:
+            values (List[Any]): Raw price values.
+            
+        Returns:
+            List[Optional[float]]: Normalized prices aligned with the input.
+        """
+        def convert(plain: np.ndarray) -> List[Optional[float]]:
+            # Plain decimals have no sign, so they are never negative
+            return plain.astype(np.float64).tolist()
+        
+        return self._normalize_column(values, self.normalize_price, PLAIN_DECIMAL_PATTERN, convert)
+    
+    def normalize_ratings(self, values: List[Any]) -> List[Optional[float]]:
+        """
+        Columnar counterpart of ``normalize_rating``.
+        
+        Args:
+            values (List[Any]): Raw rating values.
+            
+        Returns:
+            List[Optional[float]]: Normalized ratings (0-5) aligned with the input.
+        """
+        def convert(plain: np.ndarray) -> List[Optional[float]]:
+            ratings = plain.astype(np.float64)
+            # If rating is > 5, assume it's out of 10 and scale down
+            ratings = np.where(ratings > 5, ratings / 2.0, ratings)
+            valid = (ratings >= 0) & (ratings <= 5)
+            return [rating if ok else None for rating, ok in zip(ratings.tolist(), valid.tolist())]
+        
+        return self._normalize_column(values, self.normalize_rating, PLAIN_DECIMAL_PATTERN, convert)
+    
+    def normalize_review_counts(self, values: List[Any]) -> List[Optional[int]]:
+        """
+        Columnar counterpart of ``normalize_review_count``.
+        
+        Args:
+            values (List[Any]): Raw review count values.
+            
+        Returns:
+            List[Optional[int]]: Normalized review counts aligned with the input.
+        """
+        def convert(plain: np.ndarray) -> List[Optional[int]]:
+            return plain.astype(np.int64).tolist()
+        
+        return self._normalize_column(values, self.normalize_review_count, PLAIN_INTEGER_PATTERN, convert)
+    
+    def _clean_text_column(self, values: List[Any]) -> Tuple[List[Optional[str]], List[bool]]:
+        """
+        Columnar counterpart of ``clean_text``, cleaning each distinct string once.
+        
+        Args:
+            values (List[Any]): Raw text values.
+            
+        Returns:
+            Tuple[List[Optional[str]], List[bool]]: Cleaned values, and flags for
+                values ``clean_text`` cannot handle (non-empty non-strings).
+        """
+        distinct: Dict[str, Optional[str]] = {}
+        cleaned: List[Optional[str]] = []
+        unsupported: List[bool] = []
+        for value in values:
+            if type(value) is str:
+                if value not in distinct:
+                    distinct[value] = self.clean_text(value)
+                cleaned.append(distinct[value])
+                unsupported.append(False)
+            else:
+                cleaned.append(None)
+                unsupported.append(bool(value))
+        return cleaned, unsupported
+    
+    def process_columns(self, products: List[Dict], generate_id: bool = True) -> List[Optional[Dict]]:
+        """
+        Process a batch of products column by column.
+        
+        Produces the same output as ``process_product`` for every row, with
+        fields normalized per column (see ``normalize_prices`` etc.) and
+        embedding text built once per distinct field combination.
+        
+        Args:
+            products (List[Dict]): Raw product dictionaries.
+            generate_id (bool): Whether to generate UUID if ID is missing.
+            
+        Returns:
+            List[Optional[Dict]]: Processed products aligned with the input; None
+                for rows with values only ``process_product`` handles (e.g. a
+                number in a text field).
+        """
+        if not products:
+            return []
+        
+        texts = {}
+        needs_row_path = [False] * len(products)
+        for field in TEXT_FIELDS:
+            texts[field], unsupported = self._clean_text_column([p.get(field) for p in products])
+            needs_row_path = [a or b for a, b in zip(needs_row_path, unsupported)]
+        prices = self.normalize_prices([p.get('price') for p in products])
+        ratings = self.normalize_ratings([p.get('rating') for p in products])
+        review_counts = self.normalize_review_counts([p.get('review_count') for p in products])
+        
+        embedding_texts: Dict[tuple, str] = {}
+        results: List[Optional[Dict]] = []
+        for i, product in enumerate(products):
+            if needs_row_path[i]:
+                results.append(None)
+                continue
+            
+            # Generate ID if missing
+            if not product.get('id') and generate_id:
+                product['id'] = f"prod_{uuid.uuid4().hex[:12]}"
+            
+            processed = {
+                'id': product.get('id'),
+                'name': texts['name'][i],
+                'description': texts['description'][i],
+                'category': texts['category'][i],
+                'price': prices[i],
+                'rating': ratings[i],
+                'review_count': review_counts[i],
+                'image_url': texts['image_url'][i],
+                'brand': texts['brand'][i]
+            }
+            
+            key = (processed['name'], processed['description'], processed['category'], processed['brand'])
+            if key not in embedding_texts:
+                embedding_texts[key] = self.create_embedding_text(
+                    name=processed['name'] or "",
+                    description=processed['description'],
+                    category=processed['category'],
+                    brand=processed['brand']
+                )
+            processed['embedding_text'] = embedding_texts[key]
+            results.append(processed)
+        
+        return results
+    
     def process_batch(
         self,
         products: List[Dict],
         batch_size: int = 100,
-        skip_invalid: bool = True
+        skip_invalid: bool = True,
+        columnar: bool = True
     ) -> Tuple[List[Dict], List[Dict]]:
         """
         Process products in batches.
         
         Args:
             products (List[Dict]): List of raw product dictionaries.
-            batch_size (int): Number of products per batch (unused in logic but kept for interface compatibility).
+            batch_size (int): Number of products normalized together on the columnar path.
             skip_invalid (bool): Whether to skip invalid products or raise error.
+            columnar (bool): Normalize column by column (``process_columns``);
+                rows it cannot handle fall back to ``process_product``.
             
         Returns:
             Tuple[List[Dict], List[Dict]]: (processed_products, invalid_products_with_errors).
         """
         processed = []
         invalid = []
+        batch_size = max(batch_size, 1)
         
-        for i, product in enumerate(products):
-            try:
-                # Process product
-                processed_product = self.process_product(product)
-                
-                # Validate
-                is_valid, errors = self.validate_product(processed_product)
+        for start in range(0, len(products), batch_size):
+            batch = products[start:start + batch_size]
+            columnar_results = [None] * len(batch)
+            if columnar:
+                try:
+                    columnar_results = self.process_columns(batch)
+                except Exception as e:
+                    logger.warning(f"Columnar processing failed, processing rows individually: {e}")
+            
+            for i, (product, processed_product) in enumerate(zip(batch, columnar_results), start):
+                try:
+                    # Process product
+                    if processed_product is None:
+                        processed_product = self.process_product(product)
+                    
+                    # Validate
+                    is_valid, errors = self.validate_product(processed_product)
+                    
+                    if is_valid:
+                        processed.append(processed_product)
+                    else:
+                        if skip_invalid:
+                            logger.warning(f"Product {i+1} invalid: {', '.join(errors)}")
+                            invalid.append({
+                                'product': product,
+                                'errors': errors
+                            })
+                        else:
+                            raise ValueError(f"Product {i+1} invalid: {', '.join(errors)}")
                 
-                if is_valid:
-                    processed.append(processed_product)
-                else:
+                except Exception as e:
+                    logger.error(f"Error processing product {i+1}: {e}")
                     if skip_invalid:
-                        logger.warning(f"Product {i+1} invalid: {', '.join(errors)}")
                         invalid.append({
                             'product': product,
-                            'errors': errors
+                            'errors': [str(e)]
                         })
                     else:
-                        raise ValueError(f"Product {i+1} invalid: {', '.join(errors)}")
-            
-            except Exception as e:
-                logger.error(f"Error processing product {i+1}: {e}")
-                if skip_invalid:
-                    invalid.append({
-                        'product': product,
-                        'errors': [str(e)]
-                    })
-                else:
-                    raise
+                        raise
         
         logger.info(f"Processed {len(processed)} products, {len(invalid)} invalid")
         return processed, invalid
@@ -0,0 +1,279 @@
+"""
+Incremental BM25 Index
+Inverted index that is updated in place as documents are added or deleted
+"""
+
+import logging
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Identifies the serialized state written to bm25_index.pkl
+INDEX_FORMAT = "inverted_index"
+INDEX_FORMAT_VERSION = 1
+
+
+def _int_array(values: np.ndarray) -> array:
+    """
+    Copy a NumPy integer array into a growable ``array('i')``.
+
+    Args:
+        values (np.ndarray): Integer values.
+
+    Returns:
+        array: int32 array with the same values.
+    """
+    result = array('i')
+    result.frombytes(np.ascontiguousarray(values, dtype=np.int32).tobytes())
+    return result
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text for BM25 (must match the retrieval service query tokenizer).
+
+    Args:
+        text (str): Input text.
+
+    Returns:
+        List[str]: Lowercased whitespace tokens.
+    """
+    return text.lower().split()
+
+
+class IncrementalBM25Index:
+    """
+    Incrementally maintained BM25 inverted index.
+
+    Each term keeps an append-only postings list (document ids and term
+    frequencies). Adding documents only tokenizes the new texts and appends to
+    the postings of their terms, updating document frequencies as it goes.
+    Deleting documents marks them as tombstones; their postings stay in place
+    until ``compact()`` drops them and renumbers the remaining documents.
+
+    Document ids are positions in the unified index, so they stay aligned with
+    the FAISS vectors and metadata rows managed by ``IndexManager``.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1 (float): BM25 term frequency saturation parameter.
+            b (float): BM25 length normalization parameter.
+            epsilon (float): IDF floor factor (as in BM25Okapi).
+        """
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        self.vocab: Dict[str, int] = {}
+        self.postings_docs: List[array] = []
+        self.postings_tfs: List[array] = []
+        self.df = array('i')          # live document frequency per term-id
+        self.doc_len = array('i')     # token count per document
+        self.live = bytearray()       # 1 = live, 0 = tombstone
+        self.num_live = 0
+
+    @property
+    def num_docs(self) -> int:
+        """Number of document slots, including tombstones."""
+        return len(self.doc_len)
+
+    @property
+    def num_tombstones(self) -> int:
+        """Number of deleted documents awaiting compaction."""
+        return self.num_docs - self.num_live
+
+    @property
+    def tombstone_ratio(self) -> float:
+        """Fraction of document slots that are tombstones."""
+        return self.num_tombstones / self.num_docs if self.num_docs else 0.0
+
+    def add_documents(self, texts: Iterable[str]) -> int:
+        """
+        Append documents to the index.
+
+        Only the new texts are tokenized; postings and document frequencies
+        of their terms are updated in place.
+
+        Args:
+            texts (Iterable[str]): Document texts, in index order.
+
+        Returns:
+            int: Number of documents added.
+        """
+        added = 0
+        for text in texts:
+            tokens = tokenize(text or "")
+            self._append_document(Counter(tokens), len(tokens))
+            added += 1
+        return added
+
+    def _append_document(self, frequencies: Dict[str, int], length: int):
+        """
+        Append one document given its term frequencies.
+
+        Args:
+            frequencies (Dict[str, int]): Term counts for the document.
+            length (int): Number of tokens in the document.
+        """
+        doc_id = len(self.doc_len)
+        for term, freq in frequencies.items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                term_id = len(self.vocab)
+                self.vocab[term] = term_id
+                self.postings_docs.append(array('i'))
+                self.postings_tfs.append(array('i'))
+                self.df.append(0)
+            self.postings_docs[term_id].append(doc_id)
+            self.postings_tfs[term_id].append(freq)
+            self.df[term_id] += 1
+        self.doc_len.append(length)
+        self.live.append(1)
+        self.num_live += 1
+
+    def delete_documents(self, doc_ids: Iterable[int], texts: Iterable[str]):
+        """
+        Mark documents as deleted (tombstones).
+
+        The texts of the deleted documents are tokenized to decrement the
+        document frequencies of their terms; postings are left untouched
+        until the next compaction.
+
+        Args:
+            doc_ids (Iterable[int]): Document ids to delete.
+            texts (Iterable[str]): Texts of those documents, in the same order.
+        """
+        for doc_id, text in zip(doc_ids, texts):
+            if not self.live[doc_id]:
+                continue
+            self.live[doc_id] = 0
+            self.num_live -= 1
+            for term in set(tokenize(text or "")):
+                term_id = self.vocab.get(term)
+                if term_id is not None:
+                    self.df[term_id] -= 1
+
+    def compact(self) -> np.ndarray:
+        """
+        Drop tombstoned documents and renumber the remaining ones.
+
+        Remaining documents keep their relative order, so the new ids match a
+        metadata list compacted with the same tombstones. Terms that no longer
+        occur in any document are removed from the vocabulary.
+
+        Returns:
+            np.ndarray: Mapping from old document id to new id (-1 for removed).
+        """
+        live = np.frombuffer(bytes(self.live), dtype=np.uint8).astype(bool)
+        remap = np.full(len(live), -1, dtype=np.int64)
+        remap[live] = np.arange(int(live.sum()))
+
+        vocab: Dict[str, int] = {}
+        postings_docs: List[array] = []
+        postings_tfs: List[array] = []
+        df = array('i')
+
+        for term, term_id in self.vocab.items():
+            if self.df[term_id] <= 0:
+                continue
+            docs = np.frombuffer(self.postings_docs[term_id], dtype=np.int32)
+            tfs = np.frombuffer(self.postings_tfs[term_id], dtype=np.int32)
+            keep = live[docs]
+            vocab[term] = len(vocab)
+            postings_docs.append(_int_array(remap[docs[keep]]))
+            postings_tfs.append(_int_array(tfs[keep]))
+            df.append(self.df[term_id])
+
+        removed = self.num_tombstones
+        self.vocab = vocab
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.df = df
+        self.doc_len = _int_array(np.frombuffer(self.doc_len, dtype=np.int32)[live])
+        self.live = bytearray(b"\x01" * len(self.doc_len))
+        self.num_live = len(self.doc_len)
+
+        logger.info(f"Compacted BM25 index: removed {removed} tombstones, {self.num_live} documents remain")
+        return remap
+
+    def to_state(self) -> Dict:
+        """
+        Export the index as plain Python/NumPy data (CSR postings layout).
+
+        The retrieval service loads this state without importing this class.
+
+        Returns:
+            Dict: Serializable index state.
+        """
+        lengths = np.fromiter((len(p) for p in self.postings_docs), dtype=np.int64, count=len(self.postings_docs))
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        empty = np.zeros(0, dtype=np.int32)
+        doc_ids = np.concatenate([np.frombuffer(p, dtype=np.int32) for p in self.postings_docs]) if self.postings_docs else empty
+        term_freqs = np.concatenate([np.frombuffer(p, dtype=np.int32) for p in self.postings_tfs]) if self.postings_tfs else empty
+
+        return {
+            "format": INDEX_FORMAT,
+            "version": INDEX_FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "vocab": self.vocab,
+            "indptr": indptr,
+            "doc_ids": doc_ids,
+            "term_freqs": term_freqs,
+            "df": np.frombuffer(self.df, dtype=np.int32).copy(),
+            "doc_len": np.frombuffer(self.doc_len, dtype=np.int32).copy(),
+            "live": np.frombuffer(bytes(self.live), dtype=np.uint8).astype(bool)
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "IncrementalBM25Index":
+        """
+        Restore an index exported by ``to_state``.
+
+        Args:
+            state (Dict): Serialized index state.
+
+        Returns:
+            IncrementalBM25Index: The restored index.
+        """
+        index = cls(k1=state["k1"], b=state["b"], epsilon=state["epsilon"])
+        indptr = state["indptr"]
+        doc_ids = state["doc_ids"].astype(np.int32, copy=False)
+        term_freqs = state["term_freqs"].astype(np.int32, copy=False)
+
+        index.vocab = dict(state["vocab"])
+        for term_id in range(len(index.vocab)):
+            start, end = indptr[term_id], indptr[term_id + 1]
+            index.postings_docs.append(_int_array(doc_ids[start:end]))
+            index.postings_tfs.append(_int_array(term_freqs[start:end]))
+        index.df = _int_array(state["df"])
+        index.doc_len = _int_array(state["doc_len"])
+        index.live = bytearray(state["live"].astype(np.uint8).tobytes())
+        index.num_live = int(state["live"].sum())
+        return index
+
+    @classmethod
+    def from_bm25(cls, bm25) -> "IncrementalBM25Index":
+        """
+        Migrate a legacy ``rank_bm25.BM25Okapi`` pickle to an incremental index.
+
+        Args:
+            bm25: A fitted BM25Okapi instance.
+
+        Returns:
+            IncrementalBM25Index: Index holding the same documents.
+        """
+        index = cls(k1=bm25.k1, b=bm25.b, epsilon=bm25.epsilon)
+        for frequencies, length in zip(bm25.doc_freqs, bm25.doc_len):
+            index._append_document(frequencies, length)
+        return index
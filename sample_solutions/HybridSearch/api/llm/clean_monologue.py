@@ -2,6 +2,7 @@
 Helper function to clean internal monologue from LLM responses
 """
 import re
+from typing import List, Optional
 
 
 def clean_internal_monologue(text: str) -> str:
@@ -65,4 +66,242 @@ def clean_internal_monologue(text: str) -> str:
     if not cleaned_paragraphs:
         return text.strip()
     
-    return '\n\n'.join(cleaned_paragraphs).strip()
\ No newline at end of file
+    return '\n\n'.join(cleaned_paragraphs).strip()
+
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+def _partial_tag_length(text: str, tag: str) -> int:
+    """
+    Length of the longest suffix of text that is a proper prefix of tag.
+    
+    Args:
+        text (str): Text received so far (lower-cased).
+        tag (str): Tag to look for.
+        
+    Returns:
+        int: Number of trailing characters that may start the tag.
+    """
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+class MonologueFilter:
+    """
+    Incremental counterpart of the service's ``clean_internal_monologue``.
+    
+    Streamed LLM output is fed in as it arrives and only the text that the
+    batch cleaner would keep is passed on, so answers can be shown while they
+    are generated:
+    
+    1. ``<think>...</think>`` blocks are dropped, including tags split
+       across chunks.
+    2. Each paragraph is held back only until it can be classified (its
+       first characters decide whether it is internal monologue); kept
+       paragraphs are then streamed as they grow, skipped ones are dropped.
+       Like the batch cleaner, a thinking paragraph skips everything up to
+       the next header or list.
+    
+    If nothing would be kept, ``flush`` returns the same fallback as the
+    batch cleaner. The batch cleaner stays authoritative for the final
+    answer; this filter only drives the live preview.
+    """
+    
+    # Same rules as the paragraph filter in main.clean_internal_monologue
+    THINKING_PATTERNS = [
+        r'^okay,?\s+let\'?s',
+        r'^first,?\s+i\s',
+        r'^i\s+need\s+to',
+        r'^i\s+should',
+        r'^i\s+will',
+        r'^i\'ll',
+        r'^starting\s+with',
+        r'^putting\s+this\s+together',
+        r'^the\s+user\s+(wants|is\s+asking)',
+        r'^looking\s+at',
+        r'^going\s+through',
+        r'^analyzing',
+        r'^from\s+what\s+i\s+can\s+see',
+    ]
+    FIRST_PERSON_PATTERN = r'^(i\s|my\s|we\s|our\s)'
+    FIRST_PERSON_MAX_WORDS = 50
+    # Characters needed before a paragraph prefix can be matched reliably
+    DECISION_CHARS = 32
+    
+    def __init__(self):
+        self._raw = ""              # text not yet checked for think tags
+        self._in_think = False
+        self._think_text = ""       # content of an unclosed think block
+        self._paragraph = ""        # current paragraph (after think removal)
+        self._emitted = 0           # characters of the current paragraph already sent
+        self._decision: Optional[bool] = None
+        self._skip_mode = False
+        self._emitted_any = False
+        self._paragraphs: List[str] = []  # all complete paragraphs (for the fallback)
+    
+    def feed(self, text: str) -> str:
+        """
+        Process the next piece of streamed output.
+        
+        Args:
+            text (str): Newly generated text.
+            
+        Returns:
+            str: Text that can be shown now (may be empty).
+        """
+        return self._feed_visible(self._strip_think(text))
+    
+    def flush(self) -> str:
+        """
+        Finish the stream.
+        
+        Returns:
+            str: Remaining text to show, or the batch cleaner's fallback if
+                 everything was filtered out.
+        """
+        visible = self._raw
+        self._raw = ""
+        if self._in_think:
+            # Unclosed think block: the batch cleaner keeps it verbatim
+            visible = THINK_OPEN + self._think_text + visible
+            self._in_think = False
+        out = self._feed_visible(visible)
+        out += self._finish_paragraph(complete=True)
+        
+        if not self._emitted_any:
+            for para in self._paragraphs:
+                para_stripped = para.strip()
+                if len(para_stripped) > 100 and not self._is_thinking(para_stripped.lower()):
+                    return out + para_stripped
+            return out + '\n\n'.join(self._paragraphs).strip()
+        return out
+    
+    def _strip_think(self, text: str) -> str:
+        """Remove think blocks, holding back a possibly split tag."""
+        self._raw += text
+        out = []
+        while self._raw:
+            lower = self._raw.lower()
+            if self._in_think:
+                end = lower.find(THINK_CLOSE)
+                if end == -1:
+                    hold = _partial_tag_length(lower, THINK_CLOSE)
+                    self._think_text += self._raw[:len(self._raw) - hold]
+                    self._raw = self._raw[len(self._raw) - hold:]
+                    break
+                self._raw = self._raw[end + len(THINK_CLOSE):]
+                self._in_think = False
+                self._think_text = ""
+            else:
+                start = lower.find(THINK_OPEN)
+                if start == -1:
+                    hold = _partial_tag_length(lower, THINK_OPEN)
+                    out.append(self._raw[:len(self._raw) - hold])
+                    self._raw = self._raw[len(self._raw) - hold:]
+                    break
+                out.append(self._raw[:start])
+                self._raw = self._raw[start + len(THINK_OPEN):]
+                self._in_think = True
+        return "".join(out)
+    
+    def _feed_visible(self, text: str) -> str:
+        """Split think-free text into paragraphs and emit kept content."""
+        out = []
+        self._paragraph += text
+        while True:
+            boundary = self._paragraph.find('\n\n')
+            if boundary == -1:
+                break
+            rest = self._paragraph[boundary + 2:]
+            self._paragraph = self._paragraph[:boundary]
+            out.append(self._finish_paragraph(complete=True))
+            self._paragraph = rest
+        out.append(self._finish_paragraph(complete=False))
+        return "".join(out)
+    
+    def _finish_paragraph(self, complete: bool) -> str:
+        """
+        Classify the current paragraph if possible and emit its new text.
+        
+        Args:
+            complete (bool): Whether the paragraph has ended.
+            
+        Returns:
+            str: Text to emit.
+        """
+        para = self._paragraph
+        if self._decision is None:
+            self._decision = self._classify(para, complete)
+        
+        out = ""
+        if self._decision:
+            if self._emitted == 0:
+                # Leading whitespace is dropped like the batch cleaner's strip()
+                leading = len(para) - len(para.lstrip()) if not self._emitted_any else 0
+                self._emitted = leading
+                if self._emitted_any and para[leading:].strip():
+                    out = '\n\n'
+            # Trailing whitespace is held back until more text follows it
+            end = len(para.rstrip())
+            if end > self._emitted:
+                out += para[self._emitted:end]
+                self._emitted = end
+                self._emitted_any = True
+        
+        if complete:
+            if para.strip():
+                self._paragraphs.append(para)
+            self._paragraph = ""
+            self._emitted = 0
+            self._decision = None
+        return out
+    
+    def _is_thinking(self, para_lower: str) -> bool:
+        return any(re.match(pattern, para_lower) for pattern in self.THINKING_PATTERNS)
+    
+    def _classify(self, para: str, complete: bool) -> Optional[bool]:
+        """
+        Decide whether a paragraph is kept.
+        
+        Args:
+            para (str): Paragraph text so far.
+            complete (bool): Whether the paragraph has ended.
+            
+        Returns:
+            Optional[bool]: True to keep, False to skip, None if undecided yet.
+        """
+        para_stripped = para.strip()
+        if not para_stripped:
+            return None if not complete else False
+        if not complete and len(para_stripped) < self.DECISION_CHARS:
+            return None
+        
+        para_lower = para_stripped.lower()
+        if self._is_thinking(para_lower):
+            self._skip_mode = True
+            return False
+        
+        if re.match(self.FIRST_PERSON_PATTERN, para_lower):
+            words = len(para_stripped.split())
+            if complete and words < self.FIRST_PERSON_MAX_WORDS:
+                self._skip_mode = True
+                return False
+            if not complete and words <= self.FIRST_PERSON_MAX_WORDS:
+                return None
+        
+        if self._skip_mode:
+            is_header = re.match(r'^#+\s+', para_stripped) or re.match(r'^\d+\.', para_stripped)
+            if not is_header and re.match(r'^[A-Z]', para_stripped):
+                # "Heading:" style header; undecided until ':' or a sentence end shows up
+                if re.match(r'^[A-Z][^.!?]*:', para_stripped):
+                    is_header = True
+                elif not complete and not re.search(r'[.!?]', para_stripped):
+                    return None
+            if is_header:
+                self._skip_mode = False
+        
+        return not self._skip_mode
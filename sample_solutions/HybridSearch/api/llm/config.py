@@ -55,6 +55,26 @@ class Settings(BaseSettings):
     temperature_simple: float = 0.1
     temperature_complex: float = 0.6
 
+    # Semantic answer cache (size or TTL 0 disables). Answers are reused for
+    # near-identical questions over the same context chunks and index version
+    answer_cache_size: int = 1024
+    answer_cache_ttl_seconds: float = 3600.0
+    answer_cache_similarity_threshold: float = 0.95  # Minimum cosine similarity of query embeddings
+    # Embedding service for query embeddings (unset: only identical questions hit)
+    embedding_service_url: Optional[str] = None
+
+    # Pooled HTTP client for the embedding service
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http2_enabled: bool = False  # Requires the optional 'h2' package
+    # Circuit breaker: fail fast after consecutive failures, probe again after the reset timeout
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout_seconds: float = 30.0
+
+    # Shared secret other services send in X-Internal-Token for admin
+    # endpoints; unset disables them
+    internal_api_token: Optional[str] = None
+
     # SSL Verification Settings
     verify_ssl: bool = True
 
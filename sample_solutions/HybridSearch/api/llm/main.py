@@ -3,13 +3,19 @@ LLM Service - OpenAI API Wrapper for Question Answering
 Handles dual-model routing for simple and complex queries
 """
 
+import json
 import logging
+import secrets
 import time
 import re
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException, status
+from typing import Callable, Iterator, List, Optional, Dict, Any, Tuple
+import numpy as np
+from fastapi import Depends, FastAPI, Header, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from openai import OpenAI, OpenAIError, RateLimitError, APIConnectionError, APITimeoutError
 from tenacity import (
@@ -21,8 +27,10 @@ from tenacity import (
 )
 from config import settings
 from services.response_formatter import ResponseFormatter
+from services.answer_cache import SemanticAnswerCache, context_key
+from services.http_clients import UpstreamClient
 from prompts.product_prompts import ProductPrompts
-from clean_monologue import clean_internal_monologue
+from clean_monologue import clean_internal_monologue, MonologueFilter
 
 # Configure logging
 logging.basicConfig(
@@ -32,10 +40,19 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Shutdown
+    if embedding_client is not None:
+        await embedding_client.aclose()
+    logger.info("Service shutdown complete")
+
 app = FastAPI(
     title="LLM Service",
     description="OpenAI-powered question answering service with dual-model routing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -78,6 +95,28 @@ COMPLEX_QA_PROMPT = (PROMPTS_DIR / "complex_qa.txt").read_text()
 response_formatter = ResponseFormatter()
 product_prompts = ProductPrompts()
 
+# Repeated helpdesk questions over the same retrieved chunks reuse earlier answers
+answer_cache = SemanticAnswerCache(
+    max_size=settings.answer_cache_size,
+    ttl_seconds=settings.answer_cache_ttl_seconds,
+    similarity_threshold=settings.answer_cache_similarity_threshold
+)
+# Query embeddings for the answer cache (the embedding service caches them too)
+embedding_client = (
+    UpstreamClient(
+        "embedding",
+        settings.embedding_service_url,
+        timeout=5.0,
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        http2=settings.http2_enabled,
+        verify=settings.verify_ssl,
+        failure_threshold=settings.circuit_failure_threshold,
+        reset_timeout=settings.circuit_reset_timeout_seconds
+    )
+    if settings.embedding_service_url and answer_cache.enabled else None
+)
+
 
 # Request/Response Models
 class RetrievalChunk(BaseModel):
@@ -141,6 +180,14 @@ class LLMRequest(BaseModel):
         True,
         description="Whether to extract citations from response"
     )
+    query_embedding: Optional[List[float]] = Field(
+        None,
+        description="Query embedding for the answer cache (fetched from the embedding service if omitted)"
+    )
+    index_version: Optional[int] = Field(
+        None,
+        description="Version of the index the context chunks were retrieved from (newer versions invalidate cached answers)"
+    )
     
     class Config:
         json_schema_extra = {
@@ -173,6 +220,10 @@ class LLMResponse(BaseModel):
         query_type: Detected complexity of the query ('simple' or 'complex').
         generation_time_ms: Time taken for generation in milliseconds.
         token_count: Total tokens used (if available).
+        time_to_first_token_ms: Time until the first answer token was streamed
+            (streaming endpoint only).
+        cached: Whether the answer came from the answer cache.
+        cache_similarity: Query similarity to the cached question (cache hits only).
     """
     answer: str
     citations: List[Citation]
@@ -180,6 +231,9 @@ class LLMResponse(BaseModel):
     query_type: str
     generation_time_ms: float
     token_count: Optional[int] = None
+    time_to_first_token_ms: Optional[float] = None
+    cached: bool = False
+    cache_similarity: Optional[float] = None
 
 
 class HealthResponse(BaseModel):
@@ -431,6 +485,68 @@ def clean_internal_monologue(text: str) -> str:
     return '\n\n'.join(cleaned_paragraphs).strip()
 
 
+def _prepare_generation(request: LLMRequest) -> Tuple[str, OpenAI, str, int, float, str]:
+    """
+    Select the model for a request and build its prompt.
+    
+    Args:
+        request (LLMRequest): Generation request.
+        
+    Returns:
+        Tuple[str, OpenAI, str, int, float, str]: Query type, client, model name,
+            max tokens, temperature and prompt.
+    """
+    # Determine query type
+    if request.model_type == "auto":
+        query_type = detect_query_complexity(request.query)
+    else:
+        query_type = request.model_type
+    
+    # Select model and parameters
+    current_client = client  # Default to global client
+    
+    if settings.is_enterprise_configured():
+        # Enterprise API with dual model support
+        if query_type == "simple":
+            model = settings.inference_model_name_simple
+            endpoint = settings.inference_model_endpoint_simple
+            max_tokens = request.max_tokens or settings.max_tokens_simple
+            temperature = request.temperature or settings.temperature_simple
+            prompt_template = SIMPLE_QA_PROMPT
+        else:
+            model = settings.inference_model_name_complex
+            endpoint = settings.inference_model_endpoint_complex
+            max_tokens = request.max_tokens or settings.max_tokens_complex
+            temperature = request.temperature or settings.temperature_complex
+            prompt_template = COMPLEX_QA_PROMPT
+        
+        # Get specific client for the endpoint
+        from api_client import get_api_client
+        api_client_inst = get_api_client()
+        current_client = api_client_inst.get_inference_client(endpoint=endpoint)
+        
+    else:
+        # Fallback (should not be reached if config validation works)
+        logger.warning("Enterprise config missing, using simple model default")
+        model = settings.inference_model_name_simple
+        max_tokens = request.max_tokens or settings.max_tokens_simple
+        temperature = request.temperature or settings.temperature_simple
+        prompt_template = SIMPLE_QA_PROMPT
+    
+    logger.info(
+        f"Generating answer using {model} "
+        f"(query_type={query_type}, chunks={len(request.context_chunks)})"
+    )
+    
+    # Format context
+    context = format_context(request.context_chunks)
+    
+    # Build prompt
+    prompt = prompt_template.format(context=context, query=request.query)
+    
+    return query_type, current_client, model, max_tokens, temperature, prompt
+
+
 # Retry Configuration for OpenAI API
 @retry(
     stop=stop_after_attempt(3),
@@ -444,7 +560,8 @@ def _call_chat_completion(
     model: str,
     prompt: str,
     max_tokens: int,
-    temperature: float
+    temperature: float,
+    stream: bool = False
 ):
     """
     Call chat completion API with retry logic
@@ -455,9 +572,11 @@ def _call_chat_completion(
         prompt: User prompt
         max_tokens: Maximum tokens to generate
         temperature: Sampling temperature
+        stream: Return an iterator of completion chunks instead of waiting
+            for the full completion (only opening the stream is retried)
         
     Returns:
-        Chat completion response
+        Chat completion response, or a chunk stream if stream is True
         
     Raises:
         OpenAIError: If all retries fail
@@ -470,7 +589,8 @@ def _call_chat_completion(
                 {"role": "user", "content": prompt}
             ],
             max_tokens=max_tokens,
-            temperature=temperature
+            temperature=temperature,
+            stream=stream
         )
     except (RateLimitError, APIConnectionError, APITimeoutError) as e:
         logger.warning(f"API error (will retry): {type(e).__name__}: {e}")
@@ -481,6 +601,109 @@ def _call_chat_completion(
         raise
 
 
+async def require_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    """
+    FastAPI dependency for admin endpoints only other services may call.
+    
+    Args:
+        x_internal_token (Optional[str]): Value of the X-Internal-Token header.
+        
+    Raises:
+        HTTPException: 403 if no internal token is configured or the header
+                       does not match it.
+    """
+    expected = settings.internal_api_token
+    if not expected:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Internal endpoints are disabled (INTERNAL_API_TOKEN is not set)"
+        )
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid internal token"
+        )
+
+
+async def get_query_embedding(request: LLMRequest) -> Optional[np.ndarray]:
+    """
+    Get the query embedding used for semantic answer cache lookups.
+    
+    Args:
+        request (LLMRequest): Generation request.
+        
+    Returns:
+        Optional[np.ndarray]: The request's embedding, else one from the
+            embedding service; None if neither is available (the cache then
+            only matches identical questions).
+    """
+    if request.query_embedding:
+        return np.asarray(request.query_embedding, dtype=np.float32)
+    if embedding_client is None:
+        return None
+    try:
+        response = await embedding_client.post(
+            "/api/v1/embeddings/encode",
+            json={"texts": [request.query], "normalize": True}
+        )
+        response.raise_for_status()
+        return np.asarray(response.json()["embeddings"][0], dtype=np.float32)
+    except Exception as e:
+        logger.warning(f"Query embedding unavailable for the answer cache: {e}")
+        return None
+
+
+async def lookup_cached_answer(
+    request: LLMRequest,
+    model: str,
+    max_tokens: int,
+    temperature: float
+) -> Tuple[Optional[Dict[str, Any]], Optional[Callable[[LLMResponse], None]]]:
+    """
+    Look up the answer cache for a request.
+    
+    Args:
+        request (LLMRequest): Generation request.
+        model (str): Selected model.
+        max_tokens (int): Token limit.
+        temperature (float): Sampling temperature.
+        
+    Returns:
+        Tuple[Optional[Dict[str, Any]], Optional[Callable[[LLMResponse], None]]]:
+            Cached response fields (None on a miss), and a function that stores
+            the generated response on a miss (None if the cache is disabled).
+    """
+    if not answer_cache.enabled:
+        return None, None
+    
+    answer_cache.observe_index_version(request.index_version)
+    context = context_key(
+        [chunk.chunk_id for chunk in request.context_chunks],
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        include_citations=request.include_citations
+    )
+    query_embedding = await get_query_embedding(request)
+    cached = answer_cache.get(context, request.query, query_embedding, request.index_version)
+    if cached is not None:
+        return cached, None
+    
+    def store(response: LLMResponse):
+        if response.answer.strip():
+            answer_cache.put(
+                context,
+                request.query,
+                query_embedding,
+                request.index_version,
+                response.model_dump(include={"answer", "citations", "model_used", "query_type", "token_count"}),
+                response.token_count,
+                response.generation_time_ms
+            )
+    
+    return None, store
+
+
 # API Endpoints
 @app.post(
     "/api/v1/llm/generate",
@@ -497,8 +720,9 @@ async def generate_answer(request: LLMRequest):
     1. Determines query complexity (if set to auto)
     2. Selects appropriate model (simple vs complex)
     3. Formats context chunks
-    4. Calls LLM (OpenAI or Enterprise)
-    5. Cleans response and extracts citations
+    4. Returns a cached answer for a near-identical question over the same chunks
+    5. Calls LLM (OpenAI or Enterprise)
+    6. Cleans response and extracts citations
     
     Args:
         request (LLMRequest): Request object containing query, context chunks, and parameters.
@@ -512,53 +736,16 @@ async def generate_answer(request: LLMRequest):
     try:
         start_time = time.time()
         
-        # Determine query type
-        if request.model_type == "auto":
-            query_type = detect_query_complexity(request.query)
-        else:
-            query_type = request.model_type
-        
-        # Select model and parameters
-        current_client = client  # Default to global client
-        
-        if settings.is_enterprise_configured():
-            # Enterprise API with dual model support
-            if query_type == "simple":
-                model = settings.inference_model_name_simple
-                endpoint = settings.inference_model_endpoint_simple
-                max_tokens = request.max_tokens or settings.max_tokens_simple
-                temperature = request.temperature or settings.temperature_simple
-                prompt_template = SIMPLE_QA_PROMPT
-            else:
-                model = settings.inference_model_name_complex
-                endpoint = settings.inference_model_endpoint_complex
-                max_tokens = request.max_tokens or settings.max_tokens_complex
-                temperature = request.temperature or settings.temperature_complex
-                prompt_template = COMPLEX_QA_PROMPT
-            
-            # Get specific client for the endpoint
-            from api_client import get_api_client
-            api_client_inst = get_api_client()
-            current_client = api_client_inst.get_inference_client(endpoint=endpoint)
-            
-        else:
-            # Fallback (should not be reached if config validation works)
-            logger.warning("Enterprise config missing, using simple model default")
-            model = settings.inference_model_name_simple
-            max_tokens = request.max_tokens or settings.max_tokens_simple
-            temperature = request.temperature or settings.temperature_simple
-            prompt_template = SIMPLE_QA_PROMPT
+        query_type, current_client, model, max_tokens, temperature, prompt = _prepare_generation(request)
         
-        logger.info(
-            f"Generating answer using {model} "
-            f"(query_type={query_type}, chunks={len(request.context_chunks)})"
-        )
-        
-        # Format context
-        context = format_context(request.context_chunks)
-        
-        # Build prompt
-        prompt = prompt_template.format(context=context, query=request.query)
+        cached, store_answer = await lookup_cached_answer(request, model, max_tokens, temperature)
+        if cached is not None:
+            processing_time = (time.time() - start_time) * 1000
+            logger.info(
+                f"Answer served from cache in {processing_time:.2f}ms "
+                f"(similarity={cached['cache_similarity']}, saved tokens={cached['token_count']})"
+            )
+            return LLMResponse(**cached, cached=True, generation_time_ms=round(processing_time, 2))
         
         # Call API with retry logic
         response = _call_chat_completion(
@@ -596,7 +783,7 @@ async def generate_answer(request: LLMRequest):
             f"(tokens={token_count}, citations={len(citations)})"
         )
         
-        return LLMResponse(
+        llm_response = LLMResponse(
             answer=answer,
             citations=citations,
             model_used=model,
@@ -604,6 +791,9 @@ async def generate_answer(request: LLMRequest):
             generation_time_ms=round(processing_time, 2),
             token_count=token_count
         )
+        if store_answer is not None:
+            store_answer(llm_response)
+        return llm_response
         
     except OpenAIError as e:
         logger.error(f"OpenAI API error: {e}")
@@ -619,6 +809,209 @@ async def generate_answer(request: LLMRequest):
         )
 
 
+def format_sse_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Encode one Server-Sent Event.
+    
+    Args:
+        event (str): Event name.
+        data (Dict[str, Any]): JSON-serialisable payload.
+        
+    Returns:
+        str: The event in SSE wire format.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_answer_events(
+    completion_stream,
+    request: LLMRequest,
+    model: str,
+    query_type: str,
+    start_time: float,
+    on_done: Optional[Callable[[LLMResponse], None]] = None
+) -> Iterator[str]:
+    """
+    Relay a streamed completion as Server-Sent Events.
+    
+    Events:
+        meta: ``{"model_used", "query_type"}``, sent first.
+        token: ``{"text"}`` for each piece of cleaned answer text.
+        done: The full ``LLMResponse`` (answer cleaned in one pass, citations,
+            timing); this is the authoritative answer.
+        error: ``{"detail"}`` if generation fails mid-stream.
+    
+    Internal monologue is filtered incrementally so only answer text is
+    streamed. Runs in Starlette's threadpool (the OpenAI client is blocking).
+    
+    Args:
+        completion_stream: Chunk stream from ``_call_chat_completion``.
+        request (LLMRequest): Original request (for citations).
+        model (str): Model name.
+        query_type (str): Query complexity.
+        start_time (float): Request start time.
+        on_done (Optional[Callable[[LLMResponse], None]]): Called with the
+            final response (stores it in the answer cache).
+        
+    Yields:
+        str: Encoded events.
+    """
+    yield format_sse_event("meta", {"model_used": model, "query_type": query_type})
+    
+    monologue_filter = MonologueFilter()
+    raw_parts: List[str] = []
+    token_count = None
+    first_token_time = None
+    try:
+        for chunk in completion_stream:
+            usage = getattr(chunk, "usage", None)
+            if usage:
+                token_count = usage.total_tokens
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            raw_parts.append(delta)
+            text = monologue_filter.feed(delta)
+            if text:
+                if first_token_time is None:
+                    first_token_time = time.time()
+                yield format_sse_event("token", {"text": text})
+        
+        text = monologue_filter.flush()
+        if text:
+            if first_token_time is None:
+                first_token_time = time.time()
+            yield format_sse_event("token", {"text": text})
+        
+        raw_answer = "".join(raw_parts)
+        answer = clean_internal_monologue(raw_answer)
+        logger.info(f"Streamed {len(raw_answer)} characters ({len(answer)} after cleaning)")
+        
+        citations = []
+        if request.include_citations:
+            citations = extract_citations(answer, request.context_chunks)
+        
+        processing_time = (time.time() - start_time) * 1000
+        ttft = (first_token_time - start_time) * 1000 if first_token_time else None
+        logger.info(
+            f"Answer streamed in {processing_time:.2f}ms "
+            f"(first token {ttft or 0:.2f}ms, tokens={token_count}, citations={len(citations)})"
+        )
+        
+        response = LLMResponse(
+            answer=answer,
+            citations=citations,
+            model_used=model,
+            query_type=query_type,
+            generation_time_ms=round(processing_time, 2),
+            token_count=token_count,
+            time_to_first_token_ms=round(ttft, 2) if ttft is not None else None
+        )
+        if on_done is not None:
+            on_done(response)
+        yield format_sse_event("done", response.model_dump())
+        
+    except Exception as e:
+        logger.error(f"Streaming generation failed: {e}", exc_info=True)
+        yield format_sse_event("error", {"detail": f"Generation failed: {str(e)}"})
+    finally:
+        close = getattr(completion_stream, "close", None)
+        if close:
+            close()
+
+
+def _cached_answer_events(response: LLMResponse) -> Iterator[str]:
+    """
+    Send a cached answer as the same event sequence as a streamed one.
+    
+    Args:
+        response (LLMResponse): Cached response.
+        
+    Yields:
+        str: Encoded meta, token (the whole answer) and done events.
+    """
+    yield format_sse_event("meta", {"model_used": response.model_used, "query_type": response.query_type})
+    yield format_sse_event("token", {"text": response.answer})
+    yield format_sse_event("done", response.model_dump())
+
+
+@app.post(
+    "/api/v1/llm/generate/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Stream answer for query",
+    description="Generate answer like /api/v1/llm/generate, streaming tokens as Server-Sent Events"
+)
+async def generate_answer_stream(request: LLMRequest):
+    """
+    Generate an answer, streaming it as it is produced.
+    
+    Model selection, prompting and the answer cache are the same as
+    ``generate_answer``; a cached answer is sent as a single token event.
+    The completion stream is opened (with retries) before the response
+    starts, so connection errors still surface as HTTP errors; afterwards
+    events are sent as described in ``_stream_answer_events``.
+    
+    Args:
+        request (LLMRequest): Request object containing query, context chunks, and parameters.
+        
+    Returns:
+        StreamingResponse: ``text/event-stream`` of meta, token and done events.
+        
+    Raises:
+        HTTPException: If the LLM stream cannot be opened.
+    """
+    try:
+        start_time = time.time()
+        query_type, current_client, model, max_tokens, temperature, prompt = _prepare_generation(request)
+        
+        cached, store_answer = await lookup_cached_answer(request, model, max_tokens, temperature)
+        if cached is not None:
+            processing_time = round((time.time() - start_time) * 1000, 2)
+            logger.info(f"Answer served from cache in {processing_time:.2f}ms (similarity={cached['cache_similarity']})")
+            cached_response = LLMResponse(
+                **cached,
+                cached=True,
+                generation_time_ms=processing_time,
+                time_to_first_token_ms=processing_time
+            )
+            return StreamingResponse(
+                _cached_answer_events(cached_response),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        
+        completion_stream = await run_in_threadpool(
+            _call_chat_completion,
+            client_instance=current_client,
+            model=model,
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+    except OpenAIError as e:
+        logger.error(f"OpenAI API error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"OpenAI API error: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        _stream_answer_events(completion_stream, request, model, query_type, start_time, on_done=store_answer),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post(
     "/api/v1/llm/generate/simple",
     response_model=LLMResponse,
@@ -667,6 +1060,40 @@ async def generate_complex(request: LLMRequest):
     return await generate_answer(request)
 
 
+@app.get(
+    "/api/v1/llm/cache/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Answer cache statistics",
+    description="Hit rate, saved tokens and size of the semantic answer cache"
+)
+async def get_cache_stats():
+    """
+    Get answer cache statistics.
+    
+    Returns:
+        dict: Cache counters, including hit rate and saved tokens.
+    """
+    return answer_cache.get_stats()
+
+
+@app.post(
+    "/api/v1/llm/cache/invalidate",
+    status_code=status.HTTP_200_OK,
+    summary="Clear the answer cache",
+    description="Drop all cached answers (e.g. after documents were re-ingested)",
+    dependencies=[Depends(require_internal_token)]
+)
+async def invalidate_cache():
+    """
+    Drop all cached answers.
+    
+    Returns:
+        dict: Status and the cache statistics after clearing.
+    """
+    answer_cache.clear()
+    return {"status": "cleared", "answer_cache": answer_cache.get_stats()}
+
+
 @app.get(
     "/health",
     response_model=HealthResponse,
@@ -0,0 +1,296 @@
+"""
+Answer Cache
+Semantic cache of generated answers, keyed on the query embedding and the context chunks
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query for exact matching."""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+def context_key(chunk_ids: Sequence[str], **generation_params: Any) -> str:
+    """
+    Key for "the same retrieved context, generated the same way".
+
+    Args:
+        chunk_ids (Sequence[str]): IDs of the context chunks (order does not matter).
+        **generation_params: Model, token limit, temperature and other options
+            that change the answer.
+
+    Returns:
+        str: Stable hash of the chunk ID set and the parameters.
+    """
+    encoded = json.dumps([sorted(set(chunk_ids)), generation_params], sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+@dataclass
+class _Entry:
+    context: str
+    query: str
+    embedding: Optional[np.ndarray]
+    index_version: Optional[int]
+    response: Dict[str, Any]
+    token_count: int
+    generation_ms: float
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """
+    LRU cache of generated answers with time-to-live and semantic lookup.
+
+    An answer is reused for a new question when it was generated from the
+    same set of context chunks with the same model parameters, against the
+    same index version, and the questions are either identical (ignoring
+    case and spacing) or their embeddings have a cosine similarity of at
+    least ``similarity_threshold``. Only entries of the same context are
+    compared, so a lookup scans a handful of vectors.
+
+    When a request reports a different index version than the last one
+    seen (documents were added, removed or the index was rebuilt), entries
+    from other versions are dropped. Entries expire after ``ttl_seconds`` and are
+    evicted in LRU order beyond ``max_size``. A ``max_size`` or
+    ``ttl_seconds`` of 0 disables the cache. Thread-safe: streamed answers
+    are stored from Starlette's threadpool.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, similarity_threshold: float = 0.95):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size (int): Maximum number of answers (0 disables the cache).
+            ttl_seconds (float): Answer lifetime in seconds (0 disables the cache).
+            similarity_threshold (float): Minimum cosine similarity between
+                query embeddings for a semantic hit.
+        """
+        self.max_size = max(max_size, 0)
+        self.ttl_seconds = max(ttl_seconds, 0.0)
+        self.similarity_threshold = similarity_threshold
+        self.index_version: Optional[int] = None
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._by_context: Dict[str, List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.saved_tokens = 0
+        self.saved_generation_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all."""
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def observe_index_version(self, version: Optional[int]):
+        """
+        Drop answers generated against other indexes once a new version is seen.
+
+        Args:
+            version (Optional[int]): Index version reported with a request.
+        """
+        if version is None or not self.enabled:
+            return
+        with self._lock:
+            if version == self.index_version:
+                return
+            self.index_version = version
+            stale = [
+                entry_id for entry_id, entry in self._entries.items()
+                if entry.index_version is not None and entry.index_version != version
+            ]
+            for entry_id in stale:
+                self._remove(entry_id)
+            if stale:
+                self.invalidations += len(stale)
+                logger.info(f"Index version {version}: dropped {len(stale)} cached answers")
+
+    def get(
+        self,
+        context: str,
+        query: str,
+        embedding: Optional[np.ndarray],
+        index_version: Optional[int]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a question over a given context.
+
+        Args:
+            context (str): Key from ``context_key``.
+            query (str): User question.
+            embedding (Optional[np.ndarray]): Query embedding (None: exact matches only).
+            index_version (Optional[int]): Index version the context was retrieved from.
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached response fields, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        normalized = normalize_query(query)
+        query_vector = _unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_similarity, exact = None, -1.0, False
+            candidates = []
+            for entry_id in list(self._by_context.get(context, ())):
+                entry = self._entries[entry_id]
+                if entry.expires_at < now:
+                    self._remove(entry_id)
+                    self.expirations += 1
+                    continue
+                if entry.index_version != index_version:
+                    continue
+                if entry.query == normalized:
+                    best_id, best_similarity, exact = entry_id, 1.0, True
+                    break
+                if (query_vector is not None and entry.embedding is not None
+                        and entry.embedding.shape == query_vector.shape):
+                    candidates.append(entry_id)
+
+            if best_id is None and candidates:
+                similarities = np.stack([self._entries[i].embedding for i in candidates]) @ query_vector
+                top = int(np.argmax(similarities))
+                if similarities[top] >= self.similarity_threshold:
+                    best_id, best_similarity = candidates[top], float(similarities[top])
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            entry = self._entries[best_id]
+            self._entries.move_to_end(best_id)
+            if exact:
+                self.exact_hits += 1
+            else:
+                self.semantic_hits += 1
+            self.saved_tokens += entry.token_count
+            self.saved_generation_ms += entry.generation_ms
+            return {**entry.response, "cache_similarity": round(best_similarity, 4)}
+
+    def put(
+        self,
+        context: str,
+        query: str,
+        embedding: Optional[np.ndarray],
+        index_version: Optional[int],
+        response: Dict[str, Any],
+        token_count: Optional[int],
+        generation_ms: float
+    ):
+        """
+        Store a generated answer, evicting the least recently used ones if full.
+
+        Answers generated against another index version than the current one
+        are not stored.
+
+        Args:
+            context (str): Key from ``context_key``.
+            query (str): User question.
+            embedding (Optional[np.ndarray]): Query embedding (None: exact matches only).
+            index_version (Optional[int]): Index version the context was retrieved from.
+            response (Dict[str, Any]): Response fields to return on a hit.
+            token_count (Optional[int]): Tokens the generation used.
+            generation_ms (float): Time the generation took.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if index_version is not None and self.index_version is not None and index_version != self.index_version:
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(
+                context=context,
+                query=normalize_query(query),
+                embedding=_unit(embedding),
+                index_version=index_version,
+                response=response,
+                token_count=token_count or 0,
+                generation_ms=generation_ms,
+                expires_at=time.monotonic() + self.ttl_seconds
+            )
+            self._by_context.setdefault(context, []).append(entry_id)
+            self.stores += 1
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, entry_id: int):
+        """Remove an entry (caller holds the lock)."""
+        entry = self._entries.pop(entry_id)
+        ids = self._by_context[entry.context]
+        ids.remove(entry_id)
+        if not ids:
+            del self._by_context[entry.context]
+
+    def clear(self):
+        """Drop all answers (counters are kept)."""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._by_context.clear()
+            self.invalidations += dropped
+        if dropped:
+            logger.info(f"Cleared {dropped} cached answers")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict[str, Any]: Size, limits, hit/miss counters, hit rate and the
+                tokens and generation time saved by hits.
+        """
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity_threshold": self.similarity_threshold,
+            "index_version": self.index_version,
+            "hits": hits,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "saved_tokens": self.saved_tokens,
+            "saved_generation_ms": round(self.saved_generation_ms, 2)
+        }
+
+
+def _unit(embedding: Optional[Sequence[float]]) -> Optional[np.ndarray]:
+    """L2-normalized float32 copy of an embedding (None if missing or all zeros)."""
+    if embedding is None:
+        return None
+    vector = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    if not vector.size or not np.isfinite(norm) or norm == 0.0:
+        return None
+    return vector / norm
@@ -2,10 +2,12 @@
 API Client for GenAI Gateway authentication and enterprise API calls (Retrieval Service)
 """
 
+import asyncio
 import httpx
 import logging
 import re
 from config import settings
+from services.http_clients import UpstreamClient
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +45,18 @@ class APIClient:
         self.base_url = clean_url(base_url).rstrip('/') if base_url else None
         self.token = settings.genai_api_key
         self.http_client = httpx.Client(verify=settings.verify_ssl, timeout=60.0) if self.token else None
+        # Pooled client with circuit breaker for async rerank calls
+        self.rerank_upstream = UpstreamClient(
+            "reranker",
+            self.base_url,
+            timeout=60.0,
+            max_connections=settings.reranker_max_connections,
+            max_keepalive_connections=settings.reranker_max_connections,
+            http2=settings.http2_enabled,
+            verify=settings.verify_ssl,
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_timeout=settings.circuit_reset_timeout_seconds
+        )
 
         if self.token and self.base_url:
             backend = "APISIX" if self.use_apisix else f"GenAI Gateway ({settings.inference_backend})"
@@ -61,35 +75,41 @@ class APIClient:
         client_base_url = f"{self.base_url}"
         return client_base_url, self.token
 
-    def rerank_pairs(self, query: str, docs: list[str]) -> list[float]:
+    def _rerank_url(self) -> str:
         """
-        Perform reranking using the GenAI Gateway reranking endpoint.
-
-        Args:
-            query (str): The search query.
-            docs (list[str]): List of document texts to rerank against the query.
+        Build the rerank endpoint URL.
 
         Returns:
-            list[float]: List of relevance scores corresponding to the input docs.
+            str: Rerank URL for the configured backend.
 
         Raises:
-            Exception: If the reranker API call fails.
+            ValueError: If the GenAI Gateway configuration is missing.
         """
         if not self.token or not self.base_url:
             raise ValueError("GenAI Gateway configuration missing. Check GENAI_GATEWAY_URL and GENAI_API_KEY.")
 
         # APISIX or TEI (Gaudi): /rerank   |   GenAI Gateway + vLLM (Xeon): /v1/rerank
         use_no_v1 = self.use_apisix or self.use_tei
-        url = f"{self.base_url}/rerank" if use_no_v1 else f"{self.base_url}/v1/rerank"
-
-        if not self.http_client:
-            self.http_client = httpx.Client(verify=settings.verify_ssl, timeout=60.0)
+        return f"{self.base_url}/rerank" if use_no_v1 else f"{self.base_url}/v1/rerank"
 
-        headers = {
+    def _rerank_headers(self) -> dict:
+        """Authorization headers for rerank requests."""
+        return {
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
 
+    def _rerank_batches(self, query: str, docs: list[str]) -> list[tuple[int, dict]]:
+        """
+        Split documents into rerank request payloads.
+
+        Args:
+            query (str): The search query.
+            docs (list[str]): Document texts.
+
+        Returns:
+            list[tuple[int, dict]]: (offset of the batch in docs, request payload) pairs.
+        """
         # Truncate each doc to ~500 chars (~125 tokens) so query + doc
         # stays well within the reranker model's 512-token max sequence length.
         # 500 chars handles worst-case tokenization (technical text ~2 chars/token)
@@ -99,55 +119,135 @@ class APIClient:
 
         # Split into batches to respect the model's max batch size
         batch_size = settings.reranker_max_batch_size
-        scores = [0.0] * len(docs)
+        batches = []
 
         for batch_start in range(0, len(truncated_docs), batch_size):
             batch = truncated_docs[batch_start:batch_start + batch_size]
 
             # Keycloak/APISIX uses "texts"; GenAI Gateway (LiteLLM/Cohere) uses "documents"
-            if self.use_apisix:
-                payload = {
-                    "model": settings.reranker_model_name,
-                    "query": query,
-                    "texts": batch,
-                    "top_n": len(batch),
-                    "return_documents": False
-                }
+            payload = {
+                "model": settings.reranker_model_name,
+                "query": query,
+                "texts" if self.use_apisix else "documents": batch,
+                "top_n": len(batch),
+                "return_documents": False
+            }
+            batches.append((batch_start, payload))
+
+        return batches
+
+    @staticmethod
+    def _parse_rerank_response(response: httpx.Response, batch_start: int, scores: list[float]):
+        """
+        Write the scores of one rerank response into the score list.
+
+        Args:
+            response (httpx.Response): Reranker response.
+            batch_start (int): Offset of the batch in the document list.
+            scores (list[float]): Scores of all documents, updated in place.
+
+        Raises:
+            httpx.HTTPStatusError: If the reranker returned an error status.
+        """
+        if response.status_code != 200:
+            logger.error(f"Reranker API error: {response.status_code} - {response.text}")
+            response.raise_for_status()
+
+        response_data = response.json()
+        logger.debug(f"Reranker raw response: {response_data}")
+
+        # Handle both response formats:
+        # Format 1 (vLLM/APISIX):    [{"index": 0, "score": 0.9}, ...]
+        # Format 2 (LiteLLM/Cohere): {"results": [{"index": 0, "relevance_score": 0.9}, ...]}
+        if isinstance(response_data, list):
+            results = response_data
+        else:
+            results = response_data.get("results", [])
+
+        for res in results:
+            original_idx = batch_start + res["index"]
+            if isinstance(response_data, list):
+                scores[original_idx] = res["score"]
             else:
-                payload = {
-                    "model": settings.reranker_model_name,
-                    "query": query,
-                    "documents": batch,
-                    "top_n": len(batch),
-                    "return_documents": False
-                }
+                scores[original_idx] = res["relevance_score"]
+
+    def rerank_pairs(self, query: str, docs: list[str]) -> list[float]:
+        """
+        Perform reranking using the GenAI Gateway reranking endpoint.
+
+        Blocking; batches are sent one after another. Async code should use
+        ``arerank_pairs``.
+
+        Args:
+            query (str): The search query.
+            docs (list[str]): List of document texts to rerank against the query.
 
+        Returns:
+            list[float]: List of relevance scores corresponding to the input docs.
+
+        Raises:
+            Exception: If the reranker API call fails.
+        """
+        url = self._rerank_url()
+
+        if not self.http_client:
+            self.http_client = httpx.Client(verify=settings.verify_ssl, timeout=60.0)
+
+        headers = self._rerank_headers()
+        scores = [0.0] * len(docs)
+
+        for batch_start, payload in self._rerank_batches(query, docs):
             response = self.http_client.post(url, json=payload, headers=headers)
+            self._parse_rerank_response(response, batch_start, scores)
+
+        return scores
 
-            if response.status_code != 200:
-                logger.error(f"Reranker API error: {response.status_code} - {response.text}")
-                response.raise_for_status()
+    async def arerank_pairs(self, query: str, docs: list[str]) -> list[float]:
+        """
+        Perform reranking without blocking the event loop.
 
-            response_data = response.json()
-            logger.info(f"Reranker raw response: {response_data}")
+        Batches are sent concurrently (at most ``reranker_max_concurrency``
+        in flight per call) over a persistent connection pool; the call fails
+        fast while the reranker's circuit breaker is open.
 
-            # Handle both response formats:
-            # Format 1 (vLLM/APISIX):    [{"index": 0, "score": 0.9}, ...]
-            # Format 2 (LiteLLM/Cohere): {"results": [{"index": 0, "relevance_score": 0.9}, ...]}
-            if isinstance(response_data, list):
-                results = response_data
-            else:
-                results = response_data.get("results", [])
+        Args:
+            query (str): The search query.
+            docs (list[str]): List of document texts to rerank against the query.
 
-            for res in results:
-                original_idx = batch_start + res["index"]
-                if isinstance(response_data, list):
-                    scores[original_idx] = res["score"]
-                else:
-                    scores[original_idx] = res["relevance_score"]
+        Returns:
+            list[float]: List of relevance scores corresponding to the input docs.
 
+        Raises:
+            Exception: If the reranker API call fails.
+        """
+        url = self._rerank_url()
+        headers = self._rerank_headers()
+        scores = [0.0] * len(docs)
+        semaphore = asyncio.Semaphore(max(settings.reranker_max_concurrency, 1))
+
+        async def send(batch_start: int, payload: dict):
+            async with semaphore:
+                response = await self.rerank_upstream.post(url, json=payload, headers=headers)
+            self._parse_rerank_response(response, batch_start, scores)
+
+        await asyncio.gather(*(
+            send(batch_start, payload) for batch_start, payload in self._rerank_batches(query, docs)
+        ))
         return scores
 
+    def get_pool_stats(self) -> dict:
+        """
+        Get connection pool and circuit breaker stats for the reranker.
+
+        Returns:
+            dict: Stats of the pooled rerank client.
+        """
+        return self.rerank_upstream.get_stats()
+
+    async def aclose(self):
+        """Close the pooled async HTTP client."""
+        await self.rerank_upstream.aclose()
+
     def is_authenticated(self) -> bool:
         """
         Check if client is authenticated.
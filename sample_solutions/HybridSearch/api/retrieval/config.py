@@ -34,6 +34,8 @@ class Settings(BaseSettings):
     
     # Embedding Service
     embedding_service_url: str = "http://localhost:8001"
+    embedding_encoding_format: str = "base64"  # "float" (JSON lists), "base64" or "msgpack" (needs `msgpack`)
+    embedding_wire_dtype: str = "float32"  # "float32" or "float16" for base64/msgpack responses
 
     # GenAI Gateway Configuration
     # Supports multiple deployment patterns:
@@ -53,11 +55,23 @@ class Settings(BaseSettings):
     reranker_model_endpoint: str = "bge-reranker-base-vllmcpu"
     reranker_model_name: str = "BAAI/bge-reranker-base"
     reranker_max_batch_size: int = 32  # Max docs per rerank request (model-dependent)
+    reranker_max_concurrency: int = 4  # Rerank batches in flight per query
+    reranker_max_connections: int = 20  # Pooled keep-alive connections to the reranker
+    # Latency budget: slower rerank calls fall back to fusion (RRF) order
+    reranker_timeout_ms: float = 1500.0
+    # Cross-encoder scores cached per (query, chunk); cleared on index reload
+    reranker_score_cache_size: int = 20000
+    reranker_score_cache_ttl_seconds: float = 3600.0
     
     # Index Storage Path - default to /data/indexes in Docker
     index_storage_path: str = "/data/indexes"
     
-    # Individual Index Paths - can be overridden by environment variables
+    # Manifest of versioned index snapshots published by the ingestion service
+    index_manifest_path: str = "/data/indexes/manifest.json"
+    # Seconds between manifest checks for new snapshots (0 = reload only via /api/v1/reload)
+    index_poll_interval_seconds: float = 0.0
+    
+    # Individual Index Paths (layout without a manifest) - can be overridden by environment variables
     faiss_index_path: str = "/data/indexes/faiss_index.bin"
     bm25_index_path: str = "/data/indexes/bm25_index.pkl"
     metadata_index_path: str = "/data/indexes/metadata.pkl"
@@ -74,7 +88,28 @@ class Settings(BaseSettings):
     top_k_rerank: int = 10
     use_reranking: bool = False  # Skip in dev phase
     rrf_k: int = 60  # RRF constant
-    
+    # Fusion of dense and sparse results: "rrf", "convex" (weighted min-max
+    # normalized scores) or "dbsf" (distribution-based score fusion)
+    fusion_method: str = "rrf"
+    fusion_dense_weight: float = 1.0
+    fusion_sparse_weight: float = 1.0
+
+    # ANN query defaults (used when the ingestion service built an IVF/HNSW index);
+    # higher values trade latency for recall and can be overridden per request
+    faiss_nprobe: int = 16
+    faiss_ef_search: int = 64
+
+    # Concurrency: dense (FAISS) and sparse (BM25) scoring run on a bounded
+    # thread pool so the event loop stays free while indexes are scanned
+    search_worker_threads: int = 4
+
+    # Caches (LRU with TTL; size 0 disables). Query embeddings do not depend on
+    # the index; result entries are keyed by index snapshot and cleared on reload
+    query_embedding_cache_size: int = 2048
+    query_embedding_cache_ttl_seconds: float = 3600.0
+    result_cache_size: int = 1024
+    result_cache_ttl_seconds: float = 300.0
+
     # Product Catalog Settings
     system_mode: str = "document"  # "document" or "product"
     default_result_limit: int = 20
@@ -82,6 +117,14 @@ class Settings(BaseSettings):
     # SSL Verification Settings
     verify_ssl: bool = True
 
+    # Pooled HTTP client for the embedding service
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http2_enabled: bool = False  # Requires the optional 'h2' package
+    # Circuit breaker: fail fast after consecutive failures, probe again after the reset timeout
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout_seconds: float = 30.0
+
     # Logging
     log_level: str = "INFO"
 
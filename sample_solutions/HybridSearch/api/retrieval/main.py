@@ -3,17 +3,26 @@ Retrieval Service
 Hybrid search with FAISS + BM25 + RRF
 """
 
+import asyncio
+import functools
+import json
 import logging
 import time
-import httpx
-from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException, status
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional, Dict, Any, Tuple
+import numpy as np
+from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from config import settings
 from services.dense_retrieval import DenseRetrieval
-from services.sparse_retrieval import SparseRetrieval
-from services.fusion import ReciprocalRankFusion
+from services.index_snapshot import IndexSnapshot, SnapshotManager
+from services.fusion import RankedList, ReciprocalRankFusion
+from services.query_cache import TTLCache
+from services.reranker import Reranker
+from services.http_clients import UpstreamClient
+from services.embedding_codec import decode_response, resolve_format
 
 # Configure logging
 logging.basicConfig(
@@ -22,11 +31,102 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bounded worker pool for CPU-bound index scans (FAISS / BM25).
+# Keeps the event loop responsive while searches are running.
+search_executor = ThreadPoolExecutor(
+    max_workers=settings.search_worker_threads,
+    thread_name_prefix="retrieval-search"
+)
+
+# Index snapshots are loaded on their own thread so a reload never takes
+# search workers away from in-flight queries
+reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrieval-reload")
+
+
+async def refresh_snapshot():
+    """
+    Load the latest published index snapshot in the background and swap it in.
+    
+    Returns:
+        IndexSnapshot: The active snapshot after the swap.
+    """
+    loop = asyncio.get_running_loop()
+    snapshot = await loop.run_in_executor(reload_executor, snapshot_manager.load_latest)
+    # Cached results and rerank scores belong to the previous snapshot
+    result_cache.clear()
+    reranker.clear_cache()
+    # Snapshots still held by in-flight requests close on their last release
+    snapshot_manager.close_retired()
+    return snapshot
+
+
+async def active_snapshot() -> AsyncIterator[IndexSnapshot]:
+    """
+    Dependency that holds the active snapshot for the whole request.
+    
+    The reference keeps a snapshot replaced mid-request open until the
+    request finishes with it.
+    
+    Yields:
+        IndexSnapshot: Snapshot the request searches.
+        
+    Raises:
+        HTTPException: 503 if no snapshot has been loaded yet.
+    """
+    try:
+        snapshot = snapshot_manager.acquire()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    try:
+        yield snapshot
+    finally:
+        snapshot_manager.release(snapshot)
+
+
+async def watch_manifest(interval: float):
+    """
+    Poll the index manifest and activate newly published snapshots.
+    
+    Args:
+        interval (float): Seconds between manifest checks.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if snapshot_manager.has_newer():
+                await refresh_snapshot()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to activate new index snapshot: {e}")
+
+
 # Initialize FastAPI app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: load the first snapshot off the event loop before serving
+    try:
+        await refresh_snapshot()
+    except Exception as e:
+        logger.error(f"Could not load index snapshot at startup: {e}")
+    watcher = None
+    if settings.index_poll_interval_seconds > 0:
+        watcher = asyncio.create_task(watch_manifest(settings.index_poll_interval_seconds))
+    yield
+    # Shutdown
+    if watcher:
+        watcher.cancel()
+    await reranker.close()
+    await embedding_client.aclose()
+    search_executor.shutdown(wait=False, cancel_futures=True)
+    reload_executor.shutdown(wait=False, cancel_futures=True)
+    logger.info("Service shutdown complete")
+
 app = FastAPI(
     title="Retrieval Service",
     description="Hybrid search with dense + sparse + reranking",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -38,29 +138,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize retrieval components
-dense_retrieval = DenseRetrieval(
-    index_path=settings.faiss_index_path,
-    metadata_path=settings.metadata_index_path
+# Retrieval components live in versioned index snapshots; search requests
+# hold the active snapshot (see active_snapshot) and use it throughout
+snapshot_manager = SnapshotManager(
+    manifest_path=settings.index_manifest_path,
+    legacy_paths={
+        "faiss_index": settings.faiss_index_path,
+        "bm25_index": settings.bm25_index_path,
+        "metadata": settings.metadata_index_path,
+        "product_faiss_index": settings.product_faiss_index_path,
+        "product_bm25_index": settings.product_bm25_index_path,
+        "product_metadata": settings.product_metadata_index_path
+    },
+    dense_options={
+        "default_nprobe": settings.faiss_nprobe,
+        "default_ef_search": settings.faiss_ef_search
+    }
 )
-
-sparse_retrieval = SparseRetrieval(
-    index_path=settings.bm25_index_path,
-    metadata_path=settings.metadata_index_path
+# One reranker per process so its connection pool and score cache are shared
+reranker = Reranker()
+rrf_fusion = ReciprocalRankFusion(
+    k=settings.rrf_k,
+    reranker=reranker,
+    method=settings.fusion_method,
+    weights={"dense": settings.fusion_dense_weight, "sparse": settings.fusion_sparse_weight}
 )
 
-# Product retrieval components
-product_dense_retrieval = DenseRetrieval(
-    index_path=settings.product_faiss_index_path,
-    metadata_path=settings.product_metadata_index_path
+# Pooled, keep-alive client for the embedding service (closed on shutdown)
+embedding_client = UpstreamClient(
+    "embedding",
+    settings.embedding_service_url,
+    timeout=30.0,
+    max_connections=settings.http_max_connections,
+    max_keepalive_connections=settings.http_max_keepalive_connections,
+    http2=settings.http2_enabled,
+    verify=settings.verify_ssl,
+    failure_threshold=settings.circuit_failure_threshold,
+    reset_timeout=settings.circuit_reset_timeout_seconds
 )
-
-product_sparse_retrieval = SparseRetrieval(
-    index_path=settings.product_bm25_index_path,
-    metadata_path=settings.product_metadata_index_path
+# Packed float32/float16 embeddings decode straight into arrays (no JSON float lists)
+embedding_wire_format = resolve_format(settings.embedding_encoding_format, settings.embedding_wire_dtype)
+
+# Repeated queries (FAQ questions, storefront autocomplete) skip the embedding
+# call and, for identical requests against the same snapshot, the whole search
+embedding_cache = TTLCache(
+    "query embedding",
+    max_size=settings.query_embedding_cache_size,
+    ttl_seconds=settings.query_embedding_cache_ttl_seconds
+)
+result_cache = TTLCache(
+    "search result",
+    max_size=settings.result_cache_size,
+    ttl_seconds=settings.result_cache_ttl_seconds
 )
-
-rrf_fusion = ReciprocalRankFusion(k=settings.rrf_k)
 
 
 # Request/Response Models
@@ -73,6 +203,9 @@ class HybridRetrievalRequest(BaseModel):
         top_k_candidates: Number of candidates to fetch from each method (dense/sparse) before fusion.
         top_k_fusion: Number of top results to keep after Reciprocal Rank Fusion.
         top_k_final: Number of final results to return after reranking (if enabled).
+        nprobe: IVF lists probed by dense search (IVF indexes only).
+        ef_search: HNSW search list size for dense search (HNSW indexes only).
+        include_query_embedding: Return the query embedding with the results.
     """
     query: str = Field(..., description="Query string")
     top_k_candidates: int = Field(
@@ -87,6 +220,20 @@ class HybridRetrievalRequest(BaseModel):
         10,
         description="Number of final results after reranking"
     )
+    nprobe: Optional[int] = Field(
+        None,
+        description="IVF lists to probe in dense search (defaults to FAISS_NPROBE)",
+        ge=1
+    )
+    ef_search: Optional[int] = Field(
+        None,
+        description="HNSW efSearch for dense search (defaults to FAISS_EF_SEARCH)",
+        ge=1
+    )
+    include_query_embedding: bool = Field(
+        False,
+        description="Return the query embedding (e.g. for the LLM answer cache)"
+    )
     
     class Config:
         json_schema_extra = {
@@ -108,6 +255,8 @@ class RetrievalResult(BaseModel):
         document_id: Parent document identifier.
         text: Text content of the chunk.
         page_number: Page number (optional).
+        char_start: Start offset of the chunk in its page text (optional).
+        char_end: End offset of the chunk in its page text (optional).
         score: Relevance score (from fusion or reranking).
         rank: Final rank position (1-based).
         retrieval_method: Method that found this result (e.g., 'hybrid', 'dense', 'sparse').
@@ -117,6 +266,8 @@ class RetrievalResult(BaseModel):
     document_id: str
     text: str
     page_number: Optional[int] = None
+    char_start: Optional[int] = None
+    char_end: Optional[int] = None
     score: float
     rank: int
     retrieval_method: str
@@ -135,6 +286,8 @@ class HybridRetrievalResponse(BaseModel):
         fusion_time_ms: Time taken for fusion phase.
         query: Original query.
         total_candidates: Total raw candidates found before fusion.
+        index_version: Version of the index snapshot that was searched.
+        query_embedding: Query embedding used for dense search (if requested).
     """
     results: List[RetrievalResult]
     retrieval_time_ms: float
@@ -143,12 +296,16 @@ class HybridRetrievalResponse(BaseModel):
     fusion_time_ms: float
     query: str
     total_candidates: int
+    index_version: Optional[int] = None
+    query_embedding: Optional[List[float]] = None
 
 
 class IndexStats(BaseModel):
     """Index statistics"""
     dense_stats: Dict
     sparse_stats: Dict
+    cache_stats: Dict
+    http_pools: Dict
     deployment_phase: str
 
 
@@ -166,6 +323,8 @@ class ProductSearchRequest(BaseModel):
     query_text: str = Field(..., description="Query text for BM25")
     filters: Dict[str, Any] = Field(default_factory=dict, description="Product filters")
     top_k: int = Field(20, description="Number of results to return", ge=1, le=100)
+    nprobe: Optional[int] = Field(None, description="IVF lists to probe in dense search", ge=1)
+    ef_search: Optional[int] = Field(None, description="HNSW efSearch for dense search", ge=1)
 
 
 class ProductSearchResponse(BaseModel):
@@ -183,7 +342,7 @@ class ProductSearchResponse(BaseModel):
 
 
 # Helper Functions
-async def get_query_embedding(query: str) -> List[float]:
+async def get_query_embedding(query: str) -> np.ndarray:
     """
     Get query embedding from embedding service.
     
@@ -191,19 +350,135 @@ async def get_query_embedding(query: str) -> List[float]:
         query (str): Query string to encode.
         
     Returns:
-        List[float]: Query embedding vector.
+        np.ndarray: Query embedding vector (float32, read-only when cached).
         
     Raises:
         httpx.HTTPError: If embedding service is unreachable or returns error.
+        CircuitOpenError: If the embedding service circuit is open.
     """
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-            f"{settings.embedding_service_url}/api/v1/embeddings/encode",
-            json={"texts": [query], "normalize": True}
-        )
-        response.raise_for_status()
-        data = response.json()
-        return data["embeddings"][0]
+    cached = embedding_cache.get(query)
+    if cached is not None:
+        return cached
+    
+    response = await embedding_client.post(
+        "/api/v1/embeddings/encode",
+        json={"texts": [query], "normalize": True, **embedding_wire_format}
+    )
+    response.raise_for_status()
+    embedding = decode_response(response.headers.get("content-type"), response.content)[0]
+    # Cached vectors are shared between requests
+    embedding.flags.writeable = False
+    
+    embedding_cache.put(query, embedding)
+    return embedding
+
+
+def result_cache_key(endpoint: str, snapshot: IndexSnapshot, request: BaseModel) -> Tuple:
+    """
+    Build the result cache key for a search request.
+    
+    The key covers every request field (query, filters, top-k values, ANN
+    parameters) plus the snapshot the search runs against, so results are
+    never served across index versions. A pre-computed query embedding is
+    keyed by its hash rather than serialized.
+    
+    Args:
+        endpoint (str): Endpoint name.
+        snapshot (IndexSnapshot): Snapshot used for the search.
+        request (BaseModel): Search request.
+        
+    Returns:
+        Tuple: Hashable cache key.
+    """
+    fields = request.model_dump()
+    embedding = fields.pop("query_embedding", None)
+    params = json.dumps(fields, sort_keys=True, default=str)
+    embedding_hash = hash(tuple(embedding)) if embedding else None
+    return (endpoint, snapshot.version, snapshot.loaded_at, params, embedding_hash)
+
+
+def _timed_call(func: Callable, *args, **kwargs) -> Tuple[Any, float]:
+    """
+    Run a function and measure its wall-clock duration.
+    
+    Args:
+        func (Callable): Function to run.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+        
+    Returns:
+        Tuple[Any, float]: Function result and elapsed time in milliseconds.
+    """
+    start = time.time()
+    result = func(*args, **kwargs)
+    return result, (time.time() - start) * 1000
+
+
+async def run_search(func: Callable, *args, **kwargs) -> Tuple[Any, float]:
+    """
+    Run a blocking search call on the bounded search worker pool.
+    
+    The elapsed time is measured inside the worker, so it reflects the
+    search itself rather than time spent waiting for a free worker.
+    
+    Args:
+        func (Callable): Blocking search function (e.g. DenseRetrieval.search).
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+        
+    Returns:
+        Tuple[Any, float]: Search results and elapsed time in milliseconds.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        search_executor,
+        functools.partial(_timed_call, func, *args, **kwargs)
+    )
+
+
+async def embed_and_dense_search(
+    retriever: DenseRetrieval,
+    query: str,
+    query_embedding: Optional[List[float]] = None,
+    ids_only: bool = False,
+    **search_kwargs
+) -> Tuple[Any, float]:
+    """
+    Get the query embedding (unless provided), then run dense search on the worker pool.
+    
+    Args:
+        retriever (DenseRetrieval): Dense retriever to search.
+        query (str): Query string to embed.
+        query_embedding (Optional[List[float]]): Pre-computed query embedding.
+        ids_only (bool): Return row ids and scores (DenseRetrieval.search_ids)
+                         instead of result dictionaries.
+        **search_kwargs: Extra arguments for DenseRetrieval.search.
+        
+    Returns:
+        Tuple[Any, float]: Dense results and dense search time in milliseconds.
+    """
+    if not query_embedding:
+        query_embedding = await get_query_embedding(query)
+    search = retriever.search_ids if ids_only else retriever.search
+    return await run_search(search, query_embedding, **search_kwargs)
+
+
+async def gather_searches(*tasks: "asyncio.Future") -> List[Any]:
+    """
+    Wait for concurrent search tasks, cancelling the rest if one fails.
+    
+    Args:
+        *tasks (asyncio.Future): Search tasks to wait for.
+        
+    Returns:
+        List[Any]: Task results in the order given.
+    """
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
 
 
 # API Endpoints
@@ -214,18 +489,21 @@ async def get_query_embedding(query: str) -> List[float]:
     summary="Hybrid search",
     description="Search using dense + sparse + fusion + reranking"
 )
-async def hybrid_search(request: HybridRetrievalRequest):
+async def hybrid_search(request: HybridRetrievalRequest, snapshot: IndexSnapshot = Depends(active_snapshot)):
     """
     Perform hybrid search using Dense + Sparse + Fusion + Reranking.
     
     Orchestrates the retrieval pipeline:
-    1. Generates query embedding.
-    2. Runs parallel dense (FAISS) and sparse (BM25) searches.
-    3. Fuses results using Reciprocal Rank Fusion (RRF).
+    1. Starts sparse (BM25) search while the query embedding is generated.
+    2. Runs dense (FAISS) search once the embedding arrives; both searches
+       run concurrently on the bounded search worker pool.
+    3. Fuses the id lists (Reciprocal Rank Fusion by default, see ``fusion_method``)
+       and decodes metadata for the fused top-k only.
     4. Optionally reranks top results using a cross-encoder model.
     
     Args:
         request (HybridRetrievalRequest): Search parameters.
+        snapshot (IndexSnapshot): Active index snapshot, held for the request.
         
     Returns:
         HybridRetrievalResponse: Ranked search results and timing metrics.
@@ -238,36 +516,57 @@ async def hybrid_search(request: HybridRetrievalRequest):
         
         logger.info(f"Hybrid search query: {request.query[:100]}")
         
-        # Get query embedding
-        query_embedding = await get_query_embedding(request.query)
-        
-        # Dense retrieval
-        dense_start = time.time()
-        dense_results = dense_retrieval.search(
-            query_embedding,
-            top_k=request.top_k_candidates
-        )
-        dense_time = (time.time() - dense_start) * 1000
+        cache_key = result_cache_key("hybrid", snapshot, request)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            formatted_results, total_candidates, query_embedding = cached
+            total_time = (time.time() - start_time) * 1000
+            logger.info(f"Hybrid search served from cache: {len(formatted_results)} results")
+            return HybridRetrievalResponse(
+                results=formatted_results,
+                retrieval_time_ms=round(total_time, 2),
+                dense_time_ms=0,
+                sparse_time_ms=0,
+                fusion_time_ms=0,
+                query=request.query,
+                total_candidates=total_candidates,
+                index_version=snapshot.version,
+                query_embedding=query_embedding
+            )
         
-        # Sparse retrieval
-        sparse_start = time.time()
-        sparse_results = sparse_retrieval.search(
+        # Sparse (BM25) scoring does not need the embedding, so it starts
+        # right away on the worker pool while the embedding call is in flight.
+        # Dense search follows as soon as the embedding arrives.
+        # Both return row ids and scores; metadata is decoded after fusion.
+        sparse_task = asyncio.ensure_future(run_search(
+            snapshot.sparse_retrieval.search_ids,
             request.query,
             top_k=request.top_k_candidates
+        ))
+        dense_task = asyncio.ensure_future(embed_and_dense_search(
+            snapshot.dense_retrieval,
+            request.query,
+            ids_only=True,
+            top_k=request.top_k_candidates,
+            nprobe=request.nprobe,
+            ef_search=request.ef_search
+        ))
+        
+        (dense_ranked, dense_time), (sparse_ranked, sparse_time) = await gather_searches(
+            dense_task, sparse_task
         )
-        sparse_time = (time.time() - sparse_start) * 1000
         
-        # Fusion
+        # Fusion over id arrays; only the fused top-k rows are decoded
         fusion_start = time.time()
-        fused_results = rrf_fusion.fuse(
-            dense_results,
-            sparse_results,
+        fused = rrf_fusion.fuse_ids(
+            [RankedList("dense", *dense_ranked), RankedList("sparse", *sparse_ranked)],
             top_k=request.top_k_fusion
         )
+        fused_results = rrf_fusion.join_results(fused, snapshot.dense_retrieval.metadata)
         
         # Reranking (enterprise cross-encoder)
         if settings.use_reranking:
-            final_results = rrf_fusion.rerank(
+            final_results = await rrf_fusion.rerank(
                 request.query,
                 fused_results,
                 top_k=request.top_k_final
@@ -290,6 +589,15 @@ async def hybrid_search(request: HybridRetrievalRequest):
             f"(dense: {dense_time:.2f}ms, sparse: {sparse_time:.2f}ms, fusion: {fusion_time:.2f}ms)"
         )
         
+        total_candidates = len(dense_ranked[0]) + len(sparse_ranked[0])
+        # The dense search left the embedding in the query embedding cache
+        query_embedding = None
+        if request.include_query_embedding:
+            query_embedding = (await get_query_embedding(request.query)).tolist()
+        # Results that fell back to fusion order (reranker slow or failing) are not cached
+        if not settings.use_reranking or all("rerank_score" in r for r in final_results):
+            result_cache.put(cache_key, (formatted_results, total_candidates, query_embedding))
+        
         return HybridRetrievalResponse(
             results=formatted_results,
             retrieval_time_ms=round(total_time, 2),
@@ -297,7 +605,9 @@ async def hybrid_search(request: HybridRetrievalRequest):
             sparse_time_ms=round(sparse_time, 2),
             fusion_time_ms=round(fusion_time, 2),
             query=request.query,
-            total_candidates=len(dense_results) + len(sparse_results)
+            total_candidates=total_candidates,
+            index_version=snapshot.version,
+            query_embedding=query_embedding
         )
         
     except Exception as e:
@@ -315,7 +625,7 @@ async def hybrid_search(request: HybridRetrievalRequest):
     summary="Dense search only",
     description="Search using only FAISS dense retrieval"
 )
-async def dense_only_search(request: HybridRetrievalRequest):
+async def dense_only_search(request: HybridRetrievalRequest, snapshot: IndexSnapshot = Depends(active_snapshot)):
     """
     Perform dense-only search (FAISS).
     
@@ -323,6 +633,7 @@ async def dense_only_search(request: HybridRetrievalRequest):
     
     Args:
         request (HybridRetrievalRequest): Search parameters.
+        snapshot (IndexSnapshot): Active index snapshot, held for the request.
         
     Returns:
         HybridRetrievalResponse: Dense search results.
@@ -332,12 +643,13 @@ async def dense_only_search(request: HybridRetrievalRequest):
         
         query_embedding = await get_query_embedding(request.query)
         
-        dense_start = time.time()
-        dense_results = dense_retrieval.search(
+        dense_results, dense_time = await run_search(
+            snapshot.dense_retrieval.search,
             query_embedding,
-            top_k=request.top_k_final
+            top_k=request.top_k_final,
+            nprobe=request.nprobe,
+            ef_search=request.ef_search
         )
-        dense_time = (time.time() - dense_start) * 1000
         
         total_time = (time.time() - start_time) * 1000
         
@@ -370,7 +682,7 @@ async def dense_only_search(request: HybridRetrievalRequest):
     summary="Sparse search only",
     description="Search using only BM25 sparse retrieval"
 )
-async def sparse_only_search(request: HybridRetrievalRequest):
+async def sparse_only_search(request: HybridRetrievalRequest, snapshot: IndexSnapshot = Depends(active_snapshot)):
     """
     Perform sparse-only search (BM25).
     
@@ -378,6 +690,7 @@ async def sparse_only_search(request: HybridRetrievalRequest):
     
     Args:
         request (HybridRetrievalRequest): Search parameters.
+        snapshot (IndexSnapshot): Active index snapshot, held for the request.
         
     Returns:
         HybridRetrievalResponse: Sparse search results.
@@ -385,12 +698,11 @@ async def sparse_only_search(request: HybridRetrievalRequest):
     try:
         start_time = time.time()
         
-        sparse_start = time.time()
-        sparse_results = sparse_retrieval.search(
+        sparse_results, sparse_time = await run_search(
+            snapshot.sparse_retrieval.search,
             request.query,
             top_k=request.top_k_final
         )
-        sparse_time = (time.time() - sparse_start) * 1000
         
         total_time = (time.time() - start_time) * 1000
         
@@ -422,16 +734,25 @@ async def sparse_only_search(request: HybridRetrievalRequest):
     status_code=status.HTTP_200_OK,
     summary="Get index statistics"
 )
-async def get_stats():
+async def get_stats(snapshot: IndexSnapshot = Depends(active_snapshot)):
     """
     Get retrieval index statistics.
     
     Returns:
-        IndexStats: Statistics for both dense and sparse indexes.
+        IndexStats: Statistics for both dense and sparse indexes, and cache counters.
     """
     return IndexStats(
-        dense_stats=dense_retrieval.get_stats(),
-        sparse_stats=sparse_retrieval.get_stats(),
+        dense_stats={**snapshot.dense_retrieval.get_stats(), "snapshot_version": snapshot.version},
+        sparse_stats=snapshot.sparse_retrieval.get_stats(),
+        cache_stats={
+            "query_embedding": embedding_cache.get_stats(),
+            "results": result_cache.get_stats(),
+            "rerank_scores": reranker.get_stats()
+        },
+        http_pools={
+            "embedding": embedding_client.get_stats(),
+            "reranker": reranker.api_client.get_pool_stats()
+        },
         deployment_phase=settings.deployment_phase
     )
 
@@ -447,21 +768,26 @@ async def reload_indexes():
     Reload all indexes from disk.
     
     Useful after clearing or re-ingesting data without restarting the service.
+    The latest published snapshot is loaded on a background thread and swapped
+    in atomically; queries keep using the previous snapshot until then, and
+    it stays active if the new one fails to load.
     
     Returns:
         dict: Status message and loaded index flags.
     """
     try:
-        dense_retrieval.reload()
-        sparse_retrieval.reload()
-        product_dense_retrieval.reload()
-        product_sparse_retrieval.reload()
+        snapshot = await refresh_snapshot()
+        dense_retrieval = snapshot.dense_retrieval
+        sparse_retrieval = snapshot.sparse_retrieval
+        product_dense_retrieval = snapshot.product_dense_retrieval
+        product_sparse_retrieval = snapshot.product_sparse_retrieval
         
-        logger.info("Successfully reloaded all indexes")
+        logger.info(f"Successfully reloaded all indexes (snapshot v{snapshot.version})")
         
         return {
             "message": "Indexes reloaded successfully",
             "status": "success",
+            "snapshot_version": snapshot.version,
             "indexes_loaded": {
                 "dense": dense_retrieval.index is not None,
                 "sparse": sparse_retrieval.bm25 is not None,
@@ -488,15 +814,20 @@ async def reload_indexes():
 )
 async def health_check():
     """Health check endpoint"""
+    try:
+        snapshot = snapshot_manager.current
+    except Exception as e:
+        logger.error(f"No index snapshot available: {e}")
+        snapshot = None
     return HealthResponse(
         status="healthy",
         service="retrieval",
         deployment_phase=settings.deployment_phase,
         indexes_loaded={
-            "dense": dense_retrieval.index is not None,
-            "sparse": sparse_retrieval.bm25 is not None,
-            "product_dense": product_dense_retrieval.index is not None,
-            "product_sparse": product_sparse_retrieval.bm25 is not None
+            "dense": snapshot is not None and snapshot.dense_retrieval.index is not None,
+            "sparse": snapshot is not None and snapshot.sparse_retrieval.bm25 is not None,
+            "product_dense": snapshot is not None and snapshot.product_dense_retrieval.index is not None,
+            "product_sparse": snapshot is not None and snapshot.product_sparse_retrieval.bm25 is not None
         }
     )
 
@@ -508,7 +839,7 @@ async def health_check():
     summary="Product search",
     description="Search products with filters using hybrid retrieval"
 )
-async def search_products(request: ProductSearchRequest):
+async def search_products(request: ProductSearchRequest, snapshot: IndexSnapshot = Depends(active_snapshot)):
     """
     Search products with filters using hybrid retrieval.
     
@@ -517,6 +848,7 @@ async def search_products(request: ProductSearchRequest):
     
     Args:
         request (ProductSearchRequest): Query and filter parameters.
+        snapshot (IndexSnapshot): Active index snapshot, held for the request.
         
     Returns:
         ProductSearchResponse: Formatted product results.
@@ -526,40 +858,54 @@ async def search_products(request: ProductSearchRequest):
         
         logger.info(f"Product search: query='{request.query_text[:100]}', filters={request.filters}")
         
-        # Get query embedding if not provided
-        query_embedding = request.query_embedding
-        if not query_embedding:
-            query_embedding = await get_query_embedding(request.query_text)
+        cache_key = result_cache_key("products", snapshot, request)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            total_time = (time.time() - start_time) * 1000
+            logger.info(f"Product search served from cache: {len(cached)} results")
+            return ProductSearchResponse(
+                results=cached,
+                total_matches=len(cached),
+                retrieval_time_ms=round(total_time, 2)
+            )
         
-        # Dense retrieval with filters (uses UNIFIED index, filter by content_type=product)
-        dense_start = time.time()
-        dense_results = dense_retrieval.search(
-            query_embedding,
-            top_k=request.top_k * 5,  # Get more candidates for filtering
+        # Sparse retrieval with filters (uses UNIFIED index, filter by content_type=product)
+        # starts immediately; it does not depend on the query embedding.
+        # Filters are applied inside both searches, so each returns up to top_k
+        # matching candidates without over-fetching.
+        sparse_task = asyncio.ensure_future(run_search(
+            snapshot.sparse_retrieval.search_ids,
+            request.query_text,
+            top_k=request.top_k,
             filters=request.filters,
             product_mode=True
-        )
-        dense_time = (time.time() - dense_start) * 1000
+        ))
         
-        # Sparse retrieval with filters (uses UNIFIED index, filter by content_type=product)
-        sparse_start = time.time()
-        sparse_results = sparse_retrieval.search(
+        # Dense retrieval with filters (uses UNIFIED index, filter by content_type=product);
+        # the query embedding is fetched first if not provided
+        dense_task = asyncio.ensure_future(embed_and_dense_search(
+            snapshot.dense_retrieval,
             request.query_text,
-            top_k=request.top_k * 5,  # Get more candidates for filtering
+            query_embedding=request.query_embedding,
+            ids_only=True,
+            top_k=request.top_k,
             filters=request.filters,
-            product_mode=True
+            product_mode=True,
+            nprobe=request.nprobe,
+            ef_search=request.ef_search
+        ))
+        
+        (dense_ranked, dense_time), (sparse_ranked, sparse_time) = await gather_searches(
+            dense_task, sparse_task
         )
-        sparse_time = (time.time() - sparse_start) * 1000
         
-        # Fusion with enrichment (product mode)
+        # Fusion over id arrays; only the fused top-k rows are decoded
         fusion_start = time.time()
-        fused_results = rrf_fusion.fuse(
-            dense_results,
-            sparse_results,
-            top_k=request.top_k,
-            product_mode=True,
-            filters=request.filters
+        fused = rrf_fusion.fuse_ids(
+            [RankedList("dense", *dense_ranked), RankedList("sparse", *sparse_ranked)],
+            top_k=request.top_k
         )
+        fused_results = rrf_fusion.join_results(fused, snapshot.dense_retrieval.metadata)
         fusion_time = (time.time() - fusion_start) * 1000
         
         # Format results for products
@@ -591,6 +937,8 @@ async def search_products(request: ProductSearchRequest):
             f"(dense: {dense_time:.2f}ms, sparse: {sparse_time:.2f}ms, fusion: {fusion_time:.2f}ms)"
         )
         
+        result_cache.put(cache_key, product_results)
+        
         return ProductSearchResponse(
             results=product_results,
             total_matches=len(product_results),  # This would be calculated before filtering
@@ -628,8 +976,7 @@ if __name__ == "__main__":
     
     logger.info(f"Starting Retrieval Service on {settings.retrieval_host}:{settings.retrieval_port}")
     logger.info(f"Deployment phase: {settings.deployment_phase}")
-    logger.info(f"FAISS index: {settings.faiss_index_path}")
-    logger.info(f"BM25 index: {settings.bm25_index_path}")
+    logger.info(f"Index manifest: {settings.index_manifest_path}")
     
     uvicorn.run(
         app,
@@ -0,0 +1,233 @@
+"""
+Columnar Attribute Index
+Filterable metadata fields as NumPy arrays keyed by vector id
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Column files written next to the metadata records by the ingestion service
+ATTRIBUTES_FILE = "attributes.json"
+ATTRIBUTE_COLUMNS = {
+    "live": "attr_live.npy",
+    "price": "attr_price.npy",
+    "rating": "attr_rating.npy",
+    "category": "attr_category.npy",
+    "content_type": "attr_content_type.npy",
+}
+
+
+def _to_float(value: Any) -> float:
+    """
+    Convert a metadata value to float, using NaN for missing or invalid values.
+
+    Args:
+        value (Any): Raw metadata value.
+
+    Returns:
+        float: Parsed value or NaN.
+    """
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class AttributeIndex:
+    """
+    Columnar index of the attributes used by product filters.
+
+    Row ``i`` describes vector id / BM25 document ``i`` of the unified index.
+    Prices and ratings are float arrays (NaN when missing); categories and
+    content types are dictionary-encoded integer arrays (-1 when missing).
+    Filters are evaluated with vectorized comparisons into a boolean
+    allow-list, which the dense and sparse retrievers apply *during* search
+    instead of over-fetching candidates and filtering dicts afterwards.
+    """
+
+    def __init__(
+        self,
+        live: np.ndarray,
+        price: np.ndarray,
+        rating: np.ndarray,
+        category: np.ndarray,
+        content_type: np.ndarray,
+        category_codes: Dict[str, int],
+        content_type_codes: Dict[str, int]
+    ):
+        """
+        Initialize the index from prebuilt columns.
+
+        Args:
+            live (np.ndarray): True for rows that are not deleted.
+            price (np.ndarray): Price per row (NaN if missing).
+            rating (np.ndarray): Rating per row (NaN if missing).
+            category (np.ndarray): Category code per row (-1 if missing).
+            content_type (np.ndarray): Content type code per row (-1 if missing).
+            category_codes (Dict[str, int]): Category to code mapping.
+            content_type_codes (Dict[str, int]): Content type to code mapping.
+        """
+        self.live = live
+        self.price = price
+        self.rating = rating
+        self.category = category
+        self.content_type = content_type
+        self.category_codes = category_codes
+        self.content_type_codes = content_type_codes
+
+    @classmethod
+    def from_metadata(cls, metadata: Iterable[Optional[Dict]]) -> "AttributeIndex":
+        """
+        Build the columns by walking metadata rows (legacy pickled metadata).
+
+        Args:
+            metadata (Iterable[Optional[Dict]]): Metadata rows (None for deleted rows).
+
+        Returns:
+            AttributeIndex: The built index.
+        """
+        metadata = list(metadata)
+        n = len(metadata)
+        live = np.zeros(n, dtype=bool)
+        price = np.full(n, np.nan, dtype=np.float64)
+        rating = np.full(n, np.nan, dtype=np.float32)
+        category = np.full(n, -1, dtype=np.int32)
+        content_type = np.full(n, -1, dtype=np.int8)
+        category_codes: Dict[str, int] = {}
+        content_type_codes: Dict[str, int] = {}
+
+        for row, chunk in enumerate(metadata):
+            if chunk is None:
+                continue
+            live[row] = True
+
+            if chunk.get('content_type') is not None:
+                content_type[row] = content_type_codes.setdefault(
+                    chunk['content_type'], len(content_type_codes)
+                )
+
+            attributes = chunk.get('metadata') or {}
+            price[row] = _to_float(attributes.get('price'))
+            rating[row] = _to_float(attributes.get('rating'))
+            if attributes.get('category') is not None:
+                category[row] = category_codes.setdefault(attributes['category'], len(category_codes))
+
+        logger.info(
+            f"Built attribute index: {n} rows, {len(category_codes)} categories, "
+            f"{len(content_type_codes)} content types"
+        )
+        return cls(live, price, rating, category, content_type, category_codes, content_type_codes)
+
+    @classmethod
+    def load(cls, directory: Union[str, Path]) -> "AttributeIndex":
+        """
+        Memory-map the attribute columns written by the ingestion service.
+
+        Args:
+            directory (Union[str, Path]): Snapshot directory.
+
+        Returns:
+            AttributeIndex: Index backed by read-only mapped columns.
+        """
+        directory = Path(directory)
+        with open(directory / ATTRIBUTES_FILE, 'r') as f:
+            vocab = json.load(f)
+        columns = {
+            name: np.load(directory / file_name, mmap_mode='r')
+            for name, file_name in ATTRIBUTE_COLUMNS.items()
+        }
+        return cls(
+            category_codes={name: code for code, name in enumerate(vocab["categories"])},
+            content_type_codes={name: code for code, name in enumerate(vocab["content_types"])},
+            **columns
+        )
+
+    @classmethod
+    def open(cls, metadata_path: Union[str, Path], metadata: Iterable[Optional[Dict]]) -> "AttributeIndex":
+        """
+        Load stored columns if the snapshot has them, otherwise build from metadata.
+
+        Args:
+            metadata_path (Union[str, Path]): Snapshot directory or legacy pickle path.
+            metadata (Iterable[Optional[Dict]]): Metadata rows, used as fallback.
+
+        Returns:
+            AttributeIndex: The attribute index.
+        """
+        metadata_path = Path(metadata_path)
+        if metadata_path.is_dir() and (metadata_path / ATTRIBUTES_FILE).exists():
+            return cls.load(metadata_path)
+        return cls.from_metadata(metadata)
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def allow_mask(self, filters: Optional[Dict] = None, product_mode: bool = False) -> np.ndarray:
+        """
+        Evaluate filters into an allow-list over vector ids.
+
+        Supports the filters produced by the gateway's filter extractor:
+        ``price_min``, ``price_max``, ``rating_min`` and ``categories``. Rows
+        without a price (or rating) never match a price (or rating) filter.
+
+        Args:
+            filters (Optional[Dict]): Product filters.
+            product_mode (bool): If True, only rows with content_type 'product' are allowed.
+
+        Returns:
+            np.ndarray: Boolean mask, True for rows that pass every filter.
+        """
+        mask = np.array(self.live, dtype=bool)
+        filters = filters or {}
+
+        if product_mode:
+            code = self.content_type_codes.get('product')
+            if code is None:
+                return np.zeros(len(mask), dtype=bool)
+            mask &= self.content_type == code
+
+        # NaN comparisons are False, so rows without a value drop out
+        price_min = filters.get('price_min')
+        if price_min is not None:
+            mask &= self.price >= float(price_min)
+        price_max = filters.get('price_max')
+        if price_max is not None:
+            mask &= self.price <= float(price_max)
+
+        rating_min = filters.get('rating_min')
+        if rating_min is not None:
+            mask &= self.rating >= float(rating_min)
+
+        categories = filters.get('categories')
+        if categories:
+            codes = [self.category_codes[c] for c in categories if c in self.category_codes]
+            mask &= np.isin(self.category, np.asarray(codes, dtype=np.int32))
+
+        return mask
+
+    @staticmethod
+    def is_restrictive(filters: Optional[Dict] = None, product_mode: bool = False) -> bool:
+        """
+        Check whether a search needs an allow-list at all.
+
+        Args:
+            filters (Optional[Dict]): Product filters.
+            product_mode (bool): Product-only search flag.
+
+        Returns:
+            bool: True if product_mode is set or any supported filter has a value.
+        """
+        if product_mode:
+            return True
+        if not filters:
+            return False
+        return any(
+            filters.get(key) is not None for key in ('price_min', 'price_max', 'rating_min')
+        ) or bool(filters.get('categories'))
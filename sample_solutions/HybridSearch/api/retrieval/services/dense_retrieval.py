@@ -4,11 +4,13 @@ Semantic search using vector embeddings
 """
 
 import logging
-import pickle
+import math
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple
 import numpy as np
 import faiss
+from services.attribute_index import AttributeIndex
+from services.metadata_records import load_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -19,61 +21,198 @@ class DenseRetrieval:
     
     Manages loading of FAISS indexes and metadata, and performing semantic search
     using vector embeddings. Supports both document and product search modes.
+    
+    The index type (flat, IVF or HNSW) is chosen by the ingestion service and
+    detected on load. Query-time accuracy knobs (``nprobe`` for IVF,
+    ``efSearch`` for HNSW) are passed per search as FAISS search parameters,
+    so concurrent searches with different settings do not interfere.
+    
+    Filters are evaluated on a columnar ``AttributeIndex`` into an allow-list
+    that FAISS applies through an ``IDSelectorBitmap`` during the search, so
+    filtered searches return the best ``top_k`` matching vectors directly.
     """
     
+    # Upper bound for efSearch when it is scaled up for selective filters
+    MAX_FILTERED_EF_SEARCH = 1024
+    # Filters allowing at most this many vectors are scored exactly on the
+    # reconstructed vectors instead of traversing an approximate index
+    EXACT_FILTER_MAX_ALLOWED = 4096
+    
     def __init__(
         self,
         index_path: str,
-        metadata_path: str
+        metadata_path: str,
+        default_nprobe: int = 16,
+        default_ef_search: int = 64,
+        metadata: Optional[Sequence[Optional[Dict]]] = None,
+        attributes: Optional[AttributeIndex] = None
     ):
         """
         Initialize dense retrieval.
         
         Args:
             index_path (str): Path to the FAISS index file (.bin).
-            metadata_path (str): Path to the matching metadata pickle file (.pkl).
+            metadata_path (str): Snapshot directory with metadata records, or a
+                                 legacy metadata pickle file (.pkl).
+            default_nprobe (int): IVF lists probed per query unless overridden.
+            default_ef_search (int): HNSW search list size unless overridden.
+            metadata (Optional[Sequence[Optional[Dict]]]): Already loaded metadata
+                                 to share with other retrievers.
+            attributes (Optional[AttributeIndex]): Already loaded attribute index.
         """
         self.index_path = Path(index_path)
         self.metadata_path = Path(metadata_path)
+        self.default_nprobe = default_nprobe
+        self.default_ef_search = default_ef_search
         
         self.index = None
+        self.index_type = "flat"
+        self.nlist = 0
+        self.can_reconstruct = True
         self.metadata = []
+        self.attributes = AttributeIndex.from_metadata([])
         
-        self._load_index()
+        self._load_index(metadata, attributes)
     
-    def _load_index(self):
+    def _load_index(
+        self,
+        metadata: Optional[Sequence[Optional[Dict]]] = None,
+        attributes: Optional[AttributeIndex] = None
+    ):
         """
         Load FAISS index and metadata from disk.
         
         Handles missing files gracefully by initializing empty state.
+        
+        Args:
+            metadata (Optional[Sequence[Optional[Dict]]]): Shared metadata (loaded if None).
+            attributes (Optional[AttributeIndex]): Shared attribute index (loaded if None).
         """
         try:
             if self.index_path.exists():
                 self.index = faiss.read_index(str(self.index_path))
-                logger.info(f"Loaded FAISS index with {self.index.ntotal} vectors")
+                self.index_type = self._detect_index_type(self.index)
+                self.nlist = 0
+                self.can_reconstruct = True
+                if self.index_type.startswith("ivf"):
+                    ivf = faiss.extract_index_ivf(self.index)
+                    self.nlist = ivf.nlist
+                    self.can_reconstruct = self._enable_reconstruct(ivf)
+                logger.info(f"Loaded {self.index_type} FAISS index with {self.index.ntotal} vectors")
             else:
                 logger.warning(f"FAISS index not found at {self.index_path}")
                 self.index = None
+                self.index_type = "flat"
             
-            if self.metadata_path.exists():
-                with open(self.metadata_path, 'rb') as f:
-                    self.metadata = pickle.load(f)  # nosec B301 - indexes are written by this application
-                logger.info(f"Loaded {len(self.metadata)} metadata entries")
-            else:
-                logger.warning(f"Metadata not found at {self.metadata_path}")
-                self.metadata = []
+            self.metadata = metadata if metadata is not None else load_metadata(self.metadata_path)
+            if attributes is None:
+                attributes = AttributeIndex.open(self.metadata_path, self.metadata)
+            self.attributes = attributes
                 
         except Exception as e:
             logger.error(f"Error loading index: {e}")
             self.index = None
+            self.index_type = "flat"
             self.metadata = []
+            self.attributes = AttributeIndex.from_metadata([])
+    
+    @staticmethod
+    def _enable_reconstruct(ivf: faiss.IndexIVF) -> bool:
+        """
+        Let an IVF index reconstruct vectors by id for exact filtered search.
+        
+        Ids are unified row positions with gaps left by deleted rows, so a
+        hashtable direct map is used (an array map needs sequential ids).
+        
+        Args:
+            ivf (faiss.IndexIVF): Loaded IVF index.
+            
+        Returns:
+            bool: True if vectors can be reconstructed; otherwise filtered
+                  searches stay on the approximate index.
+        """
+        try:
+            ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return True
+        except RuntimeError as e:
+            logger.warning(f"IVF index cannot reconstruct vectors ({e}); using approximate filtered search only")
+            return False
+    
+    @staticmethod
+    def _detect_index_type(index: faiss.Index) -> str:
+        """
+        Identify the index type written by the ingestion service.
+        
+        Args:
+            index (faiss.Index): Loaded index, possibly wrapped in an IndexIDMap.
+            
+        Returns:
+            str: "flat", "ivf_flat", "ivf_pq" or "hnsw".
+        """
+        inner = index
+        if isinstance(inner, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            inner = faiss.downcast_index(inner.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(inner, faiss.IndexIVFPQ):
+            return "ivf_pq"
+        if isinstance(inner, faiss.IndexIVF):
+            return "ivf_flat"
+        return "flat"
+    
+    def _search_params(
+        self,
+        k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        selector: Optional[faiss.IDSelector] = None,
+        selectivity: float = 1.0
+    ) -> Optional[faiss.SearchParameters]:
+        """
+        Build per-query FAISS search parameters for the loaded index type.
+        
+        With a selector, nprobe / efSearch are scaled by the inverse of the
+        filter selectivity so approximate indexes still visit enough
+        allowed vectors to fill k results.
+        
+        Args:
+            k (int): Number of neighbours requested.
+            nprobe (Optional[int]): IVF lists to probe (default if None).
+            ef_search (Optional[int]): HNSW search list size (default if None).
+            selector (Optional[faiss.IDSelector]): Allow-list of vector ids.
+            selectivity (float): Fraction of vectors allowed by the selector.
+            
+        Returns:
+            Optional[faiss.SearchParameters]: Parameters, or None for an
+                                              unfiltered flat search.
+        """
+        scale = 1.0 / selectivity if selector is not None and selectivity > 0 else 1.0
+        
+        if self.index_type in ("ivf_flat", "ivf_pq"):
+            nprobe = min(self.nlist, math.ceil((nprobe or self.default_nprobe) * scale))
+            params = faiss.SearchParametersIVF(nprobe=max(nprobe, 1))
+        elif self.index_type == "hnsw":
+            # efSearch below k would cap the number of results
+            ef = max(ef_search or self.default_ef_search, k)
+            ef = min(math.ceil(ef * scale), max(ef, self.MAX_FILTERED_EF_SEARCH))
+            params = faiss.SearchParametersHNSW(efSearch=ef)
+        elif selector is not None:
+            params = faiss.SearchParameters()
+        else:
+            return None
+        
+        if selector is not None:
+            params.sel = selector
+        return params
     
     def search(
         self,
         query_embedding: List[float],
         top_k: int = 100,
         filters: Dict = None,
-        product_mode: bool = False
+        product_mode: bool = False,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None
     ) -> List[Dict]:
         """
         Search for similar vectors with optional filters.
@@ -81,114 +220,161 @@ class DenseRetrieval:
         Args:
             query_embedding (List[float]): Query vector (will be normalized).
             top_k (int): Number of results to return.
-            filters (Dict, optional): Metadata filters (price, rating, category).
-            product_mode (bool): If True, filters results to only 'product' type items.
+            filters (Dict, optional): Metadata filters (price, rating, category),
+                                      applied during the search.
+            product_mode (bool): If True, only 'product' type items are searched.
+            nprobe (Optional[int]): IVF lists to probe (IVF indexes only).
+            ef_search (Optional[int]): HNSW search list size (HNSW indexes only).
             
         Returns:
             List[Dict]: List of result dictionaries containing metadata, score, rank,
                        and retrieval method.
         """
+        ids, scores = self.search_ids(
+            query_embedding,
+            top_k=top_k,
+            filters=filters,
+            product_mode=product_mode,
+            nprobe=nprobe,
+            ef_search=ef_search
+        )
+        results = self.results_for(ids, scores)
+        logger.info(f"Dense retrieval found {len(results)} results")
+        return results
+    
+    def search_ids(
+        self,
+        query_embedding: List[float],
+        top_k: int = 100,
+        filters: Dict = None,
+        product_mode: bool = False,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for similar vectors, returning metadata row ids instead of results.
+        
+        Used by hybrid search, which fuses id arrays and decodes metadata only
+        for the fused top-k. Arguments are the same as for ``search``.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Row ids (int64) and cosine scores
+                (float32), best first. Deleted rows are left out.
+        """
         if not self.index or self.index.ntotal == 0:
             logger.warning("Index is empty or not loaded")
-            return []
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
         
         try:
             # Convert to numpy array and normalize
             query_vector = np.array([query_embedding], dtype=np.float32)
             faiss.normalize_L2(query_vector)
             
-            # Retrieve more candidates if filters are applied (for post-retrieval filtering)
-            k = min(top_k * 5 if filters else top_k, self.index.ntotal)
-            distances, indices = self.index.search(query_vector, k)
+            # Filters become an allow-list applied inside the FAISS search.
+            # The bitmap and selector must stay referenced until search returns.
+            bitmap = selector = None
+            selectivity = 1.0
+            k = min(top_k, self.index.ntotal)
+            if AttributeIndex.is_restrictive(filters, product_mode):
+                allow = self.attributes.allow_mask(filters, product_mode)
+                allowed = int(allow.sum())
+                if allowed == 0:
+                    logger.info("Dense retrieval: no vectors match the filters")
+                    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+                bitmap = np.packbits(allow, bitorder='little')
+                selector = faiss.IDSelectorBitmap(len(allow), faiss.swig_ptr(bitmap))
+                selectivity = allowed / max(self.index.ntotal, 1)
+                k = min(top_k, allowed)
             
-            # Format results
-            results = []
-            for idx, (distance, index) in enumerate(zip(distances[0], indices[0])):
-                if index < len(self.metadata):
-                    result = {
-                        **self.metadata[index],
-                        "score": float(distance),  # Cosine similarity
-                        "rank": idx + 1,
-                        "retrieval_method": "dense"
-                    }
-                    results.append(result)
-            
-            # Filter by content_type if in product_mode
-            if product_mode:
-                results = [r for r in results if r.get('content_type') == 'product']
-                logger.debug(f"Filtered to {len(results)} product results")
-            
-            # Apply other filters if provided
-            if filters:
-                results = self._apply_filters(results, filters)
-                # Limit to top_k after filtering
-                results = results[:top_k]
+            if (selector is not None and self.index_type != "flat" and self.can_reconstruct
+                    and allowed <= self.EXACT_FILTER_MAX_ALLOWED):
+                # Very selective filter: approximate indexes may not reach
+                # enough allowed vectors, so score the allowed ones directly
+                distances, indices = self._exact_search_subset(query_vector, np.flatnonzero(allow), k)
+            else:
+                params = self._search_params(
+                    k,
+                    nprobe=nprobe,
+                    ef_search=ef_search,
+                    selector=selector,
+                    selectivity=selectivity
+                )
+                if params is not None:
+                    distances, indices = self.index.search(query_vector, k, params=params)
+                else:
+                    distances, indices = self.index.search(query_vector, k)
             
-            logger.info(f"Dense retrieval found {len(results)} results")
-            return results
+            # Rows deleted by ingestion (tombstoned metadata) are skipped until compaction
+            ids, scores = indices[0].astype(np.int64), distances[0]
+            keep = (ids >= 0) & (ids < min(len(self.metadata), len(self.attributes)))
+            keep[keep] = self.attributes.live[ids[keep]]
+            return ids[keep], scores[keep]
             
         except Exception as e:
             logger.error(f"Error during dense search: {e}")
-            return []
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
     
-    def _apply_filters(self, results: List[Dict], filters: Dict) -> List[Dict]:
+    def results_for(self, ids: np.ndarray, scores: np.ndarray) -> List[Dict]:
         """
-        Apply post-retrieval metadata filters.
+        Decode the metadata of returned rows into result dictionaries.
         
         Args:
-            results (List[Dict]): List of result dictionaries.
-            filters (Dict): Filter dictionary (e.g., {'price_min': 10}).
+            ids (np.ndarray): Row ids, best first.
+            scores (np.ndarray): Cosine scores.
             
         Returns:
-            List[Dict]: Filtered list of results.
+            List[Dict]: Result dictionaries with metadata, score, rank and retrieval method.
+        """
+        results = []
+        for index, score in zip(ids.tolist(), scores.tolist()):
+            chunk = self.metadata[index]
+            if chunk is not None:
+                results.append({
+                    **chunk,
+                    "score": score,  # Cosine similarity
+                    "rank": len(results) + 1,
+                    "retrieval_method": "dense"
+                })
+        return results
+    
+    def _exact_search_subset(
+        self,
+        query_vector: np.ndarray,
+        ids: np.ndarray,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        filtered = []
+        Score a small set of vector ids exactly.
         
-        for result in results:
-            metadata = result.get('metadata', {})
-            
-            # Price filters
-            if 'price_min' in filters or 'price_max' in filters:
-                price = metadata.get('price')
-                if price is None:
-                    continue  # Skip products without price if price filter is set
-                
-                if 'price_min' in filters and price < filters['price_min']:
-                    continue
-                if 'price_max' in filters and price > filters['price_max']:
-                    continue
-            
-            # Rating filters
-            if 'rating_min' in filters:
-                rating = metadata.get('rating')
-                if rating is None or rating < filters['rating_min']:
-                    continue
-            
-            # Category filters
-            if 'categories' in filters and filters['categories']:
-                category = metadata.get('category')
-                if category not in filters['categories']:
-                    continue
+        Args:
+            query_vector (np.ndarray): Normalized query of shape (1, d).
+            ids (np.ndarray): Vector ids to score.
+            k (int): Number of results.
             
-            filtered.append(result)
-        
-        logger.info(f"Filtered {len(results)} results to {len(filtered)}")
-        return filtered
-    
-    def reload(self):
-        """Reload index and metadata from disk."""
-        logger.info("Reloading FAISS index from disk")
-        self._load_index()
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Scores and ids of shape (1, k),
+                                           in the layout of ``index.search``.
+        """
+        ids = ids.astype(np.int64)
+        vectors = self.index.reconstruct_batch(ids)
+        scores = vectors @ query_vector[0]
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return scores[order][None, :], ids[order][None, :]
     
     def get_stats(self) -> Dict:
         """
         Get index statistics.
         
         Returns:
-            Dict: Dictionary containing 'total_vectors', 'total_metadata', and 'index_loaded'.
+            Dict: Dictionary containing 'total_vectors', 'total_metadata', 'index_loaded'
+                  and 'index_type'.
         """
         return {
             "total_vectors": self.index.ntotal if self.index else 0,
+            "index_type": self.index_type,
             "total_metadata": len(self.metadata),
             "index_loaded": self.index is not None
         }
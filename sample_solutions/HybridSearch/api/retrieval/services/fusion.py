@@ -4,29 +4,241 @@ Combines results from multiple retrieval methods
 """
 
 import logging
-from typing import List, Dict
-from collections import defaultdict
+from typing import List, Dict, NamedTuple, Optional, Sequence
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+FUSION_METHODS = ("rrf", "convex", "dbsf")
+
+
+class RankedList(NamedTuple):
+    """
+    One retriever's ranked results as parallel arrays, best first.
+    
+    Attributes:
+        name (str): Retriever name (selects the list's fusion weight).
+        ids (np.ndarray): Integer document (metadata row) ids.
+        scores (np.ndarray): Raw retriever scores.
+    """
+    name: str
+    ids: np.ndarray
+    scores: np.ndarray
+
+
+class FusedRanking(NamedTuple):
+    """
+    Fused top-k as parallel arrays, best first.
+    
+    Attributes:
+        ids (np.ndarray): Document ids.
+        scores (np.ndarray): Fused scores.
+        source_scores (np.ndarray): Raw score from the first list containing each id.
+        list_ranks (np.ndarray): 1-based rank of each id in each input list
+            (shape lists x k, 0 where the list does not contain it).
+    """
+    ids: np.ndarray
+    scores: np.ndarray
+    source_scores: np.ndarray
+    list_ranks: np.ndarray
+
+
+def normalized_scores(scores: np.ndarray, method: str, k: int = 60) -> np.ndarray:
+    """
+    Turn one list's raw scores into fusion contributions.
+    
+    - ``rrf``: 1 / (k + rank), ignoring the raw scores.
+    - ``convex``: min-max normalization to [0, 1].
+    - ``dbsf``: distribution-based score fusion; scores are scaled from
+      mean - 3 std (0) to mean + 3 std (1) and clipped.
+    
+    Args:
+        scores (np.ndarray): Raw scores, best first.
+        method (str): One of ``FUSION_METHODS``.
+        k (int): RRF constant.
+        
+    Returns:
+        np.ndarray: float64 contributions, aligned with scores.
+    """
+    if method == "rrf":
+        return 1.0 / (k + np.arange(1, len(scores) + 1, dtype=np.float64))
+    
+    scores = np.asarray(scores, dtype=np.float64)
+    if not len(scores):
+        return scores
+    if method == "convex":
+        low, high = scores.min(), scores.max()
+    elif method == "dbsf":
+        mean, std = scores.mean(), scores.std()
+        low, high = mean - 3 * std, mean + 3 * std
+    else:
+        raise ValueError(f"Unknown fusion method '{method}'. Use one of: {', '.join(FUSION_METHODS)}")
+    if high <= low:
+        # All scores equal: every result counts fully
+        return np.ones(len(scores))
+    return np.clip((scores - low) / (high - low), 0.0, 1.0)
+
+
+def fuse_ranked_lists(
+    lists: Sequence[RankedList],
+    top_k: int = 50,
+    method: str = "rrf",
+    weights: Optional[Dict[str, float]] = None,
+    k: int = 60
+) -> FusedRanking:
+    """
+    Fuse any number of ranked id lists with per-list weights.
+    
+    Ids of all lists are mapped to dense positions once (``np.unique``),
+    weighted contributions are summed with ``np.bincount`` and the top-k is
+    selected with ``argpartition``, so the cost grows linearly with the
+    total number of candidates however many retrievers are fused. Ties keep
+    the order in which ids first appear (earlier lists first).
+    
+    Args:
+        lists (Sequence[RankedList]): Ranked lists to fuse.
+        top_k (int): Number of fused results.
+        method (str): "rrf", "convex" or "dbsf" (see ``normalized_scores``).
+        weights (Optional[Dict[str, float]]): Weight per list name (default 1.0).
+        k (int): RRF constant.
+        
+    Returns:
+        FusedRanking: Fused top-k.
+    """
+    weights = weights or {}
+    if top_k <= 0 or not any(len(ranked.ids) for ranked in lists):
+        empty = np.empty(0, dtype=np.int64)
+        return FusedRanking(empty, np.empty(0), np.empty(0), np.zeros((len(lists), 0), dtype=np.int64))
+    
+    all_ids = np.concatenate([np.asarray(ranked.ids, dtype=np.int64) for ranked in lists])
+    raw_scores = np.concatenate([np.asarray(ranked.scores, dtype=np.float64) for ranked in lists])
+    contributions = np.concatenate([
+        weights.get(ranked.name, 1.0) * normalized_scores(ranked.scores, method, k)
+        for ranked in lists
+    ])
+    unique_ids, first_seen, positions = np.unique(all_ids, return_index=True, return_inverse=True)
+    fused = np.bincount(positions, weights=contributions, minlength=len(unique_ids))
+    
+    if top_k < len(fused):
+        # Everything tied with the k-th best score stays a candidate, so the
+        # first-seen tie-break below is exact
+        kth_score = fused[np.argpartition(-fused, top_k - 1)[top_k - 1]]
+        candidates = np.flatnonzero(fused >= kth_score)
+    else:
+        candidates = np.arange(len(fused))
+    top = candidates[np.lexsort((first_seen[candidates], -fused[candidates]))][:top_k]
+    
+    # Rank of every fused id in every input list (0 = absent)
+    list_ranks = np.zeros((len(lists), len(unique_ids)), dtype=np.int64)
+    offset = 0
+    for row, ranked in enumerate(lists):
+        count = len(ranked.ids)
+        # Assigned in reverse so the best rank wins for repeated ids
+        list_ranks[row, positions[offset:offset + count][::-1]] = np.arange(count, 0, -1)
+        offset += count
+    
+    return FusedRanking(
+        ids=unique_ids[top],
+        scores=fused[top],
+        source_scores=raw_scores[first_seen[top]],
+        list_ranks=list_ranks[:, top]
+    )
+
 
 class ReciprocalRankFusion:
     """
-    RRF algorithm for combining ranked lists.
+    Fusion of ranked lists from multiple retrievers.
     
-    Implements Reciprocal Rank Fusion to combine results from multiple retrieval
-    sources (e.g., Dense and Sparse) into a single ranked list.
+    Combines results from multiple retrieval sources (e.g., Dense and
+    Sparse) into a single ranked list with Reciprocal Rank Fusion (the
+    default), a convex combination of min-max normalized scores, or
+    distribution-based score fusion, each list weighted by retriever name.
+    Hybrid search fuses integer id arrays (``fuse_ids``) and decodes
+    metadata only for the fused top-k (``join_results``).
     """
     
-    def __init__(self, k: int = 60):
+    # Results within this dense rank count as a semantic match
+    SEMANTIC_MATCH_RANK = 10
+    
+    def __init__(
+        self,
+        k: int = 60,
+        reranker=None,
+        method: str = "rrf",
+        weights: Optional[Dict[str, float]] = None
+    ):
         """
         Initialize RRF.
         
         Args:
             k (int): RRF constant (default factor for rank penalty).
                     Higher k reduces the impact of high rankings.
+            reranker (Reranker, optional): Shared cross-encoder reranker
+                    (created on first use if omitted).
+            method (str): Fusion method: "rrf", "convex" or "dbsf".
+            weights (Optional[Dict[str, float]]): Weight per retriever name
+                    (e.g. {"dense": 1.0, "sparse": 0.5}); missing names weigh 1.0.
         """
+        if method not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method '{method}'. Use one of: {', '.join(FUSION_METHODS)}")
         self.k = k
+        self.reranker = reranker
+        self.method = method
+        self.weights = weights or {}
+    
+    def fuse_ids(self, lists: Sequence[RankedList], top_k: int = 50) -> FusedRanking:
+        """
+        Fuse ranked id lists with the configured method and weights.
+        
+        Args:
+            lists (Sequence[RankedList]): Ranked lists to fuse.
+            top_k (int): Number of fused results.
+            
+        Returns:
+            FusedRanking: Fused top-k.
+        """
+        return fuse_ranked_lists(lists, top_k=top_k, method=self.method, weights=self.weights, k=self.k)
+    
+    def join_results(
+        self,
+        fused: FusedRanking,
+        metadata: Sequence[Optional[Dict]],
+        list_names: Sequence[str] = ("dense", "sparse"),
+        enrich_results: bool = False
+    ) -> List[Dict]:
+        """
+        Decode metadata for the fused top-k and build result dictionaries.
+        
+        Args:
+            fused (FusedRanking): Output of ``fuse_ids``.
+            metadata (Sequence[Optional[Dict]]): Metadata rows the ids refer to.
+            list_names (Sequence[str]): Names of the fused lists, in order.
+            enrich_results (bool): Whether to add match reasons (for products).
+            
+        Returns:
+            List[Dict]: Fused results, best first.
+        """
+        dense_ranks = fused.list_ranks[list(list_names).index("dense")] if "dense" in list_names else None
+        results = []
+        for position, (row, score, source_score) in enumerate(zip(
+            fused.ids.tolist(), fused.scores.tolist(), fused.source_scores.tolist()
+        )):
+            chunk = metadata[row]
+            if chunk is None:
+                continue
+            result = {
+                **chunk,
+                "score": source_score,
+                "rrf_score": score,
+                "relevance_score": score,  # Alias for product search
+                "rank": len(results) + 1,
+                "retrieval_method": "hybrid"
+            }
+            if enrich_results:
+                semantic = dense_ranks is not None and 0 < dense_ranks[position] <= self.SEMANTIC_MATCH_RANK
+                result["match_reasons"] = self._generate_match_reasons(result, semantic)
+            results.append(result)
+        return results
     
     def fuse(
         self,
@@ -40,6 +252,9 @@ class ReciprocalRankFusion:
         """
         Fuse dense and sparse retrieval results.
         
+        Results are identified by chunk id (or product id) and fused with
+        ``fuse_ranked_lists``.
+        
         Args:
             dense_results (List[Dict]): Results from dense retrieval.
             sparse_results (List[Dict]): Results from sparse retrieval.
@@ -49,53 +264,25 @@ class ReciprocalRankFusion:
             filters (Dict): Unused filters kept for interface compatibility.
             
         Returns:
-            List[Dict]: List of fused results sorted by RRF score.
+            List[Dict]: List of fused results sorted by fused score.
         """
-        # Calculate RRF scores
-        rrf_scores = defaultdict(float)
-        chunk_data = {}  # Store chunk info
-        
-        # Process dense results
-        for rank, result in enumerate(dense_results, 1):
-            chunk_id = result.get("chunk_id") or result.get("metadata", {}).get("product_id")
-            if chunk_id:
-                rrf_scores[chunk_id] += 1 / (self.k + rank)
-                if chunk_id not in chunk_data:
-                    chunk_data[chunk_id] = result
-        
-        # Process sparse results
-        for rank, result in enumerate(sparse_results, 1):
-            chunk_id = result.get("chunk_id") or result.get("metadata", {}).get("product_id")
-            if chunk_id:
-                rrf_scores[chunk_id] += 1 / (self.k + rank)
-                if chunk_id not in chunk_data:
-                    chunk_data[chunk_id] = result
-        
-        # Sort by RRF score
-        sorted_chunks = sorted(
-            rrf_scores.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:top_k]
-        
-        # Format results
-        fused_results = []
-        for rank, (chunk_id, rrf_score) in enumerate(sorted_chunks, 1):
-            if chunk_id in chunk_data:
-                result = {
-                    **chunk_data[chunk_id],
-                    "rrf_score": float(rrf_score),
-                    "relevance_score": float(rrf_score),  # Alias for product search
-                    "rank": rank,
-                    "retrieval_method": "hybrid"
-                }
-                
-                # Enrich with match reasons for products
-                if enrich_results:
-                    match_reasons = self._generate_match_reasons(result, dense_results, sparse_results)
-                    result["match_reasons"] = match_reasons
-                
-                fused_results.append(result)
+        # Map result ids to integers; the first result seen for an id supplies its data
+        chunk_data = []
+        positions = {}
+        lists = []
+        for name, results in (("dense", dense_results), ("sparse", sparse_results)):
+            ids, scores = [], []
+            for result in results:
+                chunk_id = result.get("chunk_id") or result.get("metadata", {}).get("product_id")
+                if chunk_id:
+                    if chunk_id not in positions:
+                        positions[chunk_id] = len(chunk_data)
+                        chunk_data.append(result)
+                    ids.append(positions[chunk_id])
+                    scores.append(result.get("score", 0.0))
+            lists.append(RankedList(name, np.array(ids, dtype=np.int64), np.array(scores, dtype=np.float64)))
+        
+        fused_results = self.join_results(self.fuse_ids(lists, top_k), chunk_data, enrich_results=enrich_results)
         
         logger.info(
             f"RRF fusion: {len(dense_results)} dense + {len(sparse_results)} sparse "
@@ -104,12 +291,7 @@ class ReciprocalRankFusion:
         
         return fused_results
     
-    def _generate_match_reasons(
-        self,
-        result: Dict,
-        dense_results: List[Dict],
-        sparse_results: List[Dict]
-    ) -> List[str]:
+    def _generate_match_reasons(self, result: Dict, semantic_match: bool) -> List[str]:
         """
         Generate match reasons for a product result.
         
@@ -118,20 +300,16 @@ class ReciprocalRankFusion:
         
         Args:
             result (Dict): The result dictionary to analyze.
-            dense_results (List[Dict]): Original dense retrieval results.
-            sparse_results (List[Dict]): Original sparse retrieval results.
+            semantic_match (bool): Whether dense retrieval ranked it in its top 10.
             
         Returns:
             List[str]: List of human-readable match reason strings.
         """
         reasons = []
         metadata = result.get('metadata', {})
-        product_id = metadata.get('product_id')
         
         # Check if in dense results (semantic match)
-        if any(r.get('chunk_id') == result.get('chunk_id') or 
-               r.get('metadata', {}).get('product_id') == product_id 
-               for r in dense_results[:10]):
+        if semantic_match:
             reasons.append("Semantic match")
         
         # Check price filter
@@ -151,7 +329,7 @@ class ReciprocalRankFusion:
         
         return reasons if reasons else ["Matches your search"]
     
-    def rerank(
+    async def rerank(
         self,
         query: str,
         results: List[Dict],
@@ -170,13 +348,14 @@ class ReciprocalRankFusion:
         Returns:
             List[Dict]: Top-k reranked results.
         """
-        from services.reranker import Reranker
-        reranker = Reranker()
+        if self.reranker is None:
+            from services.reranker import Reranker
+            self.reranker = Reranker()
         
         if not results:
             return []
             
         # In enterprise mode, we use the cross-encoder reranker
         logger.info(f"Performing enterprise reranking for top {len(results)} results")
-        return reranker.rerank(query, results, top_k)
+        return await self.reranker.rerank(query, results, top_k)
 
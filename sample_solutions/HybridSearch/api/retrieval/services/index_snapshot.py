@@ -0,0 +1,348 @@
+"""
+Index Snapshots
+Loads published index versions and swaps them in atomically
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from services.attribute_index import AttributeIndex
+from services.dense_retrieval import DenseRetrieval
+from services.metadata_records import RECORDS_FILE, load_metadata
+from services.sparse_retrieval import SparseRetrieval
+
+logger = logging.getLogger(__name__)
+
+# File names inside a snapshot directory (written by the ingestion service)
+FAISS_INDEX_FILE = "faiss_index.bin"
+BM25_INDEX_FILE = "bm25_index.pkl"
+METADATA_FILE = "metadata.pkl"  # pickled metadata of snapshots written before the record format
+
+
+class IndexSnapshot:
+    """
+    One consistent, immutable set of retrievers.
+
+    All retrievers of a snapshot are loaded from the same published index
+    version. Requests take a reference to a snapshot once and use only that
+    snapshot, so they never mix an index with metadata from another version.
+    ``readers`` counts the requests holding it (see ``SnapshotManager.acquire``).
+    """
+
+    def __init__(
+        self,
+        version: int,
+        dense_retrieval: DenseRetrieval,
+        sparse_retrieval: SparseRetrieval,
+        product_dense_retrieval: DenseRetrieval,
+        product_sparse_retrieval: SparseRetrieval
+    ):
+        """
+        Initialize the snapshot.
+
+        Args:
+            version (int): Published index version (0 for the legacy layout).
+            dense_retrieval (DenseRetrieval): Unified dense retriever.
+            sparse_retrieval (SparseRetrieval): Unified sparse retriever.
+            product_dense_retrieval (DenseRetrieval): Legacy product dense retriever.
+            product_sparse_retrieval (SparseRetrieval): Legacy product sparse retriever.
+        """
+        self.version = version
+        self.dense_retrieval = dense_retrieval
+        self.sparse_retrieval = sparse_retrieval
+        self.product_dense_retrieval = product_dense_retrieval
+        self.product_sparse_retrieval = product_sparse_retrieval
+        self.loaded_at = time.time()
+        self.readers = 0
+
+    def close(self):
+        """
+        Release the indexes and unmap the metadata files.
+
+        Called once the snapshot has been replaced and no request holds it;
+        its retrievers report empty indexes afterwards.
+        """
+        retrievers = [
+            self.dense_retrieval, self.sparse_retrieval,
+            self.product_dense_retrieval, self.product_sparse_retrieval
+        ]
+        empty_attributes = AttributeIndex.from_metadata([])
+        for retriever in retrievers:
+            # Dense and sparse retrievers share one MetadataRecords
+            if hasattr(retriever.metadata, "close"):
+                retriever.metadata.close()
+            retriever.metadata = []
+            retriever.attributes = empty_attributes
+        self.dense_retrieval.index = None
+        self.product_dense_retrieval.index = None
+        self.sparse_retrieval.bm25 = None
+        self.product_sparse_retrieval.bm25 = None
+        logger.info(f"Closed index snapshot v{self.version}")
+
+
+class SnapshotManager:
+    """
+    Track the published index version and hold the active snapshot.
+
+    The ingestion service publishes each index version in its own directory
+    and points ``manifest.json`` at it. ``load_latest`` builds a complete new
+    snapshot (meant to run off the event loop) and then replaces the active
+    snapshot with a single reference assignment; in-flight requests keep
+    using the snapshot they started with. Replaced snapshots are retired and
+    closed once the last request holding them releases them, so their FAISS
+    indexes and mapped files do not outlive their readers. Without a
+    manifest, the root-level index files of older ingestion versions are
+    loaded instead.
+    """
+
+    def __init__(
+        self,
+        manifest_path: str,
+        legacy_paths: Dict[str, str],
+        dense_options: Optional[Dict] = None
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            manifest_path (str): Path to the ingestion service's manifest.json.
+            legacy_paths (Dict[str, str]): Index file paths used without a
+                manifest, and for the legacy product indexes. Keys: faiss_index,
+                bm25_index, metadata, product_faiss_index, product_bm25_index,
+                product_metadata.
+            dense_options (Optional[Dict]): Extra keyword arguments for DenseRetrieval.
+        """
+        self.manifest_path = Path(manifest_path)
+        self.legacy_paths = legacy_paths
+        self.dense_options = dense_options or {}
+        self._current: Optional[IndexSnapshot] = None
+        self._retired: List[IndexSnapshot] = []
+        self._load_lock = threading.Lock()
+        # Guards the swap, reader counts and retired list
+        self._ref_lock = threading.Lock()
+
+    @property
+    def current(self) -> IndexSnapshot:
+        """
+        Active snapshot.
+
+        Never loads one: request handlers run on the event loop, and loading
+        reads and validates the index files. The service loads the first
+        snapshot at startup with ``load_latest`` on a worker thread.
+
+        Raises:
+            RuntimeError: If no snapshot has been loaded yet.
+        """
+        snapshot = self._current
+        if snapshot is None:
+            raise RuntimeError("No index snapshot loaded yet")
+        return snapshot
+
+    def acquire(self) -> IndexSnapshot:
+        """
+        Take a reference to the active snapshot.
+
+        Every ``acquire`` must be paired with ``release``; prefer ``reading``.
+
+        Returns:
+            IndexSnapshot: The active snapshot, kept open until released.
+
+        Raises:
+            RuntimeError: If no snapshot has been loaded yet.
+        """
+        with self._ref_lock:
+            snapshot = self.current
+            snapshot.readers += 1
+            return snapshot
+
+    def release(self, snapshot: IndexSnapshot):
+        """
+        Drop a reference taken with ``acquire``.
+
+        Closes the snapshot if it has been replaced and this was its last reader.
+
+        Args:
+            snapshot (IndexSnapshot): Snapshot returned by ``acquire``.
+        """
+        with self._ref_lock:
+            snapshot.readers -= 1
+            idle = snapshot.readers == 0 and snapshot in self._retired
+            if idle:
+                self._retired.remove(snapshot)
+        if idle:
+            snapshot.close()
+
+    @contextmanager
+    def reading(self) -> Iterator[IndexSnapshot]:
+        """
+        Hold the active snapshot for the duration of a ``with`` block.
+
+        Yields:
+            IndexSnapshot: The active snapshot.
+        """
+        snapshot = self.acquire()
+        try:
+            yield snapshot
+        finally:
+            self.release(snapshot)
+
+    def close_retired(self) -> int:
+        """
+        Close replaced snapshots that no request holds any more.
+
+        Snapshots still in use are closed by the ``release`` of their last reader.
+
+        Returns:
+            int: Number of snapshots closed.
+        """
+        with self._ref_lock:
+            idle = [snapshot for snapshot in self._retired if snapshot.readers == 0]
+            self._retired = [snapshot for snapshot in self._retired if snapshot.readers]
+        for snapshot in idle:
+            snapshot.close()
+        return len(idle)
+
+    def read_manifest(self) -> Optional[Dict]:
+        """
+        Read the published manifest.
+
+        Returns:
+            Optional[Dict]: Manifest contents, or None if missing or unreadable.
+        """
+        if not self.manifest_path.exists():
+            return None
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read index manifest {self.manifest_path}: {e}")
+            return None
+
+    def has_newer(self) -> bool:
+        """
+        Check whether a newer version than the active snapshot was published.
+
+        Returns:
+            bool: True if the manifest version differs from the active one.
+        """
+        manifest = self.read_manifest()
+        if manifest is None:
+            return False
+        return self._current is None or int(manifest.get("version", 0)) != self._current.version
+
+    def load_latest(self) -> IndexSnapshot:
+        """
+        Build a snapshot for the published version and make it active.
+
+        Blocking; call from a worker thread when serving requests. Concurrent
+        calls are serialized. If the new snapshot fails validation, the
+        active snapshot is kept and the error is raised. The replaced snapshot
+        is retired, not closed: call ``close_retired`` from the thread that
+        serves requests.
+
+        Returns:
+            IndexSnapshot: The active snapshot after loading.
+
+        Raises:
+            RuntimeError: If the published snapshot is incomplete.
+        """
+        with self._load_lock:
+            start = time.time()
+            manifest = self.read_manifest()
+            snapshot = self._build(manifest)
+            with self._ref_lock:
+                previous, self._current = self._current, snapshot
+                if previous is not None:
+                    self._retired.append(previous)
+            logger.info(
+                f"Activated index snapshot v{snapshot.version} in {(time.time() - start) * 1000:.0f}ms "
+                f"({snapshot.dense_retrieval.get_stats()['total_vectors']} vectors)"
+            )
+            return snapshot
+
+    def _build(self, manifest: Optional[Dict]) -> IndexSnapshot:
+        """
+        Load all retrievers for a manifest (or the legacy layout).
+
+        Args:
+            manifest (Optional[Dict]): Published manifest, or None.
+
+        Returns:
+            IndexSnapshot: Newly loaded snapshot.
+
+        Raises:
+            RuntimeError: If the loaded files do not match the manifest.
+        """
+        if manifest is not None:
+            version = int(manifest["version"])
+            snapshot_dir = self.manifest_path.parent / manifest["snapshot"]
+            faiss_path = snapshot_dir / FAISS_INDEX_FILE
+            bm25_path = snapshot_dir / BM25_INDEX_FILE
+            if (snapshot_dir / RECORDS_FILE).exists():
+                metadata_path = snapshot_dir
+            else:
+                metadata_path = snapshot_dir / METADATA_FILE
+        else:
+            version = 0
+            faiss_path = self.legacy_paths["faiss_index"]
+            bm25_path = self.legacy_paths["bm25_index"]
+            metadata_path = self.legacy_paths["metadata"]
+
+        # Dense and sparse retrievers share one mapped copy of the metadata
+        metadata = load_metadata(metadata_path)
+        attributes = AttributeIndex.open(metadata_path, metadata)
+
+        dense = DenseRetrieval(
+            index_path=str(faiss_path),
+            metadata_path=str(metadata_path),
+            metadata=metadata,
+            attributes=attributes,
+            **self.dense_options
+        )
+        sparse = SparseRetrieval(
+            index_path=str(bm25_path),
+            metadata_path=str(metadata_path),
+            metadata=metadata,
+            attributes=attributes
+        )
+
+        if manifest is not None:
+            self._validate(manifest, dense, sparse)
+
+        product_dense = DenseRetrieval(
+            index_path=self.legacy_paths["product_faiss_index"],
+            metadata_path=self.legacy_paths["product_metadata"],
+            **self.dense_options
+        )
+        product_sparse = SparseRetrieval(
+            index_path=self.legacy_paths["product_bm25_index"],
+            metadata_path=self.legacy_paths["product_metadata"]
+        )
+
+        return IndexSnapshot(version, dense, sparse, product_dense, product_sparse)
+
+    @staticmethod
+    def _validate(manifest: Dict, dense: DenseRetrieval, sparse: SparseRetrieval):
+        """
+        Check that a loaded snapshot matches its manifest.
+
+        Args:
+            manifest (Dict): Published manifest.
+            dense (DenseRetrieval): Loaded dense retriever.
+            sparse (SparseRetrieval): Loaded sparse retriever.
+
+        Raises:
+            RuntimeError: If an index failed to load or row counts differ.
+        """
+        version = manifest["version"]
+        rows = manifest.get("rows", 0)
+        if dense.index is None or dense.index.ntotal != manifest.get("faiss_vectors", dense.index.ntotal):
+            raise RuntimeError(f"Snapshot v{version}: FAISS index missing or incomplete")
+        if len(dense.metadata) != rows or len(sparse.metadata) != rows:
+            raise RuntimeError(f"Snapshot v{version}: expected {rows} metadata rows")
+        if rows and sparse.bm25 is None:
+            raise RuntimeError(f"Snapshot v{version}: BM25 index missing")
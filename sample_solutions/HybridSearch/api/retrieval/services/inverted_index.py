@@ -0,0 +1,357 @@
+"""
+Inverted Index for BM25
+Postings-based sparse scoring that only touches documents containing query terms
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text the same way the ingestion service builds the BM25 corpus.
+
+    Args:
+        text (str): Input text.
+
+    Returns:
+        List[str]: Lowercased whitespace tokens.
+    """
+    return text.lower().split()
+
+
+class InvertedIndex:
+    """
+    BM25 (Okapi) inverted index backed by compact NumPy postings arrays.
+
+    Postings for term ``t`` live in ``doc_ids[indptr[t]:indptr[t + 1]]`` with the
+    matching term frequencies in ``term_freqs``. Scoring a query only visits the
+    postings of its terms, and top-k selection uses ``argpartition`` instead of a
+    full sort. Scores match ``rank_bm25.BM25Okapi.get_scores`` for the same corpus.
+
+    Documents deleted by the ingestion service stay in the postings as
+    tombstones until it compacts the index; ``live`` masks them out of scoring
+    and corpus statistics.
+    """
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        idf: np.ndarray,
+        doc_len: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+        live: Optional[np.ndarray] = None
+    ):
+        """
+        Initialize the index from prebuilt postings arrays.
+
+        Args:
+            vocab (Dict[str, int]): Term to term-id mapping.
+            indptr (np.ndarray): Postings offsets per term-id (length n_terms + 1).
+            doc_ids (np.ndarray): Concatenated postings document ids (int32).
+            term_freqs (np.ndarray): Term frequency for each posting (float32).
+            idf (np.ndarray): IDF value per term-id (float32).
+            doc_len (np.ndarray): Token count per document (float32).
+            k1 (float): BM25 term frequency saturation parameter.
+            b (float): BM25 length normalization parameter.
+            live (Optional[np.ndarray]): Boolean mask of non-deleted documents.
+        """
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.idf = idf
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.live = live
+
+        live_len = doc_len[live] if live is not None else doc_len
+        avgdl = float(live_len.mean()) if len(live_len) else 0.0
+        # Per-document length normalization, precomputed once:
+        # k1 * (1 - b + b * |d| / avgdl)
+        if avgdl > 0:
+            self.doc_norm = (k1 * (1 - b + b * doc_len / avgdl)).astype(np.float32)
+        else:
+            self.doc_norm = np.full(len(doc_len), k1, dtype=np.float32)
+
+    @property
+    def num_docs(self) -> int:
+        """Number of indexed (non-deleted) documents."""
+        if self.live is not None:
+            return int(self.live.sum())
+        return len(self.doc_len)
+
+    @property
+    def num_terms(self) -> int:
+        """Number of distinct terms."""
+        return len(self.vocab)
+
+    @classmethod
+    def from_term_frequencies(
+        cls,
+        doc_term_freqs: Iterable[Dict[str, int]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+        idf: Optional[Dict[str, float]] = None
+    ) -> "InvertedIndex":
+        """
+        Build the index from per-document term frequency dictionaries.
+
+        Args:
+            doc_term_freqs (Iterable[Dict[str, int]]): One {term: count} dict per document.
+            k1 (float): BM25 k1 parameter.
+            b (float): BM25 b parameter.
+            epsilon (float): IDF floor factor (as in BM25Okapi).
+            idf (Optional[Dict[str, float]]): Precomputed IDF values. Computed
+                                             with the BM25Okapi formula if omitted.
+
+        Returns:
+            InvertedIndex: The built index.
+        """
+        vocab: Dict[str, int] = {}
+        posting_terms: List[int] = []
+        posting_docs: List[int] = []
+        posting_tfs: List[int] = []
+        doc_len: List[int] = []
+
+        for doc_id, frequencies in enumerate(doc_term_freqs):
+            doc_len.append(sum(frequencies.values()))
+            for term, freq in frequencies.items():
+                term_id = vocab.setdefault(term, len(vocab))
+                posting_terms.append(term_id)
+                posting_docs.append(doc_id)
+                posting_tfs.append(freq)
+
+        n_terms = len(vocab)
+        terms_arr = np.asarray(posting_terms, dtype=np.int32)
+        # Stable sort keeps document ids ascending within each postings list
+        order = np.argsort(terms_arr, kind="stable")
+        doc_ids = np.asarray(posting_docs, dtype=np.int32)[order]
+        term_freqs = np.asarray(posting_tfs, dtype=np.float32)[order]
+
+        df = np.bincount(terms_arr, minlength=n_terms)
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        if idf is not None:
+            idf_arr = np.zeros(n_terms, dtype=np.float32)
+            for term, term_id in vocab.items():
+                idf_arr[term_id] = idf.get(term, 0.0)
+        else:
+            idf_arr = cls._okapi_idf(df, len(doc_len), epsilon)
+
+        index = cls(
+            vocab=vocab,
+            indptr=indptr,
+            doc_ids=doc_ids,
+            term_freqs=term_freqs,
+            idf=idf_arr,
+            doc_len=np.asarray(doc_len, dtype=np.float32),
+            k1=k1,
+            b=b
+        )
+        logger.info(
+            f"Built inverted index: {index.num_docs} documents, {index.num_terms} terms, "
+            f"{len(doc_ids)} postings"
+        )
+        return index
+
+    @classmethod
+    def from_tokenized_corpus(
+        cls,
+        tokenized_corpus: Iterable[List[str]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25
+    ) -> "InvertedIndex":
+        """
+        Build the index from a tokenized corpus.
+
+        Args:
+            tokenized_corpus (Iterable[List[str]]): One token list per document.
+            k1 (float): BM25 k1 parameter.
+            b (float): BM25 b parameter.
+            epsilon (float): IDF floor factor.
+
+        Returns:
+            InvertedIndex: The built index.
+        """
+        return cls.from_term_frequencies(
+            (Counter(tokens) for tokens in tokenized_corpus),
+            k1=k1,
+            b=b,
+            epsilon=epsilon
+        )
+
+    @classmethod
+    def from_bm25(cls, bm25) -> "InvertedIndex":
+        """
+        Build the index from a ``rank_bm25.BM25Okapi`` object.
+
+        Reuses the per-document term frequencies and IDF values that the
+        ingestion service already computed from its tokenized corpus.
+
+        Args:
+            bm25: A fitted BM25Okapi instance.
+
+        Returns:
+            InvertedIndex: The built index.
+        """
+        return cls.from_term_frequencies(
+            bm25.doc_freqs,
+            k1=bm25.k1,
+            b=bm25.b,
+            idf=bm25.idf
+        )
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "InvertedIndex":
+        """
+        Build the index from the state written by the ingestion service.
+
+        The state holds CSR postings arrays, per-term live document
+        frequencies and a live-document mask (see ``IncrementalBM25Index.to_state``
+        in the ingestion service).
+
+        Args:
+            state (Dict): Serialized index state.
+
+        Returns:
+            InvertedIndex: The loaded index.
+        """
+        live = np.asarray(state["live"], dtype=bool)
+        idf = cls._okapi_idf(
+            np.asarray(state["df"]),
+            int(live.sum()),
+            state["epsilon"]
+        )
+        return cls(
+            vocab=state["vocab"],
+            indptr=np.asarray(state["indptr"], dtype=np.int64),
+            doc_ids=np.asarray(state["doc_ids"], dtype=np.int32),
+            term_freqs=np.asarray(state["term_freqs"], dtype=np.float32),
+            idf=idf,
+            doc_len=np.asarray(state["doc_len"], dtype=np.float32),
+            k1=state["k1"],
+            b=state["b"],
+            live=None if live.all() else live
+        )
+
+    @staticmethod
+    def _okapi_idf(df: np.ndarray, corpus_size: int, epsilon: float) -> np.ndarray:
+        """
+        Compute BM25Okapi IDF values, flooring negative IDFs at epsilon * mean IDF.
+
+        Terms with a document frequency of zero (only present in deleted
+        documents) get an IDF of zero and are left out of the mean.
+
+        Args:
+            df (np.ndarray): Document frequency per term-id.
+            corpus_size (int): Number of documents.
+            epsilon (float): IDF floor factor.
+
+        Returns:
+            np.ndarray: IDF per term-id (float32).
+        """
+        present = df > 0
+        idf = np.zeros(len(df), dtype=np.float64)
+        if not present.any():
+            return idf.astype(np.float32)
+        present_df = df[present].astype(np.float64)
+        present_idf = np.log(corpus_size - present_df + 0.5) - np.log(present_df + 0.5)
+        eps = epsilon * present_idf.mean()
+        present_idf[present_idf < 0] = eps
+        idf[present] = present_idf
+        return idf.astype(np.float32)
+
+    def score(self, query_tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score all documents that contain at least one query term.
+
+        Args:
+            query_tokens (List[str]): Tokenized query. Repeated tokens count
+                                     multiple times, as in BM25Okapi.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Candidate document ids and their BM25 scores.
+        """
+        doc_parts = []
+        score_parts = []
+
+        for term, query_count in Counter(query_tokens).items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            if start == end:
+                continue
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            weight = self.idf[term_id] * (self.k1 + 1) * query_count
+            doc_parts.append(docs)
+            score_parts.append(weight * tf / (tf + self.doc_norm[docs]))
+
+        if not doc_parts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        if len(doc_parts) == 1:
+            return doc_parts[0], score_parts[0]
+
+        # Accumulate contributions per document across query terms
+        all_docs = np.concatenate(doc_parts)
+        all_scores = np.concatenate(score_parts)
+        candidates, inverse = np.unique(all_docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=all_scores, minlength=len(candidates))
+        return candidates, scores.astype(np.float32)
+
+    def search(
+        self,
+        query_tokens: List[str],
+        top_k: int,
+        doc_mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the top-k documents for a query.
+
+        Args:
+            query_tokens (List[str]): Tokenized query.
+            top_k (int): Number of results to return.
+            doc_mask (Optional[np.ndarray]): Boolean array over document ids;
+                                            documents where it is False are skipped.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Document ids and scores, best first.
+            Only documents with a positive score are returned.
+        """
+        candidates, scores = self.score(query_tokens)
+
+        if self.live is not None and len(candidates):
+            keep = self.live[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+
+        if doc_mask is not None and len(candidates):
+            keep = doc_mask[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+
+        positive = scores > 0
+        candidates, scores = candidates[positive], scores[positive]
+
+        if top_k <= 0 or len(candidates) == 0:
+            return candidates[:0], scores[:0]
+
+        if len(candidates) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            candidates, scores = candidates[top], scores[top]
+
+        order = np.argsort(-scores, kind="stable")
+        return candidates[order], scores[order]
@@ -0,0 +1,121 @@
+"""
+Metadata Records
+Memory-mapped, lazily decoded metadata written by the ingestion service
+"""
+
+import json
+import logging
+import mmap
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Files inside a snapshot directory (see ingestion services/metadata_records.py)
+RECORDS_FILE = "metadata.records"
+OFFSETS_FILE = "metadata.offsets.npy"
+
+
+class MetadataRecords:
+    """
+    Read-only metadata rows backed by memory-mapped files.
+
+    Row ``i`` is a UTF-8 JSON record at ``records[offsets[i]:offsets[i + 1]]``
+    (zero-length for rows deleted by ingestion). Opening the store only maps
+    the files, so startup time and per-process memory do not grow with the
+    corpus; pages are shared between worker processes through the page cache
+    and only the rows actually returned by a search are decoded.
+
+    Behaves like a read-only list of metadata dicts (``None`` for deleted rows).
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        Open the record files.
+
+        Args:
+            directory (Union[str, Path]): Snapshot directory holding the record files.
+        """
+        self.directory = Path(directory)
+        self.offsets = np.load(self.directory / OFFSETS_FILE, mmap_mode='r')
+        self._file = open(self.directory / RECORDS_FILE, 'rb')
+        size = self.offsets[-1] if len(self.offsets) else 0
+        # mmap cannot map an empty file
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return max(len(self.offsets) - 1, 0)
+
+    def __getitem__(self, row: int) -> Optional[Dict]:
+        """
+        Decode one row.
+
+        Args:
+            row (int): Row position.
+
+        Returns:
+            Optional[Dict]: Metadata dict, or None for a deleted row.
+        """
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"Metadata row {row} out of range")
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        if end == start:
+            return None
+        return json.loads(self._data[start:end])
+
+    def get(self, row: int) -> Optional[Dict]:
+        """
+        Decode one row, returning None for deleted or out-of-range rows.
+
+        Args:
+            row (int): Row position.
+
+        Returns:
+            Optional[Dict]: Metadata dict or None.
+        """
+        if not 0 <= row < len(self):
+            return None
+        return self[row]
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def close(self):
+        """
+        Unmap the record files. The store reads as empty afterwards.
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+        self._file.close()
+        self.offsets = np.zeros(0, dtype=np.int64)
+
+
+def load_metadata(path: Union[str, Path]) -> Sequence[Optional[Dict]]:
+    """
+    Load metadata from a snapshot directory or a legacy pickle file.
+
+    Args:
+        path (Union[str, Path]): Snapshot directory with record files, or a
+                                 pickled list of dicts (older layouts).
+
+    Returns:
+        Sequence[Optional[Dict]]: Metadata rows (mmapped records or a list).
+    """
+    path = Path(path)
+    if path.is_dir() and (path / RECORDS_FILE).exists():
+        records = MetadataRecords(path)
+        logger.info(f"Mapped {len(records)} metadata records from {path}")
+        return records
+    if path.is_file():
+        with open(path, 'rb') as f:
+            metadata: List[Optional[Dict]] = pickle.load(f)  # nosec B301 - indexes are written by this application
+        logger.info(f"Loaded {len(metadata)} metadata entries")
+        return metadata
+    logger.warning(f"Metadata not found at {path}")
+    return []
@@ -0,0 +1,117 @@
+"""
+Query Cache
+Bounded LRU cache with time-to-live for query embeddings and search results
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries also expire after a fixed time.
+
+    Used for query embeddings (repeated FAQ questions, storefront
+    autocomplete) and for final search results. Entries are evicted in LRU
+    order once ``max_size`` is reached; expired entries are dropped when they
+    are looked up. A ``max_size`` or ``ttl_seconds`` of 0 disables the cache.
+    Hit, miss and eviction counters are kept for the stats endpoint.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float):
+        """
+        Initialize the cache.
+
+        Args:
+            name (str): Name used in logs and stats.
+            max_size (int): Maximum number of entries (0 disables the cache).
+            ttl_seconds (float): Entry lifetime in seconds (0 disables the cache).
+        """
+        self.name = name
+        self.max_size = max(max_size, 0)
+        self.ttl_seconds = max(ttl_seconds, 0.0)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all."""
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up an entry, refreshing its LRU position.
+
+        Args:
+            key (Hashable): Cache key.
+
+        Returns:
+            Optional[Any]: Cached value, or None on a miss or expired entry.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Store an entry, evicting the least recently used ones if full.
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to cache (must not be mutated afterwards).
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+        if dropped:
+            logger.info(f"Cleared {dropped} entries from {self.name} cache")
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict: Size, limits, hit/miss/eviction counters and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
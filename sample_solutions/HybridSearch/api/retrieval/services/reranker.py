@@ -3,75 +3,187 @@ Reranker Service
 Handles precise ranking of candidates using cross-encoders
 """
 
+import asyncio
+import hashlib
 import logging
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from api_client import get_api_client
 from config import settings
+from services.query_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 class Reranker:
     """
     Enterprise Reranker implementation using Keycloak and BGE-Reranker.
-    
-    Delegates reranking to the enterprise API client.
+
+    Delegates reranking to the enterprise API client. Calls are async and
+    go through the client's pooled connections, with batches sent
+    concurrently. Cross-encoder scores are cached per (query, chunk) so
+    pagination and repeated queries only score documents not seen before.
+    A latency budget bounds the wait: if the reranker does not answer in
+    time, candidates are returned in their original (RRF) order while the
+    pending scores keep filling the cache in the background.
     """
-    
+
     def __init__(self):
         self.api_client = get_api_client()
         self.enabled = settings.use_reranking
-        
-    def rerank(self, query: str, candidates: List[Dict], top_k: int = 10) -> List[Dict]:
+        self.timeout_seconds = settings.reranker_timeout_ms / 1000
+        self.score_cache = TTLCache(
+            "rerank score",
+            max_size=settings.reranker_score_cache_size,
+            ttl_seconds=settings.reranker_score_cache_ttl_seconds
+        )
+        self.budget_exceeded = 0
+        self.failures = 0
+        # Scoring tasks still running after their request gave up waiting
+        self._pending: set = set()
+
+    @staticmethod
+    def _candidate_key(query_digest: str, candidate: Dict) -> Optional[tuple]:
+        """
+        Build the score cache key for a candidate.
+
+        Args:
+            query_digest (str): Hash of the query text.
+            candidate (Dict): Candidate result.
+
+        Returns:
+            Optional[tuple]: Cache key, or None if the candidate has no id.
+        """
+        doc_id = candidate.get("chunk_id") or candidate.get("metadata", {}).get("product_id")
+        return (query_digest, doc_id) if doc_id else None
+
+    async def _score(self, query: str, texts: List[str], keys: List[Optional[tuple]]) -> List[float]:
+        """
+        Score documents with the cross-encoder and cache the scores.
+
+        Args:
+            query (str): The user query.
+            texts (List[str]): Document texts to score.
+            keys (List[Optional[tuple]]): Cache keys, aligned with texts.
+
+        Returns:
+            List[float]: Scores aligned with texts.
+        """
+        scores = await self.api_client.arerank_pairs(query, texts)
+        for key, score in zip(keys, scores):
+            if key is not None:
+                self.score_cache.put(key, float(score))
+        return scores
+
+    def _finish_background(self, task: asyncio.Task):
+        """Forget a finished scoring task, logging errors nobody awaited."""
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Background rerank scoring failed: {task.exception()}")
+
+    async def rerank(self, query: str, candidates: List[Dict], top_k: int = 10) -> List[Dict]:
         """
         Rerank a list of candidates based on the query.
-        
+
         Sends pairs of (query, document_text) to the enterprise cross-encoder
-        API to get precise relevance scores.
-        
+        API to get precise relevance scores, skipping candidates whose score
+        is already cached.
+
         Args:
             query (str): The user query.
             candidates (List[Dict]): List of retrieved chunks to rerank.
             top_k (int): Number of results to return.
-            
+
         Returns:
-            List[Dict]: Top-k reranked results with updated scores.
+            List[Dict]: Top-k reranked results with updated scores, or the
+                        first top_k candidates if reranking fails or exceeds
+                        the latency budget.
         """
         if not self.enabled or not candidates:
             return candidates[:top_k]
-            
+
         try:
             start_time = time.time()
-            
-            # Prepare documents for reranking
-            # Enterprise cross-encoders typically expect query and doc text pairs
-            docs = [c.get("text", "") for c in candidates]
-            
-            logger.info(f"Reranking {len(docs)} candidates for query: '{query[:50]}...'")
-            
-            # Call enterprise rerank endpoint
-            scores = self.api_client.rerank_pairs(query, docs)
-            
-            # Update scores and sort
-            for i, score in enumerate(scores):
-                candidates[i]["rerank_score"] = float(score)
-                # Blend or replace original score
-                candidates[i]["original_score"] = candidates[i].get("score", 0.0)
-                candidates[i]["score"] = float(score)
-            
-            # Sort by new score
+
+            query_digest = hashlib.sha1(query.encode("utf-8"), usedforsecurity=False).hexdigest()
+            keys = [self._candidate_key(query_digest, c) for c in candidates]
+            scores: List[Optional[float]] = [
+                self.score_cache.get(key) if key is not None else None for key in keys
+            ]
+            missing = [i for i, score in enumerate(scores) if score is None]
+
+            if missing:
+                # Enterprise cross-encoders typically expect query and doc text pairs
+                logger.info(
+                    f"Reranking {len(missing)} of {len(candidates)} candidates "
+                    f"(others cached) for query: '{query[:50]}...'"
+                )
+                task = asyncio.ensure_future(self._score(
+                    query,
+                    [candidates[i].get("text", "") for i in missing],
+                    [keys[i] for i in missing]
+                ))
+                self._pending.add(task)
+                task.add_done_callback(self._finish_background)
+                try:
+                    # shield: a slow call still completes and fills the cache
+                    new_scores = await asyncio.wait_for(asyncio.shield(task), self.timeout_seconds)
+                except asyncio.TimeoutError:
+                    self.budget_exceeded += 1
+                    logger.warning(
+                        f"Reranker exceeded its {self.timeout_seconds * 1000:.0f}ms budget; "
+                        f"keeping fusion order"
+                    )
+                    return candidates[:top_k]
+                for i, score in zip(missing, new_scores):
+                    scores[i] = score
+
+            # Update scores on copies (candidates may be shared) and sort
             reranked = sorted(
-                candidates,
-                key=lambda x: x.get("score", 0.0),
+                (
+                    {
+                        **candidate,
+                        "rerank_score": float(score),
+                        # Blend or replace original score
+                        "original_score": candidate.get("score", 0.0),
+                        "score": float(score)
+                    }
+                    for candidate, score in zip(candidates, scores)
+                ),
+                key=lambda x: x["score"],
                 reverse=True
             )
-            
+
             duration = (time.time() - start_time) * 1000
             logger.info(f"Reranking completed in {duration:.2f}ms")
-            
+
             return reranked[:top_k]
-            
+
         except Exception as e:
+            self.failures += 1
             logger.error(f"Reranking failed: {e}", exc_info=True)
             # Fallback to original order
             return candidates[:top_k]
+
+    def clear_cache(self):
+        """Drop cached scores (e.g. after the index changed)."""
+        self.score_cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get reranker statistics.
+
+        Returns:
+            Dict[str, Any]: Score cache counters, budget and fallback counts.
+        """
+        return {
+            **self.score_cache.get_stats(),
+            "timeout_ms": self.timeout_seconds * 1000,
+            "budget_exceeded": self.budget_exceeded,
+            "failures": self.failures
+        }
+
+    async def close(self):
+        """Cancel background scoring and close pooled connections."""
+        for task in list(self._pending):
+            task.cancel()
+        await self.api_client.aclose()
@@ -6,8 +6,11 @@ Lexical search using keyword matching
 import logging
 import pickle
 from pathlib import Path
-from typing import List, Dict
-from rank_bm25 import BM25Okapi
+from typing import List, Dict, Optional, Sequence, Tuple
+import numpy as np
+from services.attribute_index import AttributeIndex
+from services.inverted_index import InvertedIndex, tokenize
+from services.metadata_records import load_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -17,56 +20,78 @@ class SparseRetrieval:
     BM25-based sparse retrieval system.
     
     Manages loading of pre-computed BM25 indexes and metadata for lexical search.
-    Supports both document and product search modes.
+    The BM25 postings written by the ingestion service (or a legacy BM25Okapi
+    pickle) are loaded into an inverted index, so queries only score documents
+    containing query terms. Supports both document and product search modes;
+    filters are evaluated on a columnar ``AttributeIndex`` and restrict BM25
+    scoring to allowed documents before top-k selection.
     """
     
     def __init__(
         self,
         index_path: str,
-        metadata_path: str
+        metadata_path: str,
+        metadata: Optional[Sequence[Optional[Dict]]] = None,
+        attributes: Optional[AttributeIndex] = None
     ):
         """
         Initialize sparse retrieval.
         
         Args:
             index_path (str): Path to BM25 index pickle file.
-            metadata_path (str): Path to metadata pickle file.
+            metadata_path (str): Snapshot directory with metadata records, or a
+                                 legacy metadata pickle file.
+            metadata (Optional[Sequence[Optional[Dict]]]): Already loaded metadata
+                                 to share with other retrievers.
+            attributes (Optional[AttributeIndex]): Already loaded attribute index.
         """
         self.index_path = Path(index_path)
         self.metadata_path = Path(metadata_path)
         
         self.bm25 = None
         self.metadata = []
+        self.attributes = AttributeIndex.from_metadata([])
         
-        self._load_index()
+        self._load_index(metadata, attributes)
     
-    def _load_index(self):
+    def _load_index(
+        self,
+        metadata: Optional[Sequence[Optional[Dict]]] = None,
+        attributes: Optional[AttributeIndex] = None
+    ):
         """
         Load BM25 index and metadata from disk.
         
         Handles missing files gracefully by initializing empty state.
+        
+        Args:
+            metadata (Optional[Sequence[Optional[Dict]]]): Shared metadata (loaded if None).
+            attributes (Optional[AttributeIndex]): Shared attribute index (loaded if None).
         """
         try:
             if self.index_path.exists():
                 with open(self.index_path, 'rb') as f:
-                    self.bm25 = pickle.load(f)  # nosec B301 - indexes are written by this application
-                logger.info("Loaded BM25 index")
+                    bm25 = pickle.load(f)  # nosec B301 - indexes are written by this application
+                if isinstance(bm25, dict) and bm25.get("format") == "inverted_index":
+                    self.bm25 = InvertedIndex.from_state(bm25)
+                else:
+                    # Legacy rank_bm25.BM25Okapi pickle
+                    self.bm25 = InvertedIndex.from_bm25(bm25)
+                logger.info(f"Loaded BM25 index ({self.bm25.num_docs} documents, {self.bm25.num_terms} terms)")
             else:
                 logger.warning(f"BM25 index not found at {self.index_path}")
                 self.bm25 = None
             
-            if self.metadata_path.exists():
-                with open(self.metadata_path, 'rb') as f:
-                    self.metadata = pickle.load(f)  # nosec B301 - indexes are written by this application
-                logger.info(f"Loaded {len(self.metadata)} metadata entries")
-            else:
-                logger.warning(f"Metadata not found at {self.metadata_path}")
-                self.metadata = []
+            self.metadata = metadata if metadata is not None else load_metadata(self.metadata_path)
+            if attributes is None:
+                attributes = AttributeIndex.open(self.metadata_path, self.metadata)
+            self.attributes = attributes
                 
         except Exception as e:
             logger.error(f"Error loading BM25 index: {e}")
             self.bm25 = None
             self.metadata = []
+            self.attributes = AttributeIndex.from_metadata([])
     
     def search(
         self,
@@ -81,106 +106,84 @@ class SparseRetrieval:
         Args:
             query (str): Query string.
             top_k (int): Number of results to return.
-            filters (Dict, optional): Metadata filters.
-            product_mode (bool): If True, filters results to only 'product' type items.
+            filters (Dict, optional): Metadata filters, applied before top-k selection.
+            product_mode (bool): If True, only 'product' type items are scored.
             
         Returns:
             List[Dict]: List of result dictionaries containing metadata, score, rank,
                        and retrieval method.
         """
+        ids, scores = self.search_ids(query, top_k=top_k, filters=filters, product_mode=product_mode)
+        results = self.results_for(ids, scores)
+        logger.info(f"Sparse retrieval found {len(results)} results")
+        return results
+    
+    def search_ids(
+        self,
+        query: str,
+        top_k: int = 100,
+        filters: Dict = None,
+        product_mode: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search using BM25, returning metadata row ids instead of results.
+        
+        Used by hybrid search, which fuses id arrays and decodes metadata only
+        for the fused top-k. Arguments are the same as for ``search``.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Row ids (int64) and BM25 scores,
+                best first. Deleted rows are left out.
+        """
         if not self.bm25 or not self.metadata:
             logger.warning("BM25 index is empty or not loaded")
-            return []
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
         
         try:
             # Tokenize query
-            tokenized_query = query.lower().split()
-            
-            # Get BM25 scores
-            scores = self.bm25.get_scores(tokenized_query)
-            
-            # Get more candidates if filters are applied
-            k = top_k * 5 if filters else top_k
-            top_indices = scores.argsort()[-k:][::-1]
+            tokenized_query = tokenize(query)
             
-            # Format results
-            results = []
-            for rank, idx in enumerate(top_indices, 1):
-                if idx < len(self.metadata) and scores[idx] > 0:
-                    result = {
-                        **self.metadata[idx],
-                        "score": float(scores[idx]),
-                        "rank": rank,
-                        "retrieval_method": "sparse"
-                    }
-                    results.append(result)
+            # Filters become an allow-list over document ids
+            doc_mask = None
+            if AttributeIndex.is_restrictive(filters, product_mode):
+                doc_mask = self.attributes.allow_mask(filters, product_mode)
             
-            # Filter by content_type if in product_mode
-            if product_mode:
-                results = [r for r in results if r.get('content_type') == 'product']
-                logger.debug(f"Filtered to {len(results)} product results")
+            # Score only allowed documents containing query terms and select top-k
+            top_indices, top_scores = self.bm25.search(tokenized_query, top_k=top_k, doc_mask=doc_mask)
             
-            # Apply other filters if provided
-            if filters:
-                results = self._apply_filters(results, filters)
-                # Limit to top_k after filtering
-                results = results[:top_k]
-            
-            logger.info(f"Sparse retrieval found {len(results)} results")
-            return results
+            # Rows deleted by ingestion (tombstoned metadata) are left out
+            ids = np.asarray(top_indices, dtype=np.int64)
+            keep = ids < min(len(self.metadata), len(self.attributes))
+            keep[keep] = self.attributes.live[ids[keep]]
+            return ids[keep], np.asarray(top_scores)[keep]
             
         except Exception as e:
             logger.error(f"Error during sparse search: {e}")
-            return []
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
     
-    def _apply_filters(self, results: List[Dict], filters: Dict) -> List[Dict]:
+    def results_for(self, ids: np.ndarray, scores: np.ndarray) -> List[Dict]:
         """
-        Apply post-retrieval metadata filters.
+        Decode the metadata of returned rows into result dictionaries.
         
         Args:
-            results (List[Dict]): List of result dictionaries.
-            filters (Dict): Filter dictionary.
+            ids (np.ndarray): Row ids, best first.
+            scores (np.ndarray): BM25 scores.
             
         Returns:
-            List[Dict]: Filtered list of results.
+            List[Dict]: Result dictionaries with metadata, score, rank and retrieval method.
         """
-        filtered = []
-        
-        for result in results:
-            metadata = result.get('metadata', {})
-            
-            # Price filters
-            if 'price_min' in filters or 'price_max' in filters:
-                price = metadata.get('price')
-                if price is None:
-                    continue  # Skip products without price if price filter is set
-                
-                if 'price_min' in filters and price < filters['price_min']:
-                    continue
-                if 'price_max' in filters and price > filters['price_max']:
-                    continue
-            
-            # Rating filters
-            if 'rating_min' in filters:
-                rating = metadata.get('rating')
-                if rating is None or rating < filters['rating_min']:
-                    continue
-            
-            # Category filters
-            if 'categories' in filters and filters['categories']:
-                category = metadata.get('category')
-                if category not in filters['categories']:
-                    continue
-            
-            filtered.append(result)
-        
-        logger.info(f"Filtered {len(results)} results to {len(filtered)}")
-        return filtered
-    
-    def reload(self):
-        """Reload index and metadata from disk."""
-        logger.info("Reloading BM25 index from disk")
-        self._load_index()
+        results = []
+        for idx, score in zip(ids.tolist(), scores.tolist()):
+            # Only returned rows are decoded
+            chunk = self.metadata[idx]
+            if chunk is not None:
+                results.append({
+                    **chunk,
+                    "score": score,
+                    "rank": len(results) + 1,
+                    "retrieval_method": "sparse"
+                })
+        return results
     
     def get_stats(self) -> Dict:
         """
@@ -191,6 +194,7 @@ class SparseRetrieval:
         """
         return {
             "total_documents": len(self.metadata),
-            "bm25_loaded": self.bm25 is not None
+            "bm25_loaded": self.bm25 is not None,
+            "vocabulary_size": self.bm25.num_terms if self.bm25 else 0
         }
 
@@ -0,0 +1,181 @@
+"""
+Recall-vs-latency report for the ANN index types against the exact (flat) index.
+
+Uses the embeddings persisted by the ingestion service (the embedding store
+file named in the index directory's manifest.json) or a synthetic clustered dataset. A held-out sample of the
+vectors is used as queries; the flat index provides the ground truth.
+
+Examples:
+    python scripts/ann_recall_report.py --index-dir data/indexes
+    python scripts/ann_recall_report.py --synthetic 200000 --dim 768 --nlist 1024
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+# Build indexes exactly as the ingestion service does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api" / "ingestion"))
+from services.ann_index import AnnIndexBuilder  # noqa: E402
+
+
+def load_stored_embeddings(index_dir: Path, max_vectors: int) -> np.ndarray:
+    """Read (a sample of) the ingestion service's embedding store without modifying it."""
+    header_path = index_dir / "embeddings.json"
+    manifest_path = index_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    data_path = index_dir / manifest.get("embedding_store", "embeddings.bin")
+    if not header_path.exists() or not data_path.exists():
+        sys.exit(f"No embedding store found in {index_dir}")
+
+    header = json.loads(header_path.read_text())
+    dtype = np.dtype(header["dtype"])
+    dim = header["dim"]
+    count = data_path.stat().st_size // (dim * dtype.itemsize)
+    if count == 0:
+        sys.exit(f"Embedding store in {index_dir} is empty")
+
+    data = np.memmap(data_path, dtype=dtype, mode="r", shape=(count, dim))
+    if count > max_vectors:
+        rows = np.sort(np.random.default_rng(0).choice(count, size=max_vectors, replace=False))
+        data = data[rows]
+    return np.asarray(data, dtype=np.float32)
+
+
+def synthetic_embeddings(count: int, dim: int, clusters: int = 256) -> np.ndarray:
+    """Clustered Gaussian vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    data = centers[labels] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return data
+
+
+def split_queries(vectors: np.ndarray, num_queries: int):
+    """Hold out query vectors so they are not part of the indexed base."""
+    faiss.normalize_L2(vectors)
+    rng = np.random.default_rng(1)
+    is_query = np.zeros(len(vectors), dtype=bool)
+    is_query[rng.choice(len(vectors), size=min(num_queries, len(vectors) // 10), replace=False)] = True
+    return np.ascontiguousarray(vectors[~is_query]), np.ascontiguousarray(vectors[is_query])
+
+
+def measure(index, queries: np.ndarray, k: int, truth: np.ndarray, params=None) -> dict:
+    """Recall@k and per-query latency (one query per call, as the retrieval service searches)."""
+    latencies = []
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        if params is not None:
+            _, ids = index.search(queries[i:i + 1], k, params=params)
+        else:
+            _, ids = index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found[i] = ids[0]
+
+    hits = sum(len(np.intersect1d(found[i], truth[i])) for i in range(len(queries)))
+    latencies = np.array(latencies)
+    return {
+        "recall": hits / truth.size,
+        "mean_ms": float(latencies.mean()),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def build_index(builder: AnnIndexBuilder, base: np.ndarray):
+    """Train (if needed) and fill an index; returns it with build seconds."""
+    start = time.perf_counter()
+    training = base[builder.sample_training_rows(np.arange(len(base)))] if builder.requires_training else None
+    index = builder.build(training)
+    index.add_with_ids(base, np.arange(len(base), dtype=np.int64))
+    return index, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--index-dir", type=Path, default=Path("data/indexes"), help="Ingestion index directory")
+    source.add_argument("--synthetic", type=int, help="Use N synthetic vectors instead of stored embeddings")
+    parser.add_argument("--dim", type=int, default=768, help="Dimension of synthetic vectors")
+    parser.add_argument("--max-vectors", type=int, default=1_000_000, help="Sample at most this many stored vectors")
+    parser.add_argument("--num-queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", default="ivf_flat,ivf_pq,hnsw", help="Comma-separated index types")
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--pq-nbits", type=int, default=8)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--hnsw-ef-construction", type=int, default=200)
+    parser.add_argument("--nprobe", default="1,4,16,32,64", help="nprobe values to sweep (IVF)")
+    parser.add_argument("--ef-search", default="16,32,64,128,256", help="efSearch values to sweep (HNSW)")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_embeddings(args.synthetic, args.dim)
+    else:
+        vectors = load_stored_embeddings(args.index_dir, args.max_vectors)
+    base, queries = split_queries(vectors, args.num_queries)
+    dim = base.shape[1]
+    print(f"Base vectors: {len(base)}, queries: {len(queries)}, dim: {dim}, k: {args.k}\n")
+
+    rows = []
+
+    flat_builder = AnnIndexBuilder(dim, "flat")
+    flat, build_s = build_index(flat_builder, base)
+    _, truth = flat.search(queries, args.k)
+    result = measure(flat, queries, args.k, truth)
+    rows.append({"index": "flat", "param": "-", "build_s": build_s, **result})
+
+    for index_type in [t.strip() for t in args.types.split(",") if t.strip()]:
+        builder = AnnIndexBuilder(
+            dim,
+            index_type,
+            nlist=args.nlist,
+            pq_m=args.pq_m,
+            pq_nbits=args.pq_nbits,
+            hnsw_m=args.hnsw_m,
+            hnsw_ef_construction=args.hnsw_ef_construction
+        )
+        if not builder.can_build(len(base)):
+            print(f"Skipping {index_type}: needs {builder.min_training_vectors} vectors to train (have {len(base)})")
+            continue
+
+        index, build_s = build_index(builder, base)
+        if index_type == "hnsw":
+            sweep = [("efSearch", v, faiss.SearchParametersHNSW(efSearch=max(v, args.k)))
+                     for v in map(int, args.ef_search.split(","))]
+        else:
+            sweep = [("nprobe", v, faiss.SearchParametersIVF(nprobe=v))
+                     for v in map(int, args.nprobe.split(","))]
+
+        for name, value, params in sweep:
+            result = measure(index, queries, args.k, truth, params=params)
+            rows.append({"index": index_type, "param": f"{name}={value}", "build_s": build_s, **result})
+
+    flat_ms = rows[0]["mean_ms"]
+    print(f"| index | query param | recall@{args.k} | mean ms | p95 ms | speedup vs flat | build s |")
+    print("|---|---|---|---|---|---|---|")
+    for row in rows:
+        print(
+            f"| {row['index']} | {row['param']} | {row['recall']:.4f} | {row['mean_ms']:.3f} | "
+            f"{row['p95_ms']:.3f} | {flat_ms / row['mean_ms']:.1f}x | {row['build_s']:.1f} |"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "base_vectors": len(base),
+            "queries": len(queries),
+            "dim": dim,
+            "k": args.k,
+            "results": rows
+        }, indent=2))
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
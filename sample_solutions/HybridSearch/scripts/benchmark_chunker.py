@@ -0,0 +1,179 @@
+"""
+Text chunker throughput benchmark.
+
+Chunks a large document with the ingestion service's TextChunker and with
+the previous implementation (tokenize with re.findall, rebuild each chunk
+with " ".join) and reports time, MB/s and chunk counts per boundary mode.
+It also checks that every chunk is exactly ``page[char_start:char_end]``
+and, without boundaries, that chunks hold the same tokens as before.
+
+The document is synthetic (paragraphs of random sentences) unless --file
+points to a text file.
+
+Examples:
+    python scripts/benchmark_chunker.py
+    python scripts/benchmark_chunker.py --pages 2000 --chunk-size 512 --chunk-overlap 50
+    python scripts/benchmark_chunker.py --file big.txt --repeat 5
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+# Chunk exactly as the ingestion service does
+sys.path.insert(0, str(SCRIPTS_DIR.parent / "api" / "ingestion"))
+from services.chunker import BOUNDARY_MODES, TextChunker  # noqa: E402
+
+WORDS = (
+    "search hybrid dense sparse vector index query ranking document page chunk token "
+    "embedding model retrieval fusion score result catalog product price rating review "
+    "latency throughput memory cache batch stream offset citation sentence paragraph"
+).split()
+
+
+def generate_pages(pages: int, words_per_page: int, seed: int = 0) -> dict:
+    """Pages of paragraphs made of random sentences."""
+    rng = random.Random(seed)
+    document = {}
+    for page in range(1, pages + 1):
+        paragraphs, words = [], 0
+        while words < words_per_page:
+            sentences = []
+            for _ in range(rng.randint(2, 6)):
+                length = rng.randint(6, 24)
+                sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+                sentences.append(sentence.capitalize() + rng.choice([".", ".", ".", "?", "!", "; e.g. 3.5%."]))
+                words += length
+            paragraphs.append("  ".join(sentences))
+        document[page] = "\n\n".join(paragraphs)
+    return document
+
+
+def legacy_chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> list:
+    """The chunker before character offsets (kept for comparison)."""
+    tokens = re.findall(r'\w+|[^\w\s]', text)
+    if len(tokens) <= chunk_size:
+        return [{"text": text, "token_count": len(tokens)}]
+    chunks = []
+    start = 0
+    while start < len(tokens):
+        end = start + chunk_size
+        chunk_tokens = tokens[start:end]
+        chunks.append({
+            "text": " ".join(chunk_tokens),
+            "token_count": len(chunk_tokens),
+            "start_token": start,
+            "end_token": end
+        })
+        start = end - chunk_overlap
+        if start >= len(tokens):
+            break
+    return chunks
+
+
+def best_time(fn, repeat: int):
+    """Best-of-N wall time; returns (seconds, last result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check_offsets(document: dict, chunks: list) -> bool:
+    """Every chunk is the exact slice of its page at its offsets."""
+    return all(
+        document[chunk["page_number"]][chunk["char_start"]:chunk["char_end"]] == chunk["text"]
+        for chunk in chunks
+    )
+
+
+def check_tokens(document: dict, chunks: list, legacy: list) -> bool:
+    """Without boundaries, chunks hold the same tokens as the legacy chunker."""
+    # After reaching the end of a page the legacy loop emitted one more chunk
+    # made only of overlap tokens; it is no longer produced
+    legacy = [
+        old for previous, old in zip([None] + legacy, legacy)
+        if not old.get("start_token")
+        or old["start_token"] + old["token_count"] > previous["start_token"] + previous["token_count"]
+    ]
+    if len(chunks) != len(legacy):
+        return False
+    return all(
+        TextChunker.simple_tokenize(chunk["text"]) == old["text"].split(" ")
+        for chunk, old in zip(chunks, legacy)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, help="Text file to chunk (one page) instead of a synthetic document")
+    parser.add_argument("--pages", type=int, default=500, help="Synthetic pages")
+    parser.add_argument("--words-per-page", type=int, default=2000, help="Synthetic words per page")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Tokens per chunk")
+    parser.add_argument("--chunk-overlap", type=int, default=25, help="Overlapping tokens")
+    parser.add_argument("--tokenizer", help="Hugging Face tokenizer for token counts (needs `tokenizers`)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant (best is reported)")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    if args.file:
+        document = {1: args.file.read_text(encoding='utf-8', errors='replace')}
+    else:
+        document = generate_pages(args.pages, args.words_per_page)
+    megabytes = sum(len(text.encode('utf-8')) for text in document.values()) / 1e6
+    print(f"Pages: {len(document)}, size: {megabytes:.1f} MB, chunk size: {args.chunk_size}, "
+          f"overlap: {args.chunk_overlap}\n")
+
+    legacy_s, legacy = best_time(
+        lambda: [
+            chunk
+            for text in document.values()
+            for chunk in legacy_chunk_text(text, args.chunk_size, args.chunk_overlap)
+        ],
+        args.repeat
+    )
+    rows = [{"variant": "legacy (join)", "seconds": legacy_s, "chunks": len(legacy), "offsets_ok": None}]
+
+    ok = True
+    for boundary in BOUNDARY_MODES:
+        chunker = TextChunker(args.chunk_size, args.chunk_overlap, boundary=boundary, tokenizer_name=args.tokenizer)
+        seconds, chunks = best_time(lambda: chunker.chunk_document(document, "bench"), args.repeat)
+        offsets_ok = check_offsets(document, chunks)
+        if boundary == "none" and chunker.tokenizer is None:
+            offsets_ok = offsets_ok and check_tokens(document, chunks, legacy)
+        ok = ok and offsets_ok
+        rows.append({"variant": f"offsets, boundary={boundary}", "seconds": seconds,
+                     "chunks": len(chunks), "offsets_ok": offsets_ok})
+
+    print("| variant | seconds | MB/s | chunks | speedup | output check |")
+    print("|---|---|---|---|---|---|")
+    for row in rows:
+        check = "-" if row["offsets_ok"] is None else ("ok" if row["offsets_ok"] else "MISMATCH")
+        print(f"| {row['variant']} | {row['seconds']:.3f} | {megabytes / row['seconds']:.1f} | "
+              f"{row['chunks']} | {legacy_s / row['seconds']:.1f}x | {check} |")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "pages": len(document),
+            "megabytes": megabytes,
+            "chunk_size": args.chunk_size,
+            "chunk_overlap": args.chunk_overlap,
+            "results": rows
+        }, indent=2))
+        print(f"\nReport written to {args.output}")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
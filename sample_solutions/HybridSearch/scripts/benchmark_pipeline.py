@@ -0,0 +1,888 @@
+"""
+End-to-end load and latency benchmark for the HybridSearch pipeline.
+
+Builds a synthetic corpus (text documents cut into --chunks chunks and a
+product catalog of --products rows, both from generate_ecommerce_dataset.py),
+starts the embedding, LLM, retrieval, ingestion and gateway services as local
+processes against stub_model_server.py (embeddings, reranking and chat
+completions with configurable latency), ingests the corpus and then drives
+open-loop load at a fixed arrival rate against each --target:
+
+    retrieval  POST retrieval /api/v1/retrieve/hybrid
+    query      POST gateway   /api/v1/query (with debug info)
+    stream     POST gateway   /api/v1/query/stream
+    search     POST gateway   /api/v1/search (products, no explanation)
+
+Requests are sent on schedule whether or not earlier ones have finished, and
+latency is measured from the scheduled send time, so a slow server shows up
+as queueing instead of a lower offered rate. The report has achieved QPS,
+p50/p95/p99 per stage (client latency plus the timings the services return),
+ingestion rows/s and chunks/s, and resident and peak memory per service
+process tree (Linux /proc). Write it with --output and pass an earlier report
+to --compare to get the change against it, e.g. between releases.
+
+Services run with the interpreter running this script, so their requirements
+(and uvicorn) must be installed in it. Service logs are in <workdir>/logs.
+
+Examples:
+    python scripts/benchmark_pipeline.py
+    python scripts/benchmark_pipeline.py --chunks 1000000 --products 0 --target retrieval --qps 200 --duration 120
+    python scripts/benchmark_pipeline.py --cold --service-env FAISS_INDEX_TYPE=hnsw --output hnsw.json --compare flat.json
+"""
+import argparse
+import asyncio
+import contextlib
+import csv
+import io
+import json
+import logging
+import math
+import os
+import platform
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+API_DIR = SCRIPTS_DIR.parent / "api"
+sys.path.insert(0, str(SCRIPTS_DIR))
+# Size documents with the ingestion service's token count
+sys.path.insert(0, str(API_DIR / "ingestion"))
+from generate_ecommerce_dataset import generate_dataset  # noqa: E402
+from services.chunker import TOKEN_PATTERN  # noqa: E402
+from stub_model_server import build_parser as build_stub_parser  # noqa: E402
+
+TARGETS = ("retrieval", "query", "stream", "search")
+PERCENTILES = (50, 95, 99)
+CATALOG_FIELDS = ['id', 'name', 'description', 'category', 'price', 'rating', 'review_count', 'image_url', 'brand']
+CATALOG_SHARD_PER_CATEGORY = 20000  # generate_dataset keeps the whole catalog in memory
+STUB_OPTIONS = (
+    "dim", "embedding_latency_ms", "embedding_item_ms", "rerank_latency_ms",
+    "rerank_item_ms", "llm_ttft_ms", "llm_token_ms", "llm_tokens"
+)
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def build_catalog(path: Path, count: int, seed: int):
+    """
+    Write a catalog of exactly ``count`` products with unique IDs.
+
+    Large catalogs are generated in shards and renumbered, since
+    generate_dataset restarts its IDs on every call.
+    """
+    random.seed(seed)
+    per_category = math.ceil(count / 7)
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.DictWriter(out, fieldnames=CATALOG_FIELDS)
+        writer.writeheader()
+        with tempfile.TemporaryDirectory() as tmp:
+            shard_path = Path(tmp) / "shard.csv"
+            while written < count:
+                shard_size = min(per_category, CATALOG_SHARD_PER_CATEGORY)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    generate_dataset(str(shard_path), num_products_per_category=shard_size)
+                with open(shard_path, newline='', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        if written >= count:
+                            break
+                        written += 1
+                        row['id'] = f"prod_{written:07d}"
+                        writer.writerow(row)
+
+
+def read_products(path: Path, limit: int) -> List[Dict[str, str]]:
+    """Read up to ``limit`` products from a catalog CSV."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = []
+        for row in csv.DictReader(f):
+            rows.append(row)
+            if len(rows) >= limit:
+                break
+        return rows
+
+
+def product_paragraph(product: Dict[str, str], rng: random.Random) -> str:
+    """Describe a product in a few sentences of document-like prose."""
+    sentences = [
+        f"{product['name']} is a {product['category'].lower()} product made by {product['brand']}.",
+        f"{product['description']}.",
+        f"It sells for ${product['price']} and is rated {product['rating']} out of 5 "
+        f"by {product['review_count']} customers.",
+        rng.choice([
+            "Reviewers mention the build quality and the value for money.",
+            "Returns are accepted within 30 days of delivery.",
+            "The warranty covers manufacturing defects for two years.",
+            "It ships in recyclable packaging and arrives within a week.",
+            "Support is available by phone, chat and email."
+        ])
+    ]
+    rng.shuffle(sentences)
+    return " ".join(sentences)
+
+
+def build_documents(directory: Path, chunks: int, chunks_per_doc: int, chunk_size: int,
+                    chunk_overlap: int, products: List[Dict[str, str]], seed: int) -> List[Path]:
+    """
+    Write text documents that chunk into about ``chunks`` chunks in total.
+
+    Each document holds ``chunks_per_doc`` chunks worth of tokens (the last
+    one fewer), counted the way the ingestion chunker counts them.
+    """
+    rng = random.Random(seed)
+    stride = max(chunk_size - chunk_overlap, 1)
+    paths = []
+    remaining = chunks
+    while remaining > 0:
+        doc_chunks = min(chunks_per_doc, remaining)
+        target_tokens = doc_chunks * stride + chunk_overlap
+        paragraphs, tokens = [], 0
+        while tokens < target_tokens:
+            paragraph = product_paragraph(rng.choice(products), rng)
+            paragraphs.append(paragraph)
+            tokens += len(TOKEN_PATTERN.findall(paragraph))
+        path = directory / f"doc_{len(paths):06d}.txt"
+        path.write_text("\n\n".join(paragraphs), encoding='utf-8')
+        paths.append(path)
+        remaining -= doc_chunks
+    return paths
+
+
+def build_queries(products: List[Dict[str, str]], count: int, seed: int) -> List[str]:
+    """Build a pool of distinct shopping and question-style queries."""
+    rng = random.Random(seed)
+    templates = [
+        lambda p: p['name'],
+        lambda p: f"{p['brand']} {p['name'].lower()}",
+        lambda p: f"best {p['category'].lower()} under ${int(float(p['price'])) + 1}",
+        lambda p: f"what is the battery life and warranty of the {p['name'].lower()}",
+        lambda p: f"{p['description'].split(' with ')[0].lower()} with good reviews",
+        lambda p: f"compare {p['name'].lower()} and {rng.choice(products)['name'].lower()}",
+        lambda p: f"is the {p['name'].lower()} by {p['brand']} worth the price",
+    ]
+    queries = set()
+    attempts = 0
+    while len(queries) < count and attempts < count * 20:
+        queries.add(rng.choice(templates)(rng.choice(products)))
+        attempts += 1
+    return sorted(queries)
+
+
+# ---------------------------------------------------------------------------
+# Processes and memory
+# ---------------------------------------------------------------------------
+
+def _read_status_kb(pid: int) -> Dict[str, int]:
+    """VmRSS and VmHWM of a process in kB (empty if unavailable)."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    values[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def _process_tree(pid: int) -> List[int]:
+    """A process and all of its descendants (Linux /proc)."""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else ():
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, ()))
+    return tree
+
+
+class Service:
+    """One service running as a local process."""
+
+    def __init__(self, name: str, command: List[str], cwd: Path, port: int, env: Dict[str, str], log_dir: Path):
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.url = f"http://127.0.0.1:{port}"
+        self.env = env
+        self.log_path = log_dir / f"{name}.log"
+        self.process: Optional[subprocess.Popen] = None
+        self.peak_rss_kb = 0
+        self.peak_processes = 0
+
+    def start(self):
+        with open(self.log_path, "wb") as log:
+            self.process = subprocess.Popen(
+                self.command, cwd=self.cwd, env=self.env,
+                stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+            )
+
+    def wait_healthy(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} exited with code {self.process.returncode}:\n{self.log_tail()}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=2).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.25)
+        raise RuntimeError(f"{self.name} did not become healthy in {timeout:.0f}s:\n{self.log_tail()}")
+
+    def log_tail(self, lines: int = 20) -> str:
+        try:
+            return "\n".join(self.log_path.read_text(errors="replace").splitlines()[-lines:])
+        except OSError:
+            return ""
+
+    def sample_memory(self) -> Dict[str, Any]:
+        """Record current memory of the process tree and update the peaks."""
+        if self.process is None or self.process.poll() is not None:
+            return {}
+        statuses = [_read_status_kb(pid) for pid in _process_tree(self.process.pid)]
+        statuses = [s for s in statuses if s]
+        rss_kb = sum(s.get("VmRSS", 0) for s in statuses)
+        self.peak_rss_kb = max(self.peak_rss_kb, rss_kb)
+        self.peak_processes = max(self.peak_processes, len(statuses))
+        return {
+            "processes": len(statuses),
+            "rss_kb": rss_kb,
+            "peak_process_kb": max((s.get("VmHWM", 0) for s in statuses), default=0)
+        }
+
+    def memory_report(self) -> Dict[str, Any]:
+        current = self.sample_memory()
+        return {
+            "processes": current.get("processes", 0),
+            "peak_processes": self.peak_processes,
+            "rss_mb": round(current.get("rss_kb", 0) / 1024, 1),
+            "peak_rss_mb": round(self.peak_rss_kb / 1024, 1),
+            # Largest single process (service or worker) over its lifetime
+            "peak_process_rss_mb": round(current.get("peak_process_kb", 0) / 1024, 1)
+        }
+
+    def stop(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(self.process.pid, signal.SIGTERM)
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+
+
+class MemorySampler(threading.Thread):
+    """Samples service memory in the background so short peaks are seen."""
+
+    def __init__(self, services: List[Service], interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.services = services
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            for service in self.services:
+                service.sample_memory()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def start_services(args: argparse.Namespace, workdir: Path) -> Dict[str, Service]:
+    """Start the stub and the five services and wait until they are healthy."""
+    log_dir = workdir / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    ports = {name: args.base_port + i for i, name in enumerate(
+        ("stub", "gateway", "embedding", "retrieval", "llm", "ingestion")
+    )}
+    urls = {name: f"http://127.0.0.1:{port}" for name, port in ports.items()}
+    index_path = workdir / "indexes"
+
+    common = {
+        **os.environ,
+        "PYTHONUNBUFFERED": "1",
+        "DEPLOYMENT_PHASE": "development",
+        "LOG_LEVEL": args.log_level.upper(),
+        "GENAI_GATEWAY_URL": urls["stub"],
+        "GENAI_API_KEY": "benchmark",
+        "INFERENCE_BACKEND": "vllm",
+        # Per-model endpoints from a local .env would bypass the stub
+        "EMBEDDING_API_ENDPOINT": "",
+        "LLM_API_ENDPOINT": "",
+        "RERANKER_API_ENDPOINT": "",
+        "EMBEDDING_SERVICE_URL": urls["embedding"],
+        "RETRIEVAL_SERVICE_URL": urls["retrieval"],
+        "LLM_SERVICE_URL": urls["llm"],
+        "INGESTION_SERVICE_URL": urls["ingestion"],
+        "GATEWAY_SERVICE_URL": urls["gateway"],
+        "INDEX_STORAGE_PATH": str(index_path),
+        "INDEX_MANIFEST_PATH": str(index_path / "manifest.json"),
+        "USE_RERANKING": str(args.reranking).lower(),
+        "EMBEDDING_DIM": str(args.dim),
+    }
+    if args.cold:
+        common.update({
+            "EMBEDDING_CACHE_PATH": "",
+            "QUERY_EMBEDDING_CACHE_SIZE": "0",
+            "RESULT_CACHE_SIZE": "0",
+            "RERANKER_SCORE_CACHE_SIZE": "0",
+            "ANSWER_CACHE_SIZE": "0",
+        })
+    else:
+        common["EMBEDDING_CACHE_PATH"] = str(workdir / "embedding_cache.db")
+    for override in args.service_env:
+        key, _, value = override.partition("=")
+        common[key] = value
+
+    stub_args = [f"--{option.replace('_', '-')}={getattr(args, option)}" for option in STUB_OPTIONS]
+    specs = [
+        ("stub", [sys.executable, str(SCRIPTS_DIR / "stub_model_server.py"), f"--port={ports['stub']}", *stub_args],
+         SCRIPTS_DIR, {}),
+        ("embedding", [sys.executable, "main.py"], API_DIR / "embedding",
+         {"EMBEDDING_HOST": "127.0.0.1", "EMBEDDING_PORT": str(ports["embedding"])}),
+        ("llm", [sys.executable, "main.py"], API_DIR / "llm",
+         {"LLM_HOST": "127.0.0.1", "LLM_PORT": str(ports["llm"])}),
+        ("retrieval", [sys.executable, "main.py"], API_DIR / "retrieval",
+         {"RETRIEVAL_HOST": "127.0.0.1", "RETRIEVAL_PORT": str(ports["retrieval"])}),
+        ("ingestion", [sys.executable, "main.py"], API_DIR / "ingestion", {
+            "INGESTION_HOST": "127.0.0.1",
+            "INGESTION_PORT": str(ports["ingestion"]),
+            "DOCUMENT_STORAGE_PATH": str(workdir / "documents"),
+            "METADATA_DB_PATH": str(workdir / "metadata.db"),
+            "PRODUCT_UPLOAD_PATH": str(workdir / "uploads"),
+            "MAX_PRODUCTS_PER_CATALOG": str(max(args.products, 50000)),
+        }),
+        # slowapi reads RATELIMIT_ENABLED; the per-client limits would cap the offered load
+        ("gateway", [sys.executable, "main.py"], API_DIR / "gateway",
+         {"GATEWAY_HOST": "127.0.0.1", "GATEWAY_PORT": str(ports["gateway"]), "RATELIMIT_ENABLED": "false"}),
+    ]
+
+    services: Dict[str, Service] = {}
+    try:
+        for name, command, cwd, env in specs:
+            service = Service(name, command, cwd, ports[name], {**common, **env}, log_dir)
+            service.start()
+            services[name] = service
+            service.wait_healthy(args.startup_timeout)
+            print(f"  {name} ready at {service.url}")
+    except BaseException:
+        stop_services(services)
+        raise
+    return services
+
+
+def stop_services(services: Dict[str, Service]):
+    for service in reversed(list(services.values())):
+        service.stop()
+
+
+# ---------------------------------------------------------------------------
+# Ingestion
+# ---------------------------------------------------------------------------
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Count, percentiles, mean and max of a list of milliseconds."""
+    if not values:
+        return {"n": 0}
+    array = np.asarray(values, dtype=np.float64)
+    summary = {"n": int(array.size)}
+    for p, value in zip(PERCENTILES, np.percentile(array, PERCENTILES)):
+        summary[f"p{p}"] = round(float(value), 2)
+    summary["mean"] = round(float(array.mean()), 2)
+    summary["max"] = round(float(array.max()), 2)
+    return summary
+
+
+async def ingest_documents(ingestion_url: str, paths: List[Path], concurrency: int, timeout: float) -> Dict[str, Any]:
+    """Upload documents, wait for each to finish and report throughput."""
+    semaphore = asyncio.Semaphore(concurrency)
+    stage_timings: Dict[str, List[float]] = {}
+    completed, failed, chunks = 0, 0, 0
+
+    async with httpx.AsyncClient(base_url=ingestion_url, timeout=timeout) as client:
+        async def ingest(path: Path):
+            nonlocal completed, failed, chunks
+            async with semaphore:
+                while True:
+                    with open(path, "rb") as f:
+                        response = await client.post(
+                            "/api/v1/documents/upload", files={"file": (path.name, f, "text/plain")}
+                        )
+                    if response.status_code != 503:
+                        break
+                    await asyncio.sleep(min(float(response.headers.get("Retry-After", 1)), 2.0))
+                if response.status_code >= 400:
+                    failed += 1
+                    return
+                document_id = response.json()["document_id"]
+                while True:
+                    await asyncio.sleep(0.2)
+                    status = (await client.get(f"/api/v1/documents/{document_id}/status")).json()
+                    if status["processing_status"] in ("completed", "failed"):
+                        break
+            if status["processing_status"] == "failed":
+                failed += 1
+                return
+            completed += 1
+            chunks += status["chunk_count"]
+            for stage, ms in (status.get("stage_timings") or {}).items():
+                stage_timings.setdefault(stage, []).append(ms)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(ingest(path) for path in paths))
+        seconds = time.perf_counter() - start
+
+    return {
+        "documents": len(paths),
+        "completed": completed,
+        "failed": failed,
+        "chunks": chunks,
+        "seconds": round(seconds, 2),
+        "documents_per_second": round(completed / seconds, 2) if seconds else 0.0,
+        "chunks_per_second": round(chunks / seconds, 1) if seconds else 0.0,
+        "stage_timings_ms": {stage: summarize(values) for stage, values in stage_timings.items()}
+    }
+
+
+async def ingest_products(ingestion_url: str, catalog: Path, timeout: float) -> Dict[str, Any]:
+    """Upload a catalog, confirm the field mapping if asked and wait for the job."""
+    async with httpx.AsyncClient(base_url=ingestion_url, timeout=timeout) as client:
+        start = time.perf_counter()
+        with open(catalog, "rb") as f:
+            response = await client.post("/api/v1/products/upload", files={"file": (catalog.name, f, "text/csv")})
+        response.raise_for_status()
+        upload = response.json()
+        job_id = upload["job_id"]
+        if upload.get("requires_confirmation"):
+            mapping = {field: field for field in CATALOG_FIELDS}
+            response = await client.post("/api/v1/products/confirm", data={
+                "job_id": job_id, "catalog_name": catalog.stem, "field_mapping": json.dumps(mapping)
+            })
+            response.raise_for_status()
+        while True:
+            await asyncio.sleep(0.5)
+            job = (await client.get(f"/api/v1/products/status/{job_id}")).json()
+            if job["status"] in ("complete", "error"):
+                break
+        seconds = time.perf_counter() - start
+
+    processed = job.get("products_processed", 0)
+    return {
+        "products": job.get("products_total", 0),
+        "processed": processed,
+        "status": job["status"],
+        "errors": job.get("errors", [])[:5],
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(processed / seconds, 1) if seconds else 0.0
+    }
+
+
+# ---------------------------------------------------------------------------
+# Load
+# ---------------------------------------------------------------------------
+
+Sender = Callable[[httpx.AsyncClient, str, float], Awaitable[Dict[str, Any]]]
+
+
+def make_senders(urls: Dict[str, str]) -> Dict[str, Sender]:
+    """
+    Request functions per target.
+
+    Each sends one query and returns the stage timings of the response in
+    milliseconds (plus flags such as cache hits); it raises on errors.
+    ``scheduled`` is the perf_counter time the request was due, for stages
+    the client measures itself.
+    """
+    async def retrieval(client: httpx.AsyncClient, query: str, scheduled: float) -> Dict[str, Any]:
+        response = await client.post(f"{urls['retrieval']}/api/v1/retrieve/hybrid", json={"query": query})
+        response.raise_for_status()
+        data = response.json()
+        stages = {"server_ms": data["retrieval_time_ms"]}
+        if data["dense_time_ms"] == data["sparse_time_ms"] == data["fusion_time_ms"] == 0:
+            return {**stages, "cache_hit": True}
+        return {
+            **stages,
+            "dense_ms": data["dense_time_ms"],
+            "sparse_ms": data["sparse_time_ms"],
+            "fusion_ms": data["fusion_time_ms"]
+        }
+
+    async def query(client: httpx.AsyncClient, query: str, scheduled: float) -> Dict[str, Any]:
+        response = await client.post(
+            f"{urls['gateway']}/api/v1/query", json={"query": query, "include_debug_info": True}
+        )
+        response.raise_for_status()
+        data = response.json()
+        debug = data.get("debug_info") or {}
+        stages = {"server_ms": data["processing_time_ms"]}
+        if "retrieval" in debug:
+            stages["retrieval_ms"] = debug["retrieval"]["retrieval_time_ms"]
+        if "llm" in debug:
+            stages["cache_hit"] = bool(debug["llm"].get("cached"))
+            if debug["llm"].get("generation_time_ms") is not None and not stages["cache_hit"]:
+                stages["generation_ms"] = debug["llm"]["generation_time_ms"]
+        return stages
+
+    async def stream(client: httpx.AsyncClient, query: str, scheduled: float) -> Dict[str, Any]:
+        stages: Dict[str, Any] = {}
+        event = None
+        async with client.stream("POST", f"{urls['gateway']}/api/v1/query/stream", json={"query": query}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[7:]
+                    if event == "token" and "first_token_ms" not in stages:
+                        stages["first_token_ms"] = (time.perf_counter() - scheduled) * 1000
+                elif line.startswith("data: ") and event in ("retrieval", "done", "error"):
+                    data = json.loads(line[6:])
+                    if event == "error":
+                        raise RuntimeError(data.get("detail", "stream error"))
+                    if event == "retrieval":
+                        stages["retrieval_ms"] = data["retrieval_time_ms"]
+                    else:
+                        stages["server_ms"] = data["processing_time_ms"]
+                        if data.get("time_to_first_token_ms") is not None:
+                            stages["server_first_token_ms"] = data["time_to_first_token_ms"]
+        return stages
+
+    async def search(client: httpx.AsyncClient, query: str, scheduled: float) -> Dict[str, Any]:
+        response = await client.post(f"{urls['gateway']}/api/v1/search", json={"query": query, "explain": False})
+        response.raise_for_status()
+        return {}
+
+    return {"retrieval": retrieval, "query": query, "stream": stream, "search": search}
+
+
+async def run_load(sender: Sender, queries: List[str], args: argparse.Namespace, seed: int) -> Dict[str, Any]:
+    """
+    Send requests at ``args.qps`` (open loop) and collect latencies.
+
+    The first ``args.warmup`` seconds are sent but not measured. Requests
+    that would exceed ``args.max_in_flight`` outstanding ones are dropped
+    and counted, so an overloaded server cannot slow down the schedule.
+    """
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    cache_hits = 0
+    dropped = 0
+    in_flight = 0
+    last_completion = 0.0
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(timeout=args.request_timeout, limits=limits) as client:
+        async def fire(query: str, scheduled: float, measured: bool):
+            nonlocal in_flight, cache_hits, last_completion
+            in_flight += 1
+            try:
+                result = await sender(client, query, scheduled)
+            except Exception as e:
+                if measured:
+                    key = f"HTTP {e.response.status_code}" if isinstance(e, httpx.HTTPStatusError) else type(e).__name__
+                    errors[key] = errors.get(key, 0) + 1
+                return
+            finally:
+                in_flight -= 1
+            done = time.perf_counter()
+            if not measured:
+                return
+            last_completion = max(last_completion, done)
+            latencies.append((done - scheduled) * 1000)
+            cache_hits += bool(result.pop("cache_hit", False))
+            for stage, ms in result.items():
+                stages.setdefault(stage, []).append(ms)
+
+        tasks = []
+        start = time.perf_counter() + 0.1
+        window_start = start + args.warmup
+        end = window_start + args.duration
+        scheduled = start
+        sent = 0
+        while True:
+            scheduled += rng.expovariate(args.qps) if args.arrival == "poisson" else 1.0 / args.qps
+            if scheduled >= end:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            measured = scheduled >= window_start
+            if in_flight >= args.max_in_flight:
+                dropped += measured
+                continue
+            sent += measured
+            tasks.append(asyncio.ensure_future(fire(rng.choice(queries), scheduled, measured)))
+        await asyncio.gather(*tasks)
+
+    window = max(args.duration, last_completion - window_start)
+    return {
+        "offered_qps": args.qps,
+        "sent": sent,
+        "ok": len(latencies),
+        "errors": errors,
+        "dropped": dropped,
+        "cache_hits": cache_hits,
+        "achieved_qps": round(len(latencies) / window, 2),
+        "stages_ms": {"latency_ms": summarize(latencies), **{s: summarize(v) for s, v in stages.items()}}
+    }
+
+
+async def wait_idle(stub_url: str, timeout: float, quiet: float = 2.0):
+    """
+    Wait until the services stop calling the stub model server.
+
+    Requests the client gave up on may still be queued in a service; letting
+    them drain keeps one target's backlog out of the next target's numbers.
+    """
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=10) as client:
+        previous = None
+        while time.monotonic() < deadline:
+            counts = (await client.get(f"{stub_url}/stats")).json()
+            if counts == previous:
+                return
+            previous = counts
+            await asyncio.sleep(quiet)
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def _delta(current: Optional[float], previous: Optional[float]) -> str:
+    """Format a value with its relative change against a previous run."""
+    if current is None:
+        return "-"
+    if previous in (None, 0):
+        return f"{current:,.2f}"
+    return f"{current:,.2f} ({(current - previous) / previous:+.1%})"
+
+
+def _git_revision() -> Optional[str]:
+    with contextlib.suppress(OSError, subprocess.CalledProcessError):
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=SCRIPTS_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip() or None
+    return None
+
+
+def print_report(report: Dict[str, Any], previous: Optional[Dict[str, Any]]):
+    previous = previous or {}
+    print(f"\nRevision: {report['meta']['revision']}"
+          + (f" (compared with {previous['meta']['revision']})" if previous.get("meta") else ""))
+
+    ingestion, previous_ingestion = report["ingestion"], previous.get("ingestion", {})
+    print("\n## Ingestion\n")
+    print("| corpus | items | chunks | failed | seconds | items/s | chunks/s |")
+    print("|---|---|---|---|---|---|---|")
+    if "documents" in ingestion:
+        docs, prev = ingestion["documents"], previous_ingestion.get("documents", {})
+        print(f"| documents | {docs['completed']} | {docs['chunks']} | {docs['failed']} | {docs['seconds']} "
+              f"| {_delta(docs['documents_per_second'], prev.get('documents_per_second'))} "
+              f"| {_delta(docs['chunks_per_second'], prev.get('chunks_per_second'))} |")
+    if "products" in ingestion:
+        products, prev = ingestion["products"], previous_ingestion.get("products", {})
+        print(f"| products | {products['processed']} | - | {products['products'] - products['processed']} "
+              f"| {products['seconds']} | {_delta(products['rows_per_second'], prev.get('rows_per_second'))} | - |")
+
+    for target, result in report["load"].items():
+        prev = previous.get("load", {}).get(target, {})
+        errors = ", ".join(f"{count} {kind}" for kind, count in result["errors"].items()) or "0"
+        print(f"\n## Load: {target}\n")
+        print(f"Offered {result['offered_qps']} QPS, achieved {_delta(result['achieved_qps'], prev.get('achieved_qps'))} "
+              f"QPS; {result['ok']} ok, errors: {errors}, "
+              f"{result['dropped']} dropped, {result['cache_hits']} cache hits\n")
+        print("| stage | n | p50 ms | p95 ms | p99 ms | mean ms | max ms |")
+        print("|---|---|---|---|---|---|---|")
+        for stage, summary in result["stages_ms"].items():
+            if not summary["n"]:
+                continue
+            before = prev.get("stages_ms", {}).get(stage, {})
+            cells = [_delta(summary[f"p{p}"], before.get(f"p{p}")) for p in PERCENTILES]
+            print(f"| {stage} | {summary['n']} | {' | '.join(cells)} | {summary['mean']:,.2f} | {summary['max']:,.2f} |")
+
+    print("\n## Memory\n")
+    print("| service | processes | RSS MB | peak RSS MB | peak process MB |")
+    print("|---|---|---|---|---|")
+    for name, memory in report["memory"].items():
+        before = previous.get("memory", {}).get(name, {})
+        print(f"| {name} | {memory['peak_processes']} | {memory['rss_mb']:,.1f} "
+              f"| {_delta(memory['peak_rss_mb'], before.get('peak_rss_mb'))} "
+              f"| {_delta(memory['peak_process_rss_mb'], before.get('peak_process_rss_mb'))} |")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    corpus = parser.add_argument_group("corpus")
+    corpus.add_argument("--chunks", type=int, default=10000, help="Document chunks to ingest (0 = none)")
+    corpus.add_argument("--chunks-per-doc", type=int, default=200, help="Chunks per generated document")
+    corpus.add_argument("--chunk-size", type=int, default=256, help="Ingestion CHUNK_SIZE (tokens)")
+    corpus.add_argument("--chunk-overlap", type=int, default=25, help="Ingestion CHUNK_OVERLAP (tokens)")
+    corpus.add_argument("--products", type=int, default=10000, help="Catalog products to ingest (0 = none)")
+    corpus.add_argument("--upload-concurrency", type=int, default=8, help="Documents being ingested at a time")
+    corpus.add_argument("--seed", type=int, default=42)
+
+    load = parser.add_argument_group("load")
+    load.add_argument("--target", default="retrieval,query,stream,search",
+                      help=f"Comma-separated targets to load in turn: {', '.join(TARGETS)}")
+    load.add_argument("--qps", type=float, default=20.0, help="Offered requests per second")
+    load.add_argument("--duration", type=float, default=30.0, help="Measured seconds per target")
+    load.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before each target")
+    load.add_argument("--arrival", choices=("poisson", "uniform"), default="poisson", help="Inter-arrival times")
+    load.add_argument("--max-in-flight", type=int, default=512, help="Outstanding requests before dropping")
+    load.add_argument("--request-timeout", type=float, default=60.0)
+    load.add_argument("--query-pool", type=int, default=500, help="Distinct queries to draw from")
+
+    services = parser.add_argument_group("services")
+    services.add_argument("--cold", action="store_true",
+                          help="Disable the embedding, query, result, rerank and answer caches")
+    services.add_argument("--reranking", action="store_true", help="Enable reranking (USE_RERANKING)")
+    services.add_argument("--service-env", action="append", default=[], metavar="KEY=VALUE",
+                          help="Extra environment variable for every service (repeatable)")
+    services.add_argument("--base-port", type=int, default=18000, help="First of six consecutive ports")
+    services.add_argument("--startup-timeout", type=float, default=120.0)
+    services.add_argument("--log-level", default="WARNING", help="Service LOG_LEVEL")
+    services.add_argument("--workdir", type=Path, help="Keep corpus, indexes and logs here (default: temporary)")
+
+    stub_defaults = build_stub_parser().parse_args([])
+    stub = parser.add_argument_group("stub model server")
+    for option in STUB_OPTIONS:
+        stub.add_argument(f"--{option.replace('_', '-')}", type=type(getattr(stub_defaults, option)),
+                          default=getattr(stub_defaults, option))
+
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    parser.add_argument("--compare", type=Path, help="Earlier JSON report to compare with")
+    return parser
+
+
+async def run(args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    targets = [t.strip() for t in args.target.split(",") if t.strip()]
+    unknown = sorted(set(targets) - set(TARGETS))
+    if unknown:
+        raise SystemExit(f"Unknown target(s): {', '.join(unknown)}")
+
+    print(f"Building corpus in {workdir}")
+    corpus_dir = workdir / "corpus"
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    # Document text and queries come from a small catalog of the same templates
+    material = corpus_dir / "material.csv"
+    build_catalog(material, 2000, args.seed)
+    products = read_products(material, 2000)
+    catalog = corpus_dir / "catalog.csv"
+    if args.products:
+        build_catalog(catalog, args.products, args.seed)
+    doc_dir = corpus_dir / "documents"
+    doc_dir.mkdir(exist_ok=True)
+    documents = build_documents(doc_dir, args.chunks, args.chunks_per_doc, args.chunk_size,
+                                args.chunk_overlap, products, args.seed) if args.chunks else []
+    queries = build_queries(products, args.query_pool, args.seed)
+    print(f"  {len(documents)} documents, {args.products} products, {len(queries)} queries")
+
+    args.service_env = [f"CHUNK_SIZE={args.chunk_size}", f"CHUNK_OVERLAP={args.chunk_overlap}", *args.service_env]
+    print("Starting services")
+    services = start_services(args, workdir)
+    sampler = MemorySampler([s for name, s in services.items() if name != "stub"])
+    sampler.start()
+    try:
+        urls = {name: service.url for name, service in services.items()}
+        ingestion: Dict[str, Any] = {}
+        if documents:
+            print(f"Ingesting {len(documents)} documents")
+            ingestion["documents"] = await ingest_documents(
+                urls["ingestion"], documents, args.upload_concurrency, args.request_timeout
+            )
+        if args.products:
+            print(f"Ingesting {args.products} products")
+            ingestion["products"] = await ingest_products(urls["ingestion"], catalog, args.request_timeout)
+        reload = httpx.post(f"{urls['retrieval']}/api/v1/reload", timeout=args.request_timeout).json()
+        print(f"  retrieval reloaded: {reload.get('indexes_loaded')}")
+
+        senders = make_senders(urls)
+        load = {}
+        for i, target in enumerate(targets):
+            if i:
+                await wait_idle(urls["stub"], args.request_timeout)
+            print(f"Loading {target} at {args.qps} QPS for {args.warmup:g}s + {args.duration:g}s")
+            load[target] = await run_load(senders[target], queries, args, args.seed + i)
+
+        upstream_calls = httpx.get(f"{urls['stub']}/stats", timeout=10).json()
+    finally:
+        sampler.stop()
+        memory = {name: s.memory_report() for name, s in services.items() if name != "stub"}
+        stop_services(services)
+
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        "ingestion": ingestion,
+        "load": load,
+        "memory": memory,
+        "upstream_calls": upstream_calls
+    }
+
+
+def main():
+    args = build_parser().parse_args()
+    logging.disable(logging.WARNING)
+    previous = json.loads(args.compare.read_text()) if args.compare else None
+
+    if args.workdir:
+        args.workdir.mkdir(parents=True, exist_ok=True)
+        report = asyncio.run(run(args, args.workdir))
+    else:
+        workdir = Path(tempfile.mkdtemp(prefix="hybridsearch-bench-"))
+        try:
+            report = asyncio.run(run(args, workdir))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(report, previous)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
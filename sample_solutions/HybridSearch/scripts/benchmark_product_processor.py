@@ -0,0 +1,129 @@
+"""
+Row-wise vs columnar product normalisation benchmark.
+
+Generates a synthetic catalog with generate_ecommerce_dataset.py, parses it
+with the ingestion service's ProductParser and times
+ProductProcessor.process_batch on both paths. It also checks that both paths
+produce identical products. With --messy, prices, ratings and review counts
+are written in mixed formats ("$1,299.99", "4.5 out of 5", "1,234 reviews")
+so the row-wise fallback is exercised too.
+
+Examples:
+    python scripts/benchmark_product_processor.py
+    python scripts/benchmark_product_processor.py --per-category 20000 --messy --repeat 5
+"""
+import argparse
+import contextlib
+import copy
+import csv
+import io
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+# Parse and process exactly as the ingestion service does
+sys.path.insert(0, str(SCRIPTS_DIR.parent / "api" / "ingestion"))
+from generate_ecommerce_dataset import generate_dataset  # noqa: E402
+from services.product_parser import ProductParser  # noqa: E402
+from services.product_processor import ProductProcessor  # noqa: E402
+
+
+def messify(csv_path: Path, seed: int = 0):
+    """Rewrite numeric columns in the mixed formats real catalogs use."""
+    rng = random.Random(seed)
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+
+    for row in rows:
+        price = float(row['price'])
+        row['price'] = rng.choice([f"{price:.2f}", f"${price:,.2f}", f"{price:,.2f} USD", f"€{price:.2f}"])
+        rating = float(row['rating'])
+        row['rating'] = rng.choice([f"{rating}", f"{rating} out of 5", f"{rating * 2:.1f}"])
+        count = int(row['review_count'])
+        row['review_count'] = rng.choice([f"{count}", f"{count:,}", f"{count:,} reviews"])
+        if rng.random() < 0.2:
+            row['description'] = f"<p>{row['description']}</p>"
+
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def time_path(processor: ProductProcessor, products, columnar: bool, batch_size: int, repeat: int):
+    """Best-of-N wall time for process_batch; returns (seconds, last result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        batch = copy.deepcopy(products)
+        start = time.perf_counter()
+        result = processor.process_batch(batch, batch_size=batch_size, columnar=columnar)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--per-category", type=int, default=5000, help="Products per category (7 categories)")
+    parser.add_argument("--messy", action="store_true", help="Write numeric fields in mixed formats")
+    parser.add_argument("--batch-size", type=int, default=100, help="process_batch batch size")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path (best is reported)")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "catalog.csv"
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_dataset(str(csv_path), num_products_per_category=args.per_category)
+        if args.messy:
+            messify(csv_path)
+
+        product_parser = ProductParser()
+        count, columns = product_parser.scan_file(csv_path, csv_path.name)
+        field_mapping = product_parser.detect_field_mapping(columns)
+        products = [
+            product
+            for batch in product_parser.iter_mapped_batches(csv_path, csv_path.name, field_mapping)
+            for product in batch
+        ]
+
+    processor = ProductProcessor()
+    print(f"Products: {count}, batch size: {args.batch_size}, messy: {args.messy}\n")
+
+    row_s, row_result = time_path(processor, products, False, args.batch_size, args.repeat)
+    col_s, col_result = time_path(processor, products, True, args.batch_size, args.repeat)
+    identical = row_result == col_result
+
+    print("| path | seconds | products/s | speedup |")
+    print("|---|---|---|---|")
+    print(f"| row-wise | {row_s:.3f} | {count / row_s:,.0f} | 1.0x |")
+    print(f"| columnar | {col_s:.3f} | {count / col_s:,.0f} | {row_s / col_s:.1f}x |")
+    print(f"\nIdentical output: {identical} ({len(col_result[0])} valid, {len(col_result[1])} invalid)")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "products": count,
+            "batch_size": args.batch_size,
+            "messy": args.messy,
+            "rowwise_seconds": row_s,
+            "columnar_seconds": col_s,
+            "speedup": row_s / col_s,
+            "identical": identical
+        }, indent=2))
+        print(f"\nReport written to {args.output}")
+
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Stub inference server for benchmarks and local runs without model endpoints.
+
+Serves the OpenAI-compatible endpoints the HybridSearch services call on the
+GenAI Gateway, with deterministic outputs and configurable latency:
+
+    POST /v1/embeddings         hashed bag-of-words vectors (similar texts get
+                                similar vectors, so dense search is meaningful);
+                                honours encoding_format "float" and "base64"
+    POST /v1/rerank, /rerank    query term overlap as the relevance score
+                                ("documents" -> {"results": [...]},
+                                "texts" -> [{"index", "score"}, ...])
+    POST /v1/chat/completions   a canned answer of --llm-tokens words, streamed
+                                as Server-Sent Events when "stream" is true
+    GET  /stats                 request and item counts per endpoint
+    GET  /health
+
+Latency is simulated with asyncio.sleep, so the stub itself is never the
+bottleneck. Point the services at it with GENAI_GATEWAY_URL=http://host:port
+and any GENAI_API_KEY.
+
+Examples:
+    python scripts/stub_model_server.py --port 9000
+    python scripts/stub_model_server.py --embedding-latency-ms 20 --llm-ttft-ms 300 --llm-token-ms 25
+"""
+import argparse
+import asyncio
+import base64
+import json
+import re
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+ANSWER_WORDS = (
+    "Based on the provided context the product offers solid value with good build quality "
+    "reliable performance and positive customer reviews across the category"
+).split()
+
+
+class EmbeddingRequest(BaseModel):
+    input: Union[str, List[str]]
+    model: str = "stub-embedding"
+    encoding_format: Optional[str] = None
+
+
+class RerankRequest(BaseModel):
+    query: str
+    documents: Optional[List[Any]] = None
+    texts: Optional[List[str]] = None
+    model: str = "stub-reranker"
+    top_n: Optional[int] = None
+
+
+class ChatCompletionRequest(BaseModel):
+    model: str = "stub-llm"
+    messages: List[Dict[str, Any]]
+    max_tokens: Optional[int] = None
+    stream: bool = False
+
+
+def embed(texts: List[str], dim: int) -> np.ndarray:
+    """
+    Feature-hash texts into L2-normalised vectors.
+
+    Args:
+        texts (List[str]): Texts to embed.
+        dim (int): Vector dimensions.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(texts), dim).
+    """
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = zlib.crc32(token.encode("utf-8"))
+            matrix[row, digest % dim] += 1.0 if digest & 0x80000000 else -1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def overlap_score(query_terms: set, document: str) -> float:
+    """Fraction of query terms found in the document."""
+    if not query_terms:
+        return 0.0
+    return len(query_terms & set(TOKEN_PATTERN.findall(document.lower()))) / len(query_terms)
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    """
+    Build the stub application.
+
+    Args:
+        args (argparse.Namespace): Parsed command line options.
+
+    Returns:
+        FastAPI: The application.
+    """
+    app = FastAPI(title="Stub Inference Server")
+    stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"requests": 0, "items": 0})
+
+    async def delay(base_ms: float, per_item_ms: float = 0.0, items: int = 0):
+        seconds = (base_ms + per_item_ms * items) / 1000
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def count(endpoint: str, items: int):
+        stats[endpoint]["requests"] += 1
+        stats[endpoint]["items"] += items
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "service": "stub-inference"}
+
+    @app.get("/stats")
+    async def get_stats():
+        return {
+            endpoint: {**counters, "avg_items": round(counters["items"] / counters["requests"], 2)}
+            for endpoint, counters in stats.items()
+        }
+
+    @app.post("/v1/embeddings")
+    @app.post("/embeddings")
+    async def embeddings(request: EmbeddingRequest):
+        texts = [request.input] if isinstance(request.input, str) else request.input
+        count("embeddings", len(texts))
+        await delay(args.embedding_latency_ms, args.embedding_item_ms, len(texts))
+        matrix = embed(texts, args.dim)
+        if request.encoding_format == "base64":
+            vectors = [base64.b64encode(row.astype("<f4").tobytes()).decode("ascii") for row in matrix]
+        else:
+            vectors = matrix.tolist()
+        tokens = sum(len(TOKEN_PATTERN.findall(text)) for text in texts)
+        return {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": vector}
+                for i, vector in enumerate(vectors)
+            ],
+            "model": request.model,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    @app.post("/v1/rerank")
+    @app.post("/rerank")
+    async def rerank(request: RerankRequest):
+        documents = request.documents if request.documents is not None else request.texts or []
+        documents = [d.get("text", "") if isinstance(d, dict) else str(d) for d in documents]
+        count("rerank", len(documents))
+        await delay(args.rerank_latency_ms, args.rerank_item_ms, len(documents))
+        query_terms = set(TOKEN_PATTERN.findall(request.query.lower()))
+        scores = [overlap_score(query_terms, document) for document in documents]
+        order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:request.top_n or len(scores)]
+        if request.texts is not None and request.documents is None:
+            return [{"index": i, "score": scores[i]} for i in order]
+        return {
+            "id": str(uuid.uuid4()),
+            "results": [{"index": i, "relevance_score": scores[i]} for i in order]
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: ChatCompletionRequest):
+        count("chat_completions", 1)
+        n_tokens = min(args.llm_tokens, request.max_tokens or args.llm_tokens)
+        words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(n_tokens)]
+        prompt_tokens = sum(len(TOKEN_PATTERN.findall(str(m.get("content", "")))) for m in request.messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": n_tokens,
+            "total_tokens": prompt_tokens + n_tokens
+        }
+
+        if not request.stream:
+            await delay(args.llm_ttft_ms, args.llm_token_ms, n_tokens)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": request.model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(words) + "."},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": request.model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra
+            }) + "\n\n"
+
+        async def events():
+            await delay(args.llm_ttft_ms)
+            yield chunk({"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                if i:
+                    await delay(args.llm_token_ms)
+                yield chunk({"content": word if i == 0 else f" {word}"})
+            yield chunk({}, "stop", usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options (shared with benchmark_pipeline.py)."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimensions")
+    parser.add_argument("--embedding-latency-ms", type=float, default=5.0, help="Base latency per embedding request")
+    parser.add_argument("--embedding-item-ms", type=float, default=0.2, help="Extra latency per embedded text")
+    parser.add_argument("--rerank-latency-ms", type=float, default=10.0, help="Base latency per rerank request")
+    parser.add_argument("--rerank-item-ms", type=float, default=0.5, help="Extra latency per reranked document")
+    parser.add_argument("--llm-ttft-ms", type=float, default=200.0, help="Time to first token")
+    parser.add_argument("--llm-token-ms", type=float, default=10.0, help="Time per generated token")
+    parser.add_argument("--llm-tokens", type=int, default=64, help="Tokens per answer")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ import httpx
 import logging
 import re
 import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
 import json
 from config import settings
@@ -455,20 +455,7 @@ class UIService:
                 json=payload
             )
             response.raise_for_status()
-            data = response.json()
-            
-            # Normalize response fields to match UI expectations
-            normalized = {
-                "answer": data.get("answer", ""),
-                "citations": data.get("citations", []),
-                "query_type": data.get("query_complexity", data.get("query_type", "unknown")),
-                "model_used": data.get("llm_model", data.get("model_used", "unknown")),
-                "response_time_ms": data.get("processing_time_ms", data.get("response_time_ms", 0)),
-                "debug_info": data.get("debug_info"),
-                "retrieval_results_count": data.get("retrieval_results_count", 0)
-            }
-            
-            return normalized
+            return self._normalize_query_response(response.json())
         except httpx.HTTPStatusError as e:
             logger.error(f"Query failed with status {e.response.status_code}: {e}")
             return {
@@ -480,6 +467,80 @@ class UIService:
             logger.error(f"Query failed: {e}")
             return {"error": True, "message": str(e)}
     
+    @staticmethod
+    def _normalize_query_response(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalize gateway query response fields to match UI expectations.
+        
+        Args:
+            data (Dict[str, Any]): Gateway QueryResponse.
+            
+        Returns:
+            Dict[str, Any]: Normalized response with answer, citations, and metadata.
+        """
+        return {
+            "answer": data.get("answer", ""),
+            "citations": data.get("citations", []),
+            "query_type": data.get("query_complexity", data.get("query_type", "unknown")),
+            "model_used": data.get("llm_model", data.get("model_used", "unknown")),
+            "response_time_ms": data.get("processing_time_ms", data.get("response_time_ms", 0)),
+            "time_to_first_token_ms": data.get("time_to_first_token_ms"),
+            "debug_info": data.get("debug_info"),
+            "retrieval_results_count": data.get("retrieval_results_count", 0)
+        }
+    
+    def stream_query(self, query: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Submit a query and stream the answer as it is generated.
+        
+        Args:
+            query (str): The user's question.
+            
+        Yields:
+            Tuple[str, Dict[str, Any]]: Gateway events as (event, data):
+                ``retrieval`` (sources), ``token`` (answer text), ``done``
+                (normalized response) or ``error`` (error response).
+        """
+        try:
+            with self.client.stream(
+                "POST",
+                f"{self.gateway_url}/api/v1/query/stream",
+                json={"query": query}
+            ) as response:
+                if response.status_code >= 400:
+                    response.read()
+                    response.raise_for_status()
+                
+                event, data_lines = "message", []
+                for line in response.iter_lines():
+                    if line:
+                        field, _, value = line.partition(":")
+                        value = value[1:] if value.startswith(" ") else value
+                        if field == "event":
+                            event = value
+                        elif field == "data":
+                            data_lines.append(value)
+                        continue
+                    if data_lines:
+                        data = json.loads("\n".join(data_lines))
+                        if event == "done":
+                            yield event, self._normalize_query_response(data)
+                        elif event == "error":
+                            yield event, {"error": True, "message": data.get("detail", "Answer generation failed")}
+                        else:
+                            yield event, data
+                    event, data_lines = "message", []
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Streaming query failed with status {e.response.status_code}: {e}")
+            yield "error", {
+                "error": True,
+                "message": f"Server error: {e.response.status_code}",
+                "detail": e.response.text
+            }
+        except Exception as e:
+            logger.error(f"Streaming query failed: {e}")
+            yield "error", {"error": True, "message": str(e)}
+    
     def upload_document(self, file_data: bytes, filename: str) -> Dict[str, Any]:
         """
         Upload a document for indexing.
@@ -1208,8 +1269,13 @@ def render_chat_panel():
             st.session_state.chat_history.append(user_message)
             
             # Get response
-            with st.spinner("🤔 Thinking..."):
-                response = st.session_state.ui_service.submit_query(query, include_debug=False)
+            if settings.enable_streaming_answers:
+                with chat_container:
+                    render_chat_message(user_message)
+                    response = render_streaming_answer(query)
+            else:
+                with st.spinner("🤔 Thinking..."):
+                    response = st.session_state.ui_service.submit_query(query, include_debug=False)
             
             # Add assistant message
             assistant_message = {
@@ -1228,6 +1294,43 @@ def render_chat_panel():
     st.markdown('</div>', unsafe_allow_html=True)  # Close chat-panel
 
 
+def render_streaming_answer(query: str) -> Dict[str, Any]:
+    """
+    Render an answer progressively while it is generated.
+    
+    Shows the retrieval status as soon as sources are found, then the
+    answer text as tokens arrive. The final message is rendered from chat
+    history (with citations) on the next rerun.
+    
+    Args:
+        query (str): The user's question.
+        
+    Returns:
+        Dict[str, Any]: Normalized response, or an error response.
+    """
+    placeholder = st.empty()
+    placeholder.markdown('<div class="assistant-message">🔍 Searching your document...</div>', unsafe_allow_html=True)
+    
+    answer = ""
+    response = None
+    for event, data in st.session_state.ui_service.stream_query(query):
+        if event == "retrieval":
+            placeholder.markdown(
+                f'<div class="assistant-message">🤔 Found {data.get("results_count", 0)} relevant passages, '
+                f'writing answer...</div>',
+                unsafe_allow_html=True
+            )
+        elif event == "token":
+            answer += data.get("text", "")
+            placeholder.markdown(f'<div class="assistant-message">{answer}▌</div>', unsafe_allow_html=True)
+        elif event in ("done", "error"):
+            response = data
+    
+    if response is None:
+        response = {"error": True, "message": "Answer stream ended unexpectedly"}
+    return response
+
+
 def render_chat_message(message: Dict[str, Any]):
     """
     Render a single chat message (user or assistant).
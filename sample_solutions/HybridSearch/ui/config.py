@@ -18,6 +18,7 @@ class Settings(BaseSettings):
     enable_debug_mode: bool = True
     enable_document_upload: bool = True
     enable_query_history: bool = True
+    enable_streaming_answers: bool = True  # Render answers token by token via /api/v1/query/stream
     
     # Display settings
     max_results_display: int = 5
@@ -43,6 +43,10 @@ ALLOWED_EXTENSIONS = {".pdf"}
 # Vector Store Settings
 VECTOR_STORE_PATH = "./dmv_index"
 
+# Embedding Settings
+EMBEDDING_BATCH_SIZE = 32  # Maximum texts per embedding request
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))  # Batches embedded in parallel per upload
+
 # Text Splitting Settings
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
@@ -2,6 +2,7 @@
 Pydantic models for request/response validation
 """
 
+from typing import List
 from pydantic import BaseModel, Field
 
 
@@ -20,6 +21,7 @@ class QueryRequest(BaseModel):
 class UploadResponse(BaseModel):
     """Response model for PDF upload"""
     message: str = Field(..., description="Success message")
+    document_id: str = Field(..., description="ID of the indexed document")
     num_chunks: int = Field(..., description="Number of chunks created")
     status: str = Field(..., description="Operation status")
     
@@ -27,6 +29,7 @@ class UploadResponse(BaseModel):
         json_schema_extra = {
             "example": {
                 "message": "Successfully uploaded and processed 'document.pdf'",
+                "document_id": "3f2b9c1e8a7d4e6f9b0c1d2e3f4a5b6c",
                 "num_chunks": 45,
                 "status": "success"
             }
@@ -59,3 +62,16 @@ class DeleteResponse(BaseModel):
     message: str = Field(..., description="Result message")
     status: str = Field(..., description="Operation status")
 
+
+class DocumentInfo(BaseModel):
+    """Indexed document"""
+    document_id: str = Field(..., description="Document ID")
+    filename: str = Field(..., description="Uploaded file name")
+    num_chunks: int = Field(..., description="Number of chunks indexed")
+    uploaded_at: str = Field(..., description="Upload time (ISO 8601, UTC)")
+
+
+class DocumentListResponse(BaseModel):
+    """Response model for listing indexed documents"""
+    documents: List[DocumentInfo] = Field(..., description="Indexed documents, oldest first")
+    total_chunks: int = Field(..., description="Number of chunks in the index")
@@ -7,17 +7,17 @@ import tempfile
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 import config
 from models import (
     QueryRequest, UploadResponse, QueryResponse,
-    HealthResponse, DeleteResponse
+    HealthResponse, DeleteResponse, DocumentInfo, DocumentListResponse
 )
 from services import (
     validate_pdf_file, load_and_split_pdf,
-    store_in_vector_storage, load_vector_store, delete_vector_store,
-    query_documents
+    load_vector_store, query_documents
 )
 
 # Configure logging
@@ -31,10 +31,13 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for FastAPI app"""
-    # Startup
+    # Startup: the store is created once and updated in place afterwards
     app.state.vectorstore = load_vector_store(config.INFERENCE_API_TOKEN)
-    if app.state.vectorstore:
-        logger.info("✓ FAISS vector store loaded successfully")
+    if not app.state.vectorstore.is_empty:
+        logger.info(
+            f"✓ FAISS vector store loaded successfully "
+            f"({len(app.state.vectorstore.documents)} documents, {app.state.vectorstore.num_chunks} chunks)"
+        )
     else:
         logger.info("! No existing vector store found. Please upload a PDF document.")
     
@@ -71,7 +74,7 @@ def root():
         "message": "RAG Chatbot API is running",
         "version": config.APP_VERSION,
         "status": "healthy",
-        "vectorstore_loaded": app.state.vectorstore is not None
+        "vectorstore_loaded": not app.state.vectorstore.is_empty
     }
 
 
@@ -80,7 +83,7 @@ def health_check():
     """Detailed health check"""
     return HealthResponse(
         status="healthy",
-        vectorstore_available=app.state.vectorstore is not None,
+        vectorstore_available=not app.state.vectorstore.is_empty,
         openai_key_configured=bool(config.INFERENCE_API_TOKEN)
     )
 
@@ -88,7 +91,10 @@ def health_check():
 @app.post("/upload-pdf", response_model=UploadResponse)
 async def upload_pdf(file: UploadFile = File(...)):
     """
-    Upload a PDF file, process it, create embeddings, and store in FAISS
+    Upload a PDF file, process it, create embeddings, and add it to the FAISS store
+    
+    Previously uploaded documents stay indexed; the new document's chunks are
+    embedded in parallel batches and added to the existing index.
     
     - **file**: PDF file to upload (max 50MB)
     """
@@ -122,8 +128,8 @@ async def upload_pdf(file: UploadFile = File(...)):
             tmp_path = tmp.name
             logger.info(f"Saved to temporary path: {tmp_path}")
         
-        # Load and split PDF
-        chunks = load_and_split_pdf(tmp_path)
+        # Load and split PDF (off the event loop, like the embedding below)
+        chunks = await run_in_threadpool(load_and_split_pdf, tmp_path)
         
         if not chunks:
             raise HTTPException(
@@ -131,16 +137,14 @@ async def upload_pdf(file: UploadFile = File(...)):
                 detail="No text content could be extracted from the PDF"
             )
         
-        # Create embeddings and store in FAISS
-        vectorstore = store_in_vector_storage(chunks, config.INFERENCE_API_TOKEN)
-        
-        # Update app state
-        app.state.vectorstore = vectorstore
+        # Create embeddings and add them to the existing FAISS index
+        document = await run_in_threadpool(app.state.vectorstore.add_document, chunks, file.filename)
         
-        logger.info(f"✓ Successfully processed PDF: {file.filename}")
+        logger.info(f"✓ Successfully processed PDF: {file.filename} (document {document['document_id']})")
         
         return UploadResponse(
             message=f"Successfully uploaded and processed '{file.filename}'",
+            document_id=document["document_id"],
             num_chunks=len(chunks),
             status="success"
         )
@@ -170,7 +174,7 @@ def query_endpoint(request: QueryRequest):
     
     - **query**: Natural language question about the documents
     """
-    if not app.state.vectorstore:
+    if app.state.vectorstore.is_empty:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No documents uploaded. Please upload a PDF first using /upload-pdf endpoint."
@@ -197,12 +201,48 @@ def query_endpoint(request: QueryRequest):
         )
 
 
+@app.get("/documents", response_model=DocumentListResponse)
+def list_documents():
+    """List the indexed documents"""
+    return DocumentListResponse(
+        documents=[DocumentInfo(**info) for info in app.state.vectorstore.list_documents()],
+        total_chunks=app.state.vectorstore.num_chunks
+    )
+
+
+@app.delete("/documents/{document_id}", response_model=DeleteResponse)
+def delete_document_endpoint(document_id: str):
+    """
+    Delete one document from the vector store
+    
+    - **document_id**: ID returned by /upload-pdf or listed by /documents
+    """
+    try:
+        deleted = app.state.vectorstore.delete_document(document_id)
+    except Exception as e:
+        logger.error(f"Error deleting document: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting document: {str(e)}"
+        )
+    
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document not found: {document_id}"
+        )
+    
+    return DeleteResponse(
+        message=f"Document {document_id} deleted successfully",
+        status="success"
+    )
+
+
 @app.delete("/vectorstore", response_model=DeleteResponse)
 def delete_vectorstore_endpoint():
-    """Delete the current vector store"""
+    """Delete all documents from the vector store"""
     try:
-        deleted = delete_vector_store()
-        app.state.vectorstore = None
+        deleted = app.state.vectorstore.clear()
         
         if deleted:
             return DeleteResponse(
@@ -3,16 +3,15 @@ Services package for RAG Chatbot API
 """
 
 from .pdf_service import load_and_split_pdf, validate_pdf_file
-from .vector_service import store_in_vector_storage, load_vector_store, delete_vector_store
+from .vector_service import DocumentStore, load_vector_store
 from .retrieval_service import query_documents
 from .api_client import APIClient, get_api_client
 
 __all__ = [
     'load_and_split_pdf',
     'validate_pdf_file',
-    'store_in_vector_storage',
+    'DocumentStore',
     'load_vector_store',
-    'delete_vector_store',
     'query_documents',
     'APIClient',
     'get_api_client'
@@ -6,6 +6,7 @@ Similar to simple-client/main.py implementation
 import logging
 import requests
 import httpx
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 import config
 
@@ -77,29 +78,35 @@ class APIClient:
         """
         Get embeddings for multiple texts
         Batches requests to avoid exceeding API limits (max batch size: 32)
+        and sends up to EMBEDDING_MAX_CONCURRENCY batches in parallel
         
         Args:
             texts: List of texts to embed
             
         Returns:
-            List of embedding vectors
+            List of embedding vectors, in the order of the texts
         """
         try:
-            BATCH_SIZE = 32  # Maximum allowed batch size
-            all_embeddings = []
+            batch_size = config.EMBEDDING_BATCH_SIZE
+            batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+            if not batches:
+                return []
             client = self.get_embedding_client()
             
-            # Process in batches of 32
-            for i in range(0, len(texts), BATCH_SIZE):
-                batch = texts[i:i + BATCH_SIZE]
-                logger.info(f"Processing embedding batch {i//BATCH_SIZE + 1}/{(len(texts) + BATCH_SIZE - 1)//BATCH_SIZE} ({len(batch)} texts)")
-                
+            def embed_batch(numbered_batch: tuple) -> list:
+                number, batch = numbered_batch
+                logger.info(f"Processing embedding batch {number}/{len(batches)} ({len(batch)} texts)")
                 response = client.embeddings.create(
                     model=config.EMBEDDING_MODEL_NAME,
                     input=batch
                 )
-                batch_embeddings = [data.embedding for data in response.data]
-                all_embeddings.extend(batch_embeddings)
+                return [data.embedding for data in response.data]
+            
+            # The httpx client is thread-safe and pools connections across the workers
+            workers = max(1, min(config.EMBEDDING_MAX_CONCURRENCY, len(batches)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(embed_batch, enumerate(batches, start=1))
+                all_embeddings = [embedding for batch_embeddings in results for embedding in batch_embeddings]
             
             return all_embeddings
         except Exception as e:
@@ -4,13 +4,13 @@ Handles query processing and retrieval operations
 """
 
 import logging
-from langchain_community.vectorstores import FAISS
 import config
+from .vector_service import DocumentStore
 
 logger = logging.getLogger(__name__)
 
 
-def query_documents(query: str, vectorstore: FAISS, api_key: str) -> dict:
+def query_documents(query: str, vectorstore: DocumentStore, api_key: str) -> dict:
     """
     Query the documents using RAG with custom embedding and inference
     
@@ -22,7 +22,7 @@ def query_documents(query: str, vectorstore: FAISS, api_key: str) -> dict:
     
     Args:
         query: User's question
-        vectorstore: FAISS vectorstore instance
+        vectorstore: DocumentStore instance
         api_key: API key
         
     Returns:
@@ -4,10 +4,16 @@ Handles FAISS vector store operations
 """
 
 import os
+import json
 import logging
 import shutil
+import threading
+import uuid
+from datetime import datetime, timezone
 from typing import Optional
+import faiss
 from langchain_openai import OpenAIEmbeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain_core.embeddings import Embeddings
 import config
@@ -16,6 +22,8 @@ logger = logging.getLogger(__name__)
 
 # Constants
 VECTOR_STORE_PATH = "/tmp/dmv_index"
+MANIFEST_FILE = "manifest.json"
+DOCUMENTS_DIR = "documents"
 
 
 class CustomEmbeddings(Embeddings):
@@ -74,79 +82,267 @@ def get_embeddings(api_key: str) -> Embeddings:
         )
 
 
-def store_in_vector_storage(chunks: list, api_key: str) -> FAISS:
+class DocumentStore:
     """
-    Create embeddings and store in FAISS vector store
+    Multi-document FAISS vector store that is updated in place
     
-    Args:
-        chunks: List of document chunks
-        api_key: OpenAI API key
+    Every uploaded document gets an ID and is saved as its own small FAISS
+    index under documents/<document_id>, then merged into the in-memory
+    index that queries search. manifest.json lists the saved documents and
+    is replaced atomically, so an upload only writes the new document's
+    files and an interrupted save never leaves a half-written store.
+    
+    Embedding happens before the lock is taken; the lock only covers the
+    in-memory merge, delete and search, so queries keep being answered
+    while documents are uploaded.
+    """
+    
+    def __init__(self, embeddings: Embeddings, path: str = VECTOR_STORE_PATH):
+        self.embeddings = embeddings
+        self.path = path
+        self.documents_path = os.path.join(path, DOCUMENTS_DIR)
+        self.manifest_path = os.path.join(path, MANIFEST_FILE)
+        self.documents: dict = {}
+        self._vectorstore: Optional[FAISS] = None
+        self._lock = threading.RLock()
+    
+    @property
+    def num_chunks(self) -> int:
+        """Number of chunks in the index"""
+        with self._lock:
+            return self._vectorstore.index.ntotal if self._vectorstore else 0
+    
+    @property
+    def is_empty(self) -> bool:
+        """Whether no documents are indexed"""
+        return self.num_chunks == 0
+    
+    @staticmethod
+    def _chunk_ids(document_id: str, num_chunks: int) -> list:
+        return [f"{document_id}-{i}" for i in range(num_chunks)]
+    
+    def load(self) -> None:
+        """
+        Load the saved documents listed in the manifest
         
-    Returns:
-        FAISS vectorstore instance
+        Document folders missing from the manifest (left over from an
+        interrupted upload or delete) are removed. A single-index store
+        written by earlier versions is migrated to one document.
+        """
+        with self._lock:
+            if not os.path.exists(self.manifest_path):
+                if os.path.exists(os.path.join(self.path, "index.faiss")):
+                    self._migrate_legacy_store()
+                return
+            
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            
+            for document_id, info in manifest.get("documents", {}).items():
+                try:
+                    segment = FAISS.load_local(
+                        os.path.join(self.documents_path, document_id),
+                        self.embeddings,
+                        allow_dangerous_deserialization=True
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not load document {document_id} ({info.get('filename')}): {str(e)}")
+                    continue
+                self._merge(segment)
+                self.documents[document_id] = info
+            
+            if len(self.documents) != len(manifest.get("documents", {})):
+                self._write_manifest()
+            
+            if os.path.isdir(self.documents_path):
+                for entry in os.listdir(self.documents_path):
+                    if entry not in self.documents:
+                        shutil.rmtree(os.path.join(self.documents_path, entry), ignore_errors=True)
+            
+            logger.info(f"Loaded {len(self.documents)} documents ({self.num_chunks} chunks) from {self.path}")
+    
+    def add_document(self, chunks: list, filename: str) -> dict:
+        """
+        Embed a document's chunks and add them to the index
         
-    Raises:
-        Exception: If storage operation fails
-    """
-    try:
-        embeddings = get_embeddings(api_key)
-        vectorstore = FAISS.from_documents(chunks, embeddings)
+        Args:
+            chunks: List of document chunks
+            filename: Name of the uploaded file
+            
+        Returns:
+            Document info (document_id, filename, num_chunks, uploaded_at)
+            
+        Raises:
+            Exception: If embedding or saving fails (the index is left unchanged)
+        """
+        document_id = uuid.uuid4().hex
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [
+            {**chunk.metadata, "source": filename, "document_id": document_id}
+            for chunk in chunks
+        ]
         
-        # Ensure directory exists
-        os.makedirs(
-            os.path.dirname(VECTOR_STORE_PATH) if os.path.dirname(VECTOR_STORE_PATH) else ".",
-            exist_ok=True
+        # Slow part: runs without the lock, in parallel batches
+        vectors = self.embeddings.embed_documents(texts)
+        segment = FAISS.from_embeddings(
+            list(zip(texts, vectors)),
+            self.embeddings,
+            metadatas=metadatas,
+            ids=self._chunk_ids(document_id, len(chunks))
         )
-        vectorstore.save_local(VECTOR_STORE_PATH)
-        logger.info(f"Saved vector store to {VECTOR_STORE_PATH}")
         
-        return vectorstore
-    except Exception as e:
-        logger.error(f"Error storing vectors: {str(e)}")
-        raise
+        # Write only the new document; it becomes visible with the manifest
+        self._save_segment(document_id, segment)
+        
+        info = {
+            "document_id": document_id,
+            "filename": filename,
+            "num_chunks": len(chunks),
+            "uploaded_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+        }
+        with self._lock:
+            self._merge(segment)
+            self.documents[document_id] = info
+            self._write_manifest()
+        
+        logger.info(f"Added document {document_id} ({filename}, {len(chunks)} chunks)")
+        return info
+    
+    def delete_document(self, document_id: str) -> bool:
+        """
+        Remove a document's chunks from the index and from disk
+        
+        Args:
+            document_id: ID returned by add_document
+            
+        Returns:
+            True if the document was deleted, False if it does not exist
+        """
+        with self._lock:
+            info = self.documents.pop(document_id, None)
+            if info is None:
+                return False
+            if info["num_chunks"] >= self._vectorstore.index.ntotal:
+                self._vectorstore = None
+            else:
+                self._vectorstore.delete(self._chunk_ids(document_id, info["num_chunks"]))
+            self._write_manifest()
+        
+        shutil.rmtree(os.path.join(self.documents_path, document_id), ignore_errors=True)
+        logger.info(f"Deleted document {document_id} ({info['filename']})")
+        return True
+    
+    def list_documents(self) -> list:
+        """
+        List the indexed documents
+        
+        Returns:
+            Document infos, oldest first
+        """
+        with self._lock:
+            return sorted(self.documents.values(), key=lambda info: info["uploaded_at"])
+    
+    def clear(self) -> bool:
+        """
+        Delete all documents from memory and disk
+        
+        Returns:
+            True if a saved store was deleted, False if there was none
+        """
+        with self._lock:
+            self._vectorstore = None
+            self.documents = {}
+            if os.path.exists(self.path):
+                shutil.rmtree(self.path)
+                return True
+            return False
+    
+    def similarity_search_by_vector(self, embedding: list, k: int = 4) -> list:
+        """
+        Find the chunks closest to an embedding
+        
+        Args:
+            embedding: Query embedding
+            k: Number of chunks to return
+            
+        Returns:
+            List of matching documents
+        """
+        with self._lock:
+            if self._vectorstore is None:
+                return []
+            return self._vectorstore.similarity_search_by_vector(embedding, k=k)
+    
+    def _merge(self, segment: FAISS) -> None:
+        """Add a document's index to the in-memory index (caller holds the lock)"""
+        if self._vectorstore is None:
+            # Copy so later merges do not modify the segment that was loaded or saved
+            self._vectorstore = FAISS(
+                self.embeddings,
+                faiss.IndexFlatL2(segment.index.d),
+                InMemoryDocstore(),
+                {}
+            )
+        self._vectorstore.merge_from(segment)
+    
+    def _save_segment(self, document_id: str, segment: FAISS) -> None:
+        """Save a document's index under a temporary name and rename it into place"""
+        os.makedirs(self.documents_path, exist_ok=True)
+        tmp_path = os.path.join(self.documents_path, f".{document_id}.tmp")
+        segment.save_local(tmp_path)
+        os.replace(tmp_path, os.path.join(self.documents_path, document_id))
+    
+    def _write_manifest(self) -> None:
+        """Atomically replace the manifest (caller holds the lock)"""
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"documents": self.documents}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _migrate_legacy_store(self) -> None:
+        """Turn a single-index store from earlier versions into one document (caller holds the lock)"""
+        legacy = FAISS.load_local(self.path, self.embeddings, allow_dangerous_deserialization=True)
+        ntotal = legacy.index.ntotal
+        docs = [legacy.docstore.search(legacy.index_to_docstore_id[i]) for i in range(ntotal)]
+        vectors = legacy.index.reconstruct_n(0, ntotal) if ntotal else []
+        
+        document_id = uuid.uuid4().hex
+        segment = FAISS.from_embeddings(
+            [(doc.page_content, list(vector)) for doc, vector in zip(docs, vectors)],
+            self.embeddings,
+            metadatas=[{**doc.metadata, "document_id": document_id} for doc in docs],
+            ids=self._chunk_ids(document_id, ntotal)
+        )
+        self._save_segment(document_id, segment)
+        self._merge(segment)
+        self.documents[document_id] = {
+            "document_id": document_id,
+            "filename": "previous uploads",
+            "num_chunks": ntotal,
+            "uploaded_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+        }
+        self._write_manifest()
+        for name in ("index.faiss", "index.pkl"):
+            os.remove(os.path.join(self.path, name))
+        logger.info(f"Migrated existing vector store ({ntotal} chunks) to document {document_id}")
 
 
-def load_vector_store(api_key: str) -> Optional[FAISS]:
+def load_vector_store(api_key: str) -> DocumentStore:
     """
-    Load existing FAISS vector store
+    Create the document store and load the saved documents
     
     Args:
         api_key: OpenAI API key
         
     Returns:
-        FAISS vectorstore instance or None if not found
+        DocumentStore instance (empty if nothing was saved or loading failed)
     """
+    store = DocumentStore(get_embeddings(api_key))
     try:
-        embeddings = get_embeddings(api_key)
-        vectorstore = FAISS.load_local(
-            VECTOR_STORE_PATH,
-            embeddings,
-            allow_dangerous_deserialization=True
-        )
-        logger.info("Loaded existing FAISS vector store")
-        return vectorstore
+        store.load()
     except Exception as e:
         logger.warning(f"Could not load vector store: {str(e)}")
-        return None
-
-
-def delete_vector_store() -> bool:
-    """
-    Delete the vector store from disk
-    
-    Returns:
-        True if deleted successfully, False otherwise
-        
-    Raises:
-        Exception: If deletion fails
-    """
-    try:
-        if os.path.exists(VECTOR_STORE_PATH):
-            shutil.rmtree(VECTOR_STORE_PATH)
-            logger.info("Deleted vector store")
-            return True
-        return False
-    except Exception as e:
-        logger.error(f"Error deleting vector store: {str(e)}")
-        raise
-
+    return store
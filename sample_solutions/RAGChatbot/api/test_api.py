@@ -81,9 +81,10 @@ def test_upload_pdf(pdf_path=None):
             
         print_status(f"✓ Upload successful!", "success")
         print(f"  Message: {data['message']}")
+        print(f"  Document ID: {data['document_id']}")
         print(f"  Number of chunks: {data['num_chunks']}")
         print(f"  Status: {data['status']}")
-        return True
+        return data['document_id']
     except requests.exceptions.HTTPError as e:
         print_status(f"✗ Upload failed: {e}", "error")
         try:
@@ -129,9 +130,57 @@ def test_query(query="What is this document about?"):
         return False
 
 
+def test_list_documents(document_id):
+    """Test document listing endpoint"""
+    print_status("\n5. Testing document listing...", "info")
+    
+    try:
+        response = requests.get(f"{BASE_URL}/documents")
+        response.raise_for_status()
+        data = response.json()
+        
+        listed_ids = [doc['document_id'] for doc in data['documents']]
+        if document_id not in listed_ids:
+            print_status(f"✗ Uploaded document {document_id} is not listed", "error")
+            return False
+        
+        print_status("✓ Document listing successful!", "success")
+        print(f"  Documents: {len(data['documents'])}")
+        print(f"  Total chunks: {data['total_chunks']}")
+        return True
+    except Exception as e:
+        print_status(f"✗ Document listing failed: {str(e)}", "error")
+        return False
+
+
+def test_delete_document(document_id):
+    """Test deleting a single document"""
+    print_status("\n6. Testing document deletion...", "info")
+    
+    try:
+        response = requests.delete(f"{BASE_URL}/documents/{document_id}")
+        response.raise_for_status()
+        
+        listed_ids = [doc['document_id'] for doc in requests.get(f"{BASE_URL}/documents").json()['documents']]
+        if document_id in listed_ids:
+            print_status(f"✗ Document {document_id} is still listed after deletion", "error")
+            return False
+        
+        # Deleting it again must report that it no longer exists
+        if requests.delete(f"{BASE_URL}/documents/{document_id}").status_code != 404:
+            print_status("✗ Deleting a missing document did not return 404", "error")
+            return False
+        
+        print_status(f"✓ Document {document_id} deleted", "success")
+        return True
+    except Exception as e:
+        print_status(f"✗ Document deletion failed: {str(e)}", "error")
+        return False
+
+
 def test_invalid_upload():
     """Test upload validation with invalid file"""
-    print_status("\n5. Testing upload validation...", "info")
+    print_status("\n7. Testing upload validation...", "info")
     
     try:
         # Try uploading a text file
@@ -179,13 +228,15 @@ def main():
     
     upload_result = test_upload_pdf(pdf_path)
     if upload_result is not None:
-        results.append(("PDF Upload", upload_result))
+        results.append(("PDF Upload", bool(upload_result)))
         
         if upload_result:
             # Wait a moment for processing
             time.sleep(1)
             results.append(("Query", test_query()))
             results.append(("Query 2", test_query("Summarize the main points")))
+            results.append(("List Documents", test_list_documents(upload_result)))
+            results.append(("Delete Document", test_delete_document(upload_result)))
     
     results.append(("Validation", test_invalid_upload()))
     